@@ -0,0 +1,102 @@
+"""
+Бенчмарк FSM хранилищ: get_state / update_data
+MemoryStorage против SQLiteStorage и (опционально) PostgresStorage.
+
+Запуск из корня проекта:
+    python benchmarks/bench_fsm_storage.py
+    python benchmarks/bench_fsm_storage.py --users 2000 --ops 20 --postgres
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from aiogram.fsm.storage.base import StorageKey
+from aiogram.fsm.storage.memory import MemoryStorage
+
+from database.fsm_storage import SQLiteStorage, PostgresStorage
+
+
+def percentile(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p))]
+
+
+async def run(storage, users: int, ops: int):
+    keys = [StorageKey(bot_id=1, chat_id=i, user_id=i) for i in range(users)]
+    get_times, update_times = [], []
+
+    started = time.perf_counter()
+    for step in range(ops):
+        for key in keys:
+            t = time.perf_counter()
+            await storage.get_state(key)
+            get_times.append(time.perf_counter() - t)
+
+            t = time.perf_counter()
+            await storage.update_data(key, {'step': step, 'exercise_id': step * 7, 'name': 'Жим лежа'})
+            update_times.append(time.perf_counter() - t)
+
+        await storage.set_state(keys[step % users], f"Bench:step_{step}")
+    total = time.perf_counter() - started
+
+    if hasattr(storage, 'flush'):
+        t = time.perf_counter()
+        await storage.flush()
+        flush_ms = (time.perf_counter() - t) * 1000
+    else:
+        flush_ms = 0.0
+
+    return {
+        'get_p50_us': statistics.median(get_times) * 1e6,
+        'get_p99_us': percentile(get_times, 0.99) * 1e6,
+        'update_p50_us': statistics.median(update_times) * 1e6,
+        'update_p99_us': percentile(update_times, 0.99) * 1e6,
+        'total_s': total,
+        'final_flush_ms': flush_ms,
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--users', type=int, default=1000)
+    parser.add_argument('--ops', type=int, default=10)
+    parser.add_argument('--postgres', action='store_true', help='нужны DATABASE_* в окружении')
+    args = parser.parse_args()
+
+    backends = [('memory', MemoryStorage())]
+
+    sqlite_path = os.path.join(tempfile.mkdtemp(), 'fsm_bench.sqlite3')
+    backends.append(('sqlite write-behind', SQLiteStorage(sqlite_path, flush_interval=1.0)))
+    backends.append(('sqlite write-through', SQLiteStorage(sqlite_path + '.wt', flush_interval=0)))
+
+    db_manager = None
+    if args.postgres:
+        from config import config
+        from database import db_manager, run_migrations
+        await db_manager.init_database(config)
+        await run_migrations(db_manager.pool)
+        pg = PostgresStorage(db_manager, flush_interval=1.0)
+        backends.append(('postgres write-behind', pg))
+
+    print(f"users={args.users} ops/user={args.ops}")
+    print(f"{'backend':<24}{'get p50':>10}{'get p99':>10}{'upd p50':>10}{'upd p99':>10}{'total':>9}{'flush':>9}")
+    for name, storage in backends:
+        r = await run(storage, args.users, args.ops)
+        print(f"{name:<24}{r['get_p50_us']:>8.1f}us{r['get_p99_us']:>8.1f}us"
+              f"{r['update_p50_us']:>8.1f}us{r['update_p99_us']:>8.1f}us"
+              f"{r['total_s']:>8.2f}s{r['final_flush_ms']:>7.1f}ms")
+        await storage.close()
+
+    if db_manager is not None:
+        await db_manager.close_pool()
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
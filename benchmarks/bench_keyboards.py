@@ -0,0 +1,114 @@
+"""
+Бенчмарк клавиатур: InlineKeyboardBuilder на каждый вызов
+против готовых разметок keyboards/cache.py.
+
+Запуск из корня проекта:
+    python benchmarks/bench_keyboards.py
+    python benchmarks/bench_keyboards.py --calls 20000
+"""
+import argparse
+import statistics
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from aiogram.utils.keyboard import InlineKeyboardBuilder
+
+from keyboards.main_keyboards import get_coach_batteries_keyboard, get_main_menu_keyboard
+from keyboards.workout_keyboards import WORKOUT_BLOCKS, get_workout_blocks_keyboard
+
+
+# ===== ПРЕЖНИЕ ВЕРСИИ (сборка на каждый вызов) =====
+
+def builder_main_menu():
+    keyboard = InlineKeyboardBuilder()
+    keyboard.button(text="🏋️ Тренировки", callback_data="workouts_menu")
+    keyboard.button(text="📊 Тесты", callback_data="tests_menu")
+    keyboard.button(text="🔍 Найти упражнение", callback_data="search_exercise")
+    keyboard.button(text="👥 Команды", callback_data="teams_menu")
+    keyboard.adjust(2)
+    return keyboard.as_markup()
+
+
+def builder_coach_batteries():
+    keyboard = InlineKeyboardBuilder()
+    keyboard.button(text="📋 Мои батареи", callback_data="my_batteries")
+    keyboard.button(text="➕ Создать батарею", callback_data="create_battery")
+    keyboard.button(text="📊 Аналитика команды", callback_data="team_analytics")
+    keyboard.button(text="🔙 К тестам", callback_data="tests_menu")
+    keyboard.adjust(2)
+    return keyboard.as_markup()
+
+
+def builder_workout_blocks(selected_blocks):
+    keyboard = InlineKeyboardBuilder()
+    for block_key, block_name in WORKOUT_BLOCKS.items():
+        action = "✏️ Изменить" if block_key in selected_blocks else "➕ Добавить"
+        keyboard.button(
+            text=f"{action} {block_name.split(' ', 1)[1]}",
+            callback_data=f"select_block_{block_key}"
+        )
+    if selected_blocks:
+        keyboard.button(text="✅ Завершить создание", callback_data="finish_workout_creation")
+    keyboard.button(text="❌ Отменить", callback_data="cancel_workout_creation")
+    keyboard.adjust(2)
+    return keyboard.as_markup()
+
+
+# Типичные состояния мастера создания тренировки
+SELECTIONS = [
+    {},
+    {'warmup': {'exercises': []}},
+    {'warmup': {'exercises': []}, 'main': {'exercises': []}},
+    {key: {'exercises': []} for key in WORKOUT_BLOCKS},
+]
+
+
+def measure(func, calls: int):
+    """Время на вызов (p50, мкс) и выделенная память на вызов (байт)"""
+    func(0)  # прогрев (и заполнение кэша)
+
+    times = []
+    for i in range(calls):
+        t = time.perf_counter()
+        func(i)
+        times.append(time.perf_counter() - t)
+
+    tracemalloc.start()
+    before, _ = tracemalloc.get_traced_memory()
+    kept = [func(i) for i in range(1000)]
+    after, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del kept
+
+    return statistics.median(times) * 1e6, (after - before) / 1000
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--calls', type=int, default=5000)
+    args = parser.parse_args()
+
+    cases = [
+        ('main menu', lambda i: builder_main_menu(), lambda i: get_main_menu_keyboard()),
+        ('coach batteries', lambda i: builder_coach_batteries(), lambda i: get_coach_batteries_keyboard()),
+        (
+            'workout blocks',
+            lambda i: builder_workout_blocks(SELECTIONS[i % len(SELECTIONS)]),
+            lambda i: get_workout_blocks_keyboard(SELECTIONS[i % len(SELECTIONS)]),
+        ),
+    ]
+
+    print(f"calls={args.calls}")
+    print(f"{'keyboard':<18}{'builder':>12}{'cached':>12}{'builder mem':>14}{'cached mem':>13}")
+    for name, builder, cached in cases:
+        b_us, b_bytes = measure(builder, args.calls)
+        c_us, c_bytes = measure(cached, args.calls)
+        print(f"{name:<18}{b_us:>10.1f}us{c_us:>10.2f}us{b_bytes:>12.0f} B{c_bytes:>11.0f} B")
+
+
+if __name__ == '__main__':
+    main()
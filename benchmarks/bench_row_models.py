@@ -0,0 +1,168 @@
+"""
+Бенчмарк отображения строк: ручное копирование Record -> @dataclass по полям
+против сгенерированного конструктора database/row_models.py (slots)
+и ленивых представлений row_view().
+
+По умолчанию строки - заглушка с интерфейсом asyncpg.Record (индекс, имя,
+get, keys). С --postgres строки настоящие: SELECT из generate_series.
+
+Запуск из корня проекта:
+    python benchmarks/bench_row_models.py
+    python benchmarks/bench_row_models.py --rows 5000 --postgres
+"""
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+import tracemalloc
+from dataclasses import dataclass
+from datetime import date, datetime
+from pathlib import Path
+from typing import Optional
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from database.row_models import from_records, view_records
+from database.teams_database import TeamPlayer
+
+COLUMNS = (
+    'id', 'team_id', 'first_name', 'last_name', 'position', 'jersey_number',
+    'telegram_id', 'phone', 'birth_date', 'is_active', 'joined_at',
+)
+
+
+# ===== ПРЕЖНЯЯ ВЕРСИЯ (обычный dataclass, копирование по полям) =====
+
+@dataclass
+class LegacyTeamPlayer:
+    id: int
+    team_id: int
+    first_name: str
+    last_name: Optional[str]
+    position: Optional[str]
+    jersey_number: Optional[int]
+    telegram_id: Optional[int]
+    phone: Optional[str]
+    birth_date: Optional[date]
+    is_active: bool
+    joined_at: datetime
+
+
+def legacy_players(rows):
+    players = []
+    for row in rows:
+        players.append(LegacyTeamPlayer(
+            id=row['id'],
+            team_id=row['team_id'],
+            first_name=row['first_name'],
+            last_name=row['last_name'],
+            position=row['position'],
+            jersey_number=row['jersey_number'],
+            telegram_id=row['telegram_id'],
+            phone=row['phone'],
+            birth_date=row['birth_date'],
+            is_active=row['is_active'],
+            joined_at=row['joined_at']
+        ))
+    return players
+
+
+# ===== СТРОКИ =====
+
+class StubRecord(dict):
+    """Замена asyncpg.Record: значения доступны и по индексу, и по имени колонки"""
+
+    def __init__(self, values):
+        super().__init__(enumerate(values))
+        self.update(zip(COLUMNS, values))
+
+    def keys(self):
+        return iter(COLUMNS)
+
+
+def stub_rows(count: int):
+    joined = datetime(2024, 9, 1, 10, 0)
+    return [
+        StubRecord((
+            i, 1 + i // 25, f"Игрок {i}", f"Фамилия {i}", 'forward', i % 99,
+            100000 + i, None, date(2005, 1, 1 + i % 28), True, joined,
+        ))
+        for i in range(count)
+    ]
+
+
+async def postgres_rows(count: int):
+    from config import config
+    from database import db_manager
+
+    await db_manager.init_database(config)
+    try:
+        async with db_manager.pool.acquire() as conn:
+            return await conn.fetch("""
+                SELECT i AS id, 1 + i / 25 AS team_id, 'Игрок ' || i AS first_name,
+                       'Фамилия ' || i AS last_name, 'forward'::text AS position,
+                       i % 99 AS jersey_number, 100000 + i::bigint AS telegram_id,
+                       NULL::text AS phone, DATE '2005-01-01' + i % 28 AS birth_date,
+                       TRUE AS is_active, now() AS joined_at
+                FROM generate_series(0, $1 - 1) AS i
+            """, count)
+    finally:
+        await db_manager.close_pool()
+
+
+# ===== ЗАМЕРЫ =====
+
+def measure(func, rows, repeat: int):
+    """Время на строку (p50 по повторам, нс) и память на строку (байт)"""
+    func(rows)  # прогрев (и генерация конструктора)
+
+    times = []
+    for _ in range(repeat):
+        t = time.perf_counter()
+        func(rows)
+        times.append(time.perf_counter() - t)
+
+    tracemalloc.start()
+    before, _ = tracemalloc.get_traced_memory()
+    kept = func(rows)
+    after, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del kept
+
+    return statistics.median(times) / len(rows) * 1e9, (after - before) / len(rows)
+
+
+def read_names(items):
+    # Типичное чтение ростера: имя и номер каждого игрока
+    return [(p.first_name, p.jersey_number) for p in items]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', type=int, default=5000)
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--postgres', action='store_true', help='нужны DATABASE_* в окружении')
+    args = parser.parse_args()
+
+    rows = asyncio.run(postgres_rows(args.rows)) if args.postgres else stub_rows(args.rows)
+    models = from_records(TeamPlayer, rows)
+    views = view_records(TeamPlayer, rows)
+
+    cases = [
+        ('field-by-field', legacy_players),
+        ('from_records', lambda r: from_records(TeamPlayer, r)),
+        ('view_records', lambda r: view_records(TeamPlayer, r)),
+        ('read 2 fields: models', lambda r: read_names(models)),
+        ('read 2 fields: views', lambda r: read_names(views)),
+    ]
+
+    print(f"rows={len(rows)} repeat={args.repeat} source={'postgres' if args.postgres else 'stub'}")
+    print(f"{'mapping':<24}{'time/row':>12}{'mem/row':>12}")
+    for name, func in cases:
+        ns, size = measure(func, rows, args.repeat)
+        print(f"{name:<24}{ns:>10.0f}ns{size:>10.0f} B")
+
+
+if __name__ == '__main__':
+    main()
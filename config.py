@@ -8,7 +8,21 @@ load_dotenv()
 class Config:
     # Telegram Bot
     BOT_TOKEN: str = os.getenv("BOT_TOKEN", "")
+    # Webhook режим включается, если задан WEBHOOK_URL (иначе long polling);
+    # WEBHOOK_SECRET тогда обязателен
     WEBHOOK_URL: str = os.getenv("WEBHOOK_URL", "")
+    WEBHOOK_PATH: str = os.getenv("WEBHOOK_PATH", "/webhook")
+    WEBHOOK_SECRET: str = os.getenv("WEBHOOK_SECRET", "")
+    WEBHOOK_HOST: str = os.getenv("WEBHOOK_HOST", "0.0.0.0")
+    WEBHOOK_PORT: int = int(os.getenv("WEBHOOK_PORT", "8080"))
+    # Сколько апдейтов обрабатывается одновременно и сколько из них - одного чата
+    UPDATE_CONCURRENCY: int = int(os.getenv("UPDATE_CONCURRENCY", "64"))
+    UPDATE_PER_CHAT: int = int(os.getenv("UPDATE_PER_CHAT", "1"))
+    # Окно (секунды), в котором повторное нажатие той же кнопки записи игнорируется
+    IDEMPOTENCY_WINDOW: float = float(os.getenv("IDEMPOTENCY_WINDOW", "5"))
+    # Не отправлять редактирования сообщений без изменений (кэш на процесс)
+    EDIT_DEDUP_ENABLED: bool = os.getenv("EDIT_DEDUP_ENABLED", "True").lower() == "true"
+    EDIT_DEDUP_SIZE: int = int(os.getenv("EDIT_DEDUP_SIZE", "10000"))
 
     # Database
     DATABASE_HOST: str = os.getenv("DATABASE_HOST", "localhost")
@@ -16,11 +30,53 @@ class Config:
     DATABASE_NAME: str = os.getenv("DATABASE_NAME", "sportbot_db")
     DATABASE_USER: str = os.getenv("DATABASE_USER", "sportbot_user")
     DATABASE_PASSWORD: str = os.getenv("DATABASE_PASSWORD", "")
+    DB_POOL_MIN_SIZE: int = int(os.getenv("DB_POOL_MIN_SIZE", "2"))
+    DB_POOL_MAX_SIZE: int = int(os.getenv("DB_POOL_MAX_SIZE", "10"))
+
+    # Метрики БД: порог медленного запроса (мс) и HTTP /metrics (порт 0 - выключено)
+    DB_SLOW_QUERY_MS: float = float(os.getenv("DB_SLOW_QUERY_MS", "200"))
+    METRICS_HOST: str = os.getenv("METRICS_HOST", "127.0.0.1")
+    METRICS_PORT: int = int(os.getenv("METRICS_PORT", "0"))
+
+    # Профилирование обработчиков: доля апдейтов под cProfile, порог медленного (мс),
+    # период сводки в лог (секунды). По умолчанию выключено: cProfile, пока
+    # активен, замедляет все корутины цикла, а не только выбранный апдейт
+    PROFILING_ENABLED: bool = os.getenv("PROFILING_ENABLED", "False").lower() == "true"
+    PROFILE_SAMPLE_RATE: float = float(os.getenv("PROFILE_SAMPLE_RATE", "0.02"))
+    PROFILE_SLOW_MS: float = float(os.getenv("PROFILE_SLOW_MS", "1000"))
+    PROFILE_LOG_INTERVAL: float = float(os.getenv("PROFILE_LOG_INTERVAL", "300"))
 
     # Application
     DEBUG: bool = os.getenv("DEBUG", "False").lower() == "true"
     LOG_LEVEL: str = os.getenv("LOG_LEVEL", "INFO")
 
+    # Кэш пользователей (секунды / количество записей)
+    USER_CACHE_TTL: float = float(os.getenv("USER_CACHE_TTL", "300"))
+    USER_CACHE_SIZE: int = int(os.getenv("USER_CACHE_SIZE", "10000"))
+    # Снимков тренировок в памяти (0 - без кэша)
+    WORKOUT_CACHE_SIZE: int = int(os.getenv("WORKOUT_CACHE_SIZE", "2000"))
+
+    # Кэш аналитики команд (секунды)
+    TEAM_ANALYTICS_TTL: float = float(os.getenv("TEAM_ANALYTICS_TTL", "300"))
+
+    # FSM хранилище: memory | postgres | sqlite
+    FSM_STORAGE: str = os.getenv("FSM_STORAGE", "memory")
+    FSM_SQLITE_PATH: str = os.getenv("FSM_SQLITE_PATH", "fsm_storage.sqlite3")
+    FSM_TTL_HOURS: float = float(os.getenv("FSM_TTL_HOURS", "24"))
+    FSM_FLUSH_INTERVAL: float = float(os.getenv("FSM_FLUSH_INTERVAL", "1.0"))
+
+    # Рассылки: воркеры и общий лимит сообщений в секунду
+    BROADCAST_WORKERS: int = int(os.getenv("BROADCAST_WORKERS", "8"))
+    BROADCAST_RATE: float = float(os.getenv("BROADCAST_RATE", "25"))
+
+    # Выполнение тренировок: период пакетной записи подходов (секунды), размер
+    # буфера для внеочередной записи, через сколько секунд закрывать брошенную сессию
+    SESSION_FLUSH_INTERVAL: float = float(os.getenv("SESSION_FLUSH_INTERVAL", "2"))
+    SESSION_BATCH_SIZE: int = int(os.getenv("SESSION_BATCH_SIZE", "200"))
+    SESSION_IDLE_TIMEOUT: float = float(os.getenv("SESSION_IDLE_TIMEOUT", "14400"))
+    # Воркеры отправки уведомлений "отдых окончен"
+    REST_TIMER_WORKERS: int = int(os.getenv("REST_TIMER_WORKERS", "4"))
+
     # Admin
     ADMIN_USER_IDS: List[int] = [
         int(x.strip()) for x in os.getenv("ADMIN_USER_IDS", "").split(",") if x.strip()
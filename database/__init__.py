@@ -1,8 +1,25 @@
-
 """
 database/__init__.py - Инициализация пакета базы данных
 """
 
 from .database import init_database, db_manager, DatabaseManager
+from .user_cache import user_cache, UserCache
+from .exercise_catalog import exercise_catalog, ExerciseCatalog
+from .workout_cache import workout_cache, WorkoutCache
+from .exercise_search import search_exercises
+from .team_analytics import team_analytics, TeamAnalytics
+from .migrator import run_migrations, MigrationError
+from .queries import queries, QueryRegistry
+from .pool_metrics import db_metrics, PoolMetrics, InstrumentedPool
 
-__all__ = ['init_database', 'db_manager', 'DatabaseManager']
+__all__ = [
+    'init_database', 'db_manager', 'DatabaseManager',
+    'user_cache', 'UserCache',
+    'exercise_catalog', 'ExerciseCatalog',
+    'workout_cache', 'WorkoutCache',
+    'search_exercises',
+    'team_analytics', 'TeamAnalytics',
+    'run_migrations', 'MigrationError',
+    'queries', 'QueryRegistry',
+    'db_metrics', 'PoolMetrics', 'InstrumentedPool',
+]
@@ -4,6 +4,13 @@ database.py - Менеджер подключений к базе данных
 Совместим с твоим existing кодом в main.py
 """
 from .teams_database import Team
+from .user_cache import user_cache
+from .team_analytics import team_analytics
+from .pool_metrics import db_metrics, InstrumentedPool
+from .queries import (
+    queries, PreparedConnection, USER_BY_TELEGRAM_ID, RECORD_ONE_REP_MAX,
+    ONE_RM_TOTALS, ONE_RM_BEST, ONE_RM_RECENT, ONE_RM_RECORDS,
+)
 
 import asyncpg
 import logging
@@ -33,20 +40,34 @@ class DatabaseManager:
 
                 self.database_url = f"postgresql://{user}:{password}@{host}:{port}/{database}"
 
-            # Создаем пул подключений
-            self.pool = await asyncpg.create_pool(
+            # Создаем пул подключений (обертка считает ожидание acquire и загрузку)
+            min_size = getattr(config, 'DB_POOL_MIN_SIZE', 2)
+            max_size = getattr(config, 'DB_POOL_MAX_SIZE', 10)
+            db_metrics.slow_threshold = getattr(config, 'DB_SLOW_QUERY_MS', 200) / 1000
+            pool = await asyncpg.create_pool(
                 self.database_url,
-                min_size=2,
-                max_size=10,
+                min_size=min_size,
+                max_size=max_size,
                 command_timeout=60,
+                connection_class=PreparedConnection,
+                init=self._init_connection,
                 server_settings={
                     'jit': 'off',
                     'application_name': 'SportBot'
                 }
             )
+            self.pool = InstrumentedPool(pool, db_metrics)
+
+            # Настройки кэша пользователей
+            user_cache.ttl = getattr(config, 'USER_CACHE_TTL', user_cache.ttl)
+            user_cache.max_size = getattr(config, 'USER_CACHE_SIZE', user_cache.max_size)
+
+            # Аналитика команд работает через тот же пул
+            team_analytics.pool = self.pool
+            team_analytics.ttl = getattr(config, 'TEAM_ANALYTICS_TTL', team_analytics.ttl)
 
             logger.info("✅ База данных инициализирована")
-            logger.info(f"📊 Pool создан: min=2, max=10")
+            logger.info(f"📊 Pool создан: min={min_size}, max={max_size}")
 
             # Проверяем соединение
             async with self.pool.acquire() as conn:
@@ -62,6 +83,12 @@ class DatabaseManager:
                 self.pool = None
             raise
 
+    @staticmethod
+    async def _init_connection(conn):
+        """Новое соединение пула: метрики запросов и подготовленные запросы"""
+        await db_metrics.attach(conn)
+        await queries.prepare_connection(conn)
+
     async def close_pool(self):
         """Закрытие пула подключений"""
         if self.pool:
@@ -72,13 +99,159 @@ class DatabaseManager:
     def get_pool(self) -> asyncpg.Pool:
         """Получить пул подключений"""
         return self.pool
-    async def get_user_by_telegram_id(self, telegram_id: int):
+    async def get_user_by_telegram_id(self, telegram_id: int, use_cache: bool = True):
+        """Получить пользователя по Telegram ID (через кэш)"""
+        if use_cache:
+            user = user_cache.get(telegram_id)
+            if user is not None:
+                return user
+
+        async with self.pool.acquire() as conn:
+            user = await USER_BY_TELEGRAM_ID.fetchrow(conn, telegram_id)
+
+        user_cache.put(telegram_id, user)
+        return user
+
+    async def create_user(self, telegram_id: int, first_name: str,
+                          last_name: str = None, username: str = None):
+        """Создать нового пользователя"""
         async with self.pool.acquire() as conn:
             user = await conn.fetchrow(
-                "SELECT * FROM users WHERE telegram_id = $1",
-                telegram_id
+                """INSERT INTO users (telegram_id, first_name, last_name, username, role)
+                   VALUES ($1, $2, $3, $4, 'player')
+                   RETURNING *""",
+                telegram_id, first_name, last_name, username
+            )
+
+        user_cache.put(telegram_id, user)
+        return user['id']
+
+    async def update_user_role(self, telegram_id: int, role: str):
+        """Сменить роль пользователя"""
+        async with self.pool.acquire() as conn:
+            await conn.execute(
+                "UPDATE users SET role = $2 WHERE telegram_id = $1",
+                telegram_id, role
+            )
+        user_cache.invalidate(telegram_id)
+
+    async def update_user_profile(self, telegram_id: int, **fields):
+        """Обновить поля профиля пользователя"""
+        allowed = {'first_name', 'last_name', 'username', 'body_weight', 'is_active'}
+        fields = {k: v for k, v in fields.items() if k in allowed}
+        if not fields:
+            return
+
+        assignments = ", ".join(f"{name} = ${i}" for i, name in enumerate(fields, start=2))
+        async with self.pool.acquire() as conn:
+            await conn.execute(
+                f"UPDATE users SET {assignments} WHERE telegram_id = $1",
+                telegram_id, *fields.values()
+            )
+        user_cache.invalidate(telegram_id)
+
+    async def create_workout(self, name: str, description: str, created_by: int,
+                             exercises: List[dict], visibility: str = 'private',
+                             difficulty_level: str = 'intermediate',
+                             estimated_duration_minutes: int = 60,
+                             creation_key: Optional[str] = None):
+        """Создать тренировку вместе со всеми упражнениями блоков
+
+        exercises: [{'id', 'phase', 'order_in_phase', 'sets', 'reps_min', 'reps_max',
+                     'one_rm_percent', 'rest_seconds'}, ...]
+        Один запрос: INSERT тренировки и unnest-вставка упражнений в одном
+        операторе (атомарно), возвращает id, unique_id и created.
+        Повтор с тем же creation_key возвращает уже созданную (created=False).
+        """
+        columns = ([], [], [], [], [], [], [], [])
+        for exercise in exercises:
+            columns[0].append(int(exercise['id']))
+            columns[1].append(exercise['phase'])
+            columns[2].append(exercise['order_in_phase'])
+            columns[3].append(exercise['sets'])
+            columns[4].append(exercise.get('reps_min'))
+            columns[5].append(exercise.get('reps_max'))
+            columns[6].append(exercise.get('one_rm_percent'))
+            columns[7].append(exercise.get('rest_seconds'))
+
+        async with self.pool.acquire() as conn:
+            row = await conn.fetchrow("""
+                WITH new_workout AS (
+                    INSERT INTO workouts (name, description, created_by, visibility,
+                                          difficulty_level, estimated_duration_minutes,
+                                          creation_key)
+                    VALUES ($1, $2, $3, $4, $5, $6, $15)
+                    ON CONFLICT (created_by, creation_key) DO NOTHING
+                    RETURNING id, unique_id
+                ), new_exercises AS (
+                    INSERT INTO workout_exercises (
+                        workout_id, exercise_id, phase, order_in_phase, sets,
+                        reps_min, reps_max, one_rm_percent, rest_seconds
+                    )
+                    SELECT w.id, e.exercise_id, e.phase, e.order_in_phase, e.sets,
+                           e.reps_min, e.reps_max, e.one_rm_percent, COALESCE(e.rest_seconds, 90)
+                    FROM new_workout w,
+                         unnest($7::int[], $8::text[], $9::int[], $10::int[],
+                                $11::int[], $12::int[], $13::int[], $14::int[])
+                         AS e(exercise_id, phase, order_in_phase, sets,
+                              reps_min, reps_max, one_rm_percent, rest_seconds)
+                )
+                SELECT id, unique_id, TRUE AS created FROM new_workout
+                UNION ALL
+                SELECT id, unique_id, FALSE FROM workouts
+                WHERE created_by = $3 AND creation_key = $15
+                  AND NOT EXISTS (SELECT 1 FROM new_workout)
+            """, name, description, created_by, visibility, difficulty_level,
+                estimated_duration_minutes, *columns, creation_key)
+
+            if row is None:
+                # Такой же ключ вставлялся параллельно - строка зафиксирована после начала запроса
+                row = await conn.fetchrow("""
+                    SELECT id, unique_id, FALSE AS created FROM workouts
+                    WHERE created_by = $1 AND creation_key = $2
+                """, created_by, creation_key)
+            return row
+
+    # ===== 1ПМ И СВОДКИ =====
+
+    async def record_one_rep_max(self, user_id: int, exercise_id: int, test_weight: float,
+                                 reps: int, brzycki: float, epley: float,
+                                 alternative: float, average: float):
+        """Сохранить тест 1ПМ и обновить сводки one_rm_summary / one_rm_daily
+
+        Вставка и обновление сводок - один оператор (атомарно),
+        возвращает id и tested_at новой записи.
+        """
+        async with self.pool.acquire() as conn:
+            row = await RECORD_ONE_REP_MAX.fetchrow(
+                conn, user_id, int(exercise_id), test_weight, reps,
+                brzycki, epley, alternative, average
             )
-            return user
+
+        team_analytics.invalidate_user(user_id)
+        return row
+
+    async def get_one_rm_progress(self, user_id: int) -> dict:
+        """Сводка прогресса 1ПМ: всего тестов, за 30 дней, лучший результат, последние тесты"""
+        async with self.pool.acquire() as conn:
+            totals = await ONE_RM_TOTALS.fetchrow(conn, user_id)
+            best = await ONE_RM_BEST.fetchrow(conn, user_id)
+
+            recent = []
+            if totals['total_tests']:
+                recent = await ONE_RM_RECENT.fetch(conn, user_id)
+
+        return {
+            'total_tests': totals['total_tests'],
+            'monthly_tests': totals['monthly_tests'],
+            'best': best,
+            'recent': recent,
+        }
+
+    async def get_one_rm_records(self, user_id: int):
+        """Лучший 1ПМ по каждому упражнению (из one_rm_summary)"""
+        async with self.pool.acquire() as conn:
+            return await ONE_RM_RECORDS.fetch(conn, user_id)
 
 async def get_team_by_access_code(self, access_code: str) -> Optional[Team]:
     """Найти команду по коду доступа"""
@@ -0,0 +1,235 @@
+"""
+exercise_catalog.py - Каталог упражнений в памяти процесса
+Таблица exercises меняется редко, поэтому меню категорий/групп мышц
+обслуживаются из индексов в памяти. Обновление - по NOTIFY exercises_changed
+(триггер из миграции 0001_initial) или явным вызовом refresh() после изменений.
+"""
+import asyncio
+import logging
+from types import MappingProxyType
+from typing import Dict, Mapping, Optional, Set, Tuple
+
+import asyncpg
+
+logger = logging.getLogger(__name__)
+
+NOTIFY_CHANNEL = 'exercises_changed'
+
+# Попыток первичной загрузки при старте (пауза 1, 2, 4... с)
+STARTUP_ATTEMPTS = 5
+
+Exercise = Mapping[str, object]
+
+
+class ExerciseCatalog:
+    """Индексированный снимок таблицы exercises"""
+
+    def __init__(self):
+        self.pool: Optional[asyncpg.Pool] = None
+        self.version = 0
+        self._by_id: Dict[int, Exercise] = {}
+        self._by_name: Dict[str, Exercise] = {}
+        self._by_category: Dict[str, Tuple[Exercise, ...]] = {}
+        self._by_muscle_group: Dict[str, Tuple[Exercise, ...]] = {}
+        self._by_test_type: Dict[str, Tuple[Exercise, ...]] = {}
+        self._by_difficulty: Dict[str, Tuple[Exercise, ...]] = {}
+        self._categories: Tuple[str, ...] = ()
+        self._muscle_groups: Tuple[str, ...] = ()
+        self._listen_conn: Optional[asyncpg.Connection] = None
+        self._dsn: Optional[str] = None
+        self._reconnect_task: Optional[asyncio.Task] = None
+        # Фоновые перезагрузки по NOTIFY (ссылки держим, чтобы задачи не собрал GC)
+        self._notify_tasks: Set[asyncio.Task] = set()
+        self._refresh_lock = asyncio.Lock()
+        self._refresh_pending = False
+        self._refresh_waiter: Optional[asyncio.Future] = None
+
+    @property
+    def loaded(self) -> bool:
+        return self.version > 0
+
+    # ===== ЗАГРУЗКА =====
+
+    async def start(self, pool: asyncpg.Pool, dsn: Optional[str] = None):
+        """Первичная загрузка и подписка на изменения"""
+        self.pool = pool
+        self._dsn = dsn
+        # Без каталога пусты все меню упражнений, а проверка дублей названий
+        # пропускала бы все - работать без него нельзя
+        for attempt in range(STARTUP_ATTEMPTS):
+            await self.refresh()
+            if self.loaded:
+                break
+            await asyncio.sleep(2 ** attempt)
+        else:
+            raise RuntimeError("Каталог упражнений не загружен - запуск остановлен")
+
+        if dsn:
+            try:
+                await self._listen()
+                logger.info(f"📚 Каталог упражнений слушает {NOTIFY_CHANNEL}")
+            except Exception as e:
+                logger.warning(f"⚠️ LISTEN {NOTIFY_CHANNEL} недоступен, только ручное обновление: {e}")
+
+    async def _listen(self):
+        conn = await asyncpg.connect(self._dsn)
+        try:
+            await conn.add_listener(NOTIFY_CHANNEL, self._on_notify)
+        except Exception:
+            await conn.close()
+            raise
+        conn.add_termination_listener(self._on_terminate)
+        self._listen_conn = conn
+
+    def _on_terminate(self, connection):
+        """Соединение LISTEN оборвалось - переподключиться и перечитать таблицу"""
+        if connection is not self._listen_conn:
+            return  # закрыто в stop()
+        self._listen_conn = None
+        logger.warning(f"⚠️ LISTEN {NOTIFY_CHANNEL} оборвался, переподключение")
+        self._reconnect_task = asyncio.get_running_loop().create_task(self._reconnect())
+
+    async def _reconnect(self):
+        delay = 1.0
+        while True:
+            await asyncio.sleep(delay)
+            try:
+                await self._listen()
+            except Exception as e:
+                logger.debug(f"Переподключение LISTEN {NOTIFY_CHANNEL}: {e}")
+                delay = min(delay * 2, 60.0)
+                continue
+            logger.info(f"📚 Каталог упражнений снова слушает {NOTIFY_CHANNEL}")
+            # Уведомления за время обрыва потеряны
+            await self.refresh()
+            return
+
+    async def stop(self):
+        """Отписка от уведомлений"""
+        self._dsn = None
+        if self._reconnect_task is not None:
+            self._reconnect_task.cancel()
+            await asyncio.gather(self._reconnect_task, return_exceptions=True)
+            self._reconnect_task = None
+        conn, self._listen_conn = self._listen_conn, None
+        if conn is not None:
+            await conn.close()
+        for task in self._notify_tasks:
+            task.cancel()
+        await asyncio.gather(*self._notify_tasks, return_exceptions=True)
+
+    def _on_notify(self, connection, pid, channel, payload):
+        """Колбэк asyncpg на NOTIFY - перезагрузка в фоне"""
+        task = asyncio.get_running_loop().create_task(self.refresh())
+        self._notify_tasks.add(task)
+        task.add_done_callback(self._notify_tasks.discard)
+
+    async def refresh(self):
+        """Перечитать таблицу и перестроить индексы
+
+        Возвращается, когда каталог отражает таблицу на момент вызова.
+        """
+        if self.pool is None:
+            return
+
+        # Пока идет загрузка, повторные запросы схлопываются в одну дозагрузку;
+        # идущая могла прочитать таблицу до изменения, поэтому ждем дозагрузку
+        if self._refresh_lock.locked():
+            self._refresh_pending = True
+            if self._refresh_waiter is None:
+                self._refresh_waiter = asyncio.get_running_loop().create_future()
+            await asyncio.shield(self._refresh_waiter)
+            return
+
+        async with self._refresh_lock:
+            while True:
+                self._refresh_pending = False
+                waiter, self._refresh_waiter = self._refresh_waiter, None
+                try:
+                    async with self.pool.acquire() as conn:
+                        rows = await conn.fetch("SELECT * FROM exercises ORDER BY name, id")
+                except Exception as e:
+                    logger.error(f"❌ Ошибка загрузки каталога упражнений: {e}")
+                    # Ожидающие получают текущий (старый) каталог, ошибка уже в логе
+                    self._refresh_pending = False
+                    for pending in (waiter, self._refresh_waiter):
+                        if pending is not None and not pending.done():
+                            pending.set_result(None)
+                    self._refresh_waiter = None
+                    return
+
+                self._build(rows)
+                if waiter is not None and not waiter.done():
+                    waiter.set_result(None)
+                if not self._refresh_pending:
+                    break
+
+        logger.info(f"📚 Каталог упражнений: {len(self._by_id)} шт. (версия {self.version})")
+
+    def _build(self, rows):
+        """Построить индексы из строк exercises (уже отсортированы по имени)"""
+        by_id: Dict[int, Exercise] = {}
+        by_name: Dict[str, Exercise] = {}
+        by_category: Dict[str, list] = {}
+        by_muscle_group: Dict[str, list] = {}
+        by_test_type: Dict[str, list] = {}
+        by_difficulty: Dict[str, list] = {}
+
+        for row in rows:
+            exercise = MappingProxyType(dict(row))
+            by_id[exercise['id']] = exercise
+            by_name.setdefault(exercise['name'].lower(), exercise)
+            by_category.setdefault(exercise['category'], []).append(exercise)
+            by_muscle_group.setdefault(exercise['muscle_group'], []).append(exercise)
+            by_test_type.setdefault(exercise.get('test_type') or 'none', []).append(exercise)
+            by_difficulty.setdefault(exercise.get('difficulty_level'), []).append(exercise)
+
+        # Подмена целиком - читатели никогда не видят полупостроенный индекс
+        self._by_id = by_id
+        self._by_name = by_name
+        self._by_category = {k: tuple(v) for k, v in by_category.items()}
+        self._by_muscle_group = {k: tuple(v) for k, v in by_muscle_group.items()}
+        self._by_test_type = {k: tuple(v) for k, v in by_test_type.items()}
+        self._by_difficulty = {k: tuple(v) for k, v in by_difficulty.items()}
+        self._categories = tuple(sorted(by_category, key=str.lower))
+        self._muscle_groups = tuple(sorted(by_muscle_group, key=str.lower))
+        self.version += 1
+
+    # ===== ЧТЕНИЕ =====
+
+    def get(self, exercise_id: int) -> Optional[Exercise]:
+        return self._by_id.get(int(exercise_id))
+
+    def find_by_name(self, name: str) -> Optional[Exercise]:
+        """Поиск по точному имени без учета регистра"""
+        return self._by_name.get(name.strip().lower())
+
+    def all(self) -> Tuple[Exercise, ...]:
+        return tuple(self._by_id.values())
+
+    def categories(self) -> Tuple[str, ...]:
+        return self._categories
+
+    def muscle_groups(self) -> Tuple[str, ...]:
+        return self._muscle_groups
+
+    def by_category(self, category: str) -> Tuple[Exercise, ...]:
+        return self._by_category.get(category, ())
+
+    def by_muscle_group(self, muscle_group: str) -> Tuple[Exercise, ...]:
+        return self._by_muscle_group.get(muscle_group, ())
+
+    def by_test_type(self, test_type: Optional[str]) -> Tuple[Exercise, ...]:
+        return self._by_test_type.get(test_type or 'none', ())
+
+    def by_difficulty(self, difficulty_level: str) -> Tuple[Exercise, ...]:
+        return self._by_difficulty.get(difficulty_level, ())
+
+    def __len__(self) -> int:
+        return len(self._by_id)
+
+
+# Глобальный каталог упражнений
+exercise_catalog = ExerciseCatalog()
+
+__all__ = ['ExerciseCatalog', 'exercise_catalog', 'NOTIFY_CHANNEL']
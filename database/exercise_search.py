@@ -0,0 +1,239 @@
+"""
+exercise_search.py - Поиск упражнений
+Инвертированный индекс по основам слов (легкий русский стемминг, ё -> е)
+с префиксным и триграммным (опечатки) сопоставлением поверх каталога
+упражнений. Если каталог не загружен - запрос уходит в Postgres (pg_trgm).
+"""
+import bisect
+import logging
+import re
+from typing import Dict, Iterable, List, Mapping, Optional, Set, Tuple
+
+import asyncpg
+
+from .database import db_manager
+from .exercise_catalog import exercise_catalog, Exercise
+
+logger = logging.getLogger(__name__)
+
+# Вес совпадения в зависимости от поля
+FIELD_WEIGHTS = (
+    ('name', 3.0),
+    ('muscle_group', 1.5),
+    ('category', 1.0),
+)
+
+# Колонки, по которым разрешена фильтрация
+FILTER_COLUMNS = ('category', 'muscle_group', 'test_type', 'difficulty_level', 'equipment')
+
+# Минимальная похожесть по триграммам для нечеткого совпадения
+FUZZY_THRESHOLD = 0.45
+
+# Окончания для легкого стемминга (сначала длинные)
+_ENDINGS = sorted([
+    'иями', 'ями', 'ами', 'ией', 'иям', 'ием', 'иях',
+    'ого', 'его', 'ому', 'ему', 'ыми', 'ими', 'ую', 'юю',
+    'ая', 'яя', 'ое', 'ее', 'ые', 'ие', 'ый', 'ий', 'ой', 'ей',
+    'ом', 'ем', 'ам', 'ям', 'ах', 'ях', 'ию', 'ью', 'ия', 'ья', 'ов', 'ев',
+    'ся', 'сь', 'ть',
+    'ы', 'и', 'а', 'я', 'о', 'е', 'у', 'ю', 'ь', 'й',
+], key=len, reverse=True)
+
+_WORD_RE = re.compile(r'[0-9a-zа-я]+')
+
+
+# ===== НОРМАЛИЗАЦИЯ =====
+
+def normalize(text: str) -> str:
+    """Нижний регистр и ё -> е"""
+    return (text or '').lower().replace('ё', 'е')
+
+
+def stem(word: str) -> str:
+    """Легкий стеммер: отрезаем одно окончание, оставляя основу от 3 букв"""
+    for ending in _ENDINGS:
+        if word.endswith(ending) and len(word) - len(ending) >= 3:
+            return word[:-len(ending)]
+    return word
+
+
+def tokenize(text: str) -> List[str]:
+    """Основы слов текста"""
+    return [stem(w) for w in _WORD_RE.findall(normalize(text))]
+
+
+def trigrams(term: str) -> Set[str]:
+    padded = f"  {term} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+# ===== ИНДЕКС =====
+
+class ExerciseSearchIndex:
+    """Индекс поиска, построенный по снимку каталога"""
+
+    def __init__(self):
+        self.version = 0
+        self._postings: Dict[str, Dict[int, float]] = {}
+        self._vocabulary: List[str] = []
+        self._trigrams: Dict[str, Set[str]] = {}
+        self._term_trigrams: Dict[str, Set[str]] = {}
+
+    def build(self, exercises: Iterable[Exercise], version: int):
+        postings: Dict[str, Dict[int, float]] = {}
+
+        for exercise in exercises:
+            for field, weight in FIELD_WEIGHTS:
+                for term in tokenize(exercise.get(field) or ''):
+                    ids = postings.setdefault(term, {})
+                    if ids.get(exercise['id'], 0) < weight:
+                        ids[exercise['id']] = weight
+
+        term_trigrams = {term: trigrams(term) for term in postings}
+        trigram_index: Dict[str, Set[str]] = {}
+        for term, grams in term_trigrams.items():
+            for gram in grams:
+                trigram_index.setdefault(gram, set()).add(term)
+
+        self._postings = postings
+        self._vocabulary = sorted(postings)
+        self._term_trigrams = term_trigrams
+        self._trigrams = trigram_index
+        self.version = version
+
+    def _expand(self, term: str) -> Dict[str, float]:
+        """Термины словаря, подходящие под термин запроса, с коэффициентом"""
+        matches: Dict[str, float] = {}
+
+        if term in self._postings:
+            matches[term] = 1.0
+
+        # Префикс: "жи" -> "жим", "присед" -> "приседан"
+        i = bisect.bisect_left(self._vocabulary, term)
+        while i < len(self._vocabulary) and self._vocabulary[i].startswith(term):
+            matches.setdefault(self._vocabulary[i], 0.85)
+            i += 1
+
+        # Опечатки: похожесть по триграммам (коэффициент Дайса)
+        if len(term) >= 3:
+            grams = trigrams(term)
+            shared: Dict[str, int] = {}
+            for gram in grams:
+                for candidate in self._trigrams.get(gram, ()):
+                    shared[candidate] = shared.get(candidate, 0) + 1
+            for candidate, count in shared.items():
+                similarity = 2.0 * count / (len(grams) + len(self._term_trigrams[candidate]))
+                if similarity >= FUZZY_THRESHOLD:
+                    score = 0.7 * similarity
+                    if matches.get(candidate, 0) < score:
+                        matches[candidate] = score
+
+        return matches
+
+    def search(self, query: str) -> List[Tuple[int, float, int]]:
+        """(id, score, совпавших терминов) по убыванию релевантности"""
+        terms = list(dict.fromkeys(tokenize(query)))
+        if not terms:
+            return []
+
+        scores: Dict[int, float] = {}
+        matched: Dict[int, int] = {}
+
+        for term in terms:
+            best: Dict[int, float] = {}
+            for vocab_term, factor in self._expand(term).items():
+                for exercise_id, weight in self._postings[vocab_term].items():
+                    value = weight * factor
+                    if best.get(exercise_id, 0) < value:
+                        best[exercise_id] = value
+            for exercise_id, value in best.items():
+                scores[exercise_id] = scores.get(exercise_id, 0) + value
+                matched[exercise_id] = matched.get(exercise_id, 0) + 1
+
+        ranked = [(eid, score, matched[eid]) for eid, score in scores.items()]
+        ranked.sort(key=lambda item: (-item[2], -item[1], item[0]))
+        return ranked
+
+
+_index = ExerciseSearchIndex()
+
+
+def _matches_filters(exercise: Exercise, filters: Mapping[str, object]) -> bool:
+    for column, expected in filters.items():
+        value = exercise.get(column)
+        if isinstance(expected, (list, tuple, set, frozenset)):
+            if value not in expected:
+                return False
+        elif value != expected:
+            return False
+    return True
+
+
+# ===== ПУБЛИЧНЫЙ API =====
+
+async def search_exercises(query: str, filters: Optional[Mapping[str, object]] = None,
+                           limit: int = 15) -> List[Exercise]:
+    """Ранжированный поиск упражнений по названию, группе мышц и категории
+
+    filters: {'category': 'Силовые'} или {'category': ('Силовые', 'Функциональные')}
+    """
+    filters = {k: v for k, v in (filters or {}).items() if k in FILTER_COLUMNS}
+
+    if not exercise_catalog.loaded:
+        return await _search_in_database(query, filters, limit)
+
+    if _index.version != exercise_catalog.version:
+        _index.build(exercise_catalog.all(), exercise_catalog.version)
+
+    results: List[Exercise] = []
+    # Частичные совпадения отбрасываем, если среди прошедших фильтры есть
+    # совпавшие по большему числу слов (лучшее считается после фильтров)
+    best_matched = 0
+    for exercise_id, _score, matched in _index.search(query):
+        if matched < best_matched:
+            break
+        exercise = exercise_catalog.get(exercise_id)
+        if exercise is None or not _matches_filters(exercise, filters):
+            continue
+        best_matched = matched
+        results.append(exercise)
+        if len(results) >= limit:
+            break
+    return results
+
+
+async def _search_in_database(query: str, filters: Mapping[str, object],
+                              limit: int) -> List[Exercise]:
+    """Запасной режим: pg_trgm, а без расширения - LIKE"""
+    term = normalize(query).strip()
+    args: list = [term, f"%{term}%", limit]
+    conditions = []
+    for column, expected in filters.items():
+        values = list(expected) if isinstance(expected, (list, tuple, set, frozenset)) else [expected]
+        args.append(values)
+        conditions.append(f"{column} = ANY(${len(args)})")
+    where_filters = "".join(f" AND {c}" for c in conditions)
+
+    async with db_manager.pool.acquire() as conn:
+        try:
+            rows = await conn.fetch(f"""
+                SELECT * FROM exercises
+                WHERE (LOWER(name) % $1 OR LOWER(name) LIKE $2
+                       OR LOWER(muscle_group) LIKE $2 OR LOWER(category) LIKE $2){where_filters}
+                ORDER BY similarity(LOWER(name), $1) DESC, name
+                LIMIT $3
+            """, *args)
+        except asyncpg.UndefinedFunctionError:
+            logger.warning("⚠️ pg_trgm не установлен, поиск через LIKE")
+            rows = await conn.fetch(f"""
+                SELECT * FROM exercises
+                WHERE (LOWER(name) LIKE $2 OR LOWER(muscle_group) LIKE $2
+                       OR LOWER(category) LIKE $2){where_filters}
+                ORDER BY name
+                LIMIT $3
+            """, *args)
+
+    return [dict(row) for row in rows]
+
+
+__all__ = ['search_exercises', 'normalize', 'stem', 'tokenize', 'ExerciseSearchIndex']
@@ -0,0 +1,318 @@
+"""
+fsm_storage.py - Постоянное хранилище FSM состояний
+Postgres (через пул db_manager) или локальный SQLite файл.
+Чтение/запись идут в кэш в памяти, изменения сбрасываются в БД пачками
+(write-behind), брошенные сценарии удаляются по TTL.
+
+При нескольких экземплярах бота с write-behind апдейты одного чата должны
+попадать на один экземпляр; иначе ставьте flush_interval=0 (запись сразу).
+"""
+import asyncio
+import json
+import logging
+import sqlite3
+import time
+from datetime import date, datetime, time as dtime
+from decimal import Decimal
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from uuid import UUID
+
+from aiogram.fsm.state import State
+from aiogram.fsm.storage.base import BaseStorage, StorageKey, StateType
+
+logger = logging.getLogger(__name__)
+
+
+# Значения из записей БД (datetime, Decimal, ...) сохраняются с меткой типа
+# и после перезагрузки возвращаются тем же типом, а не строкой
+_TYPE_KEY = '__fsm_type__'
+_DECODERS: Dict[str, Callable[[str], Any]] = {
+    'datetime': datetime.fromisoformat,
+    'date': date.fromisoformat,
+    'time': dtime.fromisoformat,
+    'decimal': Decimal,
+    'uuid': UUID,
+}
+
+
+def _encode(value: Any) -> Dict[str, str]:
+    # datetime раньше date: datetime - подкласс date
+    if isinstance(value, datetime):
+        return {_TYPE_KEY: 'datetime', 'value': value.isoformat()}
+    if isinstance(value, date):
+        return {_TYPE_KEY: 'date', 'value': value.isoformat()}
+    if isinstance(value, dtime):
+        return {_TYPE_KEY: 'time', 'value': value.isoformat()}
+    if isinstance(value, Decimal):
+        return {_TYPE_KEY: 'decimal', 'value': str(value)}
+    if isinstance(value, UUID):
+        return {_TYPE_KEY: 'uuid', 'value': str(value)}
+    raise TypeError(f"FSM data: значение типа {type(value).__name__} нельзя сохранить")
+
+
+def _decode(obj: Dict[str, Any]) -> Any:
+    decoder = _DECODERS.get(obj.get(_TYPE_KEY)) if len(obj) == 2 else None
+    return decoder(obj['value']) if decoder is not None else obj
+
+
+def _dump(data: Dict[str, Any]) -> str:
+    return json.dumps(data, ensure_ascii=False, default=_encode)
+
+
+def _loads(raw: str) -> Dict[str, Any]:
+    return json.loads(raw, object_hook=_decode)
+
+
+class _Entry:
+    __slots__ = ('state', 'data', 'touched')
+
+    def __init__(self, state: Optional[str], data: Dict[str, Any]):
+        self.state = state
+        self.data = data
+        self.touched = time.monotonic()
+
+
+class WriteBehindStorage(BaseStorage):
+    """Общая логика кэша и пакетной записи; бэкенд реализует _load/_write/_expire"""
+
+    def __init__(self, ttl: float = 86400.0, flush_interval: float = 1.0,
+                 idle_eviction: float = 600.0):
+        self.ttl = ttl
+        self.flush_interval = flush_interval
+        self.idle_eviction = idle_eviction
+        self._cache: Dict[str, _Entry] = {}
+        self._dirty: set = set()
+        self._flusher: Optional[asyncio.Task] = None
+        self._last_expire = 0.0
+
+    # ===== БЭКЕНД =====
+
+    async def _load(self, key: str) -> Optional[Tuple[Optional[str], Dict[str, Any]]]:
+        raise NotImplementedError
+
+    async def _write(self, upserts: List[Tuple[str, Optional[str], str]], deletes: List[str]):
+        raise NotImplementedError
+
+    async def _expire(self, older_than_seconds: float) -> int:
+        raise NotImplementedError
+
+    # ===== КЭШ =====
+
+    @staticmethod
+    def _key(key: StorageKey) -> str:
+        return (f"{key.bot_id}:{key.chat_id}:{key.user_id}:{key.thread_id or ''}:"
+                f"{key.business_connection_id or ''}:{key.destiny}")
+
+    async def _entry(self, key: StorageKey) -> Tuple[str, _Entry]:
+        skey = self._key(key)
+        entry = self._cache.get(skey)
+        if entry is None:
+            loaded = await self._load(skey)
+            # Пока грузили, запись могла появиться из другой корутины
+            entry = self._cache.get(skey)
+            if entry is None:
+                state, data = loaded if loaded else (None, {})
+                entry = self._cache[skey] = _Entry(state, data)
+        entry.touched = time.monotonic()
+        return skey, entry
+
+    async def _mark_dirty(self, skey: str):
+        self._dirty.add(skey)
+        if self.flush_interval <= 0:
+            await self.flush()
+        elif self._flusher is None or self._flusher.done():
+            self._flusher = asyncio.create_task(self._flush_loop())
+
+    # ===== API aiogram =====
+
+    async def set_state(self, key: StorageKey, state: StateType = None) -> None:
+        skey, entry = await self._entry(key)
+        entry.state = state.state if isinstance(state, State) else state
+        await self._mark_dirty(skey)
+
+    async def get_state(self, key: StorageKey) -> Optional[str]:
+        _, entry = await self._entry(key)
+        return entry.state
+
+    async def set_data(self, key: StorageKey, data: Dict[str, Any]) -> None:
+        # Несохраняемое значение - ошибка в обработчике сразу, а не при сбросе в БД
+        _dump(data)
+        skey, entry = await self._entry(key)
+        entry.data = dict(data)
+        await self._mark_dirty(skey)
+
+    async def get_data(self, key: StorageKey) -> Dict[str, Any]:
+        _, entry = await self._entry(key)
+        return dict(entry.data)
+
+    async def close(self) -> None:
+        if self._flusher is not None:
+            self._flusher.cancel()
+            self._flusher = None
+        await self.flush()
+
+    # ===== СБРОС / ОЧИСТКА =====
+
+    async def flush(self):
+        """Записать все измененные ключи одной пачкой"""
+        if not self._dirty:
+            return
+        keys, self._dirty = self._dirty, set()
+
+        upserts, deletes = [], []
+        for skey in keys:
+            entry = self._cache.get(skey)
+            if entry is None:
+                continue
+            if entry.state is None and not entry.data:
+                deletes.append(skey)
+            else:
+                upserts.append((skey, entry.state, _dump(entry.data)))
+
+        try:
+            await self._write(upserts, deletes)
+        except Exception as e:
+            logger.error(f"❌ Ошибка записи FSM ({len(keys)} ключей): {e}")
+            self._dirty |= keys
+
+    def _evict_idle(self):
+        """Выгрузить из памяти давно не используемые (уже сохраненные) записи"""
+        cutoff = time.monotonic() - self.idle_eviction
+        for skey in [k for k, e in self._cache.items() if e.touched < cutoff and k not in self._dirty]:
+            del self._cache[skey]
+
+    async def _flush_loop(self):
+        try:
+            while True:
+                await asyncio.sleep(self.flush_interval)
+                await self.flush()
+                self._evict_idle()
+
+                now = time.monotonic()
+                if now - self._last_expire > min(self.ttl, 3600):
+                    self._last_expire = now
+                    try:
+                        removed = await self._expire(self.ttl)
+                        if removed:
+                            logger.info(f"🧹 FSM: удалено {removed} брошенных сценариев")
+                    except Exception as e:
+                        logger.error(f"❌ Ошибка очистки FSM: {e}")
+        except asyncio.CancelledError:
+            pass
+
+
+class PostgresStorage(WriteBehindStorage):
+    """FSM в таблице fsm_storage (миграция 0003) через пул asyncpg"""
+
+    def __init__(self, db_manager, **kwargs):
+        super().__init__(**kwargs)
+        self.db = db_manager
+
+    async def _load(self, key):
+        async with self.db.pool.acquire() as conn:
+            row = await conn.fetchrow("SELECT state, data FROM fsm_storage WHERE key = $1", key)
+        if row is None:
+            return None
+        return row['state'], _loads(row['data'])
+
+    async def _write(self, upserts, deletes):
+        async with self.db.pool.acquire() as conn:
+            async with conn.transaction():
+                if upserts:
+                    await conn.executemany("""
+                        INSERT INTO fsm_storage (key, state, data, updated_at)
+                        VALUES ($1, $2, $3::jsonb, CURRENT_TIMESTAMP)
+                        ON CONFLICT (key) DO UPDATE
+                        SET state = EXCLUDED.state, data = EXCLUDED.data, updated_at = EXCLUDED.updated_at
+                    """, upserts)
+                if deletes:
+                    await conn.execute("DELETE FROM fsm_storage WHERE key = ANY($1::text[])", deletes)
+
+    async def _expire(self, older_than_seconds):
+        async with self.db.pool.acquire() as conn:
+            result = await conn.execute(
+                "DELETE FROM fsm_storage WHERE updated_at < CURRENT_TIMESTAMP - make_interval(secs => $1)",
+                float(older_than_seconds)
+            )
+        return int(result.split()[-1])
+
+
+class SQLiteStorage(WriteBehindStorage):
+    """FSM в локальном SQLite файле (один узел)"""
+
+    def __init__(self, path: str = "fsm_storage.sqlite3", **kwargs):
+        super().__init__(**kwargs)
+        self.path = path
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS fsm_storage (
+                key TEXT PRIMARY KEY,
+                state TEXT,
+                data TEXT NOT NULL DEFAULT '{}',
+                updated_at REAL NOT NULL
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_fsm_storage_updated_at ON fsm_storage(updated_at)")
+        self._lock = asyncio.Lock()
+
+    async def _run(self, fn, *args):
+        async with self._lock:
+            return await asyncio.to_thread(fn, *args)
+
+    async def _load(self, key):
+        row = await self._run(
+            lambda: self._conn.execute("SELECT state, data FROM fsm_storage WHERE key = ?", (key,)).fetchone()
+        )
+        if row is None:
+            return None
+        return row[0], _loads(row[1])
+
+    def _write_sync(self, upserts, deletes):
+        now = time.time()
+        with self._conn:
+            self._conn.execute("BEGIN")
+            self._conn.executemany("""
+                INSERT INTO fsm_storage (key, state, data, updated_at) VALUES (?, ?, ?, ?)
+                ON CONFLICT (key) DO UPDATE
+                SET state = excluded.state, data = excluded.data, updated_at = excluded.updated_at
+            """, [(k, s, d, now) for k, s, d in upserts])
+            self._conn.executemany("DELETE FROM fsm_storage WHERE key = ?", [(k,) for k in deletes])
+
+    async def _write(self, upserts, deletes):
+        await self._run(self._write_sync, upserts, deletes)
+
+    async def _expire(self, older_than_seconds):
+        cursor = await self._run(
+            self._conn.execute, "DELETE FROM fsm_storage WHERE updated_at < ?", (time.time() - older_than_seconds,)
+        )
+        return cursor.rowcount
+
+    async def close(self) -> None:
+        await super().close()
+        self._conn.close()
+
+
+def create_fsm_storage(config, db_manager) -> BaseStorage:
+    """Хранилище FSM по config.FSM_STORAGE: memory | postgres | sqlite"""
+    backend = getattr(config, 'FSM_STORAGE', 'memory').lower()
+    options = {
+        'ttl': getattr(config, 'FSM_TTL_HOURS', 24) * 3600,
+        'flush_interval': getattr(config, 'FSM_FLUSH_INTERVAL', 1.0),
+    }
+
+    if backend == 'postgres':
+        logger.info("💾 FSM: Postgres (write-behind)")
+        return PostgresStorage(db_manager, **options)
+    if backend == 'sqlite':
+        path = getattr(config, 'FSM_SQLITE_PATH', 'fsm_storage.sqlite3')
+        logger.info(f"💾 FSM: SQLite {path} (write-behind)")
+        return SQLiteStorage(path, **options)
+
+    from aiogram.fsm.storage.memory import MemoryStorage
+    logger.info("💾 FSM: MemoryStorage")
+    return MemoryStorage()
+
+
+__all__ = ['WriteBehindStorage', 'PostgresStorage', 'SQLiteStorage', 'create_fsm_storage']
@@ -1,6 +1,7 @@
 -- ===== СПОРТИВНЫЙ TELEGRAM БОТ - СХЕМА БАЗЫ ДАННЫХ =====
--- Версия: 1.0
--- Дата: 2025-10-13
+-- Миграция 0001: базовая схема (бывший schema.sql)
+-- Все операторы идемпотентны, поэтому на базе, созданной из schema.sql
+-- вручную, миграция просто фиксирует текущее состояние.
 
 -- ===== ПОЛЬЗОВАТЕЛИ =====
 CREATE TABLE IF NOT EXISTS users (
@@ -104,26 +105,29 @@ CREATE TABLE IF NOT EXISTS exercise_sessions (
     notes TEXT
 );
 
--- ===== КОМАНДЫ =====
-CREATE TABLE IF NOT EXISTS teams (
-    id SERIAL PRIMARY KEY,
-    name VARCHAR(200) NOT NULL,
-    description TEXT,
-    coach_id INTEGER REFERENCES users(id),
-    access_code VARCHAR(20) UNIQUE NOT NULL DEFAULT substring(md5(random()::text) from 1 for 8),
-    created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
-    is_active BOOLEAN DEFAULT true
+-- ===== СВОДКИ ПО 1ПМ =====
+-- Поддерживаются DatabaseManager.record_one_rep_max в одном операторе со вставкой
+-- в one_rep_max; экраны прогресса и рекордов читают только их.
+CREATE TABLE IF NOT EXISTS one_rm_summary (
+    user_id INTEGER REFERENCES users(id) ON DELETE CASCADE,
+    exercise_id INTEGER REFERENCES exercises(id) ON DELETE CASCADE,
+    best_1rm DECIMAL(5,2) NOT NULL,
+    best_test_weight DECIMAL(5,2),
+    best_reps INTEGER,
+    best_tested_at TIMESTAMP WITH TIME ZONE,
+    last_1rm DECIMAL(5,2) NOT NULL,
+    prev_1rm DECIMAL(5,2),
+    last_tested_at TIMESTAMP WITH TIME ZONE,
+    tests_count INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (user_id, exercise_id)
 );
 
--- ===== УЧАСТНИКИ КОМАНД =====
-CREATE TABLE IF NOT EXISTS team_members (
-    id SERIAL PRIMARY KEY,
-    team_id INTEGER REFERENCES teams(id) ON DELETE CASCADE,
+-- Количество тестов по дням (для "за 30 дней" без сканирования истории)
+CREATE TABLE IF NOT EXISTS one_rm_daily (
     user_id INTEGER REFERENCES users(id) ON DELETE CASCADE,
-    joined_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
-    role VARCHAR(20) DEFAULT 'player' CHECK (role IN ('player', 'assistant_coach')),
-    is_active BOOLEAN DEFAULT true,
-    UNIQUE(team_id, user_id)
+    tested_on DATE NOT NULL,
+    tests_count INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (user_id, tested_on)
 );
 
 -- ===== ИНДЕКСЫ ДЛЯ ПРОИЗВОДИТЕЛЬНОСТИ =====
@@ -132,15 +136,60 @@ CREATE INDEX IF NOT EXISTS idx_exercises_category ON exercises(category);
 CREATE INDEX IF NOT EXISTS idx_exercises_muscle_group ON exercises(muscle_group);
 CREATE INDEX IF NOT EXISTS idx_one_rep_max_user_exercise ON one_rep_max(user_id, exercise_id);
 CREATE INDEX IF NOT EXISTS idx_one_rep_max_tested_at ON one_rep_max(tested_at);
+CREATE INDEX IF NOT EXISTS idx_one_rep_max_user_tested_at ON one_rep_max(user_id, tested_at DESC);
 CREATE INDEX IF NOT EXISTS idx_workouts_created_by ON workouts(created_by);
 CREATE INDEX IF NOT EXISTS idx_workouts_unique_id ON workouts(unique_id);
 CREATE INDEX IF NOT EXISTS idx_workout_exercises_workout_id ON workout_exercises(workout_id);
 CREATE INDEX IF NOT EXISTS idx_workout_sessions_user_id ON workout_sessions(user_id);
-CREATE INDEX IF NOT EXISTS idx_teams_access_code ON teams(access_code);
-CREATE INDEX IF NOT EXISTS idx_team_members_team_user ON team_members(team_id, user_id);
+
+-- Нечеткий поиск упражнений (запасной режим search_exercises без каталога в памяти)
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+CREATE INDEX IF NOT EXISTS idx_exercises_name_trgm ON exercises USING gin (LOWER(name) gin_trgm_ops);
+
+-- ===== УВЕДОМЛЕНИЯ ОБ ИЗМЕНЕНИИ КАТАЛОГА УПРАЖНЕНИЙ =====
+-- Бот держит каталог в памяти и перечитывает его по NOTIFY exercises_changed
+CREATE OR REPLACE FUNCTION notify_exercises_changed() RETURNS trigger AS $$
+BEGIN
+    PERFORM pg_notify('exercises_changed', '');
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_exercises_changed ON exercises;
+CREATE TRIGGER trg_exercises_changed
+    AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON exercises
+    FOR EACH STATEMENT EXECUTE FUNCTION notify_exercises_changed();
+
+-- ===== ЗАПОЛНЕНИЕ СВОДОК ПО 1ПМ ИЗ ИСТОРИИ =====
+INSERT INTO one_rm_summary (
+    user_id, exercise_id, best_1rm, best_test_weight, best_reps, best_tested_at,
+    last_1rm, prev_1rm, last_tested_at, tests_count
+)
+SELECT user_id, exercise_id,
+       (array_agg(formula_average ORDER BY formula_average DESC, tested_at))[1],
+       (array_agg(test_weight ORDER BY formula_average DESC, tested_at))[1],
+       (array_agg(reps ORDER BY formula_average DESC, tested_at))[1],
+       (array_agg(tested_at ORDER BY formula_average DESC, tested_at))[1],
+       (array_agg(formula_average ORDER BY tested_at DESC))[1],
+       (array_agg(formula_average ORDER BY tested_at DESC))[2],
+       MAX(tested_at),
+       COUNT(*)
+FROM one_rep_max
+WHERE user_id IS NOT NULL AND exercise_id IS NOT NULL AND formula_average IS NOT NULL
+GROUP BY user_id, exercise_id
+ON CONFLICT (user_id, exercise_id) DO NOTHING;
+
+INSERT INTO one_rm_daily (user_id, tested_on, tests_count)
+SELECT user_id, tested_at::date, COUNT(*)
+FROM one_rep_max
+WHERE user_id IS NOT NULL AND formula_average IS NOT NULL
+GROUP BY user_id, tested_at::date
+ON CONFLICT (user_id, tested_on) DO NOTHING;
 
 -- ===== НАЧАЛЬНЫЕ ДАННЫЕ - УПРАЖНЕНИЯ =====
-INSERT INTO exercises (name, category, muscle_group, description, instructions, difficulty_level, equipment) VALUES
+-- У exercises нет уникального name, поэтому вместо ON CONFLICT - проверка NOT EXISTS
+INSERT INTO exercises (name, category, muscle_group, description, instructions, difficulty_level, equipment)
+SELECT v.* FROM (VALUES
 -- СИЛОВЫЕ УПРАЖНЕНИЯ
 ('Жим лежа', 'Силовые', 'Грудь', 'Базовое упражнение для развития грудных мышц', 'Лягте на скамью, возьмите штангу хватом шире плеч, медленно опустите до касания груди, выжмите вверх', 'intermediate', 'Штанга, скамья'),
 ('Приседания со штангой', 'Силовые', 'Ноги', 'Базовое упражнение для развития мышц ног и ягодиц', 'Поставьте штангу на плечи, ноги на ширине плеч, приседайте до параллели с полом', 'intermediate', 'Штанга, стойки'),
@@ -161,12 +210,10 @@ INSERT INTO exercises (name, category, muscle_group, description, instructions,
 ('Планка', 'Функциональные', 'Кор', 'Изометрическое упражнение для укрепления мышц кора', 'Примите упор лежа на предплечьях, держите тело прямо', 'beginner', 'Без оборудования'),
 ('Берпи', 'Функциональные', 'Все тело', 'Комплексное упражнение для развития силы и выносливости', 'Присядьте, упритесь руками, прыгните в планку, отожмитесь, вернитесь и подпрыгните', 'intermediate', 'Без оборудования'),
 ('Выпады', 'Функциональные', 'Ноги', 'Одностороннее упражнение для развития мышц ног', 'Сделайте шаг вперед, опуститесь в выпад, вернитесь в исходное положение', 'beginner', 'Без оборудования')
-
-ON CONFLICT (name) DO NOTHING;
+) AS v(name, category, muscle_group, description, instructions, difficulty_level, equipment)
+WHERE NOT EXISTS (SELECT 1 FROM exercises e WHERE e.name = v.name);
 
 -- ===== СОЗДАНИЕ ПОЛЬЗОВАТЕЛЯ-АДМИНИСТРАТОРА (опционально) =====
 -- INSERT INTO users (telegram_id, first_name, last_name, username, role) 
 -- VALUES (123456789, 'Admin', 'User', 'admin_user', 'admin')
 -- ON CONFLICT (telegram_id) DO NOTHING;
-
-COMMIT;
@@ -0,0 +1,90 @@
+-- ===== МИГРАЦИЯ 0002: КОМАНДЫ И ПОДОПЕЧНЫЕ =====
+-- Единая форма таблиц модуля команд (TeamsDatabase): тренер по coach_telegram_id.
+-- Заменяет DDL из TeamsDatabase.init_tables и таблицу teams из старой schema.sql
+-- (coach_id -> users.id); существующие команды старого вида переносятся.
+
+CREATE TABLE IF NOT EXISTS teams (
+    id SERIAL PRIMARY KEY,
+    name VARCHAR(200) NOT NULL,
+    description TEXT,
+    coach_telegram_id BIGINT,
+    sport_type VARCHAR(50) DEFAULT 'general',
+    max_players INTEGER DEFAULT 25,
+    access_code VARCHAR(20) DEFAULT substring(md5(random()::text) from 1 for 8),
+    is_active BOOLEAN DEFAULT TRUE,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Таблица могла быть создана schema.sql или TeamsDatabase без части колонок
+ALTER TABLE teams
+    ADD COLUMN IF NOT EXISTS coach_telegram_id BIGINT,
+    ADD COLUMN IF NOT EXISTS sport_type VARCHAR(50) DEFAULT 'general',
+    ADD COLUMN IF NOT EXISTS max_players INTEGER DEFAULT 25,
+    ADD COLUMN IF NOT EXISTS access_code VARCHAR(20) DEFAULT substring(md5(random()::text) from 1 for 8),
+    ADD COLUMN IF NOT EXISTS is_active BOOLEAN DEFAULT TRUE,
+    ADD COLUMN IF NOT EXISTS updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP;
+
+-- Команды старого вида: coach_id ссылался на users.id
+DO $$
+BEGIN
+    IF EXISTS (
+        SELECT 1 FROM information_schema.columns
+        WHERE table_schema = current_schema() AND table_name = 'teams' AND column_name = 'coach_id'
+    ) THEN
+        UPDATE teams t SET coach_telegram_id = u.telegram_id
+        FROM users u
+        WHERE t.coach_id = u.id AND t.coach_telegram_id IS NULL;
+    END IF;
+END $$;
+
+UPDATE teams SET access_code = substring(md5(random()::text || id::text) from 1 for 8)
+WHERE access_code IS NULL;
+
+-- Игроки команд
+CREATE TABLE IF NOT EXISTS team_players (
+    id SERIAL PRIMARY KEY,
+    team_id INTEGER REFERENCES teams(id) ON DELETE CASCADE,
+    first_name VARCHAR(100) NOT NULL,
+    last_name VARCHAR(100),
+    position VARCHAR(50),
+    jersey_number INTEGER,
+    telegram_id BIGINT,
+    phone VARCHAR(20),
+    birth_date DATE,
+    is_active BOOLEAN DEFAULT TRUE,
+    joined_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Индивидуальные подопечные
+CREATE TABLE IF NOT EXISTS individual_students (
+    id SERIAL PRIMARY KEY,
+    coach_telegram_id BIGINT NOT NULL,
+    first_name VARCHAR(100) NOT NULL,
+    last_name VARCHAR(100),
+    telegram_id BIGINT,
+    phone VARCHAR(20),
+    birth_date DATE,
+    specialization VARCHAR(100),
+    level VARCHAR(20) DEFAULT 'beginner',
+    notes TEXT,
+    is_active BOOLEAN DEFAULT TRUE,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Назначенные командам тренировки
+CREATE TABLE IF NOT EXISTS workout_teams (
+    id SERIAL PRIMARY KEY,
+    workout_id INTEGER REFERENCES workouts(id) ON DELETE CASCADE,
+    team_id INTEGER REFERENCES teams(id) ON DELETE CASCADE,
+    assigned_by BIGINT,
+    assigned_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    UNIQUE (workout_id, team_id)
+);
+
+-- Индексы
+CREATE INDEX IF NOT EXISTS idx_teams_coach ON teams(coach_telegram_id);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_teams_access_code_unique ON teams(access_code);
+CREATE INDEX IF NOT EXISTS idx_team_players_team ON team_players(team_id);
+CREATE INDEX IF NOT EXISTS idx_team_players_telegram_id ON team_players(telegram_id);
+CREATE INDEX IF NOT EXISTS idx_individual_students_coach ON individual_students(coach_telegram_id);
@@ -0,0 +1,20 @@
+-- ===== МИГРАЦИЯ 0004: ОЧЕРЕДЬ РАССЫЛОК (BroadcastEngine) =====
+
+CREATE TABLE IF NOT EXISTS broadcast_queue (
+    id BIGSERIAL PRIMARY KEY,
+    broadcast_id VARCHAR(32) NOT NULL,
+    chat_id BIGINT NOT NULL,
+    text TEXT NOT NULL,
+    parse_mode VARCHAR(20),
+    title VARCHAR(200),
+    report_chat_id BIGINT,
+    status VARCHAR(20) DEFAULT 'pending' CHECK (status IN ('pending', 'sent', 'failed')),
+    attempts INTEGER DEFAULT 0,
+    last_error TEXT,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+    sent_at TIMESTAMP WITH TIME ZONE,
+    UNIQUE (broadcast_id, chat_id)
+);
+
+CREATE INDEX IF NOT EXISTS idx_broadcast_queue_pending
+    ON broadcast_queue(id) WHERE status = 'pending';
@@ -0,0 +1,38 @@
+-- ===== МИГРАЦИЯ 0005: ИДЕМПОТЕНТНОСТЬ ЗАПИСЕЙ =====
+-- Повторная доставка апдейта или двойное нажатие не создают дублей:
+-- вставки идут через INSERT ... ON CONFLICT по этим уникальным ключам.
+
+-- Тренировка: ключ мастера создания (FSM), один на пользователя
+ALTER TABLE workouts ADD COLUMN IF NOT EXISTS creation_key VARCHAR(32);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_workouts_creation_key
+    ON workouts(created_by, creation_key);
+
+-- Таблицы батарей тестов создаются вне миграций - меняем, только если они есть
+DO $$
+BEGIN
+    IF to_regclass('test_sets') IS NOT NULL THEN
+        ALTER TABLE test_sets ADD COLUMN IF NOT EXISTS creation_key VARCHAR(32);
+        CREATE UNIQUE INDEX IF NOT EXISTS idx_test_sets_creation_key
+            ON test_sets(created_by, creation_key);
+    END IF;
+
+    IF to_regclass('test_set_exercises') IS NOT NULL THEN
+        DELETE FROM test_set_exercises a
+        USING test_set_exercises b
+        WHERE a.test_set_id = b.test_set_id
+          AND a.exercise_id = b.exercise_id
+          AND a.id > b.id;
+        CREATE UNIQUE INDEX IF NOT EXISTS idx_test_set_exercises_unique
+            ON test_set_exercises(test_set_id, exercise_id);
+    END IF;
+
+    IF to_regclass('test_set_participants') IS NOT NULL THEN
+        DELETE FROM test_set_participants a
+        USING test_set_participants b
+        WHERE a.test_set_id = b.test_set_id
+          AND a.user_id = b.user_id
+          AND a.id > b.id;
+        CREATE UNIQUE INDEX IF NOT EXISTS idx_test_set_participants_unique
+            ON test_set_participants(test_set_id, user_id);
+    END IF;
+END $$;
@@ -0,0 +1,11 @@
+-- ===== МИГРАЦИЯ 0006: ТАЙМЕРЫ ОТДЫХА (RestTimerService) =====
+-- Незастреленные таймеры переживают рестарт: при старте бот загружает их
+-- обратно в колесо таймеров, просроченные срабатывают сразу.
+
+CREATE TABLE IF NOT EXISTS rest_timers (
+    timer_key VARCHAR(64) PRIMARY KEY,
+    chat_id BIGINT NOT NULL,
+    fire_at TIMESTAMP WITH TIME ZONE NOT NULL,
+    text TEXT NOT NULL,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+);
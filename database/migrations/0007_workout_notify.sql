@@ -0,0 +1,45 @@
+-- ===== МИГРАЦИЯ 0007: УВЕДОМЛЕНИЯ ОБ ИЗМЕНЕНИИ ТРЕНИРОВОК =====
+-- Бот держит снимки тренировок в памяти (database/workout_cache.py) и
+-- сбрасывает их по NOTIFY workouts_changed. Полезная нагрузка:
+--   '<workout_id>'   - изменилась тренировка или ее упражнения
+--   'creator:<id>'   - у автора сменилось имя (оно есть в карточке)
+
+CREATE OR REPLACE FUNCTION notify_workout_changed() RETURNS trigger AS $$
+DECLARE
+    changed_id INTEGER;
+BEGIN
+    IF TG_TABLE_NAME = 'workouts' THEN
+        changed_id := COALESCE(NEW.id, OLD.id);
+    ELSE
+        changed_id := COALESCE(NEW.workout_id, OLD.workout_id);
+    END IF;
+    PERFORM pg_notify('workouts_changed', changed_id::text);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Вставка новой тренировки не трогает кэш (снимка еще нет), поэтому только UPDATE/DELETE
+DROP TRIGGER IF EXISTS trg_workouts_changed ON workouts;
+CREATE TRIGGER trg_workouts_changed
+    AFTER UPDATE OR DELETE ON workouts
+    FOR EACH ROW EXECUTE FUNCTION notify_workout_changed();
+
+DROP TRIGGER IF EXISTS trg_workout_exercises_changed ON workout_exercises;
+CREATE TRIGGER trg_workout_exercises_changed
+    AFTER INSERT OR UPDATE OR DELETE ON workout_exercises
+    FOR EACH ROW EXECUTE FUNCTION notify_workout_changed();
+
+CREATE OR REPLACE FUNCTION notify_workout_creator_changed() RETURNS trigger AS $$
+BEGIN
+    PERFORM pg_notify('workouts_changed', 'creator:' || NEW.id::text);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_workout_creator_changed ON users;
+CREATE TRIGGER trg_workout_creator_changed
+    AFTER UPDATE OF first_name, last_name ON users
+    FOR EACH ROW
+    WHEN (OLD.first_name IS DISTINCT FROM NEW.first_name
+          OR OLD.last_name IS DISTINCT FROM NEW.last_name)
+    EXECUTE FUNCTION notify_workout_creator_changed();
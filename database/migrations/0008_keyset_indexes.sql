@@ -0,0 +1,27 @@
+-- ===== МИГРАЦИЯ 0008: ИНДЕКСЫ ДЛЯ СПИСКОВ ПО СТРАНИЦАМ =====
+-- Списки листаются по ключу (database/pagination.py): условие
+-- (created_at, id) < (курсор) + ORDER BY по тем же колонкам. С составным
+-- индексом (владелец, ключ) каждая страница - короткий проход по индексу.
+
+CREATE INDEX IF NOT EXISTS idx_workouts_created_by_page
+    ON workouts(created_by, created_at DESC, id DESC)
+    WHERE is_active = true;
+
+CREATE INDEX IF NOT EXISTS idx_team_players_roster_page
+    ON team_players(team_id, (COALESCE(jersey_number, 2147483647)), id)
+    WHERE is_active = TRUE;
+
+-- Таблицы тестов создаются вне миграций - индексы, только если они есть
+DO $$
+BEGIN
+    IF to_regclass('test_results') IS NOT NULL THEN
+        CREATE INDEX IF NOT EXISTS idx_test_results_user_page
+            ON test_results(user_id, tested_at DESC, id DESC);
+    END IF;
+
+    IF to_regclass('test_sets') IS NOT NULL THEN
+        CREATE INDEX IF NOT EXISTS idx_test_sets_created_by_page
+            ON test_sets(created_by, created_at DESC, id DESC)
+            WHERE is_active = true;
+    END IF;
+END $$;
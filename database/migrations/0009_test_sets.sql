@@ -0,0 +1,67 @@
+-- ===== МИГРАЦИЯ 0009: БАТАРЕИ ТЕСТОВ =====
+-- Таблицы батарей тестов раньше создавались вне миграций, и 0005/0008 меняли
+-- их, только если они уже были. Обработчики вставляют через ON CONFLICT по
+-- уникальным ключам 0005 - без индексов такие вставки падают. Теперь таблицы
+-- и ключи создаются здесь (для существующих таблиц - только недостающее).
+
+CREATE TABLE IF NOT EXISTS test_sets (
+    id SERIAL PRIMARY KEY,
+    name VARCHAR(200) NOT NULL,
+    description TEXT,
+    created_by INTEGER REFERENCES users(id),
+    visibility VARCHAR(20) DEFAULT 'private',
+    access_code VARCHAR(20) UNIQUE DEFAULT ('TS-' || UPPER(SUBSTR(MD5(RANDOM()::text), 1, 6))),
+    is_active BOOLEAN DEFAULT true,
+    creation_key VARCHAR(32),
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS test_set_exercises (
+    id SERIAL PRIMARY KEY,
+    test_set_id INTEGER REFERENCES test_sets(id) ON DELETE CASCADE,
+    exercise_id INTEGER REFERENCES exercises(id),
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS test_set_participants (
+    id SERIAL PRIMARY KEY,
+    test_set_id INTEGER REFERENCES test_sets(id) ON DELETE CASCADE,
+    user_id INTEGER REFERENCES users(id) ON DELETE CASCADE,
+    joined_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS test_set_results (
+    id SERIAL PRIMARY KEY,
+    test_set_id INTEGER REFERENCES test_sets(id) ON DELETE CASCADE,
+    participant_id INTEGER REFERENCES test_set_participants(id) ON DELETE CASCADE,
+    exercise_id INTEGER REFERENCES exercises(id),
+    result_value DECIMAL(10,2),
+    result_unit VARCHAR(20),
+    tested_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Ключи идемпотентности (0005 пропускал их, если таблиц еще не было)
+ALTER TABLE test_sets ADD COLUMN IF NOT EXISTS creation_key VARCHAR(32);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_test_sets_creation_key
+    ON test_sets(created_by, creation_key);
+
+DELETE FROM test_set_exercises a
+USING test_set_exercises b
+WHERE a.test_set_id = b.test_set_id
+  AND a.exercise_id = b.exercise_id
+  AND a.id > b.id;
+CREATE UNIQUE INDEX IF NOT EXISTS idx_test_set_exercises_unique
+    ON test_set_exercises(test_set_id, exercise_id);
+
+DELETE FROM test_set_participants a
+USING test_set_participants b
+WHERE a.test_set_id = b.test_set_id
+  AND a.user_id = b.user_id
+  AND a.id > b.id;
+CREATE UNIQUE INDEX IF NOT EXISTS idx_test_set_participants_unique
+    ON test_set_participants(test_set_id, user_id);
+
+-- Индекс постраничного списка батарей (0008 тоже пропускал его)
+CREATE INDEX IF NOT EXISTS idx_test_sets_created_by_page
+    ON test_sets(created_by, created_at DESC, id DESC)
+    WHERE is_active = true;
@@ -0,0 +1,14 @@
+-- ===== МИГРАЦИЯ 0010: ЗАХВАТ СТРОК ОЧЕРЕДИ РАССЫЛОК =====
+-- Экземпляр бота забирает строки в статус 'sending' со своим claimed_by,
+-- чтобы несколько экземпляров не досылали одно и то же. claimed_at
+-- продлевается, пока экземпляр жив; зависшие захваты забираются заново.
+
+ALTER TABLE broadcast_queue DROP CONSTRAINT IF EXISTS broadcast_queue_status_check;
+ALTER TABLE broadcast_queue ADD CONSTRAINT broadcast_queue_status_check
+    CHECK (status IN ('pending', 'sending', 'sent', 'failed'));
+
+ALTER TABLE broadcast_queue ADD COLUMN IF NOT EXISTS claimed_by VARCHAR(32);
+ALTER TABLE broadcast_queue ADD COLUMN IF NOT EXISTS claimed_at TIMESTAMP WITH TIME ZONE;
+
+CREATE INDEX IF NOT EXISTS idx_broadcast_queue_sending
+    ON broadcast_queue(claimed_at) WHERE status = 'sending';
@@ -0,0 +1,177 @@
+"""
+migrator.py - Версионные миграции схемы БД
+Файлы database/migrations/NNNN_название.sql применяются по порядку, каждый
+в своей транзакции; версия и контрольная сумма файла пишутся в schema_version.
+При старте бота, если схема актуальна, выполняется один SELECT по крошечной
+таблице - без DDL и блокировок на рабочих таблицах.
+
+Ручной запуск:
+    python -m database.migrator status
+    python -m database.migrator up
+"""
+import asyncio
+import hashlib
+import logging
+import re
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import asyncpg
+
+logger = logging.getLogger(__name__)
+
+MIGRATIONS_DIR = Path(__file__).resolve().parent / 'migrations'
+
+# Ключ pg_advisory_lock: несколько экземпляров бота не мигрируют одновременно
+ADVISORY_LOCK_KEY = 0x53504254  # 'SPBT'
+
+_FILE_RE = re.compile(r'^(\d{4})_([a-z0-9_]+)\.sql$')
+
+_CREATE_VERSION_TABLE = """
+    CREATE TABLE IF NOT EXISTS schema_version (
+        version INTEGER PRIMARY KEY,
+        name VARCHAR(200) NOT NULL,
+        checksum CHAR(64) NOT NULL,
+        applied_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+        execution_ms INTEGER
+    )
+"""
+
+
+class MigrationError(Exception):
+    """Схема в БД не совпадает с файлами миграций"""
+
+
+@dataclass(frozen=True)
+class Migration:
+    version: int
+    name: str
+    sql: str
+    checksum: str
+
+
+def load_migrations(directory: Path = MIGRATIONS_DIR) -> List[Migration]:
+    """Прочитать файлы миграций, отсортированные по версии"""
+    migrations = []
+    for path in sorted(directory.glob('*.sql')):
+        match = _FILE_RE.match(path.name)
+        if not match:
+            raise MigrationError(f"Неверное имя файла миграции: {path.name}")
+        sql = path.read_text(encoding='utf-8')
+        migrations.append(Migration(
+            version=int(match.group(1)),
+            name=match.group(2),
+            sql=sql,
+            checksum=hashlib.sha256(sql.encode('utf-8')).hexdigest(),
+        ))
+
+    versions = [m.version for m in migrations]
+    if len(set(versions)) != len(versions):
+        raise MigrationError("Повторяющиеся номера миграций")
+    return migrations
+
+
+async def _applied(conn: asyncpg.Connection) -> Optional[Dict[int, str]]:
+    """version -> checksum; None - таблицы schema_version еще нет"""
+    try:
+        rows = await conn.fetch("SELECT version, checksum FROM schema_version")
+    except asyncpg.UndefinedTableError:
+        return None
+    return {row['version']: row['checksum'] for row in rows}
+
+
+def _pending(migrations: List[Migration], applied: Dict[int, str]) -> List[Migration]:
+    """Проверить контрольные суммы примененных и вернуть оставшиеся"""
+    for migration in migrations:
+        checksum = applied.get(migration.version)
+        if checksum is not None and checksum != migration.checksum:
+            raise MigrationError(
+                f"Миграция {migration.version:04d}_{migration.name} изменена после применения "
+                f"(контрольная сумма не совпадает)"
+            )
+    known = {m.version for m in migrations}
+    unknown = sorted(set(applied) - known)
+    if unknown:
+        raise MigrationError(f"В БД есть миграции, которых нет в коде: {unknown}")
+    return [m for m in migrations if m.version not in applied]
+
+
+async def run_migrations(pool: asyncpg.Pool, migrations: Optional[List[Migration]] = None) -> int:
+    """Применить недостающие миграции, вернуть их количество"""
+    if migrations is None:
+        migrations = load_migrations()
+
+    # Быстрый путь: схема актуальна
+    async with pool.acquire() as conn:
+        applied = await _applied(conn)
+    if applied is not None and not _pending(migrations, applied):
+        logger.info(f"🗂 Схема БД актуальна (версия {max(applied, default=0)})")
+        return 0
+
+    async with pool.acquire() as conn:
+        await conn.execute("SELECT pg_advisory_lock($1)", ADVISORY_LOCK_KEY)
+        try:
+            await conn.execute(_CREATE_VERSION_TABLE)
+            # Пока ждали блокировку, другой экземпляр мог все применить
+            pending = _pending(migrations, await _applied(conn))
+
+            for migration in pending:
+                started = time.perf_counter()
+                async with conn.transaction():
+                    await conn.execute(migration.sql)
+                    await conn.execute("""
+                        INSERT INTO schema_version (version, name, checksum, execution_ms)
+                        VALUES ($1, $2, $3, $4)
+                    """, migration.version, migration.name, migration.checksum,
+                        int((time.perf_counter() - started) * 1000))
+                logger.info(f"🗂 Применена миграция {migration.version:04d}_{migration.name}")
+        finally:
+            await conn.execute("SELECT pg_advisory_unlock($1)", ADVISORY_LOCK_KEY)
+
+    return len(pending)
+
+
+async def migration_status(pool: asyncpg.Pool) -> List[dict]:
+    """Состояние каждой миграции: applied / pending / changed"""
+    async with pool.acquire() as conn:
+        applied = await _applied(conn) or {}
+
+    status = []
+    for migration in load_migrations():
+        checksum = applied.get(migration.version)
+        if checksum is None:
+            state = 'pending'
+        elif checksum != migration.checksum:
+            state = 'changed'
+        else:
+            state = 'applied'
+        status.append({'version': migration.version, 'name': migration.name, 'state': state})
+    return status
+
+
+async def _cli(command: str):
+    from config import config
+    from .database import db_manager
+
+    await db_manager.init_database(config)
+    try:
+        if command == 'up':
+            count = await run_migrations(db_manager.pool)
+            print(f"Применено миграций: {count}")
+        else:
+            for item in await migration_status(db_manager.pool):
+                print(f"{item['version']:04d}_{item['name']:<30} {item['state']}")
+    finally:
+        await db_manager.close_pool()
+
+
+if __name__ == '__main__':
+    import sys
+
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(_cli(sys.argv[1] if len(sys.argv) > 1 else 'status'))
+
+
+__all__ = ['Migration', 'MigrationError', 'load_migrations', 'run_migrations', 'migration_status']
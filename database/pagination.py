@@ -0,0 +1,155 @@
+"""
+pagination.py - Постраничные списки по ключу (keyset)
+Вместо LIMIT/OFFSET страница выбирается условием по ключу сортировки:
+(created_at, id) < ($n, $m) и LIMIT page_size + 1 - по составному индексу
+это одинаково быстро для первой и для сотой страницы. Ключ последней
+(первой) строки страницы упаковывается в короткий непрозрачный курсор,
+который помещается в callback_data кнопок "назад/вперед".
+
+Запрос описывается один раз с местами {keyset} (условие в WHERE) и {order}
+(ORDER BY); KeysetQuery регистрирует в реестре три варианта: первая
+страница, страница после курсора и страница перед курсором.
+"""
+import logging
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Any, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+FORWARD = 'n'
+BACKWARD = 'p'
+
+_DIGITS = '0123456789abcdefghijklmnopqrstuvwxyz'
+_EPOCH = datetime(1970, 1, 1)
+_EPOCH_UTC = datetime(1970, 1, 1, tzinfo=timezone.utc)
+_MICROSECOND = timedelta(microseconds=1)
+
+
+# ===== КУРСОРЫ =====
+
+def _base36(value: int) -> str:
+    if value < 0:
+        return '-' + _base36(-value)
+    digits = []
+    while True:
+        value, rest = divmod(value, 36)
+        digits.append(_DIGITS[rest])
+        if not value:
+            return ''.join(reversed(digits))
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    """Ключ строки -> курсор ('.' между значениями; int и datetime)"""
+    parts = []
+    for value in values:
+        if isinstance(value, datetime):
+            if value.tzinfo is None:
+                micros = (value - _EPOCH) // _MICROSECOND
+                parts.append('t' + _base36(micros))
+            else:
+                micros = (value - _EPOCH_UTC) // _MICROSECOND
+                parts.append('z' + _base36(micros))
+        elif isinstance(value, int):
+            parts.append(_base36(value))
+        else:
+            raise TypeError(f"Ключ курсора: неподдерживаемый тип {type(value).__name__}")
+    return '.'.join(parts)
+
+
+def decode_cursor(cursor: str) -> Tuple[Any, ...]:
+    """Курсор -> значения ключа (ValueError - курсор поврежден)"""
+    values = []
+    for part in cursor.split('.'):
+        if part[:1] == 't':
+            values.append(_EPOCH + int(part[1:], 36) * _MICROSECOND)
+        elif part[:1] == 'z':
+            values.append(_EPOCH_UTC + int(part[1:], 36) * _MICROSECOND)
+        else:
+            values.append(int(part, 36))
+    return tuple(values)
+
+
+# ===== СТРАНИЦЫ =====
+
+@dataclass
+class Page:
+    items: List[Any]
+    has_prev: bool
+    has_next: bool
+    prev_cursor: Optional[str] = None
+    next_cursor: Optional[str] = None
+
+
+class KeysetQuery:
+    """Запрос списка с постраничной выборкой по ключу
+
+    registry - реестр запросов (queries.py), в нем варианты получают имена
+    name, name_after, name_before;
+    sql - текст с {keyset} в WHERE и {order} в ORDER BY (LIMIT добавляется сам);
+    key - ((выражение, колонка результата), ...) уникальный ключ сортировки;
+    params - сколько своих параметров ($1..$params) у запроса.
+    """
+
+    def __init__(self, registry, name: str, sql: str, key: Sequence[Tuple[str, str]],
+                 params: int = 1, descending: bool = True):
+        self.name = name
+        self.columns = tuple(column for _, column in key)
+        expressions = ', '.join(expression for expression, _ in key)
+        cursor_params = ', '.join(f"${params + i + 1}" for i in range(len(key)))
+        row = f"({expressions})" if len(key) > 1 else expressions
+        bound = f"({cursor_params})" if len(key) > 1 else cursor_params
+        forward, backward = ('<', '>') if descending else ('>', '<')
+        direction = 'DESC' if descending else 'ASC'
+        reverse = 'ASC' if descending else 'DESC'
+
+        def variant(suffix, keyset, order_direction, limit_param):
+            order = ', '.join(f"{expression} {order_direction}" for expression, _ in key)
+            text = sql.format(keyset=keyset, order=order).rstrip() + f"\n    LIMIT ${limit_param}\n"
+            return registry.add(f"{name}{suffix}", text)
+
+        self.first = variant('', 'TRUE', direction, params + 1)
+        self.after = variant('_after', f"{row} {forward} {bound}", direction, params + len(key) + 1)
+        self.before = variant('_before', f"{row} {backward} {bound}", reverse, params + len(key) + 1)
+
+    def _key(self, row) -> str:
+        return encode_cursor([row[column] for column in self.columns])
+
+    async def page(self, conn, *args, cursor: Optional[str] = None,
+                   direction: str = FORWARD, size: int = 10) -> Page:
+        """Страница после (FORWARD) или перед (BACKWARD) курсором; без курсора - первая"""
+        key: Tuple[Any, ...] = ()
+        if cursor:
+            try:
+                key = decode_cursor(cursor)
+            except ValueError:
+                logger.warning(f"Поврежденный курсор {self.name}: {cursor!r}")
+            if len(key) != len(self.columns):
+                key = ()
+
+        if not key:
+            rows = await self.first.fetch(conn, *args, size + 1)
+            has_prev, has_next = False, len(rows) > size
+            rows = rows[:size]
+        elif direction == BACKWARD:
+            rows = await self.before.fetch(conn, *args, *key, size + 1)
+            has_prev, has_next = len(rows) > size, True
+            rows = rows[:size][::-1]
+        else:
+            rows = await self.after.fetch(conn, *args, *key, size + 1)
+            has_prev, has_next = True, len(rows) > size
+            rows = rows[:size]
+
+        if not rows:
+            if key:
+                # За курсором ничего не осталось (строки удалили) - с начала
+                return await self.page(conn, *args, size=size)
+            return Page([], False, False)
+        return Page(
+            rows, has_prev, has_next,
+            prev_cursor=self._key(rows[0]) if has_prev else None,
+            next_cursor=self._key(rows[-1]) if has_next else None,
+        )
+
+
+__all__ = ['KeysetQuery', 'Page', 'FORWARD', 'BACKWARD', 'encode_cursor', 'decode_cursor']
@@ -0,0 +1,294 @@
+"""
+pool_metrics.py - Метрики пула соединений и запросов
+Ожидание pool.acquire, гистограммы времени запросов по имени, загрузка пула
+и выборка медленных запросов. Отдается в формате Prometheus
+(services/metrics_server.py) и командой /dbstats (handlers/admin.py).
+
+Пул оборачивается в InstrumentedPool; время запросов приходит из
+реестра queries.py (по имени запроса) и из query logger asyncpg для
+остальных запросов (имя - "операция:таблица").
+"""
+import asyncio
+import logging
+import re
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Callable, Deque, Dict, List, Optional, Tuple
+
+import asyncpg
+
+logger = logging.getLogger(__name__)
+
+# Границы корзин гистограмм (секунды)
+BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+# Сколько медленных запросов хранить
+SLOW_SAMPLES = 50
+
+_VERB_RE = re.compile(r'^\s*(\w+)')
+_TABLE_RE = re.compile(r'\b(?:FROM|INTO|UPDATE|JOIN)\s+([a-z_][a-z0-9_]*)', re.IGNORECASE)
+
+
+def query_label(sql: str) -> str:
+    """Имя для запроса вне реестра: "select:users", "with:one_rep_max" """
+    verb = _VERB_RE.match(sql)
+    table = _TABLE_RE.search(sql)
+    label = verb.group(1).lower() if verb else 'query'
+    if table:
+        label += f":{table.group(1).lower()}"
+    return label
+
+
+class Histogram:
+    """Накопительная гистограмма в стиле Prometheus"""
+
+    __slots__ = ('counts', 'count', 'sum', 'max')
+
+    def __init__(self):
+        self.counts = [0] * len(BUCKETS)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value: float):
+        self.count += 1
+        self.sum += value
+        if value > self.max:
+            self.max = value
+        for i, bound in enumerate(BUCKETS):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+
+    def quantile(self, q: float) -> float:
+        """Оценка квантиля по верхней границе корзины"""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for bound, count in zip(BUCKETS, self.counts):
+            seen += count
+            if seen >= rank:
+                return bound
+        return self.max
+
+    def cumulative(self) -> List[Tuple[float, int]]:
+        result, total = [], 0
+        for bound, count in zip(BUCKETS, self.counts):
+            total += count
+            result.append((bound, total))
+        return result
+
+
+@dataclass
+class SlowQuery:
+    at: float
+    name: str
+    elapsed: float
+    sql: str
+    error: Optional[str] = None
+
+
+class PoolMetrics:
+    """Все метрики БД процесса"""
+
+    def __init__(self, slow_threshold: float = 0.2):
+        self.slow_threshold = slow_threshold
+        self.pool: Optional[asyncpg.Pool] = None
+        self.acquire_wait = Histogram()
+        self.acquire_timeouts = 0
+        self.in_use = 0
+        self.max_in_use = 0
+        self.waiting = 0
+        self.queries: Dict[str, Histogram] = {}
+        self.errors: Dict[str, int] = {}
+        self.slow: Deque[SlowQuery] = deque(maxlen=SLOW_SAMPLES)
+        # SQL, которые уже учитывает реестр queries.py (не считать дважды)
+        self.named_sql: set = set()
+        # Подписчики на время БД (elapsed) - профилирование апдейтов
+        self.listeners: List[Callable[[float], None]] = []
+
+    # ===== ЗАПИСЬ =====
+
+    def _notify(self, elapsed: float):
+        for listener in self.listeners:
+            listener(elapsed)
+
+    def observe_query(self, name: str, elapsed: float, sql: str, error: Optional[BaseException] = None):
+        self._notify(elapsed)
+        histogram = self.queries.get(name)
+        if histogram is None:
+            histogram = self.queries[name] = Histogram()
+        histogram.observe(elapsed)
+
+        if error is not None:
+            self.errors[name] = self.errors.get(name, 0) + 1
+        if elapsed >= self.slow_threshold:
+            self.slow.append(SlowQuery(
+                time.time(), name, elapsed, ' '.join(sql.split())[:300],
+                type(error).__name__ if error is not None else None
+            ))
+            logger.warning(f"🐢 Медленный запрос {name}: {elapsed * 1000:.0f} мс")
+
+    def on_query(self, record):
+        """Колбэк conn.add_query_logger для запросов вне реестра"""
+        if record.query in self.named_sql:
+            return
+        self.observe_query(query_label(record.query), record.elapsed, record.query, record.exception)
+
+    async def attach(self, conn):
+        """init-колбэк пула: подписаться на запросы соединения"""
+        conn.add_query_logger(self.on_query)
+
+    # ===== ЧТЕНИЕ =====
+
+    def pool_state(self) -> dict:
+        pool = self.pool
+        if pool is None:
+            return {'size': 0, 'idle': 0, 'min_size': 0, 'max_size': 0,
+                    'in_use': self.in_use, 'max_in_use': self.max_in_use, 'waiting': self.waiting}
+        return {
+            'size': pool.get_size(),
+            'idle': pool.get_idle_size(),
+            'min_size': pool.get_min_size(),
+            'max_size': pool.get_max_size(),
+            'in_use': self.in_use,
+            'max_in_use': self.max_in_use,
+            'waiting': self.waiting,
+        }
+
+    def top_queries(self, limit: int = 10) -> List[dict]:
+        """Запросы по суммарному времени, самые затратные первыми"""
+        rows = [
+            {
+                'name': name,
+                'calls': h.count,
+                'total_ms': h.sum * 1000,
+                'avg_ms': h.sum * 1000 / h.count if h.count else 0.0,
+                'p95_ms': h.quantile(0.95) * 1000,
+                'max_ms': h.max * 1000,
+                'errors': self.errors.get(name, 0),
+            }
+            for name, h in self.queries.items()
+        ]
+        rows.sort(key=lambda r: r['total_ms'], reverse=True)
+        return rows[:limit]
+
+    def render_prometheus(self) -> str:
+        """Текстовый формат Prometheus"""
+        lines = []
+
+        def histogram(metric: str, help_text: str, series: List[Tuple[str, Histogram]]):
+            lines.append(f"# HELP {metric} {help_text}")
+            lines.append(f"# TYPE {metric} histogram")
+            for labels, h in series:
+                sep = ',' if labels else ''
+                for bound, total in h.cumulative():
+                    lines.append(f'{metric}_bucket{{{labels}{sep}le="{bound}"}} {total}')
+                lines.append(f'{metric}_bucket{{{labels}{sep}le="+Inf"}} {h.count}')
+                suffix = f'{{{labels}}}' if labels else ''
+                lines.append(f'{metric}_sum{suffix} {h.sum:.6f}')
+                lines.append(f'{metric}_count{suffix} {h.count}')
+
+        def gauge(metric: str, help_text: str, value, kind: str = 'gauge'):
+            lines.append(f"# HELP {metric} {help_text}")
+            lines.append(f"# TYPE {metric} {kind}")
+            lines.append(f"{metric} {value}")
+
+        state = self.pool_state()
+        gauge('sportbot_db_pool_size', 'Открытых соединений в пуле', state['size'])
+        gauge('sportbot_db_pool_idle', 'Свободных соединений', state['idle'])
+        gauge('sportbot_db_pool_max_size', 'Максимальный размер пула', state['max_size'])
+        gauge('sportbot_db_pool_in_use', 'Соединений выдано', state['in_use'])
+        gauge('sportbot_db_pool_waiting', 'Ожидают соединение', state['waiting'])
+        gauge('sportbot_db_pool_acquire_timeouts_total', 'Таймауты acquire',
+              self.acquire_timeouts, 'counter')
+
+        histogram('sportbot_db_pool_acquire_seconds', 'Ожидание соединения из пула',
+                  [('', self.acquire_wait)])
+        histogram('sportbot_db_query_seconds', 'Время выполнения запросов',
+                  [(f'query="{name}"', h) for name, h in sorted(self.queries.items())])
+
+        lines.append("# HELP sportbot_db_query_errors_total Ошибки запросов")
+        lines.append("# TYPE sportbot_db_query_errors_total counter")
+        for name, count in sorted(self.errors.items()):
+            lines.append(f'sportbot_db_query_errors_total{{query="{name}"}} {count}')
+
+        return '\n'.join(lines) + '\n'
+
+    def reset(self):
+        self.acquire_wait = Histogram()
+        self.acquire_timeouts = 0
+        self.max_in_use = self.in_use
+        self.queries.clear()
+        self.errors.clear()
+        self.slow.clear()
+
+
+class _AcquireContext:
+    __slots__ = ('_pool', '_timeout', '_conn')
+
+    def __init__(self, pool: 'InstrumentedPool', timeout: Optional[float]):
+        self._pool = pool
+        self._timeout = timeout
+        self._conn = None
+
+    async def __aenter__(self):
+        self._conn = await self._pool._acquire(self._timeout)
+        return self._conn
+
+    async def __aexit__(self, *exc):
+        conn, self._conn = self._conn, None
+        await self._pool.release(conn)
+
+    def __await__(self):
+        return self._pool._acquire(self._timeout).__await__()
+
+
+class InstrumentedPool:
+    """Обертка asyncpg.Pool: замер ожидания acquire и загрузки пула.
+    Остальные атрибуты и методы берутся у исходного пула."""
+
+    def __init__(self, pool: asyncpg.Pool, metrics: PoolMetrics):
+        self._pool = pool
+        self._metrics = metrics
+        metrics.pool = pool
+
+    def acquire(self, *, timeout: Optional[float] = None) -> _AcquireContext:
+        return _AcquireContext(self, timeout)
+
+    async def _acquire(self, timeout: Optional[float]):
+        metrics = self._metrics
+        metrics.waiting += 1
+        started = time.perf_counter()
+        try:
+            conn = await self._pool.acquire(timeout=timeout)
+        except asyncio.TimeoutError:
+            metrics.acquire_timeouts += 1
+            raise
+        finally:
+            metrics.waiting -= 1
+            waited = time.perf_counter() - started
+            metrics.acquire_wait.observe(waited)
+            metrics._notify(waited)
+
+        metrics.in_use += 1
+        if metrics.in_use > metrics.max_in_use:
+            metrics.max_in_use = metrics.in_use
+        return conn
+
+    async def release(self, conn, *, timeout: Optional[float] = None):
+        try:
+            await self._pool.release(conn, timeout=timeout)
+        finally:
+            self._metrics.in_use -= 1
+
+    def __getattr__(self, name):
+        return getattr(self._pool, name)
+
+
+# Глобальный экземпляр (порог медленных запросов - config.DB_SLOW_QUERY_MS)
+db_metrics = PoolMetrics()
+
+__all__ = ['PoolMetrics', 'InstrumentedPool', 'Histogram', 'SlowQuery', 'db_metrics', 'query_label']
@@ -0,0 +1,350 @@
+"""
+queries.py - Реестр горячих SQL запросов
+Каждый запрос имеет имя и готовится (PREPARE) один раз на соединение пула:
+в init-колбэке пула или лениво при первом вызове. Вызовы идут через
+объекты Query (USER_BY_TELEGRAM_ID.fetchrow(conn, ...)), которые заодно
+пишут время выполнения по имени запроса в db_metrics (pool_metrics.py).
+"""
+import logging
+import time
+from typing import Any, Dict, List, Optional
+
+import asyncpg
+
+from .pagination import KeysetQuery
+from .pool_metrics import db_metrics
+
+logger = logging.getLogger(__name__)
+
+
+class PreparedConnection(asyncpg.Connection):
+    """Соединение пула с подготовленными запросами реестра (имя -> statement)"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.prepared: Dict[str, Any] = {}
+
+
+class Query:
+    """Именованный запрос из реестра"""
+
+    __slots__ = ('name', 'sql')
+
+    def __init__(self, name: str, sql: str):
+        self.name = name
+        self.sql = sql
+
+    async def _statement(self, conn, refresh: bool = False):
+        prepared = getattr(conn, 'prepared', None)
+        if prepared is None:
+            # Соединение не из пула с PreparedConnection - обычный кэш asyncpg
+            return None
+        statement = None if refresh else prepared.get(self.name)
+        if statement is None:
+            statement = prepared[self.name] = await conn.prepare(self.sql)
+        return statement
+
+    async def _run(self, conn, method: str, args):
+        started = time.perf_counter()
+        error = None
+        try:
+            statement = await self._statement(conn)
+            if statement is None:
+                return await getattr(conn, method)(self.sql, *args)
+            try:
+                return await getattr(statement, method)(*args)
+            except asyncpg.InvalidCachedStatementError:
+                # Схема изменилась (миграция) - готовим заново
+                statement = await self._statement(conn, refresh=True)
+                return await getattr(statement, method)(*args)
+        except Exception as e:
+            error = e
+            raise
+        finally:
+            db_metrics.observe_query(self.name, time.perf_counter() - started, self.sql, error)
+
+    async def fetch(self, conn, *args) -> List[asyncpg.Record]:
+        return await self._run(conn, 'fetch', args)
+
+    async def fetchrow(self, conn, *args) -> Optional[asyncpg.Record]:
+        return await self._run(conn, 'fetchrow', args)
+
+    async def fetchval(self, conn, *args) -> Any:
+        return await self._run(conn, 'fetchval', args)
+
+
+class QueryRegistry:
+    """Все именованные запросы"""
+
+    def __init__(self):
+        self._queries: Dict[str, Query] = {}
+
+    def add(self, name: str, sql: str) -> Query:
+        if name in self._queries:
+            raise ValueError(f"Запрос {name} уже зарегистрирован")
+        query = self._queries[name] = Query(name, sql)
+        db_metrics.named_sql.add(sql)
+        return query
+
+    def __getitem__(self, name: str) -> Query:
+        return self._queries[name]
+
+    async def prepare_connection(self, conn):
+        """init-колбэк пула: подготовить все запросы на новом соединении"""
+        prepared = getattr(conn, 'prepared', None)
+        if prepared is None:
+            return
+        for query in self._queries.values():
+            try:
+                prepared[query.name] = await conn.prepare(query.sql)
+            except asyncpg.PostgresError as e:
+                # Например, таблицы еще нет до миграций - подготовим при первом вызове
+                logger.debug(f"Запрос {query.name} не подготовлен: {e}")
+
+    def stats(self) -> List[dict]:
+        """Статистика по запросам реестра, самые затратные первыми"""
+        return [row for row in db_metrics.top_queries(limit=len(db_metrics.queries))
+                if row['name'] in self._queries]
+
+
+queries = QueryRegistry()
+
+
+# ===== ПОЛЬЗОВАТЕЛИ =====
+
+USER_BY_TELEGRAM_ID = queries.add('user_by_telegram_id', """
+    SELECT * FROM users WHERE telegram_id = $1
+""")
+
+# ===== ТРЕНИРОВКИ =====
+
+WORKOUT_DETAILS = queries.add('workout_details', """
+    SELECT w.*, u.first_name AS creator_name, u.last_name AS creator_lastname
+    FROM workouts w
+    LEFT JOIN users u ON w.created_by = u.id
+    WHERE w.id = $1 AND w.is_active = true
+""")
+
+WORKOUT_EXERCISES = queries.add('workout_exercises', """
+    SELECT we.*, e.name AS exercise_name, e.muscle_group, e.category
+    FROM workout_exercises we
+    JOIN exercises e ON we.exercise_id = e.id
+    WHERE we.workout_id = $1
+    ORDER BY
+        CASE we.phase
+            WHEN 'warmup' THEN 1
+            WHEN 'nervous_prep' THEN 2
+            WHEN 'main' THEN 3
+            WHEN 'cooldown' THEN 4
+            ELSE 5
+        END,
+        we.order_in_phase
+""")
+
+USER_WORKOUTS = KeysetQuery(queries, 'user_workouts', """
+    SELECT w.*, COUNT(we.id) AS exercise_count
+    FROM workouts w
+    LEFT JOIN workout_exercises we ON w.id = we.workout_id
+    WHERE w.created_by = $1 AND w.is_active = true AND {keyset}
+    GROUP BY w.id
+    ORDER BY {order}
+""", key=(('w.created_at', 'created_at'), ('w.id', 'id')))
+
+# ===== ТЕСТЫ =====
+
+USER_TESTS = KeysetQuery(queries, 'user_tests', """
+    SELECT tr.*, e.name AS exercise_name, e.muscle_group
+    FROM test_results tr
+    JOIN exercises e ON tr.exercise_id = e.id
+    WHERE tr.user_id = $1 AND {keyset}
+    ORDER BY {order}
+""", key=(('tr.tested_at', 'tested_at'), ('tr.id', 'id')))
+
+# ===== БАТАРЕИ ТЕСТОВ =====
+
+COACH_BATTERIES = KeysetQuery(queries, 'coach_batteries', """
+    SELECT
+        ts.*,
+        COUNT(DISTINCT tse.id) AS exercises_count,
+        COUNT(DISTINCT tsp.id) AS participants_count
+    FROM test_sets ts
+    LEFT JOIN test_set_exercises tse ON ts.id = tse.test_set_id
+    LEFT JOIN test_set_participants tsp ON ts.id = tsp.test_set_id
+    WHERE ts.created_by = $1 AND ts.is_active = true AND {keyset}
+    GROUP BY ts.id
+    ORDER BY {order}
+""", key=(('ts.created_at', 'created_at'), ('ts.id', 'id')))
+
+# ===== КОМАНДЫ =====
+
+COACH_TEAMS = queries.add('coach_teams', """
+    SELECT t.*, COUNT(tp.id) AS players_count
+    FROM teams t
+    LEFT JOIN team_players tp ON t.id = tp.team_id AND tp.is_active = TRUE
+    WHERE t.coach_telegram_id = $1
+    GROUP BY t.id
+    ORDER BY t.created_at DESC
+""")
+
+TEAM_BY_ID = queries.add('team_by_id', """
+    SELECT t.*, COUNT(tp.id) AS players_count
+    FROM teams t
+    LEFT JOIN team_players tp ON t.id = tp.team_id AND tp.is_active = TRUE
+    WHERE t.id = $1
+    GROUP BY t.id
+""")
+
+TEAM_BY_ACCESS_CODE = queries.add('team_by_access_code', """
+    SELECT t.*, COUNT(tp.id) AS players_count
+    FROM teams t
+    LEFT JOIN team_players tp ON t.id = tp.team_id AND tp.is_active = TRUE
+    WHERE t.access_code = $1
+    GROUP BY t.id
+""")
+
+TEAM_PLAYERS = queries.add('team_players', """
+    SELECT * FROM team_players
+    WHERE team_id = $1 AND is_active = TRUE
+    ORDER BY jersey_number ASC NULLS LAST, first_name ASC
+""")
+
+# Ростер по страницам: игроки без номера - в конце (как NULLS LAST)
+TEAM_PLAYERS_PAGE = KeysetQuery(queries, 'team_players_page', """
+    SELECT *, COALESCE(jersey_number, 2147483647) AS jersey_key
+    FROM team_players
+    WHERE team_id = $1 AND is_active = TRUE AND {keyset}
+    ORDER BY {order}
+""", key=(('COALESCE(jersey_number, 2147483647)', 'jersey_key'), ('id', 'id')), descending=False)
+
+PLAYER_TEAMS = queries.add('player_teams', """
+    SELECT t.*, COUNT(tp2.id) AS players_count
+    FROM teams t
+    JOIN team_players tp ON t.id = tp.team_id
+    LEFT JOIN team_players tp2 ON t.id = tp2.team_id AND tp2.is_active = TRUE
+    WHERE tp.telegram_id = $1 AND tp.is_active = TRUE
+    GROUP BY t.id, tp.joined_at
+    ORDER BY tp.joined_at DESC
+""")
+
+COACH_STATISTICS = queries.add('coach_statistics', """
+    SELECT
+        (SELECT COUNT(*) FROM teams WHERE coach_telegram_id = $1) AS teams_count,
+        (SELECT COUNT(*) FROM team_players tp
+         JOIN teams t ON tp.team_id = t.id
+         WHERE t.coach_telegram_id = $1 AND tp.is_active = TRUE) AS team_players_count,
+        (SELECT COUNT(*) FROM individual_students
+         WHERE coach_telegram_id = $1 AND is_active = TRUE) AS individual_students_count
+""")
+
+# ===== 1ПМ =====
+
+RECORD_ONE_REP_MAX = queries.add('record_one_rep_max', """
+    WITH new_test AS (
+        INSERT INTO one_rep_max (
+            user_id, exercise_id, weight, reps, test_weight,
+            formula_brzycki, formula_epley, formula_alternative, formula_average
+        ) VALUES ($1, $2, $8, $4, $3, $5, $6, $7, $8)
+        RETURNING id, user_id, exercise_id, test_weight, reps, formula_average, tested_at
+    ), summary AS (
+        INSERT INTO one_rm_summary AS s (
+            user_id, exercise_id, best_1rm, best_test_weight, best_reps, best_tested_at,
+            last_1rm, prev_1rm, last_tested_at, tests_count
+        )
+        SELECT user_id, exercise_id, formula_average, test_weight, reps, tested_at,
+               formula_average, NULL, tested_at, 1
+        FROM new_test
+        ON CONFLICT (user_id, exercise_id) DO UPDATE SET
+            best_1rm = GREATEST(s.best_1rm, EXCLUDED.best_1rm),
+            best_test_weight = CASE WHEN EXCLUDED.best_1rm > s.best_1rm
+                                    THEN EXCLUDED.best_test_weight ELSE s.best_test_weight END,
+            best_reps = CASE WHEN EXCLUDED.best_1rm > s.best_1rm
+                             THEN EXCLUDED.best_reps ELSE s.best_reps END,
+            best_tested_at = CASE WHEN EXCLUDED.best_1rm > s.best_1rm
+                                  THEN EXCLUDED.best_tested_at ELSE s.best_tested_at END,
+            prev_1rm = s.last_1rm,
+            last_1rm = EXCLUDED.last_1rm,
+            last_tested_at = EXCLUDED.last_tested_at,
+            tests_count = s.tests_count + 1
+    ), daily AS (
+        INSERT INTO one_rm_daily AS d (user_id, tested_on, tests_count)
+        SELECT user_id, tested_at::date, 1 FROM new_test
+        ON CONFLICT (user_id, tested_on) DO UPDATE SET tests_count = d.tests_count + 1
+    )
+    SELECT id, tested_at FROM new_test
+""")
+
+ONE_RM_TOTALS = queries.add('one_rm_totals', """
+    SELECT COALESCE(SUM(s.tests_count), 0) AS total_tests,
+           (SELECT COALESCE(SUM(d.tests_count), 0) FROM one_rm_daily d
+            WHERE d.user_id = $1 AND d.tested_on > CURRENT_DATE - 30) AS monthly_tests
+    FROM one_rm_summary s
+    WHERE s.user_id = $1
+""")
+
+ONE_RM_BEST = queries.add('one_rm_best', """
+    SELECT e.name, s.best_1rm AS formula_average, s.best_tested_at AS tested_at
+    FROM one_rm_summary s
+    JOIN exercises e ON s.exercise_id = e.id
+    WHERE s.user_id = $1
+    ORDER BY s.best_1rm DESC
+    LIMIT 1
+""")
+
+ONE_RM_RECENT = queries.add('one_rm_recent', """
+    SELECT e.name, orm.weight, orm.reps, orm.formula_average,
+           orm.tested_at, orm.test_weight
+    FROM one_rep_max orm
+    JOIN exercises e ON orm.exercise_id = e.id
+    WHERE orm.user_id = $1
+    ORDER BY orm.tested_at DESC
+    LIMIT 5
+""")
+
+ONE_RM_RECORDS = queries.add('one_rm_records', """
+    SELECT e.name, e.muscle_group, s.best_1rm AS formula_average,
+           s.best_test_weight AS test_weight, s.best_reps AS reps,
+           s.best_tested_at AS tested_at, s.tests_count,
+           s.last_1rm - s.prev_1rm AS trend
+    FROM one_rm_summary s
+    JOIN exercises e ON s.exercise_id = e.id
+    WHERE s.user_id = $1
+    ORDER BY s.best_1rm DESC
+""")
+
+# ===== АНАЛИТИКА КОМАНД =====
+
+TEAM_REPORT = queries.add('team_report', """
+    WITH coach_teams AS (
+        SELECT id, name FROM teams
+        WHERE coach_telegram_id = $1 AND ($2::int IS NULL OR id = $2)
+    ), roster AS (
+        SELECT tp.team_id, tp.id AS player_id, tp.first_name, tp.last_name,
+               COALESCE(NULLIF(tp.position, ''), $3) AS position, u.id AS user_id
+        FROM team_players tp
+        JOIN coach_teams ct ON ct.id = tp.team_id
+        LEFT JOIN users u ON u.telegram_id = tp.telegram_id
+        WHERE tp.is_active = TRUE
+    ), board AS (
+        SELECT r.team_id, r.player_id, r.first_name, r.last_name, r.position,
+               s.exercise_id, s.best_1rm, s.last_1rm - s.prev_1rm AS delta, s.last_tested_at,
+               RANK() OVER (PARTITION BY r.team_id, s.exercise_id ORDER BY s.best_1rm DESC) AS rank,
+               PERCENT_RANK() OVER (PARTITION BY r.team_id, s.exercise_id ORDER BY s.best_1rm) AS percentile,
+               AVG(s.best_1rm) OVER (PARTITION BY r.team_id, s.exercise_id) AS team_avg,
+               AVG(s.best_1rm) OVER (PARTITION BY r.team_id, s.exercise_id, r.position) AS position_avg
+        FROM roster r
+        JOIN one_rm_summary s ON s.user_id = r.user_id
+    )
+    SELECT ct.id AS team_id, ct.name AS team_name,
+           (SELECT COUNT(*) FROM roster r WHERE r.team_id = ct.id) AS players_count,
+           (SELECT array_agg(r.user_id) FROM roster r
+            WHERE r.team_id = ct.id AND r.user_id IS NOT NULL) AS user_ids,
+           b.player_id, b.first_name, b.last_name, b.position, b.exercise_id,
+           b.best_1rm, b.delta, b.last_tested_at, b.rank, b.percentile,
+           b.team_avg, b.position_avg
+    FROM coach_teams ct
+    LEFT JOIN board b ON b.team_id = ct.id
+    ORDER BY ct.name, ct.id, b.exercise_id, b.rank
+""")
+
+
+__all__ = ['queries', 'Query', 'QueryRegistry', 'PreparedConnection']
@@ -0,0 +1,140 @@
+"""
+row_models.py - Отображение строк asyncpg.Record в модели
+Вместо ручного Model(id=row['id'], name=row['name'], ...) на каждую строку:
+конструктор генерируется один раз на пару (модель, набор колонок запроса) и
+берет значения из Record по индексам. Поля модели, которых нет в запросе,
+получают значения по умолчанию; лишние колонки запроса игнорируются.
+
+Для больших списков, где нужны одно-два поля (ростеры на тысячи
+спортсменов), есть ленивое представление row_view(): обертка над Record без
+копирования значений, с тем же набором атрибутов, что у модели.
+"""
+import dataclasses
+import logging
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple, Type, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar('T')
+
+# (модель, колонки запроса) -> сгенерированный конструктор
+_constructors: Dict[Tuple[type, Tuple[str, ...]], Callable[[Any], Any]] = {}
+_views: Dict[type, type] = {}
+
+_MISSING = object()
+
+
+def _columns(row) -> Tuple[str, ...]:
+    return tuple(row.keys())
+
+
+def _compile(cls: type, columns: Tuple[str, ...]) -> Callable[[Any], Any]:
+    """Сгенерировать from_row(r) для модели и порядка колонок"""
+    index = {name: i for i, name in enumerate(columns)}
+    namespace: Dict[str, Any] = {'_cls': cls, '_new': object.__new__}
+    values = []
+    for field in dataclasses.fields(cls):
+        if not field.init:
+            continue
+        if field.name in index:
+            values.append((field.name, f"r[{index[field.name]}]"))
+        elif field.default is not dataclasses.MISSING:
+            namespace[f"_d_{field.name}"] = field.default
+            values.append((field.name, f"_d_{field.name}"))
+        elif field.default_factory is not dataclasses.MISSING:
+            namespace[f"_f_{field.name}"] = field.default_factory
+            values.append((field.name, f"_f_{field.name}()"))
+        else:
+            raise KeyError(f"{cls.__name__}: в строке нет колонки {field.name!r}")
+
+    frozen = cls.__dataclass_params__.frozen
+    if frozen and '__slots__' in cls.__dict__ and not hasattr(cls, '__post_init__'):
+        # frozen __init__ ставит поля через object.__setattr__ - дескрипторы
+        # слотов напрямую заметно быстрее
+        lines = ["def from_row(r):", "    o = _new(_cls)"]
+        for name, value in values:
+            namespace[f"_s_{name}"] = cls.__dict__[name].__set__
+            lines.append(f"    _s_{name}(o, {value})")
+        lines.append("    return o")
+        source = '\n'.join(lines) + '\n'
+    else:
+        source = f"def from_row(r):\n    return _cls({', '.join(value for _, value in values)})\n"
+    exec(source, namespace)
+    return namespace['from_row']
+
+
+def _constructor(cls: type, row) -> Callable[[Any], Any]:
+    columns = _columns(row)
+    key = (cls, columns)
+    constructor = _constructors.get(key)
+    if constructor is None:
+        constructor = _constructors[key] = _compile(cls, columns)
+    return constructor
+
+
+def from_record(cls: Type[T], row) -> Optional[T]:
+    """Одна строка -> модель (None -> None)"""
+    if row is None:
+        return None
+    return _constructor(cls, row)(row)
+
+
+def from_records(cls: Type[T], rows: Sequence) -> List[T]:
+    """Строки одного запроса -> список моделей (колонки у всех строк одинаковые)"""
+    if not rows:
+        return []
+    return list(map(_constructor(cls, rows[0]), rows))
+
+
+# ===== ЛЕНИВЫЕ ПРЕДСТАВЛЕНИЯ =====
+
+class RowView:
+    """Атрибутный доступ к Record без копирования значений"""
+
+    __slots__ = ('_row',)
+    model: type = object
+
+    def __init__(self, row):
+        self._row = row
+
+    def materialize(self):
+        """Полноценная модель (например, чтобы сохранить дольше жизни запроса)"""
+        return from_record(self.model, self._row)
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({dict(self._row)!r})"
+
+
+def _view_property(field: dataclasses.Field):
+    name = field.name
+    if field.default is not dataclasses.MISSING:
+        default = field.default
+        return property(lambda self: self._row.get(name, default))
+    if field.default_factory is not dataclasses.MISSING:
+        factory = field.default_factory
+
+        def getter(self):
+            value = self._row.get(name, _MISSING)
+            return factory() if value is _MISSING else value
+        return property(getter)
+    return property(lambda self: self._row[name])
+
+
+def row_view(cls: type) -> type:
+    """Класс ленивого представления для модели-датакласса (один на модель)"""
+    view = _views.get(cls)
+    if view is None:
+        attrs: Dict[str, Any] = {'__slots__': (), 'model': cls}
+        for field in dataclasses.fields(cls):
+            attrs[field.name] = _view_property(field)
+        view = _views[cls] = type(f"{cls.__name__}View", (RowView,), attrs)
+    return view
+
+
+def view_records(cls: type, rows: Iterable) -> List[RowView]:
+    """Строки -> ленивые представления модели"""
+    view = row_view(cls)
+    return list(map(view, rows))
+
+
+__all__ = ['from_record', 'from_records', 'row_view', 'view_records', 'RowView']
@@ -0,0 +1,188 @@
+"""
+team_analytics.py - Аналитика команд тренера
+Рейтинги по упражнениям, перцентили, средние по позициям и прирост 1ПМ
+для всех команд тренера одним запросом (TEAM_REPORT из queries.py,
+оконные функции поверх one_rm_summary). Результат кэшируется в памяти;
+кэш сбрасывается при новом тесте любого игрока, попавшего в отчет, и по TTL.
+"""
+import logging
+import time
+from collections import defaultdict
+from dataclasses import dataclass, field
+from decimal import Decimal
+from typing import Dict, List, Optional, Set, Tuple
+
+import asyncpg
+
+from .queries import TEAM_REPORT
+
+logger = logging.getLogger(__name__)
+
+# Игрок без позиции попадает в эту группу
+NO_POSITION = 'Без позиции'
+
+
+@dataclass
+class LeaderboardRow:
+    player_id: int
+    first_name: str
+    last_name: Optional[str]
+    position: str
+    best_1rm: Decimal
+    delta: Optional[Decimal]
+    rank: int
+    percentile: float
+    last_tested_at: object = None
+
+    @property
+    def full_name(self) -> str:
+        return f"{self.first_name} {self.last_name or ''}".strip()
+
+
+@dataclass
+class TeamReport:
+    team_id: int
+    name: str
+    players_count: int = 0
+    # exercise_id -> рейтинг по убыванию лучшего 1ПМ
+    leaderboards: Dict[int, List[LeaderboardRow]] = field(default_factory=dict)
+    # exercise_id -> среднее по команде
+    team_avg: Dict[int, Decimal] = field(default_factory=dict)
+    # exercise_id -> {позиция: среднее}
+    position_avg: Dict[int, Dict[str, Decimal]] = field(default_factory=dict)
+
+    @property
+    def tested_count(self) -> int:
+        return len({row.player_id for rows in self.leaderboards.values() for row in rows})
+
+
+class TeamAnalytics:
+    """Отчеты по командам тренера с кэшем, зависящим от игроков"""
+
+    def __init__(self, ttl: float = 300.0):
+        self.ttl = ttl
+        self.pool: Optional[asyncpg.Pool] = None
+        self._cache: Dict[Tuple, Tuple[float, List[TeamReport]]] = {}
+        self._by_user: Dict[int, Set[Tuple]] = defaultdict(set)
+        self._by_team: Dict[int, Set[Tuple]] = defaultdict(set)
+        # key -> (user_ids, team_ids) отчета: чтобы убрать ключ из индексов при сбросе
+        self._deps: Dict[Tuple, Tuple[Set[int], Set[int]]] = {}
+        self.hits = 0
+        self.misses = 0
+
+    # ===== ОТЧЕТЫ =====
+
+    async def coach_dashboard(self, coach_telegram_id: int) -> List[TeamReport]:
+        """Все команды тренера с рейтингами (один запрос)"""
+        return await self._reports(coach_telegram_id, None)
+
+    async def team_report(self, coach_telegram_id: int, team_id: int) -> Optional[TeamReport]:
+        """Отчет по одной команде (None - команда не найдена или чужая)"""
+        reports = await self._reports(coach_telegram_id, team_id)
+        return reports[0] if reports else None
+
+    async def _reports(self, coach_telegram_id: int, team_id: Optional[int]) -> List[TeamReport]:
+        key = (coach_telegram_id, team_id)
+        cached = self._cache.get(key)
+        if cached is not None and cached[0] > time.monotonic():
+            self.hits += 1
+            return cached[1]
+
+        self.misses += 1
+        async with self.pool.acquire() as conn:
+            rows = await TEAM_REPORT.fetch(conn, coach_telegram_id, team_id, NO_POSITION)
+
+        reports, user_ids = self._build(rows)
+        self._store(key, reports, user_ids)
+        return reports
+
+    @staticmethod
+    def _build(rows) -> Tuple[List[TeamReport], Set[int]]:
+        reports: Dict[int, TeamReport] = {}
+        user_ids: Set[int] = set()
+
+        for row in rows:
+            report = reports.get(row['team_id'])
+            if report is None:
+                report = reports[row['team_id']] = TeamReport(
+                    row['team_id'], row['team_name'], row['players_count']
+                )
+                user_ids.update(row['user_ids'] or ())
+
+            exercise_id = row['exercise_id']
+            if exercise_id is None:
+                continue  # в команде нет ни одного теста
+
+            report.leaderboards.setdefault(exercise_id, []).append(LeaderboardRow(
+                player_id=row['player_id'],
+                first_name=row['first_name'],
+                last_name=row['last_name'],
+                position=row['position'],
+                best_1rm=row['best_1rm'],
+                delta=row['delta'],
+                rank=row['rank'],
+                percentile=float(row['percentile']),
+                last_tested_at=row['last_tested_at'],
+            ))
+            report.team_avg[exercise_id] = row['team_avg']
+            report.position_avg.setdefault(exercise_id, {})[row['position']] = row['position_avg']
+
+        return list(reports.values()), user_ids
+
+    # ===== КЭШ =====
+
+    def _store(self, key: Tuple, reports: List[TeamReport], user_ids: Set[int]):
+        self._drop(key)
+        now = time.monotonic()
+        # Заодно убираем истекшие отчеты, которые больше никто не запрашивал
+        for expired in [k for k, (expires, _) in self._cache.items() if expires <= now]:
+            self._drop(expired)
+
+        team_ids = {report.team_id for report in reports}
+        self._cache[key] = (now + self.ttl, reports)
+        self._deps[key] = (user_ids, team_ids)
+        for user_id in user_ids:
+            self._by_user[user_id].add(key)
+        for team_id in team_ids:
+            self._by_team[team_id].add(key)
+
+    def _drop(self, key: Tuple):
+        self._cache.pop(key, None)
+        user_ids, team_ids = self._deps.pop(key, ((), ()))
+        for index, ids in ((self._by_user, user_ids), (self._by_team, team_ids)):
+            for item_id in ids:
+                keys = index.get(item_id)
+                if keys is not None:
+                    keys.discard(key)
+                    if not keys:
+                        del index[item_id]
+
+    def invalidate_user(self, user_id: int):
+        """Новый тест игрока - сбросить отчеты, где он есть"""
+        for key in list(self._by_user.get(user_id, ())):
+            self._drop(key)
+
+    def invalidate_team(self, team_id: int):
+        """Изменился состав команды"""
+        for key in list(self._by_team.get(team_id, ())):
+            self._drop(key)
+
+    def invalidate_coach(self, coach_telegram_id: int):
+        """Новая/удаленная команда тренера"""
+        for key in [k for k in self._cache if k[0] == coach_telegram_id]:
+            self._drop(key)
+
+    def clear(self):
+        self._cache.clear()
+        self._deps.clear()
+        self._by_user.clear()
+        self._by_team.clear()
+
+    def stats(self) -> dict:
+        return {'size': len(self._cache), 'hits': self.hits, 'misses': self.misses}
+
+
+# Глобальный экземпляр (пул назначается в DatabaseManager.init_database)
+team_analytics = TeamAnalytics()
+
+__all__ = ['TeamAnalytics', 'TeamReport', 'LeaderboardRow', 'team_analytics', 'NO_POSITION']
@@ -10,9 +10,20 @@ from typing import List, Dict, Optional
 from dataclasses import dataclass
 from datetime import datetime, date
 
+from .pagination import FORWARD, Page
+from .row_models import from_record, from_records
+from .queries import (
+    COACH_TEAMS, TEAM_BY_ID, TEAM_BY_ACCESS_CODE, TEAM_PLAYERS, TEAM_PLAYERS_PAGE,
+    PLAYER_TEAMS, COACH_STATISTICS,
+)
+
 logger = logging.getLogger(__name__)
 
-@dataclass
+# Модели строк со __slots__; собираются из Record через row_models.from_records
+# (конструктор генерируется по колонкам запроса). Без frozen: frozen __init__
+# ставит каждое поле через object.__setattr__ и вдвое медленнее на ростерах.
+
+@dataclass(slots=True)
 class Team:
     id: int
     name: str
@@ -25,7 +36,7 @@ class Team:
     access_code: str = ""
     players_count: int = 0
 
-@dataclass
+@dataclass(slots=True)
 class TeamPlayer:
     id: int
     team_id: int
@@ -39,7 +50,7 @@ class TeamPlayer:
     is_active: bool
     joined_at: datetime
 
-@dataclass
+@dataclass(slots=True)
 class IndividualStudent:
     id: int
     coach_telegram_id: int
@@ -58,67 +69,6 @@ class TeamsDatabase:
     def __init__(self, db_pool: asyncpg.Pool):
         self.pool = db_pool
 
-    async def init_tables(self):
-        """Инициализация таблиц"""
-        try:
-            async with self.pool.acquire() as conn:
-                # Читаем схему и создаем таблицы
-                schema_sql = """
-                -- Таблица команд
-                CREATE TABLE IF NOT EXISTS teams (
-                    id SERIAL PRIMARY KEY,
-                    name VARCHAR(100) NOT NULL,
-                    description TEXT,
-                    coach_telegram_id BIGINT NOT NULL,
-                    sport_type VARCHAR(50) DEFAULT 'general',
-                    max_players INTEGER DEFAULT 25,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                );
-
-                -- Таблица игроков в командах
-                CREATE TABLE IF NOT EXISTS team_players (
-                    id SERIAL PRIMARY KEY,
-                    team_id INTEGER REFERENCES teams(id) ON DELETE CASCADE,
-                    first_name VARCHAR(100) NOT NULL,
-                    last_name VARCHAR(100),
-                    position VARCHAR(50),
-                    jersey_number INTEGER,
-                    telegram_id BIGINT,
-                    phone VARCHAR(20),
-                    birth_date DATE,
-                    is_active BOOLEAN DEFAULT TRUE,
-                    joined_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                );
-
-                -- Таблица индивидуальных подопечных
-                CREATE TABLE IF NOT EXISTS individual_students (
-                    id SERIAL PRIMARY KEY,
-                    coach_telegram_id BIGINT NOT NULL,
-                    first_name VARCHAR(100) NOT NULL,
-                    last_name VARCHAR(100),
-                    telegram_id BIGINT,
-                    phone VARCHAR(20),
-                    birth_date DATE,
-                    specialization VARCHAR(100),
-                    level VARCHAR(20) DEFAULT 'beginner',
-                    notes TEXT,
-                    is_active BOOLEAN DEFAULT TRUE,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                );
-
-                -- Индексы
-                CREATE INDEX IF NOT EXISTS idx_teams_coach ON teams(coach_telegram_id);
-                CREATE INDEX IF NOT EXISTS idx_team_players_team ON team_players(team_id);
-                CREATE INDEX IF NOT EXISTS idx_individual_students_coach ON individual_students(coach_telegram_id);
-                """
-
-                await conn.execute(schema_sql)
-                logger.info("✅ Teams database tables initialized")
-        except Exception as e:
-            logger.error(f"❌ Error initializing teams tables: {e}")
-            raise
-
     # ===== КОМАНДЫ =====
 
     async def create_team(self, coach_telegram_id: int, name: str, description: str = "", 
@@ -131,17 +81,7 @@ class TeamsDatabase:
                 RETURNING id, name, description, coach_telegram_id, sport_type, max_players, created_at, updated_at
             """, name, description, coach_telegram_id, sport_type, max_players)
 
-            team = Team(
-                id=row['id'],
-                name=row['name'],
-                description=row['description'],
-                coach_telegram_id=row['coach_telegram_id'],
-                sport_type=row['sport_type'],
-                max_players=row['max_players'],
-                created_at=row['created_at'],
-                updated_at=row['updated_at'],
-                players_count=0
-            )
+            team = from_record(Team, row)
 
             logger.info(f"✅ Created team: {name} (ID: {team.id}) by coach {coach_telegram_id}")
             return team
@@ -149,60 +89,14 @@ class TeamsDatabase:
     async def get_coach_teams(self, coach_telegram_id: int) -> List[Team]:
         """Получить команды тренера"""
         async with self.pool.acquire() as conn:
-            rows = await conn.fetch("""
-                SELECT t.*, COUNT(tp.id) as players_count
-                FROM teams t
-                LEFT JOIN team_players tp ON t.id = tp.team_id AND tp.is_active = TRUE
-                WHERE t.coach_telegram_id = $1
-                GROUP BY t.id
-                ORDER BY t.created_at DESC
-            """, coach_telegram_id)
-
-            teams = []
-            for row in rows:
-                teams.append(Team(
-                    id=row['id'],
-                    name=row['name'],
-                    description=row['description'],
-                    coach_telegram_id=row['coach_telegram_id'],
-                    sport_type=row['sport_type'],
-                    max_players=row['max_players'],
-                    created_at=row['created_at'],
-                    updated_at=row['updated_at'],
-                    players_count=row['players_count']
-                ))
-
-            return teams
+            rows = await COACH_TEAMS.fetch(conn, coach_telegram_id)
+        return from_records(Team, rows)
 
     async def get_team_by_id(self, team_id: int) -> Optional[Team]:
         """Получить команду по ID"""
         async with self.pool.acquire() as conn:
-            row = await conn.fetchrow("""
-                SELECT t.id, t.name, t.description, t.coach_telegram_id, 
-                    t.sport_type, t.max_players, t.created_at, t.updated_at,
-                    t.access_code, COUNT(tp.id) as players_count
-                FROM teams t
-                LEFT JOIN team_players tp ON t.id = tp.team_id AND tp.is_active = TRUE
-                WHERE t.id = $1
-                GROUP BY t.id, t.name, t.description, t.coach_telegram_id, 
-                        t.sport_type, t.max_players, t.created_at, t.updated_at, t.access_code
-            """, team_id)
-
-            if not row:
-                return None
-
-            return Team(
-                id=row['id'],
-                name=row['name'],
-                description=row['description'],
-                coach_telegram_id=row['coach_telegram_id'],
-                sport_type=row['sport_type'],
-                max_players=row['max_players'],
-                created_at=row['created_at'],
-                updated_at=row['updated_at'],
-                access_code=row['access_code'],
-                players_count=row['players_count']
-            )
+            row = await TEAM_BY_ID.fetchrow(conn, team_id)
+        return from_record(Team, row)
 
     # ===== ИГРОКИ КОМАНД =====
 
@@ -219,49 +113,33 @@ class TeamsDatabase:
                 RETURNING *
             """, team_id, first_name, last_name, position, jersey_number, telegram_id, phone, birth_date)
 
-            player = TeamPlayer(
-                id=row['id'],
-                team_id=row['team_id'],
-                first_name=row['first_name'],
-                last_name=row['last_name'],
-                position=row['position'],
-                jersey_number=row['jersey_number'],
-                telegram_id=row['telegram_id'],
-                phone=row['phone'],
-                birth_date=row['birth_date'],
-                is_active=row['is_active'],
-                joined_at=row['joined_at']
-            )
+            player = from_record(TeamPlayer, row)
 
             logger.info(f"✅ Added player: {first_name} {last_name or ''} to team {team_id}")
             return player
 
     async def get_team_players(self, team_id: int) -> List[TeamPlayer]:
         """Получить игроков команды"""
+        async with self.pool.acquire() as conn:
+            rows = await TEAM_PLAYERS.fetch(conn, team_id)
+        return from_records(TeamPlayer, rows)
+
+    async def get_team_players_page(self, team_id: int, cursor: Optional[str] = None,
+                                    direction: str = FORWARD, size: int = 25) -> Page:
+        """Страница ростера (по номеру, игроки без номера в конце)"""
+        async with self.pool.acquire() as conn:
+            page = await TEAM_PLAYERS_PAGE.page(conn, team_id, cursor=cursor, direction=direction, size=size)
+        page.items = from_records(TeamPlayer, page.items)
+        return page
+
+    async def get_teams_player_chat_ids(self, team_ids: List[int]) -> List[int]:
+        """Telegram ID активных игроков нескольких команд (без повторов)"""
         async with self.pool.acquire() as conn:
             rows = await conn.fetch("""
-                SELECT * FROM team_players 
-                WHERE team_id = $1 AND is_active = TRUE
-                ORDER BY jersey_number ASC NULLS LAST, first_name ASC
-            """, team_id)
-
-            players = []
-            for row in rows:
-                players.append(TeamPlayer(
-                    id=row['id'],
-                    team_id=row['team_id'],
-                    first_name=row['first_name'],
-                    last_name=row['last_name'],
-                    position=row['position'],
-                    jersey_number=row['jersey_number'],
-                    telegram_id=row['telegram_id'],
-                    phone=row['phone'],
-                    birth_date=row['birth_date'],
-                    is_active=row['is_active'],
-                    joined_at=row['joined_at']
-                ))
-
-            return players
+                SELECT DISTINCT telegram_id FROM team_players
+                WHERE team_id = ANY($1::int[]) AND is_active = TRUE AND telegram_id IS NOT NULL
+            """, list(team_ids))
+            return [row['telegram_id'] for row in rows]
 
     # ===== ИНДИВИДУАЛЬНЫЕ ПОДОПЕЧНЫЕ =====
 
@@ -279,20 +157,7 @@ class TeamsDatabase:
                 RETURNING *
             """, coach_telegram_id, first_name, last_name, telegram_id, phone, birth_date, specialization, level, notes)
 
-            student = IndividualStudent(
-                id=row['id'],
-                coach_telegram_id=row['coach_telegram_id'],
-                first_name=row['first_name'],
-                last_name=row['last_name'],
-                telegram_id=row['telegram_id'],
-                phone=row['phone'],
-                birth_date=row['birth_date'],
-                specialization=row['specialization'],
-                level=row['level'],
-                notes=row['notes'],
-                is_active=row['is_active'],
-                created_at=row['created_at']
-            )
+            student = from_record(IndividualStudent, row)
 
             logger.info(f"✅ Added individual student: {first_name} {last_name or ''} to coach {coach_telegram_id}")
             return student
@@ -305,40 +170,14 @@ class TeamsDatabase:
                 WHERE coach_telegram_id = $1 AND is_active = TRUE
                 ORDER BY first_name ASC
             """, coach_telegram_id)
-
-            students = []
-            for row in rows:
-                students.append(IndividualStudent(
-                    id=row['id'],
-                    coach_telegram_id=row['coach_telegram_id'],
-                    first_name=row['first_name'],
-                    last_name=row['last_name'],
-                    telegram_id=row['telegram_id'],
-                    phone=row['phone'],
-                    birth_date=row['birth_date'],
-                    specialization=row['specialization'],
-                    level=row['level'],
-                    notes=row['notes'],
-                    is_active=row['is_active'],
-                    created_at=row['created_at']
-                ))
-
-            return students
+        return from_records(IndividualStudent, rows)
 
     # ===== СТАТИСТИКА =====
 
     async def get_coach_statistics(self, coach_telegram_id: int) -> Dict:
         """Получить статистику тренера"""
         async with self.pool.acquire() as conn:
-            stats = await conn.fetchrow("""
-                SELECT 
-                    (SELECT COUNT(*) FROM teams WHERE coach_telegram_id = $1) as teams_count,
-                    (SELECT COUNT(*) FROM team_players tp 
-                     JOIN teams t ON tp.team_id = t.id 
-                     WHERE t.coach_telegram_id = $1 AND tp.is_active = TRUE) as team_players_count,
-                    (SELECT COUNT(*) FROM individual_students 
-                     WHERE coach_telegram_id = $1 AND is_active = TRUE) as individual_students_count
-            """, coach_telegram_id)
+            stats = await COACH_STATISTICS.fetchrow(conn, coach_telegram_id)
 
             return {
                 'teams_count': stats['teams_count'],
@@ -350,56 +189,14 @@ class TeamsDatabase:
 async def get_team_by_access_code(self, access_code: str) -> Optional[Team]:
     """Найти команду по коду доступа"""
     async with self.pool.acquire() as conn:
-        row = await conn.fetchrow("""
-            SELECT t.*, COUNT(tp.id) as players_count
-            FROM teams t
-            LEFT JOIN team_players tp ON t.id = tp.team_id AND tp.is_active = TRUE
-            WHERE t.access_code = $1
-            GROUP BY t.id
-        """, access_code)
-        
-        if not row:
-            return None
-        
-        return Team(
-            id=row['id'],
-            name=row['name'],
-            description=row['description'],
-            coach_telegram_id=row['coach_telegram_id'],
-            sport_type=row['sport_type'],
-            max_players=row['max_players'],
-            created_at=row['created_at'],
-            updated_at=row['updated_at'],
-            players_count=row['players_count']
-        )
+        row = await TEAM_BY_ACCESS_CODE.fetchrow(conn, access_code)
+    return from_record(Team, row)
 
 async def get_player_teams(self, telegram_id: int) -> List[Team]:
     """Получить все команды игрока по его telegram_id"""
     async with self.pool.acquire() as conn:
-        rows = await conn.fetch("""
-            SELECT t.*, COUNT(tp2.id) as players_count
-            FROM teams t
-            JOIN team_players tp ON t.id = tp.team_id
-            LEFT JOIN team_players tp2 ON t.id = tp2.team_id AND tp2.is_active = TRUE
-            WHERE tp.telegram_id = $1 AND tp.is_active = TRUE
-            GROUP BY t.id
-            ORDER BY tp.joined_at DESC
-        """, telegram_id)
-        
-        teams = []
-        for row in rows:
-            teams.append(Team(
-                id=row['id'],
-                name=row['name'],
-                description=row['description'],
-                coach_telegram_id=row['coach_telegram_id'],
-                sport_type=row['sport_type'],
-                max_players=row['max_players'],
-                created_at=row['created_at'],
-                updated_at=row['updated_at'],
-                players_count=row['players_count']
-            ))
-        return teams
+        rows = await PLAYER_TEAMS.fetch(conn, telegram_id)
+    return from_records(Team, rows)
 
 async def check_player_in_team(self, telegram_id: int, team_id: int) -> bool:
     """Проверить, состоит ли игрок в команде"""
@@ -0,0 +1,74 @@
+"""
+user_cache.py - Кэш пользователей в памяти процесса
+TTL + LRU по telegram_id, чтобы не ходить в БД за профилем на каждый апдейт
+"""
+import time
+import logging
+from collections import OrderedDict
+from typing import Any, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class UserCache:
+    """TTL/LRU кэш записей users, ключ - telegram_id"""
+
+    def __init__(self, max_size: int = 10000, ttl: float = 300.0):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._items: "OrderedDict[int, tuple[float, Any]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, telegram_id: int) -> Optional[Any]:
+        """Получить пользователя из кэша (None - промах)"""
+        item = self._items.get(telegram_id)
+        if item is None:
+            self.misses += 1
+            return None
+
+        expires_at, user = item
+        if expires_at < time.monotonic():
+            del self._items[telegram_id]
+            self.misses += 1
+            return None
+
+        self._items.move_to_end(telegram_id)
+        self.hits += 1
+        return user
+
+    def put(self, telegram_id: int, user: Any):
+        """Положить пользователя в кэш"""
+        if user is None:
+            return
+        self._items[telegram_id] = (time.monotonic() + self.ttl, user)
+        self._items.move_to_end(telegram_id)
+        while len(self._items) > self.max_size:
+            self._items.popitem(last=False)
+
+    def invalidate(self, telegram_id: int):
+        """Сбросить запись (смена роли, профиля и т.п.)"""
+        self._items.pop(telegram_id, None)
+
+    def clear(self):
+        """Полностью очистить кэш"""
+        self._items.clear()
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def stats(self) -> dict:
+        """Статистика попаданий"""
+        total = self.hits + self.misses
+        return {
+            'size': len(self._items),
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / total, 3) if total else 0.0,
+        }
+
+
+# Глобальный кэш пользователей
+user_cache = UserCache()
+
+__all__ = ['UserCache', 'user_cache']
@@ -0,0 +1,256 @@
+"""
+workout_cache.py - Снимки тренировок в памяти процесса
+После finish_workout_creation тренировка не меняется, а популярные общие
+тренировки открывают постоянно. Снимок (карточка + упражнения, уже
+сгруппированные по фазам, и готовый текст) живет в LRU до изменения самой
+тренировки: сброс по NOTIFY workouts_changed (триггеры миграции 0007),
+NOTIFY exercises_changed (переименование упражнений) или явным invalidate().
+"""
+import asyncio
+import logging
+from collections import OrderedDict
+from types import MappingProxyType
+from typing import Dict, Mapping, Optional, Tuple
+
+import asyncpg
+
+from .queries import WORKOUT_DETAILS, WORKOUT_EXERCISES
+
+logger = logging.getLogger(__name__)
+
+NOTIFY_CHANNEL = 'workouts_changed'
+EXERCISES_CHANNEL = 'exercises_changed'
+
+Row = Mapping[str, object]
+
+
+class WorkoutSnapshot:
+    """Неизменяемый снимок тренировки; text заполняет тот, кто рендерит"""
+
+    __slots__ = ('workout', 'exercises', 'phases', 'text')
+
+    def __init__(self, workout: Row, exercises: Tuple[Row, ...]):
+        self.workout = workout
+        self.exercises = exercises
+        # [(phase, (упражнения фазы...)), ...] в порядке WORKOUT_EXERCISES
+        phases: Dict[str, list] = {}
+        for exercise in exercises:
+            phases.setdefault(exercise['phase'], []).append(exercise)
+        self.phases: Tuple[Tuple[str, Tuple[Row, ...]], ...] = tuple(
+            (phase, tuple(items)) for phase, items in phases.items()
+        )
+        self.text: Optional[str] = None
+
+    @property
+    def id(self) -> int:
+        return self.workout['id']
+
+    @property
+    def unique_id(self) -> str:
+        return self.workout['unique_id']
+
+    @property
+    def created_by(self) -> Optional[int]:
+        return self.workout['created_by']
+
+
+class WorkoutCache:
+    """LRU снимков тренировок по id (и unique_id) со структурной инвалидацией"""
+
+    def __init__(self, max_size: int = 2000):
+        self.max_size = max_size
+        self.pool: Optional[asyncpg.Pool] = None
+        self._items: "OrderedDict[int, WorkoutSnapshot]" = OrderedDict()
+        self._by_unique_id: Dict[str, int] = {}
+        # Загрузки в процессе: параллельные запросы одной тренировки ждут одну
+        self._loading: Dict[int, asyncio.Future] = {}
+        # Счетчик сбросов: снимок, загрузка которого пересеклась со сбросом, не кладется
+        self._generation = 0
+        self._listen_conn: Optional[asyncpg.Connection] = None
+        self._dsn: Optional[str] = None
+        self._reconnect_task: Optional[asyncio.Task] = None
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    # ===== ЗАПУСК / ОСТАНОВКА =====
+
+    async def start(self, pool: asyncpg.Pool, dsn: Optional[str] = None):
+        """Подписка на изменения; без LISTEN кэш выключен (иначе он устареет)"""
+        self.pool = pool
+        self._dsn = dsn
+        if not dsn:
+            return
+        try:
+            await self._listen()
+            logger.info(f"🗂 Кэш тренировок слушает {NOTIFY_CHANNEL}")
+        except Exception as e:
+            logger.warning(f"⚠️ LISTEN {NOTIFY_CHANNEL} недоступен, кэш тренировок выключен: {e}")
+
+    async def _listen(self):
+        conn = await asyncpg.connect(self._dsn)
+        try:
+            await conn.add_listener(NOTIFY_CHANNEL, self._on_notify)
+            await conn.add_listener(EXERCISES_CHANNEL, self._on_notify)
+        except Exception:
+            await conn.close()
+            raise
+        conn.add_termination_listener(self._on_terminate)
+        self._listen_conn = conn
+
+    def _on_terminate(self, connection):
+        """Соединение LISTEN оборвалось: уведомления теряются - сброс и переподключение"""
+        if connection is not self._listen_conn:
+            return  # закрыто в stop()
+        self._listen_conn = None
+        self.clear()
+        logger.warning(f"⚠️ LISTEN {NOTIFY_CHANNEL} оборвался, кэш тренировок выключен до переподключения")
+        self._reconnect_task = asyncio.get_running_loop().create_task(self._reconnect())
+
+    async def _reconnect(self):
+        delay = 1.0
+        while True:
+            await asyncio.sleep(delay)
+            try:
+                await self._listen()
+            except Exception as e:
+                logger.debug(f"Переподключение LISTEN {NOTIFY_CHANNEL}: {e}")
+                delay = min(delay * 2, 60.0)
+                continue
+            # Изменения за время обрыва не пришли - начинаем с пустого кэша
+            self.clear()
+            logger.info(f"🗂 Кэш тренировок снова слушает {NOTIFY_CHANNEL}")
+            return
+
+    async def stop(self):
+        self._dsn = None
+        if self._reconnect_task is not None:
+            self._reconnect_task.cancel()
+            await asyncio.gather(self._reconnect_task, return_exceptions=True)
+            self._reconnect_task = None
+        conn, self._listen_conn = self._listen_conn, None
+        if conn is not None:
+            await conn.close()
+        self.clear()
+
+    @property
+    def enabled(self) -> bool:
+        conn = self._listen_conn
+        return conn is not None and not conn.is_closed() and self.max_size > 0
+
+    def _on_notify(self, connection, pid, channel, payload):
+        """Колбэк asyncpg на NOTIFY"""
+        if channel == EXERCISES_CHANNEL:
+            # Имена упражнений есть во всех снимках
+            self.clear()
+        elif payload.startswith('creator:'):
+            self.invalidate_creator(int(payload.split(':', 1)[1]))
+        elif payload:
+            self.invalidate(int(payload))
+
+    # ===== ЧТЕНИЕ =====
+
+    async def get(self, workout_id: int) -> Optional[WorkoutSnapshot]:
+        """Снимок тренировки (None - не найдена или неактивна)"""
+        workout_id = int(workout_id)
+        snapshot = self._items.get(workout_id)
+        if snapshot is not None:
+            self._items.move_to_end(workout_id)
+            self.hits += 1
+            return snapshot
+
+        self.misses += 1
+        loading = self._loading.get(workout_id)
+        if loading is not None:
+            return await asyncio.shield(loading)
+
+        future = asyncio.get_running_loop().create_future()
+        self._loading[workout_id] = future
+        try:
+            snapshot = await self._load(workout_id)
+            future.set_result(snapshot)
+            return snapshot
+        except Exception as e:
+            future.set_exception(e)
+            # Ошибку получают и ожидающие; если их нет - не шумим в лог
+            future.exception()
+            raise
+        finally:
+            del self._loading[workout_id]
+
+    def get_by_unique_id(self, unique_id: str) -> Optional[WorkoutSnapshot]:
+        """Снимок из памяти по коду тренировки (без похода в БД)"""
+        workout_id = self._by_unique_id.get(unique_id.strip().upper())
+        return self._items.get(workout_id) if workout_id is not None else None
+
+    async def _load(self, workout_id: int) -> Optional[WorkoutSnapshot]:
+        generation = self._generation
+        async with self.pool.acquire() as conn:
+            workout = await WORKOUT_DETAILS.fetchrow(conn, workout_id)
+            if not workout:
+                return None
+            rows = await WORKOUT_EXERCISES.fetch(conn, workout_id)
+
+        snapshot = WorkoutSnapshot(
+            MappingProxyType(dict(workout)),
+            tuple(MappingProxyType(dict(row)) for row in rows)
+        )
+        if self.enabled and generation == self._generation:
+            self._put(snapshot)
+        return snapshot
+
+    def _put(self, snapshot: WorkoutSnapshot):
+        self._items[snapshot.id] = snapshot
+        self._items.move_to_end(snapshot.id)
+        if snapshot.unique_id:
+            self._by_unique_id[snapshot.unique_id.upper()] = snapshot.id
+        while len(self._items) > self.max_size:
+            _, evicted = self._items.popitem(last=False)
+            self._forget_unique_id(evicted)
+
+    def _forget_unique_id(self, snapshot: WorkoutSnapshot):
+        if snapshot.unique_id:
+            self._by_unique_id.pop(snapshot.unique_id.upper(), None)
+
+    # ===== ИНВАЛИДАЦИЯ =====
+
+    def invalidate(self, workout_id: int):
+        """Сбросить снимок (тренировка или ее упражнения изменились)"""
+        self._generation += 1
+        snapshot = self._items.pop(int(workout_id), None)
+        if snapshot is not None:
+            self._forget_unique_id(snapshot)
+            self.invalidations += 1
+
+    def invalidate_creator(self, user_id: int):
+        """Сбросить снимки тренировок автора (сменилось имя)"""
+        self._generation += 1
+        for snapshot in [s for s in self._items.values() if s.created_by == user_id]:
+            del self._items[snapshot.id]
+            self._forget_unique_id(snapshot)
+            self.invalidations += 1
+
+    def clear(self):
+        self._generation += 1
+        self.invalidations += len(self._items)
+        self._items.clear()
+        self._by_unique_id.clear()
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            'size': len(self._items),
+            'hits': self.hits,
+            'misses': self.misses,
+            'invalidations': self.invalidations,
+            'hit_rate': round(self.hits / total, 3) if total else 0.0,
+        }
+
+
+# Глобальный кэш тренировок
+workout_cache = WorkoutCache()
+
+__all__ = ['WorkoutCache', 'WorkoutSnapshot', 'workout_cache', 'NOTIFY_CHANNEL']
@@ -1,7 +1,10 @@
 import logging
+from typing import Optional
+
 from aiogram import Router, F
 from aiogram.fsm.context import FSMContext
 from aiogram.types import Message
+from asyncpg import Record
 
 # Импорт всех подмодулей
 from . import start
@@ -9,6 +12,8 @@ from . import exercises
 from . import workouts
 from . import tests
 from . import test_batteries
+from . import one_rm
+from . import admin
 from handlers.teams import TeamStates
 # Дополнительные модули (по наличию)
 try:
@@ -22,6 +27,7 @@ except ImportError:
     player_tests = None
 
 from . import teams
+from .text_dispatch import text_dispatch
 
 logger = logging.getLogger(__name__)
 
@@ -30,14 +36,13 @@ general_router = Router(name="general")
 
 
 @general_router.message()
-async def handle_all_text_messages(message: Message, state: FSMContext):
-    """Единый обработчик текстовых сообщений вне контекста других FSM."""
-    current_state = await state.get_state()
+async def handle_all_text_messages(message: Message, state: FSMContext, user: Optional[Record] = None):
+    """Единый обработчик текстовых сообщений вне контекста других FSM.
 
-    # FSM состояний команд (TeamsStates)
-    # if current_state and current_state.startswith("TeamStates:"):
-    #     logger.debug(f"➡️ Передаём управление в teams_router для {current_state}")
-        
+    Обработчик выбирается по имени состояния из реестра text_dispatch,
+    который модули заполняют при импорте.
+    """
+    current_state = await state.get_state()
 
     if current_state is None:
         await message.answer(
@@ -46,105 +51,17 @@ async def handle_all_text_messages(message: Message, state: FSMContext):
         )
         return
 
-    # Тесты (1ПМ, сила, выносливость и т.д.)
-    if current_state == "waiting_1rm_data":
-        await tests.process_1rm_test_input(message, state)
-        return
-
-    if current_state in [
-        "waiting_search_for_test",
-        "waiting_strength_test_data",
-        "waiting_endurance_test_data",
-        "waiting_speed_test_data",
-        "waiting_quantity_test_data",
-    ]:
-        await tests.process_test_text_input(message, state)
+    route = text_dispatch.resolve(current_state)
+    if route is not None:
+        if route.accepts_user:
+            await route.handler(message, state, user=user)
+        else:
+            await route.handler(message, state)
         return
 
-    # Состояния упражнений
-    try:
-        from states.exercise_states import CreateExerciseStates
-        if current_state in [
-            CreateExerciseStates.waiting_name,
-            CreateExerciseStates.waiting_description,
-            CreateExerciseStates.waiting_instructions,
-            "waiting_new_category",
-            "waiting_new_muscle_group",
-            "waiting_custom_equipment",
-            "waiting_search",
-        ]:
-            await exercises.process_exercise_text_input(message, state)
-            return
-    except ImportError:
-        logger.warning("Модуль exercise_states не найден")
-
-    # Состояния тренировок
-    try:
-        from states.workout_states import CreateWorkoutStates
-        if current_state in [
-            CreateWorkoutStates.waiting_workout_name,
-            CreateWorkoutStates.waiting_workout_description,
-            CreateWorkoutStates.adding_block_description,
-            "simple_block_config",
-            "advanced_block_config",
-            "searching_exercise_for_block",
-        ]:
-            await workouts.process_workout_text_input(message, state)
-            return
-    except ImportError:
-        logger.warning("Модуль workout_states не найден")
-
-    # Батареи тестов
-    try:
-        from handlers.test_batteries import (
-            CreateBatteryStates,
-            EditBatteryStates,
-            JoinBatteryStates,
-        )
-        if current_state in [
-            CreateBatteryStates.waiting_name,
-            CreateBatteryStates.waiting_description,
-            CreateBatteryStates.selecting_exercises,
-            EditBatteryStates.adding_exercises,
-            JoinBatteryStates.waiting_battery_code,
-        ]:
-            await test_batteries.process_battery_text_input(message, state)
-            return
-    except ImportError:
-        logger.warning("Модуль test_batteries не найден")
-
-    # Командные тесты (если есть)
-    if team_tests:
-        try:
-            from states.test_set_states import CreateTestSetStates
-            if current_state in [
-                CreateTestSetStates.waiting_name,
-                CreateTestSetStates.waiting_description,
-                "searching_exercise_for_test_set",
-            ]:
-                await team_tests.process_team_test_text_input(message, state)
-                return
-        except ImportError:
-            pass
-
-    # Участники тестов (если есть)
-    if player_tests:
-        try:
-            from states.test_set_states import JoinTestSetStates
-            if current_state in [
-                JoinTestSetStates.waiting_access_code,
-            ]:
-                await player_tests.process_player_test_text_input(message, state)
-                return
-        except ImportError:
-            pass
-
-    
-    
-    
     # Неопознанное состояние — очищаем
     logger.warning(f"⚠️ Неизвестное состояние FSM: {current_state}")
-    
+
     await state.clear()
 
 
@@ -155,6 +72,7 @@ def register_all_handlers(dp):
     workouts.register_workout_handlers(dp)
     tests.register_test_handlers(dp)
     test_batteries.register_battery_handlers(dp)
+    admin.register_admin_handlers(dp)
 
     if team_tests:
         team_tests.register_team_test_handlers(dp)
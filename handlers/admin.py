@@ -0,0 +1,103 @@
+# ===== АДМИНИСТРАТИВНЫЕ КОМАНДЫ =====
+
+import html
+import time
+
+from aiogram.filters import Command
+from aiogram.types import Message
+
+from config import config
+from database.pool_metrics import db_metrics
+from middlewares.profiling import profiler
+from services.update_scheduler import update_scheduler
+
+# Сколько строк показывать в /dbstats
+DBSTATS_TOP = 10
+DBSTATS_SLOW = 5
+
+
+def register_admin_handlers(dp):
+    """Регистрация команд администратора"""
+
+    dp.message.register(db_stats, Command("dbstats"))
+    dp.message.register(profile_stats, Command("profstats"))
+
+
+def is_admin(telegram_id: int) -> bool:
+    return telegram_id in config.ADMIN_USER_IDS
+
+
+async def db_stats(message: Message):
+    """Состояние пула и самые затратные запросы (/dbstats, /dbstats reset)"""
+    if not is_admin(message.from_user.id):
+        return
+
+    if message.text and message.text.split()[-1] == 'reset':
+        db_metrics.reset()
+        await message.answer("🔄 Метрики БД сброшены")
+        return
+
+    state = db_metrics.pool_state()
+    wait = db_metrics.acquire_wait
+
+    text = "🗄 <b>Пул соединений</b>\n"
+    text += f"Открыто: {state['size']} / {state['max_size']} (свободно {state['idle']})\n"
+    text += f"Выдано: {state['in_use']} (пик {state['max_in_use']}), ждут: {state['waiting']}\n"
+    text += (f"Ожидание acquire: p50 ≤{wait.quantile(0.5) * 1000:.0f} мс, "
+             f"p95 ≤{wait.quantile(0.95) * 1000:.0f} мс, max {wait.max * 1000:.0f} мс\n")
+    if db_metrics.acquire_timeouts:
+        text += f"⚠️ Таймаутов acquire: {db_metrics.acquire_timeouts}\n"
+
+    top = db_metrics.top_queries(DBSTATS_TOP)
+    if top:
+        text += "\n⏱ <b>Запросы (по суммарному времени)</b>\n"
+        for row in top:
+            text += (f"<code>{html.escape(row['name'])}</code>: {row['calls']} × "
+                     f"{row['avg_ms']:.1f} мс, p95 ≤{row['p95_ms']:.0f}, max {row['max_ms']:.0f}")
+            if row['errors']:
+                text += f", ошибок {row['errors']}"
+            text += "\n"
+
+    slow = list(db_metrics.slow)[-DBSTATS_SLOW:]
+    if slow:
+        text += f"\n🐢 <b>Медленные (≥{db_metrics.slow_threshold * 1000:.0f} мс)</b>\n"
+        now = time.time()
+        for sample in reversed(slow):
+            text += (f"{sample.elapsed * 1000:.0f} мс, {int(now - sample.at)} с назад: "
+                     f"<code>{html.escape(sample.name)}</code>\n")
+
+    await message.answer(text, parse_mode="HTML")
+
+
+async def profile_stats(message: Message):
+    """Очереди апдейтов, самые медленные обработчики по p95 и последний профиль (/profstats)"""
+    if not is_admin(message.from_user.id):
+        return
+
+    queue = update_scheduler.stats()
+    text = (f"📥 <b>Апдейты</b>: в работе {queue['in_flight']}/{queue['concurrency']}, "
+            f"ждут {queue['queued']} (чатов {queue['chats']}, "
+            f"макс. очередь чата {queue['max_depth']})\n\n")
+
+    rows = profiler.summary(DBSTATS_TOP)
+    if not rows:
+        await message.answer(text + "⏱ Замеров пока нет", parse_mode="HTML")
+        return
+
+    text += "⏱ <b>Обработчики (мс, по p95)</b>\n"
+    for row in rows:
+        name = row['handler'] + (f" [{row['prefix']}]" if row['prefix'] else "")
+        text += (f"<code>{html.escape(name)}</code>: n={row['count']} "
+                 f"p50 {row['p50_ms']:.0f} / p95 {row['p95_ms']:.0f} / p99 {row['p99_ms']:.0f}; "
+                 f"БД {row['db_ms']:.0f}, API {row['api_ms']:.0f}, Python {row['python_ms']:.0f}\n")
+
+    if profiler.profiles:
+        sample = profiler.profiles[-1]
+        head = "\n".join(sample.stats.strip().splitlines()[:20])
+        text += (f"\n🔬 <b>Профиль</b> {html.escape(sample.key)} ({sample.total * 1000:.0f} мс)\n"
+                 f"<pre>{html.escape(head)[:2500]}</pre>")
+
+    await message.answer(text, parse_mode="HTML")
+
+
+__all__ = ['register_admin_handlers', 'is_admin']
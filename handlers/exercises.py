@@ -5,7 +5,8 @@ from aiogram.fsm.context import FSMContext
 from aiogram.types import Message, CallbackQuery
 from aiogram.utils.keyboard import InlineKeyboardBuilder
 
-from database import db_manager
+from database import db_manager, exercise_catalog, search_exercises
+from handlers.text_dispatch import text_dispatch
 from states.exercise_states import CreateExerciseStates
 from keyboards.exercise_keyboards import (
     get_exercise_search_keyboard, get_categories_keyboard, 
@@ -90,10 +91,7 @@ async def search_exercise_by_name(callback: CallbackQuery, state: FSMContext):
 
 async def search_by_category(callback: CallbackQuery):
     try:
-        async with db_manager.pool.acquire() as conn:
-            categories = await conn.fetch("SELECT DISTINCT category FROM exercises ORDER BY category")
-        
-        keyboard = get_categories_keyboard(categories)
+        keyboard = get_categories_keyboard(exercise_catalog.categories())
         
         await callback.message.edit_text(
             "📂 **Выберите категорию:**\n\n"
@@ -108,15 +106,12 @@ async def search_by_category(callback: CallbackQuery):
 async def search_by_muscle_group(callback: CallbackQuery):
     """Поиск упражнений по группам мышц"""
     try:
-        async with db_manager.pool.acquire() as conn:
-            muscle_groups = await conn.fetch("SELECT DISTINCT muscle_group FROM exercises ORDER BY muscle_group")
-        
         keyboard = InlineKeyboardBuilder()
         
-        for mg in muscle_groups:
+        for mg in exercise_catalog.muscle_groups():
             keyboard.button(
-                text=f"💪 {mg['muscle_group']}", 
-                callback_data=f"muscle_{mg['muscle_group']}"
+                text=f"💪 {mg}", 
+                callback_data=f"muscle_{mg}"
             )
         
         keyboard.button(text="🔙 Назад", callback_data="search_exercise")
@@ -137,11 +132,7 @@ async def show_category_exercises(callback: CallbackQuery):
     category = callback.data[4:]
     
     try:
-        async with db_manager.pool.acquire() as conn:
-            exercises = await conn.fetch(
-                "SELECT id, name, muscle_group, description, test_type FROM exercises WHERE category = $1 ORDER BY name",
-                category
-            )
+        exercises = exercise_catalog.by_category(category)
         
         if exercises:
             text = f"📂 **Категория: {category}**\n\n"
@@ -186,11 +177,7 @@ async def show_muscle_group_exercises(callback: CallbackQuery):
     muscle_group = callback.data[7:]  # Убираем "muscle_"
     
     try:
-        async with db_manager.pool.acquire() as conn:
-            exercises = await conn.fetch(
-                "SELECT id, name, category, description, test_type FROM exercises WHERE muscle_group = $1 ORDER BY name",
-                muscle_group
-            )
+        exercises = exercise_catalog.by_muscle_group(muscle_group)
         
         if exercises:
             text = f"💪 **Группа мышц: {muscle_group}**\n\n"
@@ -341,15 +328,12 @@ async def cancel_exercise_creation(callback: CallbackQuery, state: FSMContext):
 
 async def select_existing_category(callback: CallbackQuery, state: FSMContext):
     try:
-        async with db_manager.pool.acquire() as conn:
-            categories = await conn.fetch("SELECT DISTINCT category FROM exercises ORDER BY category")
-        
         keyboard = InlineKeyboardBuilder()
         
-        for cat in categories:
+        for cat in exercise_catalog.categories():
             keyboard.button(
-                text=f"📂 {cat['category']}", 
-                callback_data=f"choose_cat_{cat['category']}"
+                text=f"📂 {cat}", 
+                callback_data=f"choose_cat_{cat}"
             )
         
         keyboard.button(text="📝 Создать новую категорию", callback_data="create_new_category")
@@ -388,15 +372,12 @@ async def create_new_category(callback: CallbackQuery, state: FSMContext):
 
 async def ask_muscle_group(message: Message, state: FSMContext, edit: bool = False):
     try:
-        async with db_manager.pool.acquire() as conn:
-            muscle_groups = await conn.fetch("SELECT DISTINCT muscle_group FROM exercises ORDER BY muscle_group")
-        
         keyboard = InlineKeyboardBuilder()
         
-        for mg in muscle_groups:
+        for mg in exercise_catalog.muscle_groups():
             keyboard.button(
-                text=f"💪 {mg['muscle_group']}", 
-                callback_data=f"choose_mg_{mg['muscle_group']}"
+                text=f"💪 {mg}", 
+                callback_data=f"choose_mg_{mg}"
             )
         
         keyboard.button(text="📝 Создать новую группу", callback_data="create_new_muscle_group")
@@ -489,11 +470,7 @@ async def process_exercise_name(message: Message, state: FSMContext):
     
     # Проверяем, нет ли уже такого упражнения
     try:
-        async with db_manager.pool.acquire() as conn:
-            existing = await conn.fetchrow(
-                "SELECT name FROM exercises WHERE LOWER(name) = LOWER($1)", 
-                exercise_name
-            )
+        existing = exercise_catalog.find_by_name(exercise_name)
         
         if existing:
             await message.answer(f"❌ Упражнение '{exercise_name}' уже существует в базе!")
@@ -508,15 +485,12 @@ async def process_exercise_name(message: Message, state: FSMContext):
 
 async def select_existing_category_for_new_exercise(message: Message, state: FSMContext):
     try:
-        async with db_manager.pool.acquire() as conn:
-            categories = await conn.fetch("SELECT DISTINCT category FROM exercises ORDER BY category")
-        
         keyboard = InlineKeyboardBuilder()
         
-        for cat in categories:
+        for cat in exercise_catalog.categories():
             keyboard.button(
-                text=f"📂 {cat['category']}", 
-                callback_data=f"choose_cat_{cat['category']}"
+                text=f"📂 {cat}", 
+                callback_data=f"choose_cat_{cat}"
             )
         
         keyboard.button(text="📝 Новая категория", callback_data="create_new_category")
@@ -578,6 +552,9 @@ async def save_new_exercise(message: Message, state: FSMContext):
                 data['description'], data['instructions'], user['id']
             )
         
+        # Каталог в памяти должен увидеть новое упражнение сразу
+        await exercise_catalog.refresh()
+        
         # Успешное создание
         text = f"🎉 **Упражнение создано успешно!**\n\n"
         text += f"💪 **Название:** {data['name']}\n"
@@ -609,16 +586,7 @@ async def handle_exercise_search(message: Message, state: FSMContext):
     search_term = message.text.lower()
     
     try:
-        async with db_manager.pool.acquire() as conn:
-            exercises = await conn.fetch("""
-                SELECT id, name, category, muscle_group, description, test_type 
-                FROM exercises 
-                WHERE LOWER(name) LIKE $1 
-                   OR LOWER(category) LIKE $1
-                   OR LOWER(muscle_group) LIKE $1
-                ORDER BY name
-                LIMIT 15
-            """, f"%{search_term}%")
+        exercises = await search_exercises(search_term, limit=15)
         
         if exercises:
             text = f"🔍 **Найдено: {len(exercises)} упражнений**\n\n"
@@ -736,4 +704,16 @@ async def process_exercise_text_input(message: Message, state: FSMContext):
     elif current_state == "waiting_search":
         await handle_exercise_search(message, state)
 
+# ===== ТЕКСТОВЫЕ СОСТОЯНИЯ =====
+text_dispatch.register(
+    process_exercise_text_input,
+    CreateExerciseStates.waiting_name,
+    CreateExerciseStates.waiting_description,
+    CreateExerciseStates.waiting_instructions,
+    "waiting_new_category",
+    "waiting_new_muscle_group",
+    "waiting_custom_equipment",
+    "waiting_search",
+)
+
 __all__ = ['register_exercise_handlers', 'process_exercise_text_input']
\ No newline at end of file
@@ -1,14 +1,19 @@
 # ===== ОБРАБОТЧИКИ 1ПМ ТЕСТОВ =====
 
+from typing import Optional
+
 from aiogram import F
 from aiogram.fsm.context import FSMContext
 from aiogram.types import Message, CallbackQuery
 from aiogram.utils.keyboard import InlineKeyboardBuilder
+from asyncpg import Record
 
-from database import db_manager
+from database import db_manager, exercise_catalog
+from handlers.text_dispatch import text_dispatch
 from keyboards.main_keyboards_old import get_coming_soon_keyboard
 from utils.validators import validate_1rm_data
 from utils.formatters import format_1rm_results
+from utils.strength_math import calculate_1rm
 
 def register_one_rm_handlers(dp):
     """Регистрация обработчиков 1ПМ тестов"""
@@ -21,14 +26,7 @@ def register_one_rm_handlers(dp):
 async def new_1rm_test(callback: CallbackQuery):
     """Выбор упражнения для нового теста 1ПМ"""
     try:
-        async with db_manager.pool.acquire() as conn:
-            exercises = await conn.fetch("""
-                SELECT id, name, category, muscle_group
-                FROM exercises 
-                WHERE category = 'Силовые'
-                ORDER BY name
-                LIMIT 15
-            """)
+        exercises = exercise_catalog.by_category('Силовые')[:15]
         
         if exercises:
             text = "💪 **Выберите упражнение для теста 1ПМ:**\n\n"
@@ -64,8 +62,7 @@ async def select_1rm_exercise(callback: CallbackQuery, state: FSMContext):
     exercise_id = callback.data.split("_")[1]
     
     try:
-        async with db_manager.pool.acquire() as conn:
-            exercise = await conn.fetchrow("SELECT name, category FROM exercises WHERE id = $1", int(exercise_id))
+        exercise = exercise_catalog.get(int(exercise_id))
         
         if exercise:
             await state.update_data(exercise_id=exercise_id, exercise_name=exercise['name'])
@@ -144,40 +141,7 @@ async def show_1rm_stats(callback: CallbackQuery):
     )
     await callback.answer()
 
-# ===== РАСЧЕТ 1ПМ =====
-def calculate_1rm(weight, reps):
-    """Расчет 1ПМ по трем формулам"""
-    w = float(weight)
-    r = int(reps)
-    
-    if r == 1:
-        return {
-            'brzycki': w,
-            'epley': w,
-            'alternative': w,
-            'average': w
-        }
-    
-    # Формула Бжицкого
-    brzycki = w / (1.0278 - 0.0278 * r)
-    
-    # Формула Эпли
-    epley = w * (1 + r / 30.0)
-    
-    # Альтернативная формула
-    alternative = w * (1 + 0.025 * r)
-    
-    # Среднее значение
-    average = (brzycki + epley + alternative) / 3.0
-    
-    return {
-        'brzycki': round(brzycki, 1),
-        'epley': round(epley, 1), 
-        'alternative': round(alternative, 1),
-        'average': round(average, 1)
-    }
-
-async def process_1rm_data(message: Message, state: FSMContext):
+async def process_1rm_data(message: Message, state: FSMContext, user: Optional[Record] = None):
     """Обработка данных для теста 1ПМ"""
     parts = message.text.split()
     validation = validate_1rm_data(parts[0] if len(parts) > 0 else "", 
@@ -196,17 +160,14 @@ async def process_1rm_data(message: Message, state: FSMContext):
     exercise_name = state_data.get('exercise_name', 'Упражнение')
     
     # Сохраняем результат в БД
-    user = await db_manager.get_user_by_telegram_id(message.from_user.id)
+    if user is None:
+        user = await db_manager.get_user_by_telegram_id(message.from_user.id)
     
     try:
-        async with db_manager.pool.acquire() as conn:
-            await conn.execute("""
-                INSERT INTO one_rep_max (user_id, exercise_id, weight, reps, test_weight, 
-                                       formula_brzycki, formula_epley, formula_alternative, formula_average)
-                VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9)
-            """, user['id'], int(state_data['exercise_id']), results['average'], 
-                 reps, weight, results['brzycki'], results['epley'], 
-                 results['alternative'], results['average'])
+        await db_manager.record_one_rep_max(
+            user['id'], int(state_data['exercise_id']), weight, reps,
+            results['brzycki'], results['epley'], results['alternative'], results['average']
+        )
         
         # Формируем результат
         text = format_1rm_results(exercise_name, weight, reps, results)
@@ -236,6 +197,9 @@ async def get_user_1rm_for_exercise(user_id: int, exercise_id: int):
     except Exception:
         return None
 
+# ===== ТЕКСТОВЫЕ СОСТОЯНИЯ =====
+text_dispatch.register(process_1rm_data, "waiting_1rm_data")
+
 __all__ = [
     'register_one_rm_handlers',
     'process_1rm_data',
@@ -6,6 +6,7 @@ from aiogram.types import Message, CallbackQuery
 from aiogram.utils.keyboard import InlineKeyboardBuilder
 
 from database import db_manager
+from handlers.text_dispatch import text_dispatch
 from utils.validators import validate_test_data
 # Временно убираем несуществующие функции:
 # from utils.formatters import format_test_set_for_participant, format_test_result_for_set
@@ -163,6 +164,9 @@ async def process_player_test_text_input(message: Message, state: FSMContext):
     else:
         await message.answer("🚧 В разработке")
 
+# ===== ТЕКСТОВЫЕ СОСТОЯНИЯ =====
+text_dispatch.register(process_player_test_text_input, JoinTestSetStates.waiting_access_code)
+
 __all__ = [
     'register_player_test_handlers',
     'process_player_test_text_input',
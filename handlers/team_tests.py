@@ -6,6 +6,7 @@ from aiogram.types import Message, CallbackQuery
 from aiogram.utils.keyboard import InlineKeyboardBuilder
 
 from database import db_manager
+from handlers.text_dispatch import text_dispatch
 from utils.validators import validate_test_set_name, validate_test_requirement
 # Временно убираем несуществующие функции:
 # from utils.formatters import format_test_set_summary, format_test_set_participants
@@ -385,6 +386,14 @@ async def save_test_set_to_database(message, state: FSMContext):
         await message.answer(f"❌ Ошибка создания набора тестов: {e}")
 
 
+# ===== ТЕКСТОВЫЕ СОСТОЯНИЯ =====
+text_dispatch.register(
+    process_team_test_text_input,
+    CreateTestSetStates.waiting_name,
+    CreateTestSetStates.waiting_description,
+    "searching_exercise_for_test_set",
+)
+
 __all__ = [
     'register_team_test_handlers', 
     'process_team_test_text_input',
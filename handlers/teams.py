@@ -11,6 +11,9 @@ from aiogram.exceptions import TelegramBadRequest
 from aiogram.utils.keyboard import InlineKeyboardBuilder
 from states.team_states import JoinTeamStates
 from database.teams_database import teams_database
+from database.pagination import FORWARD, Page
+from database.team_analytics import team_analytics
+from keyboards.pagination import pager_buttons, parse_page_callback
 
 
 # Импортируем реализацию БД из папки database
@@ -26,6 +29,9 @@ logger = logging.getLogger(__name__)
 # Роутер
 teams_router = Router(name="teams")
 
+# Игроков на странице ростера
+ROSTER_PAGE_SIZE = 25
+
 from aiogram import Router, F
 from aiogram.filters import Command
 from aiogram.types import Message, CallbackQuery
@@ -240,6 +246,8 @@ async def complete_join(message: Message, state: FSMContext):
             jersey_number=data.get('jersey_number'),
             telegram_id=message.from_user.id
         )
+        # Новый игрок должен сразу попасть в отчеты тренера
+        team_analytics.invalidate_team(data['team_id'])
         
         # Формируем текст
         full_name = data['first_name']
@@ -414,9 +422,9 @@ async def init_teams_module_async(db_manager) -> bool:
         if not hasattr(db_manager, 'pool') or db_manager.pool is None:
             raise RuntimeError("db_manager.pool is not initialized")
 
+        # Таблицы создаются миграциями (database/migrations)
         teams_db = init_teams_database(db_manager.pool)
-        await teams_db.init_tables()
-        logger.info("✅ Teams module loaded and database initialized")
+        logger.info("✅ Teams module loaded")
         return True
     except Exception as e:
         logger.exception("❌ Failed to initialize teams module: %s", e)
@@ -634,12 +642,11 @@ async def cb_view_team(callback: CallbackQuery, state: FSMContext) -> None:
         await callback.answer("❌ Команда не найдена")
         return
 
-    players = await get_team_players(team_id)
     text = (
         f"🏆 <b>{team.name}</b>\n\n"
         f"📋 {team.description or 'Нет описания'}\n\n"
         f"🏃 <b>Вид спорта:</b> {team.sport_type}\n"
-        f"👥 <b>Игроков:</b> {len(players)}/{team.max_players}\n"
+        f"👥 <b>Игроков:</b> {team.players_count}/{team.max_players}\n"
         f"📅 <b>Создана:</b> {team.created_at.strftime('%d.%m.%Y')}"
     )
     kb = InlineKeyboardMarkup(
@@ -656,11 +663,13 @@ async def cb_view_team(callback: CallbackQuery, state: FSMContext) -> None:
 
 @teams_router.callback_query(F.data.startswith("team_players_"))
 async def cb_team_players(callback: CallbackQuery, state: FSMContext) -> None:
-    """Обработчик просмотра списка игроков команды."""
+    """Обработчик просмотра списка игроков команды (по страницам)."""
     await state.clear()
-    team_id = int(callback.data.split('_')[-1])
+    prefix, cursor, direction = parse_page_callback(callback.data)
+    team_id = int(prefix.split('_')[-1])
     team = await get_team_by_id(team_id)
-    players = await get_team_players(team_id)
+    page = await get_team_players_page(team_id, cursor, direction)
+    players = page.items
 
     if not players:
         kb = InlineKeyboardMarkup(
@@ -674,19 +683,19 @@ async def cb_team_players(callback: CallbackQuery, state: FSMContext) -> None:
         return
 
     players_text = ""
-    for i, p in enumerate(players, 1):
+    for p in players:
         full = p.first_name + (f" {p.last_name}" if getattr(p, 'last_name', None) else "")
-        num = f"#{p.jersey_number}" if getattr(p, 'jersey_number', None) else ""
+        num = f"#{p.jersey_number}" if getattr(p, 'jersey_number', None) else "•"
         pos = f"({p.position})" if getattr(p, 'position', None) else ""
-        players_text += f"{i}. {num} {full} {pos}\n"
-
-    kb = InlineKeyboardMarkup(
-        inline_keyboard=[
-            [InlineKeyboardButton(text="➕ Добавить игрока", callback_data=f"add_player_{team_id}")],
-            [InlineKeyboardButton(text="🔙 К команде", callback_data=f"view_team_{team_id}")]
-        ]
-    )
-    await safe_edit_text(callback.message, f"👥 <b>Игроки команды \"{team.name}\"</b>\n\n{players_text}\nВсего: {len(players)} игроков", reply_markup=kb)
+        players_text += f"{num} {full} {pos}\n"
+
+    rows = [
+        pager_buttons(prefix, page),
+        [InlineKeyboardButton(text="➕ Добавить игрока", callback_data=f"add_player_{team_id}")],
+        [InlineKeyboardButton(text="🔙 К команде", callback_data=f"view_team_{team_id}")]
+    ]
+    kb = InlineKeyboardMarkup(inline_keyboard=[row for row in rows if row])
+    await safe_edit_text(callback.message, f"👥 <b>Игроки команды \"{team.name}\"</b>\n\n{players_text}\nВсего: {team.players_count} игроков", reply_markup=kb)
     await callback.answer()
 
 
@@ -1105,7 +1114,9 @@ async def create_team(coach_telegram_id: int, name: str, description: str = "",
     """Создание команды в БД."""
     if teams_db:
         try:
-            return await teams_db.create_team(coach_telegram_id, name, description, sport_type)
+            team = await teams_db.create_team(coach_telegram_id, name, description, sport_type)
+            team_analytics.invalidate_coach(coach_telegram_id)
+            return team
         except Exception as e:
             logger.exception("create_team DB error: %s", e)
             return None
@@ -1146,11 +1157,37 @@ async def get_team_players(team_id: int) -> List:
     return []
 
 
+async def get_team_players_page(team_id: int, cursor: Optional[str] = None,
+                                direction: str = FORWARD) -> Page:
+    """Страница ростера команды."""
+    if teams_db:
+        try:
+            return await teams_db.get_team_players_page(
+                team_id, cursor=cursor, direction=direction, size=ROSTER_PAGE_SIZE
+            )
+        except Exception as e:
+            logger.exception("get_team_players_page DB error: %s", e)
+    return Page([], False, False)
+
+
+async def get_teams_player_chat_ids(team_ids: List[int]) -> List[int]:
+    """Telegram ID игроков нескольких команд без повторов."""
+    if teams_db:
+        try:
+            return await teams_db.get_teams_player_chat_ids(team_ids)
+        except Exception as e:
+            logger.exception("get_teams_player_chat_ids DB error: %s", e)
+            return []
+    return []
+
+
 async def add_team_player(team_id: int, first_name: str, last_name: Optional[str] = None, position: Optional[str] = None, jersey_number: Optional[int] = None) -> Optional:
     """Добавление игрока в команду."""
     if teams_db:
         try:
-            return await teams_db.add_team_player(team_id, first_name, last_name, position, jersey_number)
+            player = await teams_db.add_team_player(team_id, first_name, last_name, position, jersey_number)
+            team_analytics.invalidate_team(team_id)
+            return player
         except Exception as e:
             logger.exception("add_team_player DB error: %s", e)
             return None
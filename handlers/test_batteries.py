@@ -5,8 +5,17 @@ from aiogram.fsm.context import FSMContext
 from aiogram.types import Message, CallbackQuery
 from aiogram.utils.keyboard import InlineKeyboardBuilder
 
-from database import db_manager
+from database import db_manager, exercise_catalog, search_exercises
+from database.queries import COACH_BATTERIES
+from keyboards.main_keyboards import get_coach_batteries_keyboard, get_player_batteries_keyboard
+from keyboards.pagination import pager_buttons, parse_page_callback
+from handlers.text_dispatch import text_dispatch
+from middlewares.idempotency import new_idempotency_key
+from utils.rendering import Raw, Template
 from utils.validators import validate_test_data
+from utils.strength_math import calculate_1rm, percent_load, TRAINING_ZONES
+from asyncpg import Record
+from typing import Optional
 import secrets
 import string
 import asyncio
@@ -15,7 +24,7 @@ from aiogram.fsm.state import State, StatesGroup
 from aiogram.fsm.context import FSMContext
 from aiogram.types import Message, CallbackQuery
 from aiogram.utils.keyboard import InlineKeyboardBuilder
-from database import db_manager
+from database import db_manager, exercise_catalog
 import logging
 
 logger = logging.getLogger(__name__)
@@ -38,9 +47,31 @@ class JoinBatteryStates(StatesGroup):
     waiting_battery_code = State()
 
 # ===== ГЛАВНОЕ МЕНЮ ДЛЯ ТРЕНЕРОВ =====
-async def coach_batteries_main_menu(callback: CallbackQuery):
+COACH_BATTERIES_STATS = Template(
+    "📊 **Ваша статистика:**\n"
+    "• Создано батарей: **{total}**\n"
+    "• Активных батарей: **{active}**\n\n"
+)
+COACH_BATTERIES_MENU = Template(
+    "📋 **Батареи тестов - Тренерская панель**\n\n"
+    "{stats}"
+    "💡 **Концепция батарей тестов:**\n"
+    "• 'Тест силы межсезон' (5-10 силовых упражнений)\n"
+    "• 'Диагностика скорости' (спринты, челночный бег)\n"
+    "• 'Оценка новичков' (комплексная батарея)\n\n"
+    "🎯 **Возможности:**\n"
+    "• Создание именованных батарей тестов\n"
+    "• Добавление 5-10 упражнений в батарею\n"
+    "• Редактирование батарей (даже с участниками)\n"
+    "• Назначение батарей команде\n"
+    "• Отслеживание прогресса участников\n\n"
+    "**Выберите действие:**"
+)
+
+async def coach_batteries_main_menu(callback: CallbackQuery, user: Optional[Record] = None):
     """Главное меню батарей тестов для тренера"""
-    user = await db_manager.get_user_by_telegram_id(callback.from_user.id)
+    if user is None:
+        user = await db_manager.get_user_by_telegram_id(callback.from_user.id)
     
     if user['role'] not in ['coach', 'admin']:
         await callback.answer("❌ Только тренеры могут управлять батареями!")
@@ -59,38 +90,21 @@ async def coach_batteries_main_menu(callback: CallbackQuery):
             except:
                 stats = {'total_batteries': 0, 'active_batteries': 0}
     
-        keyboard = InlineKeyboardBuilder()
-        keyboard.button(text="📋 Мои батареи", callback_data="my_batteries")
-        keyboard.button(text="➕ Создать батарею", callback_data="create_battery")
-        keyboard.button(text="📊 Аналитика команды", callback_data="team_analytics")
-        keyboard.button(text="🔙 К тестам", callback_data="tests_menu")
-        keyboard.adjust(2)
-        
-        text = f"📋 **Батареи тестов - Тренерская панель**\n\n"
+        keyboard = get_coach_batteries_keyboard()
         
         total_batteries = stats['total_batteries'] or 0
         if total_batteries > 0:
-            text += f"📊 **Ваша статистика:**\n"
-            text += f"• Создано батарей: **{total_batteries}**\n"
-            text += f"• Активных батарей: **{stats['active_batteries'] or 0}**\n\n"
-        
-        text += f"💡 **Концепция батарей тестов:**\n"
-        text += f"• 'Тест силы межсезон' (5-10 силовых упражнений)\n"
-        text += f"• 'Диагностика скорости' (спринты, челночный бег)\n"
-        text += f"• 'Оценка новичков' (комплексная батарея)\n\n"
-        
-        text += f"🎯 **Возможности:**\n"
-        text += f"• Создание именованных батарей тестов\n"
-        text += f"• Добавление 5-10 упражнений в батарею\n"
-        text += f"• Редактирование батарей (даже с участниками)\n"
-        text += f"• Назначение батарей команде\n"
-        text += f"• Отслеживание прогресса участников\n\n"
-        
-        text += f"**Выберите действие:**"
+            stats_text = COACH_BATTERIES_STATS.render(
+                total=total_batteries, active=stats['active_batteries'] or 0
+            )
+        else:
+            stats_text = Raw('')
+
+        text = COACH_BATTERIES_MENU.render(stats=stats_text)
         
         await callback.message.edit_text(
             text,
-            reply_markup=keyboard.as_markup(),
+            reply_markup=keyboard,
             parse_mode="Markdown"
         )
         
@@ -100,28 +114,22 @@ async def coach_batteries_main_menu(callback: CallbackQuery):
     await callback.answer()
 
 # ===== МОИ БАТАРЕИ ТЕСТОВ =====
+BATTERIES_PAGE_SIZE = 10
+
 async def my_batteries(callback: CallbackQuery):
-    """Показать батареи тестов тренера"""
+    """Показать батареи тестов тренера (по страницам)"""
     user = await db_manager.get_user_by_telegram_id(callback.from_user.id)
+    _, cursor, direction = parse_page_callback(callback.data)
     
     try:
         async with db_manager.pool.acquire() as conn:
-            batteries = await conn.fetch("""
-                SELECT 
-                    ts.*,
-                    COUNT(DISTINCT tse.id) as exercises_count,
-                    COUNT(DISTINCT tsp.id) as participants_count
-                FROM test_sets ts
-                LEFT JOIN test_set_exercises tse ON ts.id = tse.test_set_id
-                LEFT JOIN test_set_participants tsp ON ts.id = tsp.test_set_id
-                WHERE ts.created_by = $1 AND ts.is_active = true
-                GROUP BY ts.id
-                ORDER BY ts.created_at DESC
-                LIMIT 10
-            """, user['id'])
+            page = await COACH_BATTERIES.page(
+                conn, user['id'], cursor=cursor, direction=direction, size=BATTERIES_PAGE_SIZE
+            )
+        batteries = page.items
         
         if batteries:
-            text = f"📋 **Ваши батареи тестов ({len(batteries)}):**\n\n"
+            text = f"📋 **Ваши батареи тестов:**\n\n"
             
             keyboard = InlineKeyboardBuilder()
             
@@ -143,6 +151,7 @@ async def my_batteries(callback: CallbackQuery):
             keyboard.button(text="➕ Создать новую", callback_data="create_battery")
             keyboard.button(text="🔙 Назад", callback_data="coach_batteries")
             keyboard.adjust(1)
+            keyboard.row(*pager_buttons("my_batteries", page))
             
         else:
             text = f"📋 **У вас пока нет батарей тестов**\n\n"
@@ -195,6 +204,8 @@ async def create_battery(callback: CallbackQuery, state: FSMContext):
         parse_mode="Markdown"
     )
     await state.set_state(CreateBatteryStates.waiting_name)
+    # Ключ создания: повторное сохранение вернет ту же батарею, а не дубль
+    await state.update_data(creation_key=new_idempotency_key())
     await callback.answer()
 
 async def process_battery_name(message: Message, state: FSMContext):
@@ -249,17 +260,22 @@ async def save_battery_to_database(message, state: FSMContext):
     
     try:
         async with db_manager.pool.acquire() as conn:
-            # Сохраняем набор тестов (используем существующую таблицу test_sets)
-            test_set_id = await conn.fetchval("""
-                INSERT INTO test_sets (name, description, created_by, visibility)
-                VALUES ($1, $2, $3, $4)
-                RETURNING id
-            """, data['name'], data.get('description', ''), user['id'], 'private')
-            
-            # Получаем сгенерированный код
+            # Сохраняем набор тестов (используем существующую таблицу test_sets);
+            # повтор с тем же creation_key не создает вторую батарею
             test_set = await conn.fetchrow("""
-                SELECT access_code FROM test_sets WHERE id = $1
-            """, test_set_id)
+                INSERT INTO test_sets (name, description, created_by, visibility, creation_key)
+                VALUES ($1, $2, $3, $4, $5)
+                ON CONFLICT (created_by, creation_key) DO NOTHING
+                RETURNING id, access_code
+            """, data['name'], data.get('description', ''), user['id'], 'private',
+                data.get('creation_key'))
+            
+            if test_set is None:
+                test_set = await conn.fetchrow("""
+                    SELECT id, access_code FROM test_sets
+                    WHERE created_by = $1 AND creation_key = $2
+                """, user['id'], data.get('creation_key'))
+            test_set_id = test_set['id']
         
         # Формируем сообщение об успешном создании
         text = f"🎉 **Батарея тестов создана успешно!**\n\n"
@@ -446,41 +462,7 @@ async def process_1rm_test_input(message: Message, state: FSMContext):
             await state.clear()
             return
 
-        # Расчет 1ПМ по трем формулам
-        def calculate_1rm(w, r):
-            '''Расчет 1ПМ по формулам Бжицкого, Эпли и альтернативной'''
-            w = float(w)
-            r = int(r)
-
-            # Если уже 1 повторение, то это и есть 1ПМ
-            if r == 1:
-                return {
-                    'brzycki': w,
-                    'epley': w,
-                    'alternative': w,
-                    'average': w
-                }
-
-            # Формула Бжицкого: 1ПМ = вес / (1.0278 - 0.0278 × повторения)
-            brzycki = w / (1.0278 - 0.0278 * r)
-
-            # Формула Эпли: 1ПМ = вес × (1 + повторения / 30)
-            epley = w * (1 + r / 30.0)
-
-            # Альтернативная формула: 1ПМ = вес × (1 + 0.025 × повторения)  
-            alternative = w * (1 + 0.025 * r)
-
-            # Среднее по трем формулам
-            average = (brzycki + epley + alternative) / 3.0
-
-            return {
-                'brzycki': round(brzycki, 1),
-                'epley': round(epley, 1),
-                'alternative': round(alternative, 1),
-                'average': round(average, 1)
-            }
-
-        # Выполняем расчет
+        # Расчет 1ПМ по формулам Бжицкого, Эпли и альтернативной
         results = calculate_1rm(weight, reps)
 
         # Сохраняем результат в базу данных
@@ -490,17 +472,11 @@ async def process_1rm_test_input(message: Message, state: FSMContext):
             await message.answer("❌ Пользователь не найден в базе данных")
             return
 
-        async with db_manager.pool.acquire() as conn:
-            # Сохраняем результат теста
-            await conn.execute('''
-                INSERT INTO one_rep_max (
-                    user_id, exercise_id, weight, reps, test_weight,
-                    formula_brzycki, formula_epley, formula_alternative, formula_average
-                ) VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9)
-            ''', 
-            user['id'], int(exercise_id), results['average'], 
-            reps, weight, results['brzycki'], results['epley'],
-            results['alternative'], results['average'])
+        # Сохраняем результат теста (вместе со сводками рекордов)
+        await db_manager.record_one_rep_max(
+            user['id'], int(exercise_id), weight, reps,
+            results['brzycki'], results['epley'], results['alternative'], results['average']
+        )
 
         # Формируем сообщение с результатами
         text = f"🎉 **Результат теста 1ПМ**\n\n"
@@ -517,10 +493,10 @@ async def process_1rm_test_input(message: Message, state: FSMContext):
 
         # Добавляем процентовки для тренировок
         text += f"**💡 Рекомендации для тренировок:**\n"
-        text += f"• 50%: {round(results['average'] * 0.5, 1)} кг (разминка)\n"
-        text += f"• 70%: {round(results['average'] * 0.7, 1)} кг (выносливость)\n"
-        text += f"• 85%: {round(results['average'] * 0.85, 1)} кг (сила)\n"
-        text += f"• 95%: {round(results['average'] * 0.95, 1)} кг (максимальная сила)"
+        text += "\n".join(
+            f"• {percent}%: {percent_load(results['average'], percent)} кг ({purpose})"
+            for percent, purpose in TRAINING_ZONES
+        )
 
         # Создаем клавиатуру
         keyboard = InlineKeyboardBuilder()
@@ -571,48 +547,42 @@ async def handle_test_exercise_search(message: Message, state: FSMContext):
     search_term = message.text.lower().strip()
 
     try:
-        async with db_manager.pool.acquire() as conn:
-            # Ищем упражнения подходящие для тестов (обычно силовые)
-            exercises = await conn.fetch('''
-                SELECT id, name, category, muscle_group 
-                FROM exercises 
-                WHERE (LOWER(name) LIKE $1 OR LOWER(muscle_group) LIKE $1)
-                  AND category IN ('Силовые', 'Функциональные')
-                ORDER BY 
-                  CASE WHEN LOWER(name) LIKE $1 THEN 1 ELSE 2 END,
-                  name
-                LIMIT 10
-            ''', f"%{search_term}%")
-
-            if exercises:
-                text = f"🔍 **Найдено упражнений: {len(exercises)}**\n\n"
-                keyboard = InlineKeyboardBuilder()
-
-                for ex in exercises:
-                    keyboard.button(
-                        text=f"{ex['name']} ({ex['muscle_group']})",
-                        callback_data=f"test_exercise_{ex['id']}"
-                    )
-
-                keyboard.button(text="🔙 К тестам", callback_data="tests_menu")
-                keyboard.adjust(1)
+        # Ищем упражнения подходящие для тестов (обычно силовые)
+        exercises = await search_exercises(
+            search_term,
+            filters={'category': ('Силовые', 'Функциональные')},
+            limit=10
+        )
 
-                await message.answer(
-                    text + "Выберите упражнение для теста:",
-                    reply_markup=keyboard.as_markup(),
-                    parse_mode="Markdown"
-                )
-            else:
-                keyboard = InlineKeyboardBuilder()
-                keyboard.button(text="🔄 Новый поиск", callback_data="search_exercise_for_test")
-                keyboard.button(text="🔙 К тестам", callback_data="tests_menu")
+        if exercises:
+            text = f"🔍 **Найдено упражнений: {len(exercises)}**\n\n"
+            keyboard = InlineKeyboardBuilder()
 
-                await message.answer(
-                    f"❌ Упражнения по запросу '{search_term}' не найдены.\n\n"
-                    f"Попробуйте другие ключевые слова.",
-                    reply_markup=keyboard.as_markup()
+            for ex in exercises:
+                keyboard.button(
+                    text=f"{ex['name']} ({ex['muscle_group']})",
+                    callback_data=f"test_exercise_{ex['id']}"
                 )
 
+            keyboard.button(text="🔙 К тестам", callback_data="tests_menu")
+            keyboard.adjust(1)
+
+            await message.answer(
+                text + "Выберите упражнение для теста:",
+                reply_markup=keyboard.as_markup(),
+                parse_mode="Markdown"
+            )
+        else:
+            keyboard = InlineKeyboardBuilder()
+            keyboard.button(text="🔄 Новый поиск", callback_data="search_exercise_for_test")
+            keyboard.button(text="🔙 К тестам", callback_data="tests_menu")
+
+            await message.answer(
+                f"❌ Упражнения по запросу '{search_term}' не найдены.\n\n"
+                f"Попробуйте другие ключевые слова.",
+                reply_markup=keyboard.as_markup()
+            )
+
         await state.clear()
 
     except Exception as e:
@@ -634,15 +604,12 @@ async def search_exercises_for_battery(callback: CallbackQuery, state: FSMContex
 async def browse_categories_for_battery(callback: CallbackQuery):
     """Просмотр категорий упражнений для батареи"""
     try:
-        async with db_manager.pool.acquire() as conn:
-            categories = await conn.fetch("SELECT DISTINCT category FROM exercises ORDER BY category")
-        
         keyboard = InlineKeyboardBuilder()
         
-        for cat in categories:
+        for cat in exercise_catalog.categories():
             keyboard.button(
-                text=f"📂 {cat['category']}", 
-                callback_data=f"battery_cat_{cat['category']}"
+                text=f"📂 {cat}", 
+                callback_data=f"battery_cat_{cat}"
             )
         
         keyboard.button(text="🔙 К добавлению", callback_data="back_to_add_exercises")
@@ -661,15 +628,12 @@ async def browse_categories_for_battery(callback: CallbackQuery):
 async def browse_muscle_groups_for_battery(callback: CallbackQuery):
     """Просмотр групп мышц для батареи"""
     try:
-        async with db_manager.pool.acquire() as conn:
-            muscle_groups = await conn.fetch("SELECT DISTINCT muscle_group FROM exercises ORDER BY muscle_group")
-        
         keyboard = InlineKeyboardBuilder()
         
-        for mg in muscle_groups:
+        for mg in exercise_catalog.muscle_groups():
             keyboard.button(
-                text=f"💪 {mg['muscle_group']}", 
-                callback_data=f"battery_muscle_{mg['muscle_group']}"
+                text=f"💪 {mg}", 
+                callback_data=f"battery_muscle_{mg}"
             )
         
         keyboard.button(text="🔙 К добавлению", callback_data="back_to_add_exercises")
@@ -690,11 +654,7 @@ async def show_battery_category_exercises(callback: CallbackQuery, state: FSMCon
     category = callback.data[12:]  # Убираем "battery_cat_"
     
     try:
-        async with db_manager.pool.acquire() as conn:
-            exercises = await conn.fetch(
-                "SELECT id, name, muscle_group, test_type FROM exercises WHERE category = $1 ORDER BY name",
-                category
-            )
+        exercises = exercise_catalog.by_category(category)
         
         if exercises:
             text = f"📂 **{category} - добавить в батарею:**\n\n"
@@ -735,11 +695,7 @@ async def show_battery_muscle_exercises(callback: CallbackQuery, state: FSMConte
     muscle_group = callback.data[15:]  # Убираем "battery_muscle_"
     
     try:
-        async with db_manager.pool.acquire() as conn:
-            exercises = await conn.fetch(
-                "SELECT id, name, category, test_type FROM exercises WHERE muscle_group = $1 ORDER BY name",
-                muscle_group
-            )
+        exercises = exercise_catalog.by_muscle_group(muscle_group)
         
         if exercises:
             text = f"💪 **{muscle_group} - добавить в батарею:**\n\n"
@@ -787,24 +743,17 @@ async def add_exercise_to_battery(callback: CallbackQuery, state: FSMContext):
     
     try:
         async with db_manager.pool.acquire() as conn:
-            # Проверяем, что упражнения еще нет в батарее
-            existing = await conn.fetchrow("""
-                SELECT id FROM test_set_exercises 
-                WHERE test_set_id = $1 AND exercise_id = $2
-            """, battery_id, exercise_id)
-            
-            if existing:
-                await callback.answer("⚠️ Это упражнение уже добавлено в батарею!")
-                return
-            
-            # Добавляем упражнение
-            await conn.execute("""
+            # Добавляем упражнение (уникальный индекс гасит повтор без лишнего SELECT)
+            added = await conn.fetchval("""
                 INSERT INTO test_set_exercises (test_set_id, exercise_id)
                 VALUES ($1, $2)
+                ON CONFLICT (test_set_id, exercise_id) DO NOTHING
+                RETURNING id
             """, battery_id, exercise_id)
             
-            # Получаем название упражнения
-            exercise = await conn.fetchrow("SELECT name FROM exercises WHERE id = $1", exercise_id)
+            if added is None:
+                await callback.answer("⚠️ Это упражнение уже добавлено в батарею!")
+                return
             
             # Получаем обновленную информацию о батарее
             battery = await conn.fetchrow("""
@@ -815,6 +764,7 @@ async def add_exercise_to_battery(callback: CallbackQuery, state: FSMContext):
                 GROUP BY ts.id, ts.name
             """, battery_id)
         
+        exercise = exercise_catalog.get(exercise_id) or {'name': f"#{exercise_id}"}
         await callback.answer(f"✅ '{exercise['name']}' добавлено!")
         
         # ИСПРАВЛЕНО: Показываем краткое сообщение об успешном добавлении
@@ -846,12 +796,7 @@ async def player_batteries_main_menu(callback: CallbackQuery):
     """Главное меню батарей тестов для игроков"""
     user = await db_manager.get_user_by_telegram_id(callback.from_user.id)
     
-    keyboard = InlineKeyboardBuilder()
-    keyboard.button(text="📋 Мои батареи", callback_data="my_assigned_batteries")
-    keyboard.button(text="🔗 Присоединиться по коду", callback_data="join_battery")
-    keyboard.button(text="📈 Мои результаты", callback_data="my_battery_results")
-    keyboard.button(text="🔙 К тестам", callback_data="tests_menu")
-    keyboard.adjust(1)
+    keyboard = get_player_batteries_keyboard()
     
     try:
         async with db_manager.pool.acquire() as conn:
@@ -891,7 +836,7 @@ async def player_batteries_main_menu(callback: CallbackQuery):
     
     await callback.message.edit_text(
         text,
-        reply_markup=keyboard.as_markup(),
+        reply_markup=keyboard,
         parse_mode="Markdown"
     )
     await callback.answer()
@@ -939,25 +884,21 @@ async def process_battery_code(message: Message, state: FSMContext):
                 )
                 return
             
-            # Проверяем, не присоединен ли уже
-            existing = await conn.fetchrow("""
-                SELECT id FROM test_set_participants 
-                WHERE test_set_id = $1 AND user_id = $2
+            # Присоединяем к батарее (если уже участвует - вставки не будет)
+            joined = await conn.fetchval("""
+                INSERT INTO test_set_participants (test_set_id, user_id)
+                VALUES ($1, $2)
+                ON CONFLICT (test_set_id, user_id) DO NOTHING
+                RETURNING id
             """, battery['id'], user['id'])
             
-            if existing:
+            if joined is None:
                 await message.answer(
                     f"⚠️ **Вы уже участвуете в этой батарее!**\n\n"
                     f"📋 **{battery['name']}**"
                 )
                 await state.clear()
                 return
-            
-            # Присоединяем к батарее
-            await conn.execute("""
-                INSERT INTO test_set_participants (test_set_id, user_id)
-                VALUES ($1, $2)
-            """, battery['id'], user['id'])
         
         text = f"🎉 **Успешно присоединились к батарее!**\n\n"
         text += f"📋 **Название:** {battery['name']}\n"
@@ -1037,16 +978,7 @@ async def search_exercises_for_battery_text(message: Message, state: FSMContext)
     battery_id = data.get('editing_battery_id')
     
     try:
-        async with db_manager.pool.acquire() as conn:
-            exercises = await conn.fetch("""
-                SELECT id, name, category, muscle_group, test_type
-                FROM exercises 
-                WHERE LOWER(name) LIKE $1 
-                   OR LOWER(category) LIKE $1
-                   OR LOWER(muscle_group) LIKE $1
-                ORDER BY name
-                LIMIT 15
-            """, f"%{search_term}%")
+        exercises = await search_exercises(search_term, limit=15)
         
         if exercises:
             text = f"🔍 **Найдено упражнений: {len(exercises)}**\n\n"
@@ -1100,8 +1032,10 @@ def register_battery_handlers(dp):
     
     # Создание батареи
     dp.callback_query.register(my_batteries, F.data == "my_batteries")
+    dp.callback_query.register(my_batteries, F.data.startswith("my_batteries:"))
     dp.callback_query.register(create_battery, F.data == "create_battery")
-    dp.callback_query.register(skip_battery_description, F.data == "skip_battery_description")
+    dp.callback_query.register(skip_battery_description, F.data == "skip_battery_description",
+                               flags={"idempotent": True})
     dp.callback_query.register(cancel_battery_creation, F.data == "cancel_battery_creation")
     
     # Управление батареей
@@ -1114,7 +1048,8 @@ def register_battery_handlers(dp):
     dp.callback_query.register(browse_muscle_groups_for_battery, F.data == "browse_muscle_for_battery")
     dp.callback_query.register(show_battery_category_exercises, F.data.startswith("battery_cat_"))
     dp.callback_query.register(show_battery_muscle_exercises, F.data.startswith("battery_muscle_"))
-    dp.callback_query.register(add_exercise_to_battery, F.data.startswith("add_to_battery_"))
+    dp.callback_query.register(add_exercise_to_battery, F.data.startswith("add_to_battery_"),
+                               flags={"idempotent": True})
     dp.callback_query.register(back_to_add_exercises, F.data == "back_to_add_exercises")
     
     # Присоединение к батарее
@@ -1126,6 +1061,16 @@ def register_battery_handlers(dp):
     dp.callback_query.register(edit_battery, F.data.startswith("edit_battery_"))
     dp.callback_query.register(battery_results, F.data.startswith("battery_results_"))
 
+# ===== ТЕКСТОВЫЕ СОСТОЯНИЯ =====
+text_dispatch.register(
+    process_battery_text_input,
+    CreateBatteryStates.waiting_name,
+    CreateBatteryStates.waiting_description,
+    CreateBatteryStates.selecting_exercises,
+    EditBatteryStates.adding_exercises,
+    JoinBatteryStates.waiting_battery_code,
+)
+
 __all__ = [
     'register_battery_handlers',
     'process_battery_text_input',
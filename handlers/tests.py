@@ -10,7 +10,8 @@ from aiogram.types import Message, CallbackQuery
 
 from aiogram.utils.keyboard import InlineKeyboardBuilder
 
-from database import db_manager
+from database import db_manager, exercise_catalog, search_exercises
+from handlers.text_dispatch import text_dispatch
 
 import logging
 
@@ -18,6 +19,25 @@ import re
 
 from typing import Dict, Any, Tuple, Optional
 
+from asyncpg import Record
+
+from database.queries import USER_TESTS
+from database.team_analytics import team_analytics as analytics
+from database.pagination import Page
+from keyboards.pagination import pager_buttons, parse_page_callback
+from utils.rendering import Template, escape_md, join, static
+from utils.strength_math import calculate_1rm, training_loads_batch, TRAINING_ZONES
+
+# Сколько упражнений и мест показывать в отчете по команде
+TEAM_STATS_EXERCISES = 5
+TEAM_STATS_TOP = 5
+# Сколько игроков показывать в рабочих весах по упражнению
+TEAM_LOADS_PLAYERS = 10
+
+# Размер страницы списков тестов и результатов поиска
+TESTS_PAGE_SIZE = 10
+SEARCH_PAGE_SIZE = 15
+
 logger = logging.getLogger(__name__)
 
 # ===== ГЛАВНОЕ МЕНЮ ТЕСТОВ =====
@@ -166,60 +186,60 @@ async def player_batteries_menu(callback: CallbackQuery):
 
 # ===== ПОЛНОЦЕННЫЕ ФУНКЦИИ ВМЕСТО ЗАГЛУШЕК =====
 
-async def team_analytics(callback: CallbackQuery):
-    """ПОЛНОЦЕННАЯ аналитика команды"""
-    user = await db_manager.get_user_by_telegram_id(callback.from_user.id)
+async def team_analytics(callback: CallbackQuery, user: Optional[Record] = None):
+    """Аналитика команд тренера (все команды одним запросом)"""
+    if user is None:
+        user = await db_manager.get_user_by_telegram_id(callback.from_user.id)
     
     if user['role'] not in ['coach', 'admin']:
         await callback.answer("❌ Доступно только тренерам", show_alert=True)
         return
     
     try:
-        async with db_manager.pool.acquire() as conn:
-            # Получаем команды тренера
-            teams = await conn.fetch("""
-                SELECT t.id, t.name, COUNT(tm.user_id) as members_count
-                FROM teams t
-                LEFT JOIN team_members tm ON t.id = tm.team_id AND tm.is_active = true
-                WHERE t.coach_id = $1 AND t.is_active = true
-                GROUP BY t.id, t.name
-                ORDER BY t.name
-            """, user['id'])
+        reports = await analytics.coach_dashboard(callback.from_user.id)
+        
+        if not reports:
+            text = f"📈 **Аналитика команды**\n\n"
+            text += f"⚠️ У вас пока нет команд\n\n"
+            text += f"Создайте команду, чтобы видеть аналитику участников."
             
-            if not teams:
-                text = f"📈 **Аналитика команды**\\n\\n"
-                text += f"⚠️ У вас пока нет команд\\n\\n"
-                text += f"Создайте команду, чтобы видеть аналитику участников."
-                
-                keyboard = InlineKeyboardBuilder()
-                keyboard.button(text="👥 Создать команду", callback_data="create_team")
-                keyboard.button(text="🔙 К тестам", callback_data="tests_menu")
-                keyboard.adjust(1)
-            else:
-                text = f"📈 **Аналитика команды**\\n\\n"
-                text += f"👨🏫 **Ваши команды:**\\n\\n"
-                
-                keyboard = InlineKeyboardBuilder()
-                
-                for team in teams:
-                    text += f"👥 **{team['name']}**\\n"
-                    text += f"   Участников: {team['members_count']}\\n\\n"
-                    
-                    keyboard.button(
-                        text=f"📊 {team['name']} ({team['members_count']})",
-                        callback_data=f"team_stats_{team['id']}"
-                    )
+            keyboard = InlineKeyboardBuilder()
+            keyboard.button(text="👥 Создать команду", callback_data="create_team")
+            keyboard.button(text="🔙 К тестам", callback_data="tests_menu")
+            keyboard.adjust(1)
+        else:
+            text = f"📈 **Аналитика команды**\n\n"
+            text += f"👨🏫 **Ваши команды:**\n\n"
+            
+            keyboard = InlineKeyboardBuilder()
+            
+            for report in reports:
+                text += f"👥 **{escape_md(report.name)}**\n"
+                text += f"   Участников: {report.players_count} • с тестами: {report.tested_count}\n"
                 
-                text += f"💡 Выберите команду для детальной аналитики"
+                # Лидер в самом популярном упражнении
+                if report.leaderboards:
+                    exercise_id, rows = max(report.leaderboards.items(), key=lambda item: len(item[1]))
+                    exercise = exercise_catalog.get(exercise_id)
+                    exercise_name = exercise['name'] if exercise else f"Упражнение #{exercise_id}"
+                    text += f"   🏆 {escape_md(exercise_name)}: {escape_md(rows[0].full_name)} — {rows[0].best_1rm} кг\n"
+                text += "\n"
                 
-                keyboard.button(text="🔙 К тестам", callback_data="tests_menu")
-                keyboard.adjust(1)
+                keyboard.button(
+                    text=f"📊 {report.name} ({report.players_count})",
+                    callback_data=f"team_stats_{report.team_id}"
+                )
             
-            await callback.message.edit_text(
-                text,
-                reply_markup=keyboard.as_markup(),
-                parse_mode="Markdown"
-            )
+            text += f"💡 Выберите команду для детальной аналитики"
+            
+            keyboard.button(text="🔙 К тестам", callback_data="tests_menu")
+            keyboard.adjust(1)
+        
+        await callback.message.edit_text(
+            text,
+            reply_markup=keyboard.as_markup(),
+            parse_mode="Markdown"
+        )
             
     except Exception as e:
         logger.error(f"Ошибка аналитики команды: {e}")
@@ -227,6 +247,116 @@ async def team_analytics(callback: CallbackQuery):
     
     await callback.answer()
 
+async def team_stats(callback: CallbackQuery):
+    """Рейтинги команды по упражнениям: места, перцентили, позиции, прирост"""
+    team_id = int(callback.data.split("_")[-1])
+    
+    try:
+        report = await analytics.team_report(callback.from_user.id, team_id)
+        if report is None:
+            await callback.answer("❌ Команда не найдена", show_alert=True)
+            return
+        
+        text = f"📊 **{escape_md(report.name)}**\n"
+        text += f"👥 Участников: {report.players_count} • с тестами: {report.tested_count}\n\n"
+        
+        if not report.leaderboards:
+            text += f"⚠️ Игроки команды еще не проходили тесты 1ПМ"
+        
+        # Сначала упражнения, которые прошло больше игроков
+        boards = sorted(report.leaderboards.items(), key=lambda item: len(item[1]), reverse=True)
+        for exercise_id, rows in boards[:TEAM_STATS_EXERCISES]:
+            exercise = exercise_catalog.get(exercise_id)
+            exercise_name = exercise['name'] if exercise else f"Упражнение #{exercise_id}"
+            text += f"💪 **{escape_md(exercise_name)}** — среднее {round(report.team_avg[exercise_id], 1)} кг\n"
+            
+            for row in rows[:TEAM_STATS_TOP]:
+                text += f"{row.rank}. {escape_md(row.full_name)} — {row.best_1rm} кг"
+                if row.delta:
+                    text += f" ({'📈' if row.delta > 0 else '📉'} {row.delta:+})"
+                if len(rows) > 1:
+                    text += f" • лучше {round(row.percentile * 100)}%"
+                text += "\n"
+            
+            positions = report.position_avg[exercise_id]
+            if len(positions) > 1:
+                text += "   " + ", ".join(
+                    f"{escape_md(position)}: {round(avg, 1)}" for position, avg in sorted(positions.items())
+                ) + "\n"
+            text += "\n"
+        
+        if len(boards) > TEAM_STATS_EXERCISES:
+            text += f"_И еще упражнений: {len(boards) - TEAM_STATS_EXERCISES}_"
+        
+        keyboard = InlineKeyboardBuilder()
+        if report.leaderboards:
+            keyboard.button(text="⚖️ Рабочие веса", callback_data=f"team_loads_{team_id}")
+        keyboard.button(text="🔙 К командам", callback_data="team_analytics")
+        keyboard.button(text="🏠 Главное меню", callback_data="main_menu")
+        keyboard.adjust(1)
+        
+        await callback.message.edit_text(
+            text,
+            reply_markup=keyboard.as_markup(),
+            parse_mode="Markdown"
+        )
+        
+    except Exception as e:
+        logger.error(f"Ошибка аналитики команды {team_id}: {e}")
+        await callback.message.edit_text("❌ Ошибка загрузки аналитики команды")
+    
+    await callback.answer()
+
+async def team_loads(callback: CallbackQuery):
+    """Рабочие веса игроков команды по зонам нагрузки (от лучшего 1ПМ)"""
+    team_id = int(callback.data.split("_")[-1])
+    
+    try:
+        report = await analytics.team_report(callback.from_user.id, team_id)
+        if report is None:
+            await callback.answer("❌ Команда не найдена", show_alert=True)
+            return
+        
+        percents = [percent for percent, _ in TRAINING_ZONES]
+        text = f"⚖️ **Рабочие веса: {escape_md(report.name)}**\n"
+        text += " · ".join(f"{percent}% {purpose}" for percent, purpose in TRAINING_ZONES) + "\n\n"
+        
+        if not report.leaderboards:
+            text += f"⚠️ Игроки команды еще не проходили тесты 1ПМ"
+        
+        boards = sorted(report.leaderboards.items(), key=lambda item: len(item[1]), reverse=True)
+        for exercise_id, rows in boards[:TEAM_STATS_EXERCISES]:
+            exercise = exercise_catalog.get(exercise_id)
+            exercise_name = exercise['name'] if exercise else f"Упражнение #{exercise_id}"
+            text += f"💪 **{escape_md(exercise_name)}**\n"
+            
+            # Веса всех игроков по всем зонам - одним пакетным вызовом
+            shown = rows[:TEAM_LOADS_PLAYERS]
+            loads = training_loads_batch([row.best_1rm for row in shown], percents)
+            for row, player_loads in zip(shown, loads):
+                weights = " · ".join(f"{float(load):g}" for load in player_loads)
+                text += f"{escape_md(row.full_name)} ({row.best_1rm}): {weights} кг\n"
+            if len(rows) > len(shown):
+                text += f"_...и еще игроков: {len(rows) - len(shown)}_\n"
+            text += "\n"
+        
+        keyboard = InlineKeyboardBuilder()
+        keyboard.button(text="🔙 К рейтингам", callback_data=f"team_stats_{team_id}")
+        keyboard.button(text="🏠 Главное меню", callback_data="main_menu")
+        keyboard.adjust(1)
+        
+        await callback.message.edit_text(
+            text,
+            reply_markup=keyboard.as_markup(),
+            parse_mode="Markdown"
+        )
+        
+    except Exception as e:
+        logger.error(f"Ошибка рабочих весов команды {team_id}: {e}")
+        await callback.message.edit_text("❌ Ошибка загрузки рабочих весов")
+    
+    await callback.answer()
+
 async def public_test_sets(callback: CallbackQuery):
     """ПОЛНОЦЕННЫЕ публичные наборы тестов"""
     try:
@@ -485,14 +615,11 @@ async def search_exercise_by_name_for_test(callback: CallbackQuery, state: FSMCo
 async def search_by_category_for_test(callback: CallbackQuery):
     """Поиск упражнений по категориям для тестирования"""
     try:
-        async with db_manager.pool.acquire() as conn:
-            categories = await conn.fetch("SELECT DISTINCT category FROM exercises ORDER BY category")
-        
         keyboard = InlineKeyboardBuilder()
-        for cat in categories:
+        for cat in exercise_catalog.categories():
             keyboard.button(
-                text=f"📂 {cat['category']}",
-                callback_data=f"test_cat_{cat['category']}"
+                text=f"📂 {cat}",
+                callback_data=f"test_cat_{cat}"
             )
         
         keyboard.button(text="🔙 К поиску теста", callback_data="new_test_menu")
@@ -513,14 +640,11 @@ async def search_by_category_for_test(callback: CallbackQuery):
 async def search_by_muscle_for_test(callback: CallbackQuery):
     """Поиск упражнений по группам мышц для тестирования"""
     try:
-        async with db_manager.pool.acquire() as conn:
-            muscle_groups = await conn.fetch("SELECT DISTINCT muscle_group FROM exercises ORDER BY muscle_group")
-        
         keyboard = InlineKeyboardBuilder()
-        for mg in muscle_groups:
+        for mg in exercise_catalog.muscle_groups():
             keyboard.button(
-                text=f"💪 {mg['muscle_group']}",
-                callback_data=f"test_muscle_{mg['muscle_group']}"
+                text=f"💪 {mg}",
+                callback_data=f"test_muscle_{mg}"
             )
         
         keyboard.button(text="🔙 К поиску теста", callback_data="new_test_menu")
@@ -543,11 +667,7 @@ async def show_test_category_exercises(callback: CallbackQuery):
     category = callback.data[9:]  # Убираем "test_cat_"
     
     try:
-        async with db_manager.pool.acquire() as conn:
-            exercises = await conn.fetch(
-                "SELECT id, name, muscle_group, test_type FROM exercises WHERE category = $1 ORDER BY name",
-                category
-            )
+        exercises = exercise_catalog.by_category(category)
         
         if exercises:
             text = f"📂 **{category} - упражнения для тестирования:**\\n\\n"
@@ -591,11 +711,7 @@ async def show_test_muscle_exercises(callback: CallbackQuery):
     muscle_group = callback.data[12:]  # Убираем "test_muscle_"
     
     try:
-        async with db_manager.pool.acquire() as conn:
-            exercises = await conn.fetch(
-                "SELECT id, name, category, test_type FROM exercises WHERE muscle_group = $1 ORDER BY name",
-                muscle_group
-            )
+        exercises = exercise_catalog.by_muscle_group(muscle_group)
         
         if exercises:
             text = f"💪 **{muscle_group} - упражнения для тестирования:**\\n\\n"
@@ -634,68 +750,86 @@ async def show_test_muscle_exercises(callback: CallbackQuery):
     
     await callback.answer()
 
+async def render_test_search(search_term: str, offset: int = 0):
+    """Страница результатов поиска упражнений для теста: (текст, клавиатура)
+
+    Поиск ранжированный и идет по каталогу в памяти, поэтому курсор
+    страницы - смещение в выдаче.
+    """
+    exercises = await search_exercises(search_term, limit=offset + SEARCH_PAGE_SIZE + 1)
+    has_next = len(exercises) > offset + SEARCH_PAGE_SIZE
+    exercises = exercises[offset:offset + SEARCH_PAGE_SIZE]
+    keyboard = InlineKeyboardBuilder()
+
+    if exercises:
+        text = f"🔍 **Найдено упражнений для тестирования: {offset + len(exercises)}{'+' if has_next else ''}**\\n\\n"
+        text += f"💡 **Нажмите на упражнение чтобы сразу пройти тест:**\\n\\n"
+        
+        for ex in exercises:
+            test_emoji = {
+                'strength': '🏋️',
+                'endurance': '⏱️',
+                'speed': '🏃',
+                'quantity': '🔢',
+                'none': '💪'
+            }.get(ex['test_type'] if ex['test_type'] else 'none', '💪')
+            
+            keyboard.button(
+                text=f"{test_emoji} {ex['name']} • {ex['muscle_group']}",
+                callback_data=f"test_{ex['id']}"
+            )
+        
+        keyboard.button(text="🔍 Новый поиск", callback_data="new_test_menu")
+        keyboard.button(text="🔙 К индивидуальным", callback_data="individual_tests_menu")
+        keyboard.button(text="🏠 Главное меню", callback_data="main_menu")
+        keyboard.adjust(1)
+        keyboard.row(*pager_buttons("tsearch", Page(
+            exercises, has_prev=offset > 0, has_next=has_next,
+            prev_cursor=str(max(0, offset - SEARCH_PAGE_SIZE)),
+            next_cursor=str(offset + SEARCH_PAGE_SIZE),
+        )))
+    else:
+        text = f"❌ Упражнения по запросу '{search_term}' не найдены\\n\\n"  \
+               f"Попробуйте другие ключевые слова."
+        
+        keyboard.button(text="🔍 Новый поиск", callback_data="new_test_menu")
+        keyboard.button(text="🔙 К индивидуальным", callback_data="individual_tests_menu")
+        keyboard.button(text="🏠 Главное меню", callback_data="main_menu")
+
+    return text, keyboard.as_markup()
+
 async def handle_test_exercise_search(message: Message, state: FSMContext):
     """Обработка поиска упражнения по названию для теста"""
     search_term = message.text.lower()
     
     try:
-        async with db_manager.pool.acquire() as conn:
-            exercises = await conn.fetch("""
-                SELECT id, name, category, muscle_group, test_type
-                FROM exercises
-                WHERE LOWER(name) LIKE $1
-                OR LOWER(category) LIKE $1
-                OR LOWER(muscle_group) LIKE $1
-                ORDER BY name
-                LIMIT 15
-            """, f"%{search_term}%")
-        
-        if exercises:
-            text = f"🔍 **Найдено упражнений для тестирования: {len(exercises)}**\\n\\n"
-            text += f"💡 **Нажмите на упражнение чтобы сразу пройти тест:**\\n\\n"
-            
-            keyboard = InlineKeyboardBuilder()
-            
-            for ex in exercises:
-                test_emoji = {
-                    'strength': '🏋️',
-                    'endurance': '⏱️',
-                    'speed': '🏃',
-                    'quantity': '🔢',
-                    'none': '💪'
-                }.get(ex['test_type'] if ex['test_type'] else 'none', '💪')
-                
-                keyboard.button(
-                    text=f"{test_emoji} {ex['name']} • {ex['muscle_group']}",
-                    callback_data=f"test_{ex['id']}"
-                )
-            
-            keyboard.button(text="🔍 Новый поиск", callback_data="new_test_menu")
-            keyboard.button(text="🔙 К индивидуальным", callback_data="individual_tests_menu")
-            keyboard.button(text="🏠 Главное меню", callback_data="main_menu")
-            keyboard.adjust(1)
-            
-            await message.answer(
-                text,
-                reply_markup=keyboard.as_markup(),
-                parse_mode="Markdown"
-            )
-        else:
-            text = f"❌ Упражнения по запросу '{search_term}' не найдены\\n\\n"  \
-                   f"Попробуйте другие ключевые слова."
-            
-            keyboard = InlineKeyboardBuilder()
-            keyboard.button(text="🔍 Новый поиск", callback_data="new_test_menu")
-            keyboard.button(text="🔙 К индивидуальным", callback_data="individual_tests_menu")
-            keyboard.button(text="🏠 Главное меню", callback_data="main_menu")
-            
-            await message.answer(text, reply_markup=keyboard.as_markup(), parse_mode="Markdown")
+        text, markup = await render_test_search(search_term)
+        await message.answer(text, reply_markup=markup, parse_mode="Markdown")
         
-        await state.clear()
+        # Запрос остается в данных FSM для кнопок страниц
+        await state.set_state(None)
+        await state.set_data({'test_search': search_term})
         
     except Exception as e:
         await message.answer(f"❌ Ошибка поиска: {e}")
 
+async def test_search_page(callback: CallbackQuery, state: FSMContext):
+    """Другая страница результатов поиска упражнений для теста"""
+    search_term = (await state.get_data()).get('test_search')
+    if not search_term:
+        await callback.answer("⚠️ Поиск устарел, выполните его заново", show_alert=True)
+        return
+    
+    _, cursor, _ = parse_page_callback(callback.data)
+    try:
+        offset = max(0, int(cursor or 0))
+    except ValueError:
+        offset = 0
+    
+    text, markup = await render_test_search(search_term, offset)
+    await callback.message.edit_text(text, reply_markup=markup, parse_mode="Markdown")
+    await callback.answer()
+
 # ===== ПРОХОЖДЕНИЕ ТЕСТОВ С ИСПРАВЛЕННОЙ ЛОГИКОЙ =====
 
 async def start_exercise_test(callback: CallbackQuery, state: FSMContext):
@@ -703,8 +837,7 @@ async def start_exercise_test(callback: CallbackQuery, state: FSMContext):
     exercise_id = int(callback.data[5:])  # Убираем "test_"
     
     try:
-        async with db_manager.pool.acquire() as conn:
-            exercise = await conn.fetchrow("SELECT * FROM exercises WHERE id = $1", exercise_id)
+        exercise = exercise_catalog.get(exercise_id)
         
         if not exercise:
             await callback.answer("❌ Упражнение не найдено!")
@@ -842,39 +975,17 @@ async def process_strength_test_data(message: Message, state: FSMContext):
         weight = valid_data['weight']
         reps = valid_data['reps']
         
-        # Расчет 1ПМ
-        def calculate_1rm(w: float, r: int):
-            if r == 1:
-                return {'brzycki': w, 'epley': w, 'lander': w, 'average': w}
-            
-            brzycki = w / (1.0278 - 0.0278 * r)
-            epley = w * (1 + r / 30.0)
-            lander = (100 * w) / (101.3 - 2.67123 * r)
-            average = (brzycki + epley + lander) / 3.0
-            
-            return {
-                'brzycki': round(brzycki, 1),
-                'epley': round(epley, 1),
-                'lander': round(lander, 1),
-                'average': round(average, 1)
-            }
-        
-        results = calculate_1rm(weight, reps)
+        # Расчет 1ПМ (Brzycki, Epley, Lander)
+        results = calculate_1rm(weight, reps, formulas=('brzycki', 'epley', 'lander'))
         
         # Сохранение в БД
         from database import db_manager
         user = await db_manager.get_user_by_telegram_id(message.from_user.id)
         
-        async with db_manager.pool.acquire() as conn:
-            await conn.execute("""
-                INSERT INTO one_rep_max (
-                    user_id, exercise_id, weight, reps, test_weight,
-                    formula_brzycki, formula_epley, formula_alternative, formula_average
-                ) VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9)
-            """, 
-            user['id'], int(exercise_id), results['average'], 
-            reps, weight, results['brzycki'], results['epley'],
-            results['lander'], results['average'])
+        await db_manager.record_one_rep_max(
+            user['id'], int(exercise_id), weight, reps,
+            results['brzycki'], results['epley'], results['lander'], results['average']
+        )
         
         # Показ результата
         text = f"🎉 **Результат силового теста**\\n\\n"
@@ -1025,23 +1136,21 @@ async def process_quantity_test_data(message: Message, state: FSMContext):
 
 # ===== ПРОСМОТР ТЕСТОВ =====
 
-async def my_tests(callback: CallbackQuery):
-    """Показать тесты пользователя"""
-    user = await db_manager.get_user_by_telegram_id(callback.from_user.id)
+async def my_tests(callback: CallbackQuery, user: Optional[Record] = None):
+    """Показать тесты пользователя (по страницам, новые первыми)"""
+    if user is None:
+        user = await db_manager.get_user_by_telegram_id(callback.from_user.id)
+    _, cursor, direction = parse_page_callback(callback.data)
     
     try:
         async with db_manager.pool.acquire() as conn:
-            tests = await conn.fetch("""
-                SELECT tr.*, e.name as exercise_name, e.muscle_group
-                FROM test_results tr
-                JOIN exercises e ON tr.exercise_id = e.id
-                WHERE tr.user_id = $1
-                ORDER BY tr.tested_at DESC
-                LIMIT 10
-            """, user['id'])
+            page = await USER_TESTS.page(
+                conn, user['id'], cursor=cursor, direction=direction, size=TESTS_PAGE_SIZE
+            )
+        tests = page.items
         
         if tests:
-            text = f"📊 **Ваши последние тесты ({len(tests)}):**\\n\\n"
+            text = f"📊 **Ваши тесты:**\\n\\n"
             
             for test in tests:
                 test_emoji = {
@@ -1079,6 +1188,7 @@ async def my_tests(callback: CallbackQuery):
         keyboard.button(text="📈 Прогресс", callback_data="test_progress")
         keyboard.button(text="🔙 К индивидуальным", callback_data="individual_tests_menu")
         keyboard.adjust(1)
+        keyboard.row(*pager_buttons("my_tests", page))
         
         await callback.message.edit_text(
             text,
@@ -1091,87 +1201,74 @@ async def my_tests(callback: CallbackQuery):
     
     await callback.answer()
 
-async def test_progress(callback: CallbackQuery):
+PROGRESS_HEADER = Template(
+    "📈 **Ваш прогресс в тестах**\n\n"
+    "📊 **Общая статистика:**\n"
+    "• Всего тестов: {total}\n"
+    "• За месяц: {monthly}\n"
+)
+PROGRESS_BEST = Template("• Лучший 1ПМ: {formula_average} кг ({name})\n")
+PROGRESS_RECENT_TITLE = static("🏃 **Последние тесты:**\n")
+PROGRESS_TEST = Template(
+    "💪 **{name}**\n"
+    "   📊 {test_weight} кг × {reps} → 1ПМ: {formula_average} кг\n"
+    "   📅 {date}\n\n"
+)
+PROGRESS_MORE = Template("_И еще {count} тестов..._\n\n")
+PROGRESS_EMPTY = static(
+    "⚠️ У вас пока нет завершенных тестов\n"
+    "Пройдите первый тест для отслеживания прогресса!\n\n"
+)
+PROGRESS_FOOTER = static(
+    "💡 Регулярное тестирование поможет отследить прогресс\n"
+    "и правильно планировать нагрузки в тренировках."
+)
+
+async def test_progress(callback: CallbackQuery, user: Optional[Record] = None):
     """ПОЛНОЦЕННАЯ функция прогресса тестов"""
-    user = await db_manager.get_user_by_telegram_id(callback.from_user.id)
+    if user is None:
+        user = await db_manager.get_user_by_telegram_id(callback.from_user.id)
     
     try:
-        async with db_manager.pool.acquire() as conn:
-            # Получаем общую статистику
-            total_tests = await conn.fetchval("""
-                SELECT COUNT(*) FROM one_rep_max 
-                WHERE user_id = $1
-            """, user['id'])
-            
-            # Последние 5 тестов
-            recent_tests = await conn.fetch("""
-                SELECT e.name, orm.weight, orm.reps, orm.formula_average,
-                       orm.tested_at, orm.test_weight
-                FROM one_rep_max orm
-                JOIN exercises e ON orm.exercise_id = e.id
-                WHERE orm.user_id = $1
-                ORDER BY orm.tested_at DESC
-                LIMIT 5
-            """, user['id'])
-            
-            # Статистика по месяцам
-            monthly_stats = await conn.fetchval("""
-                SELECT COUNT(*) FROM one_rep_max 
-                WHERE user_id = $1 
-                AND tested_at > CURRENT_DATE - INTERVAL '30 days'
-            """, user['id'])
-            
-            # Лучший результат
-            best_result = await conn.fetchrow("""
-                SELECT e.name, orm.formula_average, orm.tested_at
-                FROM one_rep_max orm
-                JOIN exercises e ON orm.exercise_id = e.id
-                WHERE orm.user_id = $1
-                ORDER BY orm.formula_average DESC
-                LIMIT 1
-            """, user['id'])
-            
-            text = f"📈 **Ваш прогресс в тестах**\\n\\n"
-            text += f"📊 **Общая статистика:**\\n"
-            text += f"• Всего тестов: {total_tests}\\n"
-            text += f"• За месяц: {monthly_stats}\\n"
-            
-            if best_result:
-                text += f"• Лучший 1ПМ: {best_result['formula_average']} кг ({best_result['name']})\\n"
-            
-            text += f"\\n"
-            
-            if recent_tests:
-                text += f"🏃 **Последние тесты:**\\n"
-                for test in recent_tests[:3]:  # Показываем только 3 последних
-                    test_date = test['tested_at'].strftime('%d.%m.%Y')
-                    text += f"💪 **{test['name']}**\\n"
-                    text += f"   📊 {test['test_weight']} кг × {test['reps']} → 1ПМ: {test['formula_average']} кг\\n"
-                    text += f"   📅 {test_date}\\n\\n"
-                    
-                if len(recent_tests) > 3:
-                    text += f"_И еще {len(recent_tests) - 3} тестов..._\\n\\n"
-            else:
-                text += f"⚠️ У вас пока нет завершенных тестов\\n"
-                text += f"Пройдите первый тест для отслеживания прогресса!\\n\\n"
-            
-            text += f"💡 Регулярное тестирование поможет отследить прогресс\\n"
-            text += f"и правильно планировать нагрузки в тренировках."
-            
-            keyboard = InlineKeyboardBuilder()
-            if total_tests > 0:
-                keyboard.button(text="🏆 Мои рекорды", callback_data="test_records")
-                keyboard.button(text="📊 Детали", callback_data="detailed_progress")
-            keyboard.button(text="🆕 Новый тест", callback_data="individual_tests_menu")
-            keyboard.button(text="🔙 К тестам", callback_data="tests_menu")
-            keyboard.adjust(2)
-            
-            await callback.message.edit_text(
-                text,
-                reply_markup=keyboard.as_markup(),
-                parse_mode="Markdown"
+        progress = await db_manager.get_one_rm_progress(user['id'])
+        total_tests = progress['total_tests']
+        monthly_stats = progress['monthly_tests']
+        best_result = progress['best']
+        recent_tests = progress['recent']
+
+        parts = [PROGRESS_HEADER.render(total=total_tests, monthly=monthly_stats)]
+        if best_result:
+            parts.append(PROGRESS_BEST.render(best_result))
+        parts.append("\n")
+
+        if recent_tests:
+            parts.append(PROGRESS_RECENT_TITLE)
+            parts.extend(
+                PROGRESS_TEST.render(test, date=test['tested_at'].strftime('%d.%m.%Y'))
+                for test in recent_tests[:3]  # Показываем только 3 последних
             )
-            
+            if len(recent_tests) > 3:
+                parts.append(PROGRESS_MORE.render(count=len(recent_tests) - 3))
+        else:
+            parts.append(PROGRESS_EMPTY)
+
+        parts.append(PROGRESS_FOOTER)
+        text = join(parts)
+        
+        keyboard = InlineKeyboardBuilder()
+        if total_tests > 0:
+            keyboard.button(text="🏆 Мои рекорды", callback_data="test_records")
+            keyboard.button(text="📊 Детали", callback_data="detailed_progress")
+        keyboard.button(text="🆕 Новый тест", callback_data="individual_tests_menu")
+        keyboard.button(text="🔙 К тестам", callback_data="tests_menu")
+        keyboard.adjust(2)
+        
+        await callback.message.edit_text(
+            text,
+            reply_markup=keyboard.as_markup(),
+            parse_mode="Markdown"
+        )
+        
     except Exception as e:
         logger.error(f"Ошибка загрузки прогресса: {e}")
         await callback.message.edit_text(
@@ -1181,69 +1278,58 @@ async def test_progress(callback: CallbackQuery):
     
     await callback.answer()
 
-async def test_records(callback: CallbackQuery):
+async def test_records(callback: CallbackQuery, user: Optional[Record] = None):
     """ПОЛНОЦЕННАЯ функция рекордов тестов"""
-    user = await db_manager.get_user_by_telegram_id(callback.from_user.id)
+    if user is None:
+        user = await db_manager.get_user_by_telegram_id(callback.from_user.id)
     
     try:
-        async with db_manager.pool.acquire() as conn:
-            # Получаем лучшие результаты по каждому упражнению
-            records = await conn.fetch("""
-                WITH best_results AS (
-                    SELECT DISTINCT ON (exercise_id)
-                        exercise_id, formula_average, test_weight, reps, tested_at
-                    FROM one_rep_max 
-                    WHERE user_id = $1
-                    ORDER BY exercise_id, formula_average DESC
-                )
-                SELECT e.name, e.muscle_group, br.formula_average, 
-                       br.test_weight, br.reps, br.tested_at
-                FROM best_results br
-                JOIN exercises e ON br.exercise_id = e.id
-                ORDER BY br.formula_average DESC
-            """, user['id'])
-            
-            if records:
-                text = f"🏆 **Ваши рекорды**\\n\\n"
-                
-                # Топ-3 лучших результата
-                text += f"🥇 **Топ-3 лучших 1ПМ:**\\n"
-                for i, record in enumerate(records[:3], 1):
-                    medal = ["🥇", "🥈", "🥉"][i-1]
-                    text += f"{medal} **{record['name']}** ({record['muscle_group']})\\n"
-                    text += f"   🎯 1ПМ: **{record['formula_average']} кг**\\n"
-                    text += f"   📊 Тест: {record['test_weight']} кг × {record['reps']}\\n"
-                    text += f"   📅 {record['tested_at'].strftime('%d.%m.%Y')}\\n\\n"
-                
-                # Остальные рекорды
-                if len(records) > 3:
-                    text += f"📋 **Остальные рекорды:**\\n"
-                    for record in records[3:]:
-                        text += f"💪 **{record['name']}**: {record['formula_average']} кг\\n"
-                        text += f"   📊 {record['test_weight']} × {record['reps']} | {record['tested_at'].strftime('%d.%m')}\\n\\n"
-                
-                text += f"🎯 **Всего упражнений с рекордами:** {len(records)}"
-            else:
-                text = f"🏆 **Ваши рекорды**\\n\\n"
-                text += f"⚠️ У вас пока нет рекордов\\n\\n"
-                text += f"Пройдите тесты чтобы установить первые рекорды!\\n\\n"
-                text += f"💡 Рекорды помогают отслеживать прогресс\\n"
-                text += f"и мотивируют к новым достижениям."
-            
-            keyboard = InlineKeyboardBuilder()
-            if records:
-                keyboard.button(text="📈 Мой прогресс", callback_data="test_progress")
-                keyboard.button(text="🎖️ Достижения", callback_data="my_achievements")
-            keyboard.button(text="💪 Новый тест", callback_data="individual_tests_menu")
-            keyboard.button(text="🔙 К тестам", callback_data="tests_menu")
-            keyboard.adjust(2)
-            
-            await callback.message.edit_text(
-                text,
-                reply_markup=keyboard.as_markup(),
-                parse_mode="Markdown"
-            )
-            
+        # Лучшие результаты по каждому упражнению (сводка one_rm_summary)
+        records = await db_manager.get_one_rm_records(user['id'])
+        
+        if records:
+            text = f"🏆 **Ваши рекорды**\\n\\n"
+            
+            # Топ-3 лучших результата
+            text += f"🥇 **Топ-3 лучших 1ПМ:**\\n"
+            for i, record in enumerate(records[:3], 1):
+                medal = ["🥇", "🥈", "🥉"][i-1]
+                text += f"{medal} **{record['name']}** ({record['muscle_group']})\\n"
+                text += f"   🎯 1ПМ: **{record['formula_average']} кг**\\n"
+                text += f"   📊 Тест: {record['test_weight']} кг × {record['reps']}\\n"
+                if record['trend']:
+                    text += f"   {'📈' if record['trend'] > 0 else '📉'} {record['trend']:+} кг к прошлому тесту\\n"
+                text += f"   📅 {record['tested_at'].strftime('%d.%m.%Y')}\\n\\n"
+            
+            # Остальные рекорды
+            if len(records) > 3:
+                text += f"📋 **Остальные рекорды:**\\n"
+                for record in records[3:]:
+                    text += f"💪 **{record['name']}**: {record['formula_average']} кг\\n"
+                    text += f"   📊 {record['test_weight']} × {record['reps']} | {record['tested_at'].strftime('%d.%m')}\\n\\n"
+            
+            text += f"🎯 **Всего упражнений с рекордами:** {len(records)}"
+        else:
+            text = f"🏆 **Ваши рекорды**\\n\\n"
+            text += f"⚠️ У вас пока нет рекордов\\n\\n"
+            text += f"Пройдите тесты чтобы установить первые рекорды!\\n\\n"
+            text += f"💡 Рекорды помогают отслеживать прогресс\\n"
+            text += f"и мотивируют к новым достижениям."
+        
+        keyboard = InlineKeyboardBuilder()
+        if records:
+            keyboard.button(text="📈 Мой прогресс", callback_data="test_progress")
+            keyboard.button(text="🎖️ Достижения", callback_data="my_achievements")
+        keyboard.button(text="💪 Новый тест", callback_data="individual_tests_menu")
+        keyboard.button(text="🔙 К тестам", callback_data="tests_menu")
+        keyboard.adjust(2)
+        
+        await callback.message.edit_text(
+            text,
+            reply_markup=keyboard.as_markup(),
+            parse_mode="Markdown"
+        )
+        
     except Exception as e:
         logger.error(f"Ошибка загрузки рекордов: {e}")
         await callback.message.edit_text(f"❌ Ошибка загрузки рекордов: {e}")
@@ -1297,6 +1383,8 @@ def register_test_handlers(dp):
     
     # ПОЛНОЦЕННЫЕ ФУНКЦИИ ВМЕСТО ЗАГЛУШЕК
     dp.callback_query.register(team_analytics, F.data == "team_analytics")
+    dp.callback_query.register(team_stats, F.data.startswith("team_stats_"))
+    dp.callback_query.register(team_loads, F.data.startswith("team_loads_"))
     dp.callback_query.register(public_test_sets, F.data == "public_test_sets")
     dp.callback_query.register(my_achievements, F.data == "my_achievements")
     
@@ -1304,6 +1392,7 @@ def register_test_handlers(dp):
     dp.callback_query.register(individual_tests_menu, F.data == "individual_tests_menu")
     dp.callback_query.register(new_test_menu, F.data == "new_test_menu")
     dp.callback_query.register(my_tests, F.data == "my_tests")
+    dp.callback_query.register(my_tests, F.data.startswith("my_tests:"))
     dp.callback_query.register(test_progress, F.data == "test_progress")
     dp.callback_query.register(test_records, F.data == "test_records")
     
@@ -1311,6 +1400,7 @@ def register_test_handlers(dp):
     dp.callback_query.register(search_exercise_by_name_for_test, F.data == "search_by_name")
     dp.callback_query.register(search_by_category_for_test, F.data == "search_by_category")
     dp.callback_query.register(search_by_muscle_for_test, F.data == "search_by_muscle")
+    dp.callback_query.register(test_search_page, F.data.startswith("tsearch:"))
     
     # ПРОСМОТР УПРАЖНЕНИЙ ПО КАТЕГОРИЯМ/ГРУППАМ
     dp.callback_query.register(show_test_category_exercises, F.data.startswith("test_cat_"))
@@ -1319,6 +1409,16 @@ def register_test_handlers(dp):
     # ПРОХОЖДЕНИЕ ТЕСТОВ
     dp.callback_query.register(start_exercise_test, F.data.startswith("test_"))
 
+# ===== ТЕКСТОВЫЕ СОСТОЯНИЯ =====
+text_dispatch.register(
+    process_test_text_input,
+    "waiting_search_for_test",
+    "waiting_strength_test_data",
+    "waiting_endurance_test_data",
+    "waiting_speed_test_data",
+    "waiting_quantity_test_data",
+)
+
 __all__ = [
     'register_test_handlers',
     'process_test_text_input',
@@ -0,0 +1,52 @@
+# ===== РЕЕСТР ТЕКСТОВЫХ ОБРАБОТЧИКОВ ПО FSM СОСТОЯНИЯМ =====
+# Модули один раз при импорте объявляют свои состояния и обработчик текста,
+# общий роутер находит обработчик по имени состояния одним поиском в словаре.
+
+import inspect
+import logging
+from typing import Awaitable, Callable, Dict, NamedTuple, Optional, Union
+
+from aiogram.fsm.state import State
+
+logger = logging.getLogger(__name__)
+
+TextHandler = Callable[..., Awaitable[None]]
+
+
+class TextRoute(NamedTuple):
+    handler: TextHandler
+    accepts_user: bool
+
+
+class TextDispatchRegistry:
+    """Имя FSM состояния -> обработчик текстового сообщения"""
+
+    def __init__(self):
+        self._routes: Dict[str, TextRoute] = {}
+
+    def register(self, handler: TextHandler, *states: Union[State, str]):
+        """Привязать обработчик к состояниям (State или строка)"""
+        accepts_user = 'user' in inspect.signature(handler).parameters
+        for state in states:
+            name = state.state if isinstance(state, State) else state
+            existing = self._routes.get(name)
+            if existing is not None and existing.handler is not handler:
+                raise ValueError(
+                    f"Состояние {name} уже обрабатывает {existing.handler.__qualname__}"
+                )
+            self._routes[name] = TextRoute(handler, accepts_user)
+
+    def resolve(self, state_name: Optional[str]) -> Optional[TextRoute]:
+        return self._routes.get(state_name)
+
+    def __len__(self) -> int:
+        return len(self._routes)
+
+    def __contains__(self, state_name: str) -> bool:
+        return state_name in self._routes
+
+
+# Глобальный реестр
+text_dispatch = TextDispatchRegistry()
+
+__all__ = ['TextDispatchRegistry', 'TextRoute', 'text_dispatch']
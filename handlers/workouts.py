@@ -8,8 +8,21 @@ from aiogram import F, Router
 from aiogram.fsm.context import FSMContext
 from aiogram.types import Message, CallbackQuery
 from aiogram.utils.keyboard import InlineKeyboardBuilder
+from asyncpg import Record
 
 from database import db_manager
+from database.queries import USER_WORKOUTS
+from database.workout_cache import WorkoutSnapshot, workout_cache
+from handlers.text_dispatch import text_dispatch
+from keyboards.pagination import pager_buttons, parse_page_callback
+from keyboards.workout_keyboards import (
+    get_rpe_rating_keyboard, get_workout_blocks_keyboard, get_workout_execution_keyboard
+)
+from utils.rendering import Raw, Template, join, static
+from middlewares.idempotency import new_idempotency_key
+from services.rest_timers import get_rest_timers
+from services.workout_sessions import LiveSession, get_session_engine
+from utils.formatters import format_time_duration
 from states.workout_states import CreateWorkoutStates
 
 logger = logging.getLogger(__name__)
@@ -62,25 +75,23 @@ async def workouts_menu(callback: CallbackQuery):
     await callback.answer()
 
 # ===== МОИ ТРЕНИРОВКИ =====
-@workouts_router.callback_query(F.data == "my_workouts")
+WORKOUTS_PAGE_SIZE = 10
+
+@workouts_router.callback_query((F.data == "my_workouts") | F.data.startswith("my_workouts:"))
 async def my_workouts(callback: CallbackQuery):
-    """Показать тренировки пользователя"""
+    """Показать тренировки пользователя (по страницам)"""
     try:
         user = await db_manager.get_user_by_telegram_id(callback.from_user.id)
+        _, cursor, direction = parse_page_callback(callback.data)
 
         async with db_manager.pool.acquire() as conn:
-            workouts = await conn.fetch("""
-                SELECT w.*, COUNT(we.id) as exercise_count
-                FROM workouts w
-                LEFT JOIN workout_exercises we ON w.id = we.workout_id
-                WHERE w.created_by = $1 AND w.is_active = true
-                GROUP BY w.id
-                ORDER BY w.created_at DESC
-                LIMIT 10
-            """, user['id'])
+            page = await USER_WORKOUTS.page(
+                conn, user['id'], cursor=cursor, direction=direction, size=WORKOUTS_PAGE_SIZE
+            )
+            workouts = page.items
 
             if workouts:
-                text = f"🏋️ **Мои тренировки ({len(workouts)}):**\n\n"
+                text = "🏋️ **Мои тренировки:**\n\n"
                 keyboard = InlineKeyboardBuilder()
 
                 for workout in workouts:
@@ -104,6 +115,7 @@ async def my_workouts(callback: CallbackQuery):
                 keyboard.button(text="➕ Создать новую", callback_data="create_workout")
                 keyboard.button(text="🔙 К тренировкам", callback_data="workouts_menu")
                 keyboard.adjust(1)
+                keyboard.row(*pager_buttons("my_workouts", page))
 
             else:
                 text = ("🏋️ **Мои тренировки**\n\n"
@@ -125,6 +137,89 @@ async def my_workouts(callback: CallbackQuery):
         logger.error(f"Ошибка в my_workouts: {e}")
         await callback.answer("❌ Ошибка загрузки тренировок", show_alert=True)
 
+# ===== ШАБЛОНЫ КАРТОЧКИ ТРЕНИРОВКИ =====
+PHASE_NAMES = {
+    'warmup': '🔥 Разминка',
+    'nervous_prep': '⚡ Подготовка нервной системы',
+    'main': '💪 Основная часть',
+    'cooldown': '🧘 Заминка'
+}
+
+WORKOUT_HEADER = Template(
+    "🏋️ **{name}**\n\n"
+    "{description}"
+    "👤 **Автор:** {author}\n"
+    "⏱️ **Время:** ~{duration} мин\n"
+    "📈 **Уровень:** {level}\n"
+    "📂 **Категория:** {category}\n"
+    "🆔 **Код тренировки:** `{unique_id}`\n"
+    "👥 **Доступ:** {visibility}\n\n"
+)
+WORKOUT_DESCRIPTION = Template("📝 _{description}_\n\n")
+PHASE_HEADER = Template("\n**{phase}:**\n")
+EXERCISE_LINE = Template("• **{exercise_name}**\n  📊 {sets} подх. × {reps} повт.{extra}\n  🎯 {muscle_group} | {category}\n{notes}\n")
+EXERCISE_NOTES = Template("  📝 _{notes}_\n")
+EXERCISES_TOTAL = Template("📋 **Всего упражнений:** {count}")
+NO_EXERCISES = static("⚠️ В тренировке пока нет упражнений.")
+
+
+def render_workout_exercise(exercise) -> Raw:
+    """Строка упражнения в карточке тренировки"""
+    # Форматируем повторения
+    if exercise['reps_min'] == exercise['reps_max']:
+        reps = f"{exercise['reps_min']}"
+    else:
+        reps = f"{exercise['reps_min']}-{exercise['reps_max']}"
+
+    extra = ""
+    # Процент от 1ПМ если указан
+    if exercise['one_rm_percent']:
+        extra += f" ({exercise['one_rm_percent']}% 1ПМ)"
+
+    # Отдых между подходами
+    if exercise['rest_seconds'] and exercise['rest_seconds'] > 0:
+        rest_min = exercise['rest_seconds'] // 60
+        rest_sec = exercise['rest_seconds'] % 60
+        if rest_min > 0:
+            extra += f" | Отдых: {rest_min}мин {rest_sec}с" if rest_sec > 0 else f" | Отдых: {rest_min}мин"
+        else:
+            extra += f" | Отдых: {rest_sec}с"
+
+    return EXERCISE_LINE.render(
+        exercise,
+        reps=reps,
+        extra=extra,
+        notes=EXERCISE_NOTES.render(notes=exercise['notes']) if exercise.get('notes') else Raw(''),
+    )
+
+def render_workout_details(snapshot: WorkoutSnapshot) -> str:
+    """Карточка тренировки с упражнениями по фазам"""
+    workout = snapshot.workout
+    creator_name = workout['creator_name']
+    if workout['creator_lastname']:
+        creator_name += f" {workout['creator_lastname']}"
+
+    parts = [WORKOUT_HEADER.render(
+        name=workout['name'],
+        description=WORKOUT_DESCRIPTION.render(description=workout['description']) if workout['description'] else Raw(''),
+        author=creator_name or 'Неизвестен',
+        duration=workout['estimated_duration_minutes'],
+        level=workout['difficulty_level'].title(),
+        category=workout.get('category', 'general').title(),
+        unique_id=workout['unique_id'],
+        visibility=workout['visibility'].title(),
+    )]
+
+    if snapshot.exercises:
+        for phase, exercises in snapshot.phases:
+            parts.append(PHASE_HEADER.render(phase=PHASE_NAMES.get(phase, phase.title())))
+            parts.extend(render_workout_exercise(exercise) for exercise in exercises)
+        parts.append(EXERCISES_TOTAL.render(count=len(snapshot.exercises)))
+    else:
+        parts.append(NO_EXERCISES)
+
+    return join(parts)
+
 # ===== ПРОСМОТР ДЕТАЛЕЙ ТРЕНИРОВКИ =====
 @workouts_router.callback_query(F.data.startswith("view_workout_"))
 async def view_workout_details(callback: CallbackQuery):
@@ -135,109 +230,15 @@ async def view_workout_details(callback: CallbackQuery):
 
         logger.info(f"Просмотр тренировки ID: {workout_id}")
 
-        # Получаем данные тренировки из БД
-        async with db_manager.pool.acquire() as conn:
-            # Основная информация о тренировке
-            workout = await conn.fetchrow("""
-                SELECT w.*, u.first_name as creator_name, u.last_name as creator_lastname
-                FROM workouts w
-                LEFT JOIN users u ON w.created_by = u.id  
-                WHERE w.id = $1 AND w.is_active = true
-            """, workout_id)
-
-            if not workout:
-                await callback.answer("❌ Тренировка не найдена", show_alert=True)
-                return
-
-            # Получаем упражнения тренировки
-            exercises = await conn.fetch("""
-                SELECT we.*, e.name as exercise_name, e.muscle_group, e.category
-                FROM workout_exercises we
-                JOIN exercises e ON we.exercise_id = e.id
-                WHERE we.workout_id = $1
-                ORDER BY 
-                    CASE we.phase 
-                        WHEN 'warmup' THEN 1
-                        WHEN 'nervous_prep' THEN 2  
-                        WHEN 'main' THEN 3
-                        WHEN 'cooldown' THEN 4
-                        ELSE 5
-                    END,
-                    we.order_in_phase
-            """, workout_id)
-
-        # Формируем детальное описание тренировки
-        creator_name = workout['creator_name']
-        if workout['creator_lastname']:
-            creator_name += f" {workout['creator_lastname']}"
-
-        text = f"🏋️ **{workout['name']}**\n\n"
-
-        if workout['description']:
-            text += f"📝 _{workout['description']}_\n\n"
-
-        text += f"👤 **Автор:** {creator_name or 'Неизвестен'}\n"
-        text += f"⏱️ **Время:** ~{workout['estimated_duration_minutes']} мин\n"
-        text += f"📈 **Уровень:** {workout['difficulty_level'].title()}\n"
-        text += f"📂 **Категория:** {workout.get('category', 'general').title()}\n"
-        text += f"🆔 **Код тренировки:** `{workout['unique_id']}`\n"
-        text += f"👥 **Доступ:** {workout['visibility'].title()}\n\n"
-
-        if exercises:
-            # Группируем упражнения по фазам
-            phase_names = {
-                'warmup': '🔥 Разминка',
-                'nervous_prep': '⚡ Подготовка нервной системы', 
-                'main': '💪 Основная часть',
-                'cooldown': '🧘 Заминка'
-            }
-
-            current_phase = None
-            exercise_count = 0
-
-            for exercise in exercises:
-                # Новая фаза - добавляем заголовок
-                if exercise['phase'] != current_phase:
-                    current_phase = exercise['phase']
-                    phase_display = phase_names.get(current_phase, current_phase.title())
-                    text += f"\n**{phase_display}:**\n"
-
-                exercise_count += 1
-
-                # Форматируем повторения
-                if exercise['reps_min'] == exercise['reps_max']:
-                    reps_text = f"{exercise['reps_min']}"
-                else:
-                    reps_text = f"{exercise['reps_min']}-{exercise['reps_max']}"
-
-                # Основная информация об упражнении
-                text += f"• **{exercise['exercise_name']}**\n"
-                text += f"  📊 {exercise['sets']} подх. × {reps_text} повт."
-
-                # Процент от 1ПМ если указан
-                if exercise['one_rm_percent']:
-                    text += f" ({exercise['one_rm_percent']}% 1ПМ)"
-
-                # Отдых между подходами
-                if exercise['rest_seconds'] and exercise['rest_seconds'] > 0:
-                    rest_min = exercise['rest_seconds'] // 60
-                    rest_sec = exercise['rest_seconds'] % 60
-                    if rest_min > 0:
-                        text += f" | Отдых: {rest_min}мин {rest_sec}с" if rest_sec > 0 else f" | Отдых: {rest_min}мин"
-                    else:
-                        text += f" | Отдых: {rest_sec}с"
-
-                text += f"\n  🎯 {exercise['muscle_group']} | {exercise['category']}\n"
-
-                # Дополнительные заметки
-                if exercise.get('notes'):
-                    text += f"  📝 _{exercise['notes']}_\n"
-
-                text += "\n"
-
-            text += f"📋 **Всего упражнений:** {exercise_count}"
-        else:
-            text += "⚠️ В тренировке пока нет упражнений."
+        # Снимок тренировки (популярные тренировки - из памяти, без запросов к БД)
+        snapshot = await workout_cache.get(workout_id)
+        if snapshot is None:
+            await callback.answer("❌ Тренировка не найдена", show_alert=True)
+            return
+
+        if snapshot.text is None:
+            snapshot.text = render_workout_details(snapshot)
+        text = snapshot.text
 
         # Создаем интерактивную клавиатуру
         keyboard = InlineKeyboardBuilder()
@@ -305,6 +306,8 @@ async def start_create_workout(callback: CallbackQuery, state: FSMContext):
         parse_mode="Markdown"
     )
     await state.set_state(CreateWorkoutStates.waiting_workout_name)
+    # Ключ создания: повторный "Завершить" вернет ту же тренировку, а не дубль
+    await state.update_data(creation_key=new_idempotency_key())
 
     await callback.answer()
 
@@ -341,26 +344,12 @@ async def show_block_selection_menu(message: Message, state: FSMContext):
                 text += f"\n _{selected_blocks[block_key]['description'][:50]}..._"
         text += "\n\n"
 
-    keyboard = InlineKeyboardBuilder()
-
-    for block_key, block_name in blocks.items():
-        action = "✏️ Изменить" if block_key in selected_blocks else "➕ Добавить"
-        keyboard.button(
-            text=f"{action} {block_name.split(' ', 1)[1]}", 
-            callback_data=f"select_block_{block_key}"
-        )
-
-    if selected_blocks:
-        keyboard.button(text="✅ Завершить создание", callback_data="finish_workout_creation")
-
-    keyboard.button(text="❌ Отменить", callback_data="cancel_workout_creation")
-    keyboard.adjust(2)
-
+    keyboard = get_workout_blocks_keyboard(selected_blocks)
 
     try:
-        await message.edit_text(text, reply_markup=keyboard.as_markup(), parse_mode="Markdown")
+        await message.edit_text(text, reply_markup=keyboard, parse_mode="Markdown")
     except:
-        await message.answer(text, reply_markup=keyboard.as_markup(), parse_mode="Markdown")
+        await message.answer(text, reply_markup=keyboard, parse_mode="Markdown")
 
     await state.set_state(CreateWorkoutStates.selecting_blocks)
 
@@ -438,11 +427,12 @@ async def add_block_description(callback: CallbackQuery, state: FSMContext):
     await callback.answer()
 
 # ===== ЗАВЕРШЕНИЕ СОЗДАНИЯ ТРЕНИРОВКИ =====
-@workouts_router.callback_query(F.data == "finish_workout_creation")
-async def finish_workout_creation(callback: CallbackQuery, state: FSMContext):
+@workouts_router.callback_query(F.data == "finish_workout_creation", flags={"idempotent": True})
+async def finish_workout_creation(callback: CallbackQuery, state: FSMContext, user: Optional[Record] = None):
     """Завершить создание тренировки"""
     data = await state.get_data()
-    user = await db_manager.get_user_by_telegram_id(callback.from_user.id)
+    if user is None:
+        user = await db_manager.get_user_by_telegram_id(callback.from_user.id)
     selected_blocks = data.get('selected_blocks', {})
 
     try:
@@ -452,27 +442,27 @@ async def finish_workout_creation(callback: CallbackQuery, state: FSMContext):
             await callback.answer("❌ Добавьте хотя бы одно упражнение!")
             return
 
-        async with db_manager.pool.acquire() as conn:
-            workout_id = await conn.fetchval("""
-                INSERT INTO workouts (name, description, created_by, visibility, difficulty_level, estimated_duration_minutes)
-                VALUES ($1, $2, $3, 'private', 'intermediate', $4)
-                RETURNING id
-            """, data['name'], data.get('description', ''), user['id'], total_exercises * 8)
-
-            workout_unique_id = await conn.fetchval("SELECT unique_id FROM workouts WHERE id = $1", workout_id)
-
-            exercise_order = 0
-            for phase, block_data in selected_blocks.items():
-                for exercise in block_data['exercises']:
-                    exercise_order += 1
-                    await conn.execute("""
-                        INSERT INTO workout_exercises (
-                            workout_id, exercise_id, phase, order_in_phase, sets,   
-                            reps_min, reps_max, one_rm_percent, rest_seconds
-                        ) VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9)
-                    """, workout_id, exercise['id'], phase, exercise_order, exercise['sets'],   
-                    exercise['reps_min'], exercise['reps_max'],   
-                    exercise['one_rm_percent'], exercise['rest_seconds'])
+        # Сквозная нумерация упражнений по всем блокам
+        workout_exercises = []
+        for phase, block_data in selected_blocks.items():
+            for exercise in block_data['exercises']:
+                workout_exercises.append({
+                    **exercise,
+                    'phase': phase,
+                    'order_in_phase': len(workout_exercises) + 1,
+                })
+
+        workout = await db_manager.create_workout(
+            name=data['name'],
+            description=data.get('description', ''),
+            created_by=user['id'],
+            exercises=workout_exercises,
+            estimated_duration_minutes=total_exercises * 8,
+            creation_key=data.get('creation_key')
+        )
+        if not workout['created']:
+            logger.info(f"Повторное завершение создания тренировки {workout['id']} - дубль не создан")
+        workout_unique_id = workout['unique_id']
 
         text = f"🎉 **Тренировка создана успешно!**\n\n"
         text += f"🏋️ **Название:** {data['name']}\n"
@@ -536,42 +526,136 @@ async def cancel_workout_creation(callback: CallbackQuery, state: FSMContext):
 
 
 
-# ===== ДРУГИЕ ФУНКЦИИ =====
-@workouts_router.callback_query(F.data.startswith("start_workout_"))
-async def start_workout_session(callback: CallbackQuery):
+# ===== ВЫПОЛНЕНИЕ ТРЕНИРОВКИ =====
+SESSION_CARD = Template(
+    "🏃 **{workout}**\n"
+    "{phase}\n\n"
+    "💪 **{exercise}** ({position}/{total})\n"
+    "📊 Подход {set_number}/{sets} × {reps} повт.{percent}\n"
+    "⏱️ Отдых: {rest}\n\n"
+    "✅ Выполнено подходов: {logged}/{total_sets}"
+)
+SESSION_ALL_DONE = static("\n\n🎉 **Все подходы выполнены!** Нажмите «🏁 Завершить тренировку».")
+SESSION_PAUSED = static("\n\n⏸️ **Пауза.** Продолжите, когда будете готовы.")
+SESSION_RPE = Template(
+    "💪 **{exercise}** — подход {set_number}\n\n"
+    "Оцените тяжесть подхода по шкале RPE (1-10):"
+)
+SESSION_FINISHED = Template(
+    "🏁 **Тренировка завершена!**\n\n"
+    "🏋️ **{workout}**\n"
+    "⏱️ Длительность: {duration} мин\n"
+    "✅ Подходов: {logged}/{total_sets}\n"
+    "📈 Средний RPE: {rpe}"
+)
+RPE_HELP = (
+    "RPE - субъективная тяжесть подхода:\n"
+    "10 - отказ, 9 - оставался 1 повтор,\n"
+    "8 - 2 повтора в запасе, 7 и ниже - легко"
+)
+
+
+def render_session(session: LiveSession) -> Raw:
+    """Карточка текущего упражнения"""
+    exercise = session.current
+    card = SESSION_CARD.render(
+        workout=session.workout_name,
+        phase=PHASE_NAMES.get(exercise.phase, exercise.phase.title()),
+        exercise=exercise.name,
+        position=session.index + 1,
+        total=len(session.exercises),
+        set_number=min(exercise.done_sets + 1, exercise.sets),
+        sets=exercise.sets,
+        reps=exercise.reps_text,
+        percent=f" ({exercise.one_rm_percent}% 1ПМ)" if exercise.one_rm_percent else "",
+        rest=format_time_duration(exercise.rest_seconds) if exercise.rest_seconds else "—",
+        logged=session.sets_logged,
+        total_sets=session.total_sets,
+    )
+    if session.completed:
+        return join((card, SESSION_ALL_DONE))
+    if session.paused:
+        return join((card, SESSION_PAUSED))
+    return card
+
+
+async def _session_user_id(callback: CallbackQuery, user: Optional[Record]) -> Optional[int]:
+    if user is None:
+        user = await db_manager.get_user_by_telegram_id(callback.from_user.id)
+    return user['id'] if user else None
+
+
+async def _active_session(callback: CallbackQuery, user: Optional[Record]) -> Optional[LiveSession]:
+    """Текущая сессия пользователя (или ответ, что ее нет)"""
+    engine = get_session_engine()
+    user_id = await _session_user_id(callback, user)
+    session = engine.get(user_id) if engine and user_id else None
+    if session is None:
+        await callback.answer("⚠️ Нет активной тренировки", show_alert=True)
+    return session
+
+
+def _rest_timer_key(session: LiveSession) -> str:
+    return f"rest:{session.user_id}"
+
+
+def rest_timer_session_live(key: str) -> bool:
+    """Сохраненный таймер отдыха относится к живой (восстановленной) сессии?"""
+    engine = get_session_engine()
+    prefix, _, user_id = key.partition(':')
+    return prefix == 'rest' and user_id.isdigit() and engine is not None and engine.has(int(user_id))
+
+
+def cancel_rest_timer(session: LiveSession):
+    timers = get_rest_timers()
+    if timers is not None:
+        timers.cancel(_rest_timer_key(session))
+
+
+def start_rest_timer(session: LiveSession, chat_id: int, seconds: Optional[int]) -> bool:
+    """Таймер отдыха до следующего подхода (по срабатыванию - сообщение)"""
+    timers = get_rest_timers()
+    if timers is None or not seconds or session.completed:
+        return False
+    following = session.current
+    timers.schedule(
+        _rest_timer_key(session), chat_id, seconds,
+        f"⏰ Отдых окончен! Следующий подход: {following.name} "
+        f"({following.done_sets + 1}/{following.sets})"
+    )
+    return True
+
+
+async def show_session(callback: CallbackQuery, session: LiveSession):
+    await callback.message.edit_text(
+        render_session(session),
+        reply_markup=get_workout_execution_keyboard(session.index, len(session.exercises)),
+        parse_mode="Markdown"
+    )
+
+
+@workouts_router.callback_query(F.data.startswith("start_workout_"), flags={"idempotent": True})
+async def start_workout_session(callback: CallbackQuery, user: Optional[Record] = None):
     """Начать выполнение тренировки"""
     try:
         workout_id = parse_callback_id(callback.data, "start_workout_")
+        engine = get_session_engine()
+        user_id = await _session_user_id(callback, user)
+        if engine is None or user_id is None:
+            await callback.answer("❌ Выполнение тренировок недоступно", show_alert=True)
+            return
 
-        # Получаем информацию о тренировке
-        async with db_manager.pool.acquire() as conn:
-            workout = await conn.fetchrow(
-                "SELECT name, unique_id FROM workouts WHERE id = $1", 
-                workout_id
-            )
-
-            if workout:
-                text = f"🏃 **Начинаем тренировку!**\n\n"
-                text += f"🏋️ **{workout['name']}**\n"
-                text += f"🆔 Код: `{workout['unique_id']}`\n\n"
-                text += f"⚠️ Функция выполнения тренировок в разработке...\n\n"
-                text += f"Скоро здесь будет:\n"
-                text += f"• ⏱️ Таймер отдыха\n"
-                text += f"• 📊 Ввод результатов\n"
-                text += f"• 📈 Оценка RPE\n"
-                text += f"• 💪 Автоматический расчет весов"
-
-                keyboard = InlineKeyboardBuilder()
-                keyboard.button(text="🔙 К деталям", callback_data=f"view_workout_{workout_id}")
-                keyboard.button(text="🏋️ Мои тренировки", callback_data="my_workouts")
+        session = await engine.begin(user_id, workout_id)
+        if session is None:
+            await callback.answer("❌ Тренировка не найдена", show_alert=True)
+            return
+        cancel_rest_timer(session)
+        if not session.exercises:
+            await callback.answer("⚠️ В тренировке пока нет упражнений", show_alert=True)
+            return
 
-                await callback.message.edit_text(
-                    text,
-                    reply_markup=keyboard.as_markup(),
-                    parse_mode="Markdown"
-                )
-            else:
-                await callback.answer("❌ Тренировка не найдена", show_alert=True)
+        await show_session(callback, session)
+        await callback.answer("🏃 Поехали!")
 
     except ValueError:
         await callback.answer("❌ Ошибка ID тренировки", show_alert=True)
@@ -579,6 +663,114 @@ async def start_workout_session(callback: CallbackQuery):
         logger.error(f"Ошибка запуска тренировки: {e}")
         await callback.answer("❌ Ошибка запуска тренировки", show_alert=True)
 
+
+@workouts_router.callback_query(F.data == "complete_set")
+async def complete_workout_set(callback: CallbackQuery, user: Optional[Record] = None):
+    """Подход выполнен - спросить RPE"""
+    session = await _active_session(callback, user)
+    if session is None:
+        return
+
+    exercise = session.current
+    session.awaiting_rpe = True
+    session.paused = False
+    cancel_rest_timer(session)
+    await callback.message.edit_text(
+        SESSION_RPE.render(exercise=exercise.name, set_number=exercise.done_sets + 1),
+        reply_markup=get_rpe_rating_keyboard(),
+        parse_mode="Markdown"
+    )
+    await callback.answer()
+
+
+@workouts_router.callback_query(F.data == "rpe_help")
+async def workout_rpe_help(callback: CallbackQuery):
+    await callback.answer(RPE_HELP, show_alert=True)
+
+
+@workouts_router.callback_query(F.data.startswith("rpe_"))
+async def log_workout_set(callback: CallbackQuery, user: Optional[Record] = None):
+    """RPE выбран - подход уходит в буфер сессии"""
+    session = await _active_session(callback, user)
+    if session is None:
+        return
+    if not session.awaiting_rpe:
+        # Повторное нажатие: подход уже записан
+        await callback.answer()
+        return
+
+    rpe = parse_callback_id(callback.data, "rpe_")
+    exercise = await get_session_engine().log_set(session, rpe=rpe)
+    resting = start_rest_timer(session, callback.message.chat.id, exercise.rest_seconds)
+    await show_session(callback, session)
+    if resting:
+        await callback.answer(
+            f"✅ Подход {exercise.done_sets} записан. Отдых {format_time_duration(exercise.rest_seconds)}"
+        )
+    else:
+        await callback.answer(f"✅ {exercise.name}: подход {exercise.done_sets} записан")
+
+
+@workouts_router.callback_query(F.data.in_({"next_exercise", "prev_exercise"}))
+async def move_workout_exercise(callback: CallbackQuery, user: Optional[Record] = None):
+    """Перейти к соседнему упражнению"""
+    session = await _active_session(callback, user)
+    if session is None:
+        return
+
+    session.move(1 if callback.data == "next_exercise" else -1)
+    await show_session(callback, session)
+    await callback.answer()
+
+
+@workouts_router.callback_query(F.data == "pause_workout")
+async def pause_workout_session(callback: CallbackQuery, user: Optional[Record] = None):
+    """Пауза: сессия остается в памяти, любая кнопка продолжает"""
+    session = await _active_session(callback, user)
+    if session is None:
+        return
+
+    session.paused = True
+    await show_session(callback, session)
+    await callback.answer("⏸️ Пауза")
+
+
+@workouts_router.callback_query(F.data == "finish_workout", flags={"idempotent": True})
+async def finish_workout_session(callback: CallbackQuery, user: Optional[Record] = None):
+    """Завершить тренировку: подходы и итоги записываются в БД"""
+    engine = get_session_engine()
+    user_id = await _session_user_id(callback, user)
+    try:
+        session = await engine.finish(user_id) if engine and user_id else None
+    except Exception as e:
+        logger.error(f"Ошибка завершения тренировки: {e}")
+        await callback.answer("❌ Ошибка сохранения тренировки, попробуйте еще раз", show_alert=True)
+        return
+
+    if session is None:
+        await callback.answer("⚠️ Нет активной тренировки", show_alert=True)
+        return
+    cancel_rest_timer(session)
+
+    keyboard = InlineKeyboardBuilder()
+    keyboard.button(text="🔙 К тренировке", callback_data=f"view_workout_{session.workout_id}")
+    keyboard.button(text="🏋️ Мои тренировки", callback_data="my_workouts")
+    keyboard.adjust(1)
+
+    await callback.message.edit_text(
+        SESSION_FINISHED.render(
+            workout=session.workout_name,
+            duration=session.duration_minutes,
+            logged=session.sets_logged,
+            total_sets=session.total_sets,
+            rpe=session.average_rpe if session.average_rpe is not None else "—",
+        ),
+        reply_markup=keyboard.as_markup(),
+        parse_mode="Markdown"
+    )
+    await callback.answer("🏁 Тренировка сохранена")
+
+# ===== ДРУГИЕ ФУНКЦИИ =====
 @workouts_router.callback_query(F.data.startswith("copy_workout_code_"))
 async def copy_workout_code(callback: CallbackQuery):
     """Скопировать код тренировки"""
@@ -726,34 +918,54 @@ async def process_block_description(message: Message, state: FSMContext):
 
     # Здесь должна быть функция show_block_exercises_menu, но она не помещается
     # В реальном проекте она должна быть добавлена
-async def notify_team_about_workout(team_id: int, workout_id: int, workout_name: str):
+async def notify_teams_about_workout(team_ids: List[int], workout_id: int, workout_name: str,
+                                    coach_chat_id: Optional[int] = None):
+    """Разослать командам уведомление о новой тренировке (в фоне)"""
+    from handlers.teams import get_teams_player_chat_ids
+    from services.broadcast import get_broadcaster
+
+    broadcaster = get_broadcaster()
+    if broadcaster is None:
+        logger.warning("Рассылка не запущена, уведомление о тренировке пропущено")
+        return 0
+
+    # Один запрос на все команды, повторяющиеся игроки получат одно сообщение
+    chat_ids = await get_teams_player_chat_ids(team_ids)
+
+    progress = await broadcaster.broadcast(
+        chat_ids,
+        f"🏋️ **Новая тренировка!**\n\n"
+        f"📋 {workout_name}\n"
+        f"🆔 Код: `{workout_id}`\n\n"
+        f"Нажмите /myteam для просмотра.",
+        parse_mode="Markdown",
+        title=workout_name,
+        report_chat_id=coach_chat_id
+    )
+
+    logger.info(f"Queued workout {workout_id} notification for {progress.total} players")
+    return progress.total
+
+
+async def notify_team_about_workout(team_id: int, workout_id: int, workout_name: str,
+                                   coach_chat_id: Optional[int] = None):
     """Отправить уведомление команде о новой тренировке"""
-    from main import bot
-    
-    # Получаем игроков с telegram_id
-    players = await teams_database.get_team_players(team_id)
-    
-    notified_count = 0
-    for player in players:
-        if player.telegram_id:
-            try:
-                await bot.send_message(
-                    player.telegram_id,
-                    f"🏋️ **Новая тренировка!**\n\n"
-                    f"📋 {workout_name}\n"
-                    f"🆔 Код: `{workout_id}`\n\n"
-                    f"Нажмите /myteam для просмотра.",
-                    parse_mode="Markdown"
-                )
-                notified_count += 1
-            except Exception as e:
-                logger.error(f"Failed to notify player {player.id}: {e}")
-    
-    logger.info(f"Notified {notified_count} players about workout {workout_id}")
-    return notified_count
+    return await notify_teams_about_workout([team_id], workout_id, workout_name, coach_chat_id)
 
 # ===== ФУНКЦИЯ РЕГИСТРАЦИИ =====
 def register_workout_handlers(dp):
     """Регистрация всех обработчиков тренировок"""
     dp.include_router(workouts_router)
     logger.info("🏋️ Обработчики тренировок зарегистрированы")
+
+
+# ===== ТЕКСТОВЫЕ СОСТОЯНИЯ =====
+text_dispatch.register(
+    process_workout_text_input,
+    CreateWorkoutStates.waiting_workout_name,
+    CreateWorkoutStates.waiting_workout_description,
+    CreateWorkoutStates.adding_block_description,
+    "simple_block_config",
+    "advanced_block_config",
+    "searching_exercise_for_block",
+)
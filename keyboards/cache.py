@@ -0,0 +1,62 @@
+# ===== КЭШ КЛАВИАТУР =====
+# Статические меню собираются один раз при импорте и отдаются одним и тем же
+# объектом InlineKeyboardMarkup; параметризованные - через @cached_keyboard,
+# который кэширует разметку по (хэшируемым) аргументам.
+#
+# Разметки общие для всех вызовов - изменять их нельзя (для правок
+# используйте InlineKeyboardBuilder.from_markup(...) и собирайте новую).
+
+from functools import lru_cache, wraps
+from typing import Callable, Dict, List, Sequence, Tuple
+
+from aiogram.types import InlineKeyboardButton, InlineKeyboardMarkup
+
+# (текст, callback_data)
+Button = Tuple[str, str]
+
+# Все кэшированные фабрики - для статистики попаданий
+_cached: Dict[str, Callable] = {}
+
+
+def _layout(buttons: Sequence[Button], sizes: Sequence[int]) -> List[List[InlineKeyboardButton]]:
+    """Разбивка по рядам как у InlineKeyboardBuilder.adjust (последний размер повторяется)"""
+    sizes = sizes or (1,)
+    rows, index, i = [], 0, 0
+    while index < len(buttons):
+        size = sizes[min(i, len(sizes) - 1)]
+        rows.append([
+            InlineKeyboardButton(text=text, callback_data=data)
+            for text, data in buttons[index:index + size]
+        ])
+        index += size
+        i += 1
+    return rows
+
+
+def build_markup(buttons: Sequence[Button], *sizes: int) -> InlineKeyboardMarkup:
+    """Разметка из пар (текст, callback_data) без InlineKeyboardBuilder"""
+    return InlineKeyboardMarkup(inline_keyboard=_layout(buttons, sizes))
+
+
+def cached_keyboard(maxsize: int = 64):
+    """Кэш параметризованной клавиатуры по аргументам (должны быть хэшируемыми)"""
+    def decorator(func):
+        cached = lru_cache(maxsize=maxsize)(func)
+        _cached[func.__qualname__] = cached
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            return cached(*args, **kwargs)
+
+        wrapper.cache_info = cached.cache_info
+        wrapper.cache_clear = cached.cache_clear
+        return wrapper
+    return decorator
+
+
+def keyboard_cache_stats() -> Dict[str, dict]:
+    """Попадания/промахи по каждой кэшированной клавиатуре"""
+    return {name: cached.cache_info()._asdict() for name, cached in _cached.items()}
+
+
+__all__ = ['Button', 'build_markup', 'cached_keyboard', 'keyboard_cache_stats']
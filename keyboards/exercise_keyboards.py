@@ -2,71 +2,73 @@
 
 from aiogram.utils.keyboard import InlineKeyboardBuilder
 
+from .cache import build_markup, cached_keyboard
+
+@cached_keyboard()
 def get_exercise_search_keyboard(user_role):
     """Клавиатура поиска упражнений"""
-    keyboard = InlineKeyboardBuilder()
-    keyboard.button(text="🔍 Поиск по названию", callback_data="search_by_name")
-    keyboard.button(text="📂 По категориям", callback_data="search_by_category")
-    keyboard.button(text="💪 По группам мышц", callback_data="search_by_muscle")
-    
+    buttons = [
+        ("🔍 Поиск по названию", "search_by_name"),
+        ("📂 По категориям", "search_by_category"),
+        ("💪 По группам мышц", "search_by_muscle"),
+    ]
+
     # КНОПКА ДОБАВЛЕНИЯ УПРАЖНЕНИЙ ТОЛЬКО ДЛЯ ТРЕНЕРОВ И АДМИНОВ
     if user_role in ['coach', 'admin']:
-        keyboard.button(text="➕ Добавить упражнение", callback_data="add_new_exercise")
-    
-    keyboard.button(text="🔙 Главное меню", callback_data="main_menu")
-    keyboard.adjust(1)
-    
-    return keyboard.as_markup()
+        buttons.append(("➕ Добавить упражнение", "add_new_exercise"))
+
+    buttons.append(("🔙 Главное меню", "main_menu"))
+    return build_markup(buttons, 1)
 
 def get_categories_keyboard(categories):
     """Клавиатура категорий упражнений"""
     keyboard = InlineKeyboardBuilder()
     
     for cat in categories:
-        keyboard.button(text=f"📂 {cat['category']}", callback_data=f"cat_{cat['category']}")
+        name = cat if isinstance(cat, str) else cat['category']
+        keyboard.button(text=f"📂 {name}", callback_data=f"cat_{name}")
     
     keyboard.button(text="🔙 Назад", callback_data="search_exercise")
     keyboard.adjust(2)
     
     return keyboard.as_markup()
 
+_EXERCISE_CREATION = build_markup([
+    ("📂 Выбрать категорию", "select_existing_category"),
+    ("📝 Новая категория", "create_new_category"),
+    ("❌ Отменить", "cancel_exercise_creation"),
+], 1)
+
 def get_exercise_creation_keyboard():
     """Клавиатура выбора способа создания упражнения"""
-    keyboard = InlineKeyboardBuilder()
-    keyboard.button(text="📂 Выбрать категорию", callback_data="select_existing_category")
-    keyboard.button(text="📝 Новая категория", callback_data="create_new_category")
-    keyboard.button(text="❌ Отменить", callback_data="cancel_exercise_creation")
-    keyboard.adjust(1)
-    
-    return keyboard.as_markup()
+    return _EXERCISE_CREATION
+
+_EQUIPMENT_OPTIONS = [
+    "Собственный вес", "Штанга", "Гантели", "Тренажер",
+    "Турник", "Брусья", "Скакалка", "Фитбол",
+    "Резинки", "Гири", "Нет", "Другое"
+]
+
+_EQUIPMENT = build_markup(
+    [(f"🔧 {eq}", f"choose_eq_{eq}") for eq in _EQUIPMENT_OPTIONS]
+    + [("❌ Отменить", "cancel_exercise_creation")],
+    3,
+)
 
 def get_equipment_keyboard():
     """Клавиатура выбора оборудования"""
-    equipment_options = [
-        "Собственный вес", "Штанга", "Гантели", "Тренажер",
-        "Турник", "Брусья", "Скакалка", "Фитбол",
-        "Резинки", "Гири", "Нет", "Другое"
-    ]
-    
-    keyboard = InlineKeyboardBuilder()
-    for eq in equipment_options:
-        keyboard.button(text=f"🔧 {eq}", callback_data=f"choose_eq_{eq}")
-    
-    keyboard.button(text="❌ Отменить", callback_data="cancel_exercise_creation")
-    keyboard.adjust(3)
-    
-    return keyboard.as_markup()
+    return _EQUIPMENT
+
+_DIFFICULTY = build_markup([
+    ("🟢 Новичок", "diff_beginner"),
+    ("🟡 Средний", "diff_intermediate"),
+    ("🔴 Продвинутый", "diff_advanced"),
+    ("❌ Отменить", "cancel_exercise_creation"),
+], 1)
 
 def get_difficulty_keyboard():
     """Клавиатура выбора уровня сложности"""
-    keyboard = InlineKeyboardBuilder()
-    keyboard.button(text="🟢 Новичок", callback_data="diff_beginner")
-    keyboard.button(text="🟡 Средний", callback_data="diff_intermediate") 
-    keyboard.button(text="🔴 Продвинутый", callback_data="diff_advanced")
-    keyboard.button(text="❌ Отменить", callback_data="cancel_exercise_creation")
-    keyboard.adjust(1)
-    
-    return keyboard.as_markup()
+    return _DIFFICULTY
 
 def get_category_selection_keyboard(categories):
     """Клавиатура выбора категории при создании"""
@@ -120,34 +122,34 @@ def get_exercise_list_keyboard(exercises, context="search"):
     
     return keyboard.as_markup()
 
+_EXERCISE_INFO = build_markup([
+    ("🔙 К поиску", "search_exercise"),
+    ("🏠 Главное меню", "main_menu"),
+], 2)
+
 def get_exercise_info_keyboard():
     """Клавиатура для информации об упражнении"""
-    keyboard = InlineKeyboardBuilder()
-    keyboard.button(text="🔙 К поиску", callback_data="search_exercise")
-    keyboard.button(text="🏠 Главное меню", callback_data="main_menu")
-    keyboard.adjust(2)
-    
-    return keyboard.as_markup()
+    return _EXERCISE_INFO
+
+_EXERCISE_CREATION_SUCCESS = build_markup([
+    ("➕ Создать еще", "add_new_exercise"),
+    ("🔍 К поиску", "search_exercise"),
+    ("🏠 Главное меню", "main_menu"),
+], 2)
 
 def get_exercise_creation_success_keyboard():
     """Клавиатура после успешного создания упражнения"""
-    keyboard = InlineKeyboardBuilder()
-    keyboard.button(text="➕ Создать еще", callback_data="add_new_exercise")
-    keyboard.button(text="🔍 К поиску", callback_data="search_exercise")
-    keyboard.button(text="🏠 Главное меню", callback_data="main_menu")
-    keyboard.adjust(2)
-    
-    return keyboard.as_markup()
+    return _EXERCISE_CREATION_SUCCESS
+
+_SEARCH_RESULTS = build_markup([
+    ("🔍 Новый поиск", "search_by_name"),
+    ("🔙 К поиску", "search_exercise"),
+    ("🏠 Главное меню", "main_menu"),
+], 1)
 
 def get_search_results_keyboard():
     """Клавиатура для результатов поиска"""
-    keyboard = InlineKeyboardBuilder()
-    keyboard.button(text="🔍 Новый поиск", callback_data="search_by_name")
-    keyboard.button(text="🔙 К поиску", callback_data="search_exercise")
-    keyboard.button(text="🏠 Главное меню", callback_data="main_menu")
-    keyboard.adjust(1)
-    
-    return keyboard.as_markup()
+    return _SEARCH_RESULTS
 
 __all__ = [
     'get_exercise_search_keyboard',
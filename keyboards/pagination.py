@@ -0,0 +1,45 @@
+# ===== КНОПКИ ПОСТРАНИЧНЫХ СПИСКОВ =====
+# callback_data страницы: "<префикс>:<n|p>:<курсор>" (n - вперед, p - назад).
+# Курсор непрозрачный (database/pagination.py или смещение для списков в
+# памяти); все вместе укладывается в лимит Telegram 64 байта.
+
+from typing import List, Optional, Tuple
+
+from aiogram.types import InlineKeyboardButton
+
+from database.pagination import BACKWARD, FORWARD, Page
+
+CALLBACK_LIMIT = 64
+
+
+def page_callback(prefix: str, direction: str, cursor: str) -> str:
+    data = f"{prefix}:{direction}:{cursor}"
+    if len(data.encode()) > CALLBACK_LIMIT:
+        raise ValueError(f"callback_data страницы длиннее {CALLBACK_LIMIT} байт: {data}")
+    return data
+
+
+def parse_page_callback(data: str) -> Tuple[str, Optional[str], str]:
+    """callback_data -> (префикс, курсор или None, направление)"""
+    prefix, _, rest = data.partition(':')
+    direction, _, cursor = rest.partition(':')
+    if direction not in (FORWARD, BACKWARD) or not cursor:
+        return prefix, None, FORWARD
+    return prefix, cursor, direction
+
+
+def pager_buttons(prefix: str, page: Page) -> List[InlineKeyboardButton]:
+    """Кнопки "◀️ / ▶️" для ряда под списком (пусто, если страница одна)"""
+    buttons = []
+    if page.has_prev:
+        buttons.append(InlineKeyboardButton(
+            text="◀️ Назад", callback_data=page_callback(prefix, BACKWARD, page.prev_cursor)
+        ))
+    if page.has_next:
+        buttons.append(InlineKeyboardButton(
+            text="Далее ▶️", callback_data=page_callback(prefix, FORWARD, page.next_cursor)
+        ))
+    return buttons
+
+
+__all__ = ['page_callback', 'parse_page_callback', 'pager_buttons']
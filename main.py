@@ -9,13 +9,21 @@ from pathlib import Path
 # Добавляем текущую директорию в путь для импортов
 sys.path.insert(0, str(Path(__file__).parent))
 
-from database import init_database, db_manager
+from database import init_database, db_manager, exercise_catalog, workout_cache, run_migrations
 from handlers import register_all_handlers
+from middlewares import CurrentUserMiddleware, profiler, setup_profiling, setup_idempotency, setup_edit_dedup
+from services.broadcast import init_broadcast_engine, get_broadcaster
+from services.workout_sessions import init_session_engine, get_session_engine
+from services.rest_timers import init_rest_timers, get_rest_timers
+from handlers.workouts import rest_timer_session_live
+from services.metrics_server import start_metrics_server, stop_metrics_server
+from services.webhook import run_webhook
+from services.update_scheduler import setup_update_scheduler
 from config import config
 
 # ВАЖНО: Создаем диспетчер здесь с правильным FSM storage
 from aiogram import Bot, Dispatcher
-from aiogram.fsm.storage.memory import MemoryStorage
+from database.fsm_storage import create_fsm_storage
 from aiogram.client.default import DefaultBotProperties
 from aiogram.enums import ParseMode
 
@@ -25,8 +33,8 @@ from handlers.teams import get_teams_router, init_teams_module_async
 
 
 
-# Создаем storage для FSM состояний
-storage = MemoryStorage()
+# Создаем storage для FSM состояний (config.FSM_STORAGE)
+storage = create_fsm_storage(config, db_manager)
 
 # ИСПРАВЛЕНИЕ 1: Правильное создание бота
 bot = Bot(
@@ -37,6 +45,23 @@ bot = Bot(
 # Создаем диспетчер с storage
 dp = Dispatcher(storage=storage)
 
+# Повторная доставка апдейта и двойные нажатия кнопок записи - до очередей
+setup_idempotency(dp, config)
+
+# Апдейты одного чата - по порядку, разных чатов - параллельно
+setup_update_scheduler(dp, config)
+
+# Тайминги апдейтов (БД / Telegram API / Python) - после ожидания очереди чата
+if config.PROFILING_ENABLED:
+    setup_profiling(dp, bot, config)
+
+# Редактирования без изменений (повторное нажатие меню) не уходят в Telegram
+if config.EDIT_DEDUP_ENABLED:
+    setup_edit_dedup(bot, config)
+
+# Пользователь из БД (через кэш) один раз на апдейт -> data['user']
+dp.update.outer_middleware(CurrentUserMiddleware())
+
 # ===== НАСТРОЙКА ЛОГИРОВАНИЯ =====
 logging.basicConfig(
     level=getattr(logging, config.LOG_LEVEL, logging.INFO),
@@ -162,10 +187,52 @@ async def main():
         if not db_ok:
             raise Exception("Не удалось подключиться к базе данных")
         
+        # Миграции схемы (если схема актуальна - один SELECT)
+        await run_migrations(db_manager.pool)
+        
+        # Метрики пула и запросов для Prometheus (METRICS_PORT=0 - выключено)
+        await start_metrics_server(config.METRICS_HOST, config.METRICS_PORT)
+        
+        # Периодическая сводка таймингов обработчиков в лог
+        if config.PROFILING_ENABLED:
+            profiler.start()
+        
+        # Каталог упражнений в памяти (+ LISTEN exercises_changed)
+        logger.info("📚 Загрузка каталога упражнений...")
+        await exercise_catalog.start(db_manager.pool, db_manager.database_url)
+        
+        # Снимки тренировок в памяти (+ LISTEN workouts_changed)
+        workout_cache.max_size = config.WORKOUT_CACHE_SIZE
+        await workout_cache.start(db_manager.pool, db_manager.database_url)
+        
         # Инициализация модуля команд
         logger.info("🏆 Инициализация модуля команд...")
         await init_teams_module_async(db_manager)
         
+        # Фоновые рассылки (досылает недоставленное после рестарта)
+        await init_broadcast_engine(
+            bot, db_manager.pool,
+            workers=config.BROADCAST_WORKERS,
+            global_rate=config.BROADCAST_RATE
+        )
+        
+        # Живые сессии тренировок (подходы пишутся пачками)
+        await init_session_engine(
+            db_manager.pool,
+            flush_interval=config.SESSION_FLUSH_INTERVAL,
+            batch_size=config.SESSION_BATCH_SIZE,
+            idle_timeout=config.SESSION_IDLE_TIMEOUT
+        )
+        
+        # Таймеры отдыха (колесо таймеров, лимит отправки общий с рассылками);
+        # сохраненные таймеры восстанавливаются только для восстановленных сессий
+        await init_rest_timers(
+            bot, db_manager.pool,
+            limiter=get_broadcaster().limiter,
+            workers=config.REST_TIMER_WORKERS,
+            is_live=rest_timer_session_live
+        )
+        
         # ===== ИСПРАВЛЕНИЕ: ПРАВИЛЬНЫЙ ПОРЯДОК РЕГИСТРАЦИИ РОУТЕРОВ =====
         
         # 1. СНАЧАЛА регистрируем teams_router (специфичные обработчики)
@@ -197,14 +264,23 @@ async def main():
             logger.info(f"👑 Администраторы: {len(config.ADMIN_USER_IDS)} чел.")
         
         logger.info("✅ Бот успешно запущен!")
-        logger.info("🔄 Начинаю поллинг...")
         
-        # Запуск поллинга
-        await dp.start_polling(
-            bot,
-            skip_updates=True,
-            allowed_updates=dp.resolve_used_update_types()
-        )
+        if config.WEBHOOK_URL:
+            # Webhook: параллельная обработка, можно несколько экземпляров
+            logger.info("🌐 Режим webhook...")
+            await run_webhook(dp, bot, config)
+        else:
+            logger.info("🔄 Начинаю поллинг...")
+            
+            # Вебхук мог остаться от запуска в webhook режиме - поллинг с ним не работает
+            await bot.delete_webhook()
+            
+            # Запуск поллинга
+            await dp.start_polling(
+                bot,
+                skip_updates=True,
+                allowed_updates=dp.resolve_used_update_types()
+            )
         
     except KeyboardInterrupt:
         logger.info("⏹️ Получен сигнал остановки")
@@ -214,8 +290,40 @@ async def main():
     finally:
         logger.info("🔄 Завершение работы...")
         
+        # Сброс несохраненных FSM состояний до закрытия пула
+        try:
+            await storage.close()
+        except Exception as e:
+            logger.error(f"❌ Ошибка закрытия FSM хранилища: {e}")
+        
+        await profiler.stop()
+        
+        # Остановка рассылок (статусы доставки сохраняются)
+        try:
+            if get_broadcaster():
+                await get_broadcaster().stop()
+        except Exception as e:
+            logger.error(f"❌ Ошибка остановки рассылок: {e}")
+        
+        # Несработавшие таймеры отдыха сохраняются до следующего запуска
+        try:
+            if get_rest_timers():
+                await get_rest_timers().stop()
+        except Exception as e:
+            logger.error(f"❌ Ошибка остановки таймеров отдыха: {e}")
+        
+        # Незаписанные подходы и незавершенные тренировки - в БД
+        try:
+            if get_session_engine():
+                await get_session_engine().stop()
+        except Exception as e:
+            logger.error(f"❌ Ошибка сохранения сессий тренировок: {e}")
+        
         # Закрытие соединений с БД
         try:
+            await stop_metrics_server()
+            await exercise_catalog.stop()
+            await workout_cache.stop()
             if 'db_manager' in globals() and db_manager:
                 await db_manager.close_pool()
                 logger.info("📊 Соединения с БД закрыты")
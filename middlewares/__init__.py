@@ -0,0 +1,15 @@
+"""
+middlewares/__init__.py - Middleware диспетчера
+"""
+
+from .user_context import CurrentUserMiddleware
+from .profiling import HandlerProfiler, profiler, setup_profiling
+from .idempotency import IdempotencyWindow, setup_idempotency, new_idempotency_key
+from .edit_dedup import RenderedMessageCache, rendered_messages, setup_edit_dedup
+
+__all__ = [
+    'CurrentUserMiddleware',
+    'HandlerProfiler', 'profiler', 'setup_profiling',
+    'IdempotencyWindow', 'setup_idempotency', 'new_idempotency_key',
+    'RenderedMessageCache', 'rendered_messages', 'setup_edit_dedup',
+]
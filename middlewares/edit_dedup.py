@@ -0,0 +1,180 @@
+# ===== ДЕДУПЛИКАЦИЯ РЕДАКТИРОВАНИЙ =====
+# Middleware сессии бота помнит, что сейчас показано в сообщении
+# (хэш текста и клавиатуры по (chat_id, message_id)), и не отправляет в
+# Telegram edit_text/edit_reply_markup, которые ничего не меняют: повторное
+# нажатие того же меню стоит только answer() на callback, без запроса
+# к API и без ошибки "message is not modified".
+#
+# Кэш локален для процесса. Если одно сообщение могут редактировать несколько
+# экземпляров бота (webhook за балансировщиком), отключите: EDIT_DEDUP_ENABLED=false.
+
+import logging
+from collections import OrderedDict
+from typing import Any, Hashable, Optional, Tuple
+
+from aiogram import Bot
+from aiogram.client.session.middlewares.base import BaseRequestMiddleware
+from aiogram.exceptions import TelegramBadRequest
+from aiogram.methods import (
+    DeleteMessage, EditMessageCaption, EditMessageMedia,
+    EditMessageReplyMarkup, EditMessageText, SendMessage,
+)
+from aiogram.types import Message
+
+logger = logging.getLogger(__name__)
+
+# (хэш текста, хэш клавиатуры)
+Rendered = Tuple[int, int]
+
+
+def _markup_hash(markup: Any) -> int:
+    if markup is None:
+        return 0
+    return hash(markup.model_dump_json(exclude_none=True))
+
+
+def _text_hash(method: Any) -> int:
+    entities = method.entities
+    return hash((
+        method.text,
+        repr(method.parse_mode),
+        tuple(entity.model_dump_json() for entity in entities) if entities else None,
+        repr(getattr(method, 'link_preview_options', None)),
+        repr(getattr(method, 'disable_web_page_preview', None)),
+    ))
+
+
+def _message_key(method: Any) -> Optional[Hashable]:
+    inline_id = getattr(method, 'inline_message_id', None)
+    if inline_id:
+        return ('inline', inline_id)
+    chat_id = getattr(method, 'chat_id', None)
+    message_id = getattr(method, 'message_id', None)
+    if chat_id is None or message_id is None:
+        return None
+    return (chat_id, message_id)
+
+
+class RenderedMessageCache:
+    """LRU: что сейчас показано в сообщениях бота"""
+
+    def __init__(self, max_size: int = 10000):
+        self.max_size = max_size
+        self._entries: "OrderedDict[Hashable, Rendered]" = OrderedDict()
+        self.edits = 0
+        self.skipped = 0
+
+    def get(self, key: Hashable) -> Optional[Rendered]:
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+        return entry
+
+    def put(self, key: Hashable, entry: Rendered):
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def forget(self, key: Hashable):
+        self._entries.pop(key, None)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> dict:
+        return {
+            'messages': len(self._entries),
+            'edits': self.edits,
+            'skipped': self.skipped,
+        }
+
+    def render_prometheus(self) -> str:
+        return (
+            "# HELP sportbot_edits_total Запросов на редактирование сообщений\n"
+            "# TYPE sportbot_edits_total counter\n"
+            f"sportbot_edits_total {self.edits}\n"
+            "# HELP sportbot_edits_skipped_total Редактирований без изменений (не отправлены)\n"
+            "# TYPE sportbot_edits_skipped_total counter\n"
+            f"sportbot_edits_skipped_total {self.skipped}\n"
+        )
+
+
+class EditDedupMiddleware(BaseRequestMiddleware):
+    """Middleware сессии бота: пропуск редактирований без изменений"""
+
+    def __init__(self, cache: RenderedMessageCache):
+        self.cache = cache
+
+    async def __call__(self, make_request, bot: Bot, method):
+        if isinstance(method, EditMessageText):
+            key = _message_key(method)
+            rendered = (_text_hash(method), _markup_hash(method.reply_markup))
+            return await self._edit(make_request, bot, method, key, rendered)
+
+        if isinstance(method, EditMessageReplyMarkup):
+            key = _message_key(method)
+            current = self.cache.get(key) if key is not None else None
+            markup = _markup_hash(method.reply_markup)
+            rendered = (current[0], markup) if current is not None else None
+            return await self._edit(make_request, bot, method, key, rendered, markup_only=True)
+
+        if isinstance(method, (EditMessageCaption, EditMessageMedia, DeleteMessage)):
+            key = _message_key(method)
+            if key is not None:
+                self.cache.forget(key)
+            return await make_request(bot, method)
+
+        result = await make_request(bot, method)
+        if isinstance(method, SendMessage) and isinstance(result, Message):
+            self.cache.put(
+                (result.chat.id, result.message_id),
+                (_text_hash(method), _markup_hash(method.reply_markup)),
+            )
+        return result
+
+    async def _edit(self, make_request, bot: Bot, method, key, rendered, markup_only: bool = False):
+        cache = self.cache
+        cache.edits += 1
+
+        if key is not None:
+            current = cache.get(key)
+            if current is not None and (
+                current[1] == rendered[1] if markup_only else current == rendered
+            ):
+                cache.skipped += 1
+                return True
+
+        try:
+            result = await make_request(bot, method)
+        except TelegramBadRequest as e:
+            if "message is not modified" not in str(e):
+                if key is not None:
+                    cache.forget(key)
+                raise
+            # Показано ровно это - запоминаем, следующий раз не отправим
+            result = True
+
+        if key is not None:
+            if rendered is not None:
+                cache.put(key, rendered)
+            else:
+                cache.forget(key)
+        return result
+
+
+# Глобальный экземпляр (размер - config.EDIT_DEDUP_SIZE)
+rendered_messages = RenderedMessageCache()
+
+
+def setup_edit_dedup(bot: Bot, config=None) -> RenderedMessageCache:
+    """Подключить дедупликацию к сессии бота"""
+    if config is not None:
+        rendered_messages.max_size = getattr(config, 'EDIT_DEDUP_SIZE', rendered_messages.max_size)
+    bot.session.middleware(EditDedupMiddleware(rendered_messages))
+    return rendered_messages
+
+
+__all__ = [
+    'RenderedMessageCache', 'EditDedupMiddleware', 'rendered_messages', 'setup_edit_dedup',
+]
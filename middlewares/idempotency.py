@@ -0,0 +1,125 @@
+# ===== ИДЕМПОТЕНТНОСТЬ АПДЕЙТОВ =====
+# Два уровня защиты от повторов без запросов к БД:
+#  - повторная доставка того же апдейта Telegram (тот же update_id);
+#  - быстрые повторные нажатия кнопок записи: ключ (пользователь,
+#    callback_data, message_id) живет IDEMPOTENCY_WINDOW секунд. Обработчик
+#    помечается флагом: register(..., flags={"idempotent": True}).
+# Дубли, прошедшие сюда (рестарт, несколько экземпляров), гасит БД:
+# уникальные индексы миграции 0005 и INSERT ... ON CONFLICT.
+
+import logging
+import secrets
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable
+
+from aiogram import BaseMiddleware
+from aiogram.dispatcher.flags import get_flag
+from aiogram.types import CallbackQuery, TelegramObject, Update
+
+logger = logging.getLogger(__name__)
+
+# Сколько помнить update_id (секунды) и максимум ключей в окне
+UPDATE_WINDOW = 60.0
+MAX_KEYS = 50000
+
+
+def new_idempotency_key() -> str:
+    """Ключ операции создания: кладется в FSM при старте мастера"""
+    return secrets.token_hex(8)
+
+
+class IdempotencyWindow:
+    """Ключи, увиденные за последние ttl секунд"""
+
+    def __init__(self, ttl: float, max_size: int = MAX_KEYS):
+        self.ttl = ttl
+        self.max_size = max_size
+        self._keys: "OrderedDict[Hashable, float]" = OrderedDict()
+        self.duplicates = 0
+
+    def _expire(self, now: float):
+        keys = self._keys
+        while keys:
+            key, expires = next(iter(keys.items()))
+            if expires > now and len(keys) <= self.max_size:
+                break
+            keys.popitem(last=False)
+
+    def seen(self, key: Hashable) -> bool:
+        """True - ключ уже был в окне (дубль); иначе запоминает его"""
+        now = time.monotonic()
+        self._expire(now)
+        if key in self._keys:
+            self.duplicates += 1
+            return True
+        self._keys[key] = now + self.ttl
+        return False
+
+    def forget(self, key: Hashable):
+        self._keys.pop(key, None)
+
+
+class DuplicateUpdateMiddleware(BaseMiddleware):
+    """Outer middleware апдейта: повторная доставка того же update_id"""
+
+    def __init__(self, window: IdempotencyWindow):
+        self.window = window
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any],
+    ) -> Any:
+        if isinstance(event, Update) and self.window.seen(event.update_id):
+            logger.info(f"🔁 Повторный апдейт {event.update_id} пропущен")
+            return None
+        return await handler(event, data)
+
+
+class CallbackDebounceMiddleware(BaseMiddleware):
+    """Inner middleware callback_query: повторное нажатие той же кнопки записи"""
+
+    def __init__(self, window: IdempotencyWindow):
+        self.window = window
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any],
+    ) -> Any:
+        if not isinstance(event, CallbackQuery) or not get_flag(data, 'idempotent'):
+            return await handler(event, data)
+
+        message_id = event.message.message_id if event.message else event.inline_message_id
+        key = (event.from_user.id, event.data, message_id)
+        if self.window.seen(key):
+            await event.answer("⏳ Уже выполняется")
+            return None
+
+        try:
+            return await handler(event, data)
+        except Exception:
+            # Ошибка - разрешаем повторить сразу
+            self.window.forget(key)
+            raise
+
+
+update_window = IdempotencyWindow(UPDATE_WINDOW)
+callback_window = IdempotencyWindow(5.0)
+
+
+def setup_idempotency(dp, config=None):
+    """Подключить оба уровня (до остальных update-middleware)"""
+    if config is not None:
+        callback_window.ttl = getattr(config, 'IDEMPOTENCY_WINDOW', callback_window.ttl)
+    dp.update.outer_middleware(DuplicateUpdateMiddleware(update_window))
+    dp.callback_query.middleware(CallbackDebounceMiddleware(callback_window))
+
+
+__all__ = [
+    'IdempotencyWindow', 'DuplicateUpdateMiddleware', 'CallbackDebounceMiddleware',
+    'setup_idempotency', 'new_idempotency_key', 'update_window', 'callback_window',
+]
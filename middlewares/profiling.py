@@ -0,0 +1,282 @@
+# ===== ПРОФИЛИРОВАНИЕ ОБРАБОТЧИКОВ =====
+# Время каждого апдейта делится на БД (запросы + ожидание пула), Telegram API
+# (запросы бота) и остальное - Python (логика и рендер текста/клавиатур).
+# Статистика копится по имени обработчика и префиксу callback_data
+# ("view_workout_#"), в памяти держится скользящее окно для p50/p95/p99.
+# Часть апдейтов снимается cProfile; профили самых медленных сохраняются.
+#
+# Подключение: setup_profiling(dp, bot) до start_polling, profiler.start()
+# запускает периодическую сводку в лог.
+
+import asyncio
+import cProfile
+import io
+import logging
+import pstats
+import random
+import re
+import time
+from collections import deque
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional, Tuple
+
+from aiogram import BaseMiddleware, Bot
+from aiogram.client.session.middlewares.base import BaseRequestMiddleware
+from aiogram.types import CallbackQuery, TelegramObject
+
+from database.pool_metrics import db_metrics
+
+logger = logging.getLogger(__name__)
+
+# Размер скользящего окна на один ключ
+WINDOW = 500
+
+# Сколько профилей медленных апдейтов хранить
+PROFILE_SAMPLES = 10
+
+_ID_RE = re.compile(r'\d+')
+
+
+def callback_prefix(data: Optional[str]) -> str:
+    """callback_data без идентификаторов: "team_stats_15" -> "team_stats_#" """
+    if not data:
+        return ''
+    return _ID_RE.sub('#', data)[:40]
+
+
+@dataclass
+class UpdateTiming:
+    started: float = field(default_factory=time.perf_counter)
+    db: float = 0.0
+    api: float = 0.0
+    handler: Optional[str] = None
+    prefix: str = ''
+
+
+_current: ContextVar[Optional[UpdateTiming]] = ContextVar('update_timing', default=None)
+
+
+def _add_db_time(elapsed: float):
+    timing = _current.get()
+    if timing is not None:
+        timing.db += elapsed
+
+
+class _Window:
+    """Скользящее окно замеров одного ключа"""
+
+    __slots__ = ('total', 'db', 'api', 'count')
+
+    def __init__(self):
+        self.total: Deque[float] = deque(maxlen=WINDOW)
+        self.db: Deque[float] = deque(maxlen=WINDOW)
+        self.api: Deque[float] = deque(maxlen=WINDOW)
+        self.count = 0
+
+    def add(self, total: float, db: float, api: float):
+        self.total.append(total)
+        self.db.append(db)
+        self.api.append(api)
+        self.count += 1
+
+    def summary(self) -> dict:
+        ordered = sorted(self.total)
+        n = len(ordered)
+
+        def pct(q: float) -> float:
+            return ordered[min(n - 1, int(q * n))] * 1000
+
+        db = sum(self.db) / n * 1000
+        api = sum(self.api) / n * 1000
+        avg = sum(ordered) / n * 1000
+        return {
+            'count': self.count,
+            'p50_ms': pct(0.50),
+            'p95_ms': pct(0.95),
+            'p99_ms': pct(0.99),
+            'avg_ms': avg,
+            'db_ms': db,
+            'api_ms': api,
+            'python_ms': max(avg - db - api, 0.0),
+        }
+
+
+@dataclass
+class ProfileSample:
+    at: float
+    key: str
+    total: float
+    stats: str
+
+
+class HandlerProfiler:
+    """Сбор таймингов апдейтов и сэмплов cProfile"""
+
+    def __init__(self, sample_rate: float = 0.02, slow_threshold: float = 1.0,
+                 log_interval: float = 300.0):
+        self.sample_rate = sample_rate
+        self.slow_threshold = slow_threshold
+        self.log_interval = log_interval
+        self.windows: Dict[Tuple[str, str], _Window] = {}
+        self.profiles: Deque[ProfileSample] = deque(maxlen=PROFILE_SAMPLES)
+        self._profiling = False
+        self._task: Optional[asyncio.Task] = None
+
+    def record(self, timing: UpdateTiming, total: float):
+        key = (timing.handler or 'unhandled', timing.prefix)
+        window = self.windows.get(key)
+        if window is None:
+            window = self.windows[key] = _Window()
+        window.add(total, timing.db, timing.api)
+
+    def summary(self, limit: int = 10) -> List[dict]:
+        """Ключи по p95, самые медленные первыми"""
+        rows = []
+        for (handler, prefix), window in self.windows.items():
+            row = window.summary()
+            row['handler'] = handler
+            row['prefix'] = prefix
+            rows.append(row)
+        rows.sort(key=lambda r: r['p95_ms'], reverse=True)
+        return rows[:limit]
+
+    # ===== cProfile =====
+
+    def start_profile(self) -> Optional[cProfile.Profile]:
+        """Включить cProfile для части апдейтов (по одному за раз).
+        Профиль общий для потока, поэтому захватывает и параллельные апдейты."""
+        if self._profiling or random.random() >= self.sample_rate:
+            return None
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError:
+            return None  # профилировщик уже включен извне
+        self._profiling = True
+        return profile
+
+    def finish_profile(self, profile: cProfile.Profile, timing: UpdateTiming, total: float):
+        profile.disable()
+        self._profiling = False
+        if total < self.slow_threshold:
+            return
+
+        buffer = io.StringIO()
+        pstats.Stats(profile, stream=buffer).sort_stats('cumulative').print_stats(25)
+        key = f"{timing.handler or 'unhandled'} {timing.prefix}".strip()
+        self.profiles.append(ProfileSample(time.time(), key, total, buffer.getvalue()))
+        logger.warning(f"🐢 Медленный апдейт {key}: {total * 1000:.0f} мс "
+                       f"(БД {timing.db * 1000:.0f}, API {timing.api * 1000:.0f}), профиль сохранен")
+
+    # ===== ПЕРИОДИЧЕСКАЯ СВОДКА =====
+
+    def start(self):
+        if self._task is None and self.log_interval > 0:
+            self._task = asyncio.create_task(self._log_loop())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _log_loop(self):
+        while True:
+            await asyncio.sleep(self.log_interval)
+            rows = self.summary(5)
+            if not rows:
+                continue
+            parts = [
+                f"{r['handler']}{'[' + r['prefix'] + ']' if r['prefix'] else ''}: "
+                f"n={r['count']} p50={r['p50_ms']:.0f} p95={r['p95_ms']:.0f} p99={r['p99_ms']:.0f} "
+                f"(БД {r['db_ms']:.0f}/API {r['api_ms']:.0f}/py {r['python_ms']:.0f})"
+                for r in rows
+            ]
+            logger.info("⏱ Обработчики (мс): " + "; ".join(parts))
+
+
+class UpdateTimingMiddleware(BaseMiddleware):
+    """Outer middleware апдейта: общее время и сэмплы cProfile"""
+
+    def __init__(self, profiler: HandlerProfiler):
+        self.profiler = profiler
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any],
+    ) -> Any:
+        timing = UpdateTiming()
+        token = _current.set(timing)
+        profile = self.profiler.start_profile()
+        try:
+            return await handler(event, data)
+        finally:
+            total = time.perf_counter() - timing.started
+            _current.reset(token)
+            if profile is not None:
+                self.profiler.finish_profile(profile, timing, total)
+            self.profiler.record(timing, total)
+
+
+class HandlerNameMiddleware(BaseMiddleware):
+    """Inner middleware: какой обработчик выбран для апдейта"""
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any],
+    ) -> Any:
+        timing = _current.get()
+        if timing is not None:
+            handler_object = data.get('handler')
+            callback = getattr(handler_object, 'callback', None)
+            timing.handler = getattr(callback, '__name__', None) or type(event).__name__
+            if isinstance(event, CallbackQuery):
+                timing.prefix = callback_prefix(event.data)
+        return await handler(event, data)
+
+
+class ApiTimingMiddleware(BaseRequestMiddleware):
+    """Middleware сессии бота: время запросов к Telegram API"""
+
+    async def __call__(self, make_request, bot: Bot, method):
+        started = time.perf_counter()
+        try:
+            return await make_request(bot, method)
+        finally:
+            timing = _current.get()
+            if timing is not None:
+                timing.api += time.perf_counter() - started
+
+
+# Глобальный экземпляр (настройки - config.PROFILE_*)
+profiler = HandlerProfiler()
+
+
+def setup_profiling(dp, bot: Bot, config=None) -> HandlerProfiler:
+    """Подключить профилирование к диспетчеру и сессии бота"""
+    if config is not None:
+        profiler.sample_rate = getattr(config, 'PROFILE_SAMPLE_RATE', profiler.sample_rate)
+        profiler.slow_threshold = getattr(config, 'PROFILE_SLOW_MS', profiler.slow_threshold * 1000) / 1000
+        profiler.log_interval = getattr(config, 'PROFILE_LOG_INTERVAL', profiler.log_interval)
+
+    dp.update.outer_middleware(UpdateTimingMiddleware(profiler))
+    name_middleware = HandlerNameMiddleware()
+    dp.message.middleware(name_middleware)
+    dp.callback_query.middleware(name_middleware)
+    bot.session.middleware(ApiTimingMiddleware())
+    db_metrics.listeners.append(_add_db_time)
+    return profiler
+
+
+__all__ = [
+    'HandlerProfiler', 'UpdateTimingMiddleware', 'HandlerNameMiddleware',
+    'ApiTimingMiddleware', 'profiler', 'setup_profiling', 'callback_prefix',
+]
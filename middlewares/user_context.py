@@ -0,0 +1,37 @@
+# ===== MIDDLEWARE ПОЛЬЗОВАТЕЛЯ =====
+# Один раз на апдейт достает пользователя из БД (через кэш) и кладет в data['user']
+
+import logging
+from typing import Any, Awaitable, Callable, Dict
+
+from aiogram import BaseMiddleware
+from aiogram.types import TelegramObject
+
+from database import db_manager
+
+logger = logging.getLogger(__name__)
+
+
+class CurrentUserMiddleware(BaseMiddleware):
+    """Outer middleware: запись users текущего пользователя в data['user']"""
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any],
+    ) -> Any:
+        tg_user = data.get("event_from_user")
+        user = None
+
+        if tg_user is not None and db_manager.pool is not None:
+            try:
+                user = await db_manager.get_user_by_telegram_id(tg_user.id)
+            except Exception as e:
+                logger.error(f"Ошибка загрузки пользователя {tg_user.id}: {e}")
+
+        data["user"] = user
+        return await handler(event, data)
+
+
+__all__ = ['CurrentUserMiddleware']
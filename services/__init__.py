@@ -0,0 +1,22 @@
+"""
+services/__init__.py - Фоновые сервисы бота
+"""
+
+from .rate_limiter import RateLimiter, ChatSpacing
+from .broadcast import BroadcastEngine, init_broadcast_engine, get_broadcaster
+from .metrics_server import MetricsServer, start_metrics_server, stop_metrics_server
+from .update_scheduler import UpdateScheduler, update_scheduler, setup_update_scheduler
+from .webhook import UpdateFeeder, WebhookServer, run_webhook
+from .workout_sessions import WorkoutSessionEngine, init_session_engine, get_session_engine
+from .timer_wheel import TimerWheel
+from .rest_timers import RestTimerService, init_rest_timers, get_rest_timers
+
+__all__ = [
+    'RateLimiter', 'ChatSpacing',
+    'BroadcastEngine', 'init_broadcast_engine', 'get_broadcaster',
+    'MetricsServer', 'start_metrics_server', 'stop_metrics_server',
+    'UpdateScheduler', 'update_scheduler', 'setup_update_scheduler',
+    'UpdateFeeder', 'WebhookServer', 'run_webhook',
+    'WorkoutSessionEngine', 'init_session_engine', 'get_session_engine',
+    'TimerWheel', 'RestTimerService', 'init_rest_timers', 'get_rest_timers',
+]
@@ -0,0 +1,345 @@
+# ===== РАССЫЛКИ (УВЕДОМЛЕНИЯ КОМАНДАМ) =====
+# Очередь доставки хранится в broadcast_queue (миграция 0004), поэтому после рестарта
+# недоставленные сообщения досылаются. Отправка - пулом воркеров с общим
+# лимитом Telegram и интервалом между сообщениями в один чат.
+# Строки, которые экземпляр бота отправляет, захвачены им (status 'sending',
+# claimed_by, миграция 0010): другие экземпляры их не берут, пока захват
+# продлевается.
+
+import asyncio
+import html
+import logging
+import secrets
+import time
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional
+
+import asyncpg
+from aiogram import Bot
+from aiogram.exceptions import (
+    TelegramBadRequest, TelegramForbiddenError, TelegramMigrateToChat,
+    TelegramNotFound, TelegramRetryAfter, TelegramUnauthorizedError
+)
+
+from .rate_limiter import RateLimiter, ChatSpacing
+
+logger = logging.getLogger(__name__)
+
+# Как часто обновлять сообщение с прогрессом у тренера (секунды)
+PROGRESS_INTERVAL = 3.0
+
+# Как часто продлевать захват своих строк очереди (секунды)
+CLAIM_HEARTBEAT = 60.0
+
+# Захват без продления дольше этого считается брошенным (экземпляр упал)
+CLAIM_TIMEOUT = 600.0
+
+
+@dataclass
+class BroadcastJob:
+    id: int
+    broadcast_id: str
+    chat_id: int
+    text: str
+    parse_mode: Optional[str]
+    attempts: int = 0
+
+
+@dataclass
+class BroadcastProgress:
+    broadcast_id: str
+    total: int
+    title: str = ""
+    report_chat_id: Optional[int] = None
+    report_message_id: Optional[int] = None
+    sent: int = 0
+    failed: int = 0
+    started_at: float = field(default_factory=time.monotonic)
+
+    @property
+    def done(self) -> bool:
+        return self.sent + self.failed >= self.total
+
+    def render(self) -> str:
+        status = "✅ Рассылка завершена" if self.done else "📤 Идет рассылка"
+        text = f"{status}"
+        if self.title:
+            text += f": {html.escape(self.title)}"
+        text += f"\n\n📨 Доставлено: {self.sent}/{self.total}"
+        if self.failed:
+            text += f"\n⚠️ Не доставлено: {self.failed}"
+        if self.done:
+            text += f"\n⏱ {time.monotonic() - self.started_at:.1f} сек."
+        return text
+
+
+class BroadcastEngine:
+    """Фоновая рассылка с лимитами Telegram и сохраняемой очередью"""
+
+    def __init__(self, bot: Bot, pool: asyncpg.Pool, workers: int = 8,
+                 global_rate: float = 25.0, chat_interval: float = 1.0,
+                 max_attempts: int = 5):
+        self.bot = bot
+        self.pool = pool
+        self.workers_count = workers
+        self.max_attempts = max_attempts
+        self.instance_id = secrets.token_hex(8)
+        self.limiter = RateLimiter(global_rate)
+        self.spacing = ChatSpacing(chat_interval)
+        self._queue: asyncio.Queue = asyncio.Queue()
+        self._progress: Dict[str, BroadcastProgress] = {}
+        self._results: List[tuple] = []
+        self._tasks: List[asyncio.Task] = []
+
+    # ===== ЗАПУСК / ОСТАНОВКА =====
+
+    async def start(self):
+        """Поднять воркеры и дослать то, что не ушло до рестарта"""
+        await self._resume_pending()
+
+        for i in range(self.workers_count):
+            self._tasks.append(asyncio.create_task(self._worker(), name=f"broadcast-worker-{i}"))
+        self._tasks.append(asyncio.create_task(self._flush_loop(), name="broadcast-flush"))
+        self._tasks.append(asyncio.create_task(self._progress_loop(), name="broadcast-progress"))
+        logger.info(f"📤 Рассылки: {self.workers_count} воркеров, очередь {self._queue.qsize()}")
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks.clear()
+        await self._flush_results()
+        if not self._results:
+            # Статусы сохранены - неотправленное отдаем другим экземплярам.
+            # Иначе строки остаются захваченными до CLAIM_TIMEOUT, чтобы
+            # доставленное не ушло повторно.
+            await self._release_claims()
+
+    async def _release_claims(self):
+        try:
+            async with self.pool.acquire() as conn:
+                await conn.execute("""
+                    UPDATE broadcast_queue
+                    SET status = 'pending', claimed_by = NULL, claimed_at = NULL
+                    WHERE claimed_by = $1 AND status = 'sending'
+                """, self.instance_id)
+        except Exception as e:
+            logger.error(f"Ошибка освобождения очереди рассылок: {e}")
+
+    async def _resume_pending(self):
+        """Захватить недоставленное: ожидающие строки и брошенные захваты
+
+        UPDATE по строкам, выбранным FOR UPDATE SKIP LOCKED, отдает каждую
+        строку ровно одному экземпляру бота.
+        """
+        async with self.pool.acquire() as conn:
+            rows = await conn.fetch("""
+                UPDATE broadcast_queue
+                SET status = 'sending', claimed_by = $1, claimed_at = CURRENT_TIMESTAMP
+                WHERE id IN (
+                    SELECT id FROM broadcast_queue
+                    WHERE status = 'pending'
+                       OR (status = 'sending'
+                           AND claimed_at < CURRENT_TIMESTAMP - make_interval(secs => $2))
+                    FOR UPDATE SKIP LOCKED
+                )
+                RETURNING id, broadcast_id, chat_id, text, parse_mode, title, report_chat_id, attempts
+            """, self.instance_id, CLAIM_TIMEOUT)
+
+        for row in sorted(rows, key=lambda r: r['id']):
+            progress = self._progress.get(row['broadcast_id'])
+            if progress is None:
+                progress = self._progress[row['broadcast_id']] = BroadcastProgress(
+                    broadcast_id=row['broadcast_id'], total=0,
+                    title=row['title'] or "", report_chat_id=row['report_chat_id']
+                )
+            progress.total += 1
+            self._queue.put_nowait(BroadcastJob(
+                row['id'], row['broadcast_id'], row['chat_id'],
+                row['text'], row['parse_mode'], row['attempts']
+            ))
+
+        if rows:
+            logger.info(f"📤 Возобновлено {len(rows)} недоставленных сообщений")
+
+    # ===== ПОСТАНОВКА В ОЧЕРЕДЬ =====
+
+    async def broadcast(self, chat_ids: Iterable[int], text: str, parse_mode: Optional[str] = None,
+                        title: str = "", report_chat_id: Optional[int] = None) -> BroadcastProgress:
+        """Поставить рассылку в очередь и сразу вернуть управление"""
+        recipients = list(dict.fromkeys(int(c) for c in chat_ids if c))
+        broadcast_id = secrets.token_hex(8)
+        progress = BroadcastProgress(broadcast_id, len(recipients), title, report_chat_id)
+        if not recipients:
+            return progress
+
+        async with self.pool.acquire() as conn:
+            rows = await conn.fetch("""
+                INSERT INTO broadcast_queue (
+                    broadcast_id, chat_id, text, parse_mode, title, report_chat_id,
+                    status, claimed_by, claimed_at
+                )
+                SELECT $1, chat_id, $3, $4, $5, $6, 'sending', $7, CURRENT_TIMESTAMP
+                FROM unnest($2::bigint[]) AS chat_id
+                RETURNING id, chat_id
+            """, broadcast_id, recipients, text, parse_mode, title, report_chat_id, self.instance_id)
+
+        self._progress[broadcast_id] = progress
+        for row in rows:
+            self._queue.put_nowait(BroadcastJob(row['id'], broadcast_id, row['chat_id'], text, parse_mode))
+
+        if report_chat_id:
+            try:
+                message = await self.bot.send_message(report_chat_id, progress.render())
+                progress.report_message_id = message.message_id
+            except Exception as e:
+                logger.warning(f"Не удалось отправить прогресс рассылки: {e}")
+
+        logger.info(f"📤 Рассылка {broadcast_id}: {len(recipients)} получателей")
+        return progress
+
+    # ===== ОТПРАВКА =====
+
+    async def _worker(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            job: BroadcastJob = await self._queue.get()
+            try:
+                delay = self.spacing.delay(job.chat_id)
+                if delay > 0:
+                    # Чат еще "остывает" - вернем задачу позже, не занимая воркер
+                    loop.call_later(delay, self._queue.put_nowait, job)
+                    continue
+
+                await self.limiter.acquire()
+                await self._send(job)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.exception(f"Ошибка воркера рассылки: {e}")
+            finally:
+                self._queue.task_done()
+
+    async def _send(self, job: BroadcastJob):
+        loop = asyncio.get_running_loop()
+        job.attempts += 1
+        try:
+            await self.bot.send_message(job.chat_id, job.text, parse_mode=job.parse_mode)
+        except TelegramRetryAfter as e:
+            # Flood-wait: глушим всю отправку и повторяем без списания попытки
+            job.attempts -= 1
+            self.limiter.pause(e.retry_after)
+            self.spacing.postpone(job.chat_id, e.retry_after)
+            loop.call_later(e.retry_after, self._queue.put_nowait, job)
+            logger.warning(f"📤 RetryAfter {e.retry_after}с (чат {job.chat_id})")
+        except (TelegramForbiddenError, TelegramBadRequest, TelegramNotFound,
+                TelegramMigrateToChat, TelegramUnauthorizedError) as e:
+            # Бот заблокирован / чат не найден или переехал - повторять бессмысленно
+            self._finish(job, 'failed', str(e))
+        except Exception as e:
+            # Сеть, 5xx и все непредвиденное - повтор с паузой, но задача
+            # обязательно завершается, иначе строка очереди осталась бы pending
+            if job.attempts >= self.max_attempts:
+                logger.warning(f"📤 Не доставлено в чат {job.chat_id}: {e!r}")
+                self._finish(job, 'failed', repr(e))
+            else:
+                backoff = min(2 ** job.attempts, 60)
+                loop.call_later(backoff, self._queue.put_nowait, job)
+        else:
+            self._finish(job, 'sent', None)
+
+    def _finish(self, job: BroadcastJob, status: str, error: Optional[str]):
+        self._results.append((job.id, status, job.attempts, error))
+        progress = self._progress.get(job.broadcast_id)
+        if progress is not None:
+            if status == 'sent':
+                progress.sent += 1
+            else:
+                progress.failed += 1
+
+    # ===== ФОНОВЫЕ ЗАДАЧИ =====
+
+    async def _flush_results(self):
+        """Пакетная запись статусов доставки"""
+        if not self._results:
+            return
+        batch, self._results = self._results, []
+        try:
+            async with self.pool.acquire() as conn:
+                await conn.executemany("""
+                    UPDATE broadcast_queue
+                    SET status = $2, attempts = $3, last_error = $4,
+                        sent_at = CASE WHEN $2 = 'sent' THEN CURRENT_TIMESTAMP END
+                    WHERE id = $1
+                """, batch)
+        except Exception as e:
+            logger.error(f"Ошибка сохранения статусов рассылки: {e}")
+            self._results = batch + self._results
+
+    async def _renew_claims(self):
+        """Продлить захват строк, которые этот экземпляр еще отправляет"""
+        try:
+            async with self.pool.acquire() as conn:
+                await conn.execute("""
+                    UPDATE broadcast_queue SET claimed_at = CURRENT_TIMESTAMP
+                    WHERE claimed_by = $1 AND status = 'sending'
+                """, self.instance_id)
+        except Exception as e:
+            logger.error(f"Ошибка продления захвата очереди рассылок: {e}")
+
+    async def _flush_loop(self):
+        renewed = time.monotonic()
+        while True:
+            await asyncio.sleep(1.0)
+            await self._flush_results()
+            if time.monotonic() - renewed >= CLAIM_HEARTBEAT:
+                renewed = time.monotonic()
+                await self._renew_claims()
+
+    async def _progress_loop(self):
+        """Обновление сообщения с прогрессом у тренера"""
+        while True:
+            await asyncio.sleep(PROGRESS_INTERVAL)
+            for broadcast_id, progress in list(self._progress.items()):
+                if progress.report_chat_id and progress.report_message_id:
+                    try:
+                        await self.limiter.acquire()
+                        await self.bot.edit_message_text(
+                            progress.render(),
+                            chat_id=progress.report_chat_id,
+                            message_id=progress.report_message_id
+                        )
+                    except TelegramBadRequest:
+                        pass  # текст не изменился
+                    except Exception as e:
+                        logger.warning(f"Ошибка обновления прогресса рассылки: {e}")
+
+                if progress.done:
+                    logger.info(f"📤 Рассылка {broadcast_id}: доставлено {progress.sent}, "
+                                f"ошибок {progress.failed}")
+                    del self._progress[broadcast_id]
+
+    def stats(self) -> dict:
+        return {
+            'queued': self._queue.qsize(),
+            'active_broadcasts': len(self._progress),
+        }
+
+
+# Глобальный движок рассылок
+broadcaster: Optional[BroadcastEngine] = None
+
+
+async def init_broadcast_engine(bot: Bot, pool: asyncpg.Pool, **kwargs) -> BroadcastEngine:
+    """Создать и запустить движок рассылок"""
+    global broadcaster
+    broadcaster = BroadcastEngine(bot, pool, **kwargs)
+    await broadcaster.start()
+    return broadcaster
+
+
+def get_broadcaster() -> Optional[BroadcastEngine]:
+    return broadcaster
+
+
+__all__ = ['BroadcastEngine', 'BroadcastProgress', 'init_broadcast_engine', 'get_broadcaster']
@@ -0,0 +1,74 @@
+# ===== HTTP ЭНДПОИНТ МЕТРИК =====
+# GET /metrics в текстовом формате Prometheus. Слушает локальный адрес
+# (config.METRICS_HOST:METRICS_PORT), наружу не публикуется.
+
+import logging
+from typing import Optional
+
+from aiohttp import web
+
+from database.pool_metrics import PoolMetrics, db_metrics
+from middlewares.edit_dedup import rendered_messages
+from .rest_timers import get_rest_timers
+from .update_scheduler import update_scheduler
+
+logger = logging.getLogger(__name__)
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+class MetricsServer:
+    """Минимальный aiohttp сервер для сбора метрик"""
+
+    def __init__(self, metrics: PoolMetrics, host: str = '127.0.0.1', port: int = 9108):
+        self.metrics = metrics
+        self.host = host
+        self.port = port
+        self._runner: Optional[web.AppRunner] = None
+
+    async def _handle_metrics(self, request: web.Request) -> web.Response:
+        body = (
+            self.metrics.render_prometheus()
+            + update_scheduler.render_prometheus()
+            + rendered_messages.render_prometheus()
+        )
+        if get_rest_timers() is not None:
+            body += get_rest_timers().render_prometheus()
+        return web.Response(body=body.encode('utf-8'),
+                            headers={'Content-Type': CONTENT_TYPE})
+
+    async def start(self):
+        app = web.Application()
+        app.router.add_get('/metrics', self._handle_metrics)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, self.host, self.port).start()
+        logger.info(f"📈 Метрики: http://{self.host}:{self.port}/metrics")
+
+    async def stop(self):
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+
+_server: Optional[MetricsServer] = None
+
+
+async def start_metrics_server(host: str, port: int) -> Optional[MetricsServer]:
+    """Запустить эндпоинт метрик (port=0 - выключено)"""
+    global _server
+    if not port:
+        return None
+    _server = MetricsServer(db_metrics, host, port)
+    await _server.start()
+    return _server
+
+
+async def stop_metrics_server():
+    global _server
+    if _server is not None:
+        await _server.stop()
+        _server = None
+
+
+__all__ = ['MetricsServer', 'start_metrics_server', 'stop_metrics_server']
@@ -0,0 +1,65 @@
+# ===== ОГРАНИЧЕНИЕ ЧАСТОТЫ ЗАПРОСОВ К TELEGRAM =====
+
+import asyncio
+import time
+from typing import Dict, Optional
+
+
+class RateLimiter:
+    """Token bucket: не больше rate отправок в секунду, с паузой при flood-wait"""
+
+    def __init__(self, rate: float, burst: Optional[float] = None):
+        self.rate = rate
+        self.capacity = burst or rate
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        """Дождаться права на одну отправку"""
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                if now < self._paused_until:
+                    await asyncio.sleep(self._paused_until - now)
+                    continue
+
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+    def pause(self, seconds: float):
+        """Остановить все отправки (RetryAfter от Telegram)"""
+        self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+
+class ChatSpacing:
+    """Минимальный интервал между сообщениями в один чат"""
+
+    def __init__(self, interval: float = 1.0, max_chats: int = 100000):
+        self.interval = interval
+        self.max_chats = max_chats
+        self._next_at: Dict[int, float] = {}
+
+    def delay(self, chat_id: int) -> float:
+        """Сколько ждать до отправки в чат (0 - можно сейчас, слот занят)"""
+        now = time.monotonic()
+        next_at = self._next_at.get(chat_id, 0.0)
+        if next_at > now:
+            return next_at - now
+
+        if len(self._next_at) >= self.max_chats:
+            self._next_at = {k: v for k, v in self._next_at.items() if v > now}
+        self._next_at[chat_id] = now + self.interval
+        return 0.0
+
+    def postpone(self, chat_id: int, seconds: float):
+        """Отложить чат (RetryAfter для конкретного чата)"""
+        self._next_at[chat_id] = max(self._next_at.get(chat_id, 0.0), time.monotonic() + seconds)
+
+
+__all__ = ['RateLimiter', 'ChatSpacing']
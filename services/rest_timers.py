@@ -0,0 +1,234 @@
+# ===== ТАЙМЕРЫ ОТДЫХА =====
+# После записанного подхода ставится таймер на rest_seconds упражнения; по
+# срабатыванию спортсмену приходит "⏰ Отдых окончен". Таймеры живут в
+# TimerWheel (один фоновый тик на все), отправка - воркерами через общий
+# с рассылками RateLimiter. Несработавшие таймеры сохраняются в rest_timers
+# (миграция 0006) пачками и загружаются обратно при старте - только те, чья
+# сессия снова живая (is_live), иначе пришло бы "отдых окончен" по
+# тренировке, которой уже нет.
+
+import asyncio
+import logging
+import time
+from datetime import datetime, timezone
+from typing import Callable, Dict, Hashable, List, Optional, Tuple
+
+import asyncpg
+from aiogram import Bot
+from aiogram.exceptions import TelegramRetryAfter
+
+from database.pool_metrics import Histogram
+from .rate_limiter import RateLimiter
+from .timer_wheel import Timer, TimerWheel
+
+logger = logging.getLogger(__name__)
+
+# Таймеры, просроченные при старте больше чем на столько секунд, не отправляются
+STALE_AFTER = 600.0
+# Сколько при остановке ждать отправки уже сработавших таймеров
+DRAIN_TIMEOUT = 5.0
+
+
+class RestTimerService:
+    """Таймеры отдыха: колесо + сохранение + отправка уведомлений"""
+
+    def __init__(self, bot: Bot, pool: asyncpg.Pool, limiter: Optional[RateLimiter] = None,
+                 workers: int = 4, flush_interval: float = 1.0,
+                 is_live: Optional[Callable[[str], bool]] = None):
+        self.bot = bot
+        self.pool = pool
+        # key -> жива ли еще сессия таймера (проверяется при восстановлении)
+        self.is_live = is_live
+        self.workers_count = workers
+        self.flush_interval = flush_interval
+        # Общий с рассылками лимит: бюджет Telegram на отправку один на бота
+        self.limiter = limiter or RateLimiter(25.0)
+        self.wheel = TimerWheel(self._on_fire)
+        self.lag = Histogram()
+        self._queue: asyncio.Queue = asyncio.Queue()
+        # Изменения для БД: key -> (chat_id, fire_at, text) или None (удалить)
+        self._dirty: Dict[str, Optional[Tuple[int, datetime, str]]] = {}
+        self._tasks: List[asyncio.Task] = []
+        self.sent = 0
+        self.failed = 0
+
+    # ===== ЗАПУСК / ОСТАНОВКА =====
+
+    async def start(self):
+        await self._restore()
+        self.wheel.start()
+        for i in range(self.workers_count):
+            self._tasks.append(asyncio.create_task(self._worker(), name=f"rest-timer-sender-{i}"))
+        self._tasks.append(asyncio.create_task(self._flush_loop(), name="rest-timer-flush"))
+        logger.info(f"⏰ Таймеры отдыха: {len(self.wheel)} восстановлено")
+
+    async def stop(self):
+        await self.wheel.stop()
+        # Сработавшие таймеры еще в очереди: даем воркерам их отправить,
+        # не успевшие сохраняем обратно (при старте сработают сразу)
+        try:
+            await asyncio.wait_for(self._queue.join(), DRAIN_TIMEOUT)
+        except asyncio.TimeoutError:
+            while not self._queue.empty():
+                timer: Timer = self._queue.get_nowait()
+                self._queue.task_done()
+                chat_id, text = timer.payload
+                self._dirty[timer.key] = (chat_id, datetime.fromtimestamp(timer.deadline, timezone.utc), text)
+            logger.warning("⏰ Не все сработавшие таймеры отправлены до остановки")
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks.clear()
+        await self.flush()
+
+    async def _restore(self):
+        async with self.pool.acquire() as conn:
+            rows = await conn.fetch("SELECT timer_key, chat_id, fire_at, text FROM rest_timers")
+
+        now = time.time()
+        for row in rows:
+            deadline = row['fire_at'].timestamp()
+            stale = now - deadline > STALE_AFTER
+            if stale or (self.is_live is not None and not self.is_live(row['timer_key'])):
+                self._dirty[row['timer_key']] = None
+                continue
+            self.wheel.schedule(row['timer_key'], deadline, (row['chat_id'], row['text']))
+
+    # ===== ТАЙМЕРЫ =====
+
+    def schedule(self, key: Hashable, chat_id: int, seconds: float, text: str) -> float:
+        """Поставить (или переставить) таймер; возвращает время срабатывания"""
+        key = str(key)
+        deadline = time.time() + seconds
+        self.wheel.schedule(key, deadline, (chat_id, text))
+        self._dirty[key] = (chat_id, datetime.fromtimestamp(deadline, timezone.utc), text)
+        return deadline
+
+    def cancel(self, key: Hashable) -> bool:
+        key = str(key)
+        if self.wheel.cancel(key) is None:
+            return False
+        self._dirty[key] = None
+        return True
+
+    def remaining(self, key: Hashable) -> Optional[float]:
+        timer = self.wheel.get(str(key))
+        return max(0.0, timer.deadline - time.time()) if timer is not None else None
+
+    def _on_fire(self, timer: Timer):
+        self.lag.observe(max(0.0, time.time() - timer.deadline))
+        self._dirty[timer.key] = None
+        self._queue.put_nowait(timer)
+
+    # ===== ОТПРАВКА =====
+
+    async def _worker(self):
+        while True:
+            timer: Timer = await self._queue.get()
+            chat_id, text = timer.payload
+            try:
+                await self.limiter.acquire()
+                await self.bot.send_message(chat_id, text)
+                self.sent += 1
+            except TelegramRetryAfter as e:
+                self.limiter.pause(e.retry_after)
+                self._queue.put_nowait(timer)
+            except asyncio.CancelledError:
+                # Остановка посреди отправки - таймер сохраняется до следующего старта
+                self._dirty[timer.key] = (chat_id, datetime.fromtimestamp(timer.deadline, timezone.utc), text)
+                raise
+            except Exception as e:
+                self.failed += 1
+                logger.warning(f"⏰ Не удалось отправить таймер {timer.key}: {e}")
+            finally:
+                self._queue.task_done()
+
+    # ===== СОХРАНЕНИЕ =====
+
+    async def flush(self):
+        """Записать поставленные/снятые таймеры одной транзакцией"""
+        if not self._dirty:
+            return
+        dirty, self._dirty = self._dirty, {}
+        upserts = [(key, *value) for key, value in dirty.items() if value is not None]
+        deletes = [key for key, value in dirty.items() if value is None]
+        try:
+            async with self.pool.acquire() as conn:
+                async with conn.transaction():
+                    if upserts:
+                        await conn.executemany("""
+                            INSERT INTO rest_timers (timer_key, chat_id, fire_at, text)
+                            VALUES ($1, $2, $3, $4)
+                            ON CONFLICT (timer_key) DO UPDATE
+                            SET chat_id = EXCLUDED.chat_id, fire_at = EXCLUDED.fire_at, text = EXCLUDED.text
+                        """, upserts)
+                    if deletes:
+                        await conn.execute(
+                            "DELETE FROM rest_timers WHERE timer_key = ANY($1::text[])", deletes
+                        )
+        except Exception as e:
+            logger.error(f"❌ Ошибка сохранения таймеров ({len(dirty)}): {e}")
+            # Более новые изменения важнее вернувшихся
+            self._dirty = {**dirty, **self._dirty}
+
+    async def _flush_loop(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            await self.flush()
+
+    # ===== МЕТРИКИ =====
+
+    def stats(self) -> dict:
+        return {
+            'pending': len(self.wheel),
+            'fired': self.wheel.fired,
+            'cancelled': self.wheel.cancelled,
+            'queued': self._queue.qsize(),
+            'sent': self.sent,
+            'failed': self.failed,
+            'lag_p95': self.lag.quantile(0.95),
+            'lag_max': self.lag.max,
+        }
+
+    def render_prometheus(self) -> str:
+        stats = self.stats()
+        lines = []
+        for name, key, help_text, kind in (
+            ('sportbot_rest_timers_pending', 'pending', 'Таймеров отдыха в колесе', 'gauge'),
+            ('sportbot_rest_timers_fired_total', 'fired', 'Сработало таймеров', 'counter'),
+            ('sportbot_rest_timers_cancelled_total', 'cancelled', 'Снято таймеров', 'counter'),
+            ('sportbot_rest_timers_sent_total', 'sent', 'Отправлено уведомлений', 'counter'),
+            ('sportbot_rest_timers_failed_total', 'failed', 'Не отправлено уведомлений', 'counter'),
+        ):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            lines.append(f"{name} {stats[key]}")
+
+        name = 'sportbot_rest_timer_lag_seconds'
+        lines.append(f"# HELP {name} Опоздание срабатывания относительно срока")
+        lines.append(f"# TYPE {name} histogram")
+        for bound, count in self.lag.cumulative():
+            lines.append(f'{name}_bucket{{le="{bound}"}} {count}')
+        lines.append(f'{name}_bucket{{le="+Inf"}} {self.lag.count}')
+        lines.append(f"{name}_sum {self.lag.sum:.6f}")
+        lines.append(f"{name}_count {self.lag.count}")
+        return '\n'.join(lines) + '\n'
+
+
+# Глобальный сервис таймеров отдыха
+rest_timers: Optional[RestTimerService] = None
+
+
+async def init_rest_timers(bot: Bot, pool: asyncpg.Pool, **kwargs) -> RestTimerService:
+    """Создать сервис, загрузить сохраненные таймеры и запустить колесо"""
+    global rest_timers
+    rest_timers = RestTimerService(bot, pool, **kwargs)
+    await rest_timers.start()
+    return rest_timers
+
+
+def get_rest_timers() -> Optional[RestTimerService]:
+    return rest_timers
+
+
+__all__ = ['RestTimerService', 'init_rest_timers', 'get_rest_timers']
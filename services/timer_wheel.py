@@ -0,0 +1,154 @@
+# ===== ИЕРАРХИЧЕСКОЕ КОЛЕСО ТАЙМЕРОВ =====
+# Десятки тысяч таймеров без задачи asyncio.sleep на каждый: таймер лежит в
+# корзине (dict) своего уровня, вставка и отмена - O(1). Одна фоновая задача
+# раз в resolution секунд сдвигает колесо: корзина нижнего уровня
+# срабатывает, корзины верхних уровней при обороте нижнего раскладываются
+# ниже. При levels=4, slots=64, resolution=1 колесо покрывает ~194 дня,
+# более дальние таймеры ждут на верхнем уровне.
+#
+# Сроки - время эпохи (time.time()), поэтому их можно сохранить и загрузить
+# после рестарта.
+
+import asyncio
+import logging
+import math
+import time
+from typing import Any, Callable, Dict, Hashable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class Timer:
+    __slots__ = ('key', 'deadline', 'payload', 'expires', 'bucket')
+
+    def __init__(self, key: Hashable, deadline: float, payload: Any):
+        self.key = key
+        self.deadline = deadline
+        self.payload = payload
+        self.expires = 0
+        self.bucket: Optional[Dict[Hashable, 'Timer']] = None
+
+
+class TimerWheel:
+    """Колесо таймеров; on_fire(timer) вызывается синхронно из тика"""
+
+    def __init__(self, on_fire: Callable[[Timer], None], resolution: float = 1.0,
+                 slots: int = 64, levels: int = 4):
+        self.on_fire = on_fire
+        self.resolution = resolution
+        self.slots = slots
+        self.levels = levels
+        self._wheel: List[List[Dict[Hashable, Timer]]] = [
+            [{} for _ in range(slots)] for _ in range(levels)
+        ]
+        self._timers: Dict[Hashable, Timer] = {}
+        self._origin = time.time()
+        self._tick = 0
+        self._task: Optional[asyncio.Task] = None
+        self.fired = 0
+        self.cancelled = 0
+
+    def __len__(self) -> int:
+        return len(self._timers)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._timers
+
+    # ===== ВСТАВКА / ОТМЕНА =====
+
+    def schedule(self, key: Hashable, deadline: float, payload: Any = None) -> Timer:
+        """Поставить таймер на время эпохи deadline (тот же key заменяется)"""
+        self.cancel(key)
+        timer = Timer(key, deadline, payload)
+        timer.expires = max(math.ceil((deadline - self._origin) / self.resolution), self._tick + 1)
+        self._timers[key] = timer
+        self._place(timer)
+        return timer
+
+    def cancel(self, key: Hashable) -> Optional[Timer]:
+        timer = self._timers.pop(key, None)
+        if timer is not None:
+            timer.bucket.pop(key, None)
+            timer.bucket = None
+            self.cancelled += 1
+        return timer
+
+    def get(self, key: Hashable) -> Optional[Timer]:
+        return self._timers.get(key)
+
+    def _place(self, timer: Timer):
+        delta = timer.expires - self._tick
+        level, span = 0, self.slots
+        while delta >= span and level < self.levels - 1:
+            level += 1
+            span *= self.slots
+        index = (timer.expires // (self.slots ** level)) % self.slots
+        bucket = self._wheel[level][index]
+        bucket[timer.key] = timer
+        timer.bucket = bucket
+
+    # ===== ХОД КОЛЕСА =====
+
+    def _advance(self):
+        """Один тик: раскладка верхних уровней, затем срабатывание нижнего"""
+        self._tick += 1
+        tick = self._tick
+
+        for level in range(self.levels - 1, 0, -1):
+            period = self.slots ** level
+            if tick % period:
+                continue
+            index = (tick // period) % self.slots
+            bucket = self._wheel[level][index]
+            if bucket:
+                self._wheel[level][index] = {}
+                for timer in bucket.values():
+                    self._place(timer)
+
+        index = tick % self.slots
+        bucket = self._wheel[0][index]
+        if not bucket:
+            return
+        self._wheel[0][index] = {}
+        for key, timer in bucket.items():
+            if timer.expires > tick:
+                # Дальше одного оборота (только с верхнего уровня) - ждет еще
+                self._place(timer)
+                continue
+            del self._timers[key]
+            timer.bucket = None
+            self.fired += 1
+            try:
+                self.on_fire(timer)
+            except Exception as e:
+                logger.exception(f"Ошибка обработчика таймера {key}: {e}")
+
+    async def _run(self):
+        try:
+            while True:
+                next_at = self._origin + (self._tick + 1) * self.resolution
+                delay = next_at - time.time()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                # Догоняем пропущенные тики (долгий GC, перегрузка цикла)
+                target = int((time.time() - self._origin) / self.resolution)
+                while self._tick < target:
+                    self._advance()
+        except asyncio.CancelledError:
+            pass
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run(), name="timer-wheel")
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    def timers(self) -> List[Timer]:
+        return list(self._timers.values())
+
+
+__all__ = ['Timer', 'TimerWheel']
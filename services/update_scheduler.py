@@ -0,0 +1,196 @@
+# ===== ПЛАНИРОВЩИК АПДЕЙТОВ =====
+# Апдейты разных чатов обрабатываются параллельно, апдейты одного чата -
+# строго по порядку поступления (не больше UPDATE_PER_CHAT одновременно).
+# Работает как внешний update-middleware (до него - только отсечка дублей
+# без await, порядок задач сохраняется), поэтому одинаково для long polling
+# (aiogram запускает каждый апдейт отдельной задачей) и webhook.
+#
+# Встроенный FSMContextMiddleware aiogram стоит раньше и кладет raw_state
+# в data до очереди; после получения места в чате состояние перечитывается,
+# иначе апдейт маршрутизировался бы по состоянию до предыдущего обработчика.
+# Поэтому двойное нажатие "✅ Завершить создание" ждет окончания первого
+# обработчика и видит уже сброшенное им состояние.
+
+import asyncio
+import logging
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, Hashable, Optional
+
+from aiogram import BaseMiddleware
+from aiogram.types import TelegramObject, Update
+
+logger = logging.getLogger(__name__)
+
+
+def update_chat_key(update: Update) -> Optional[Hashable]:
+    """Ключ очереди апдейта: id чата (или пользователя); None - без порядка"""
+    try:
+        event = update.event
+    except Exception:
+        return None
+
+    chat = getattr(event, 'chat', None)
+    if chat is None:
+        message = getattr(event, 'message', None)
+        chat = getattr(message, 'chat', None)
+    if chat is not None:
+        return chat.id
+
+    user = getattr(event, 'from_user', None) or getattr(event, 'user', None)
+    return user.id if user is not None else None
+
+
+class _ChatSlot:
+    """FIFO-семафор одного чата: место передается следующему по очереди"""
+
+    __slots__ = ('limit', 'active', 'waiters')
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        self.active = 0
+        self.waiters: Deque[asyncio.Future] = deque()
+
+    @property
+    def idle(self) -> bool:
+        return not self.active and not self.waiters
+
+    async def acquire(self):
+        if self.active < self.limit and not self.waiters:
+            self.active += 1
+            return
+
+        future = asyncio.get_running_loop().create_future()
+        self.waiters.append(future)
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # Место уже передано нам - отдаем следующему
+                self.release()
+            else:
+                self.waiters.remove(future)
+            raise
+
+    def release(self):
+        while self.waiters:
+            future = self.waiters.popleft()
+            if not future.done():
+                future.set_result(None)  # active не меняется: место переходит
+                return
+        self.active -= 1
+
+
+class UpdateScheduler:
+    """Очереди по чатам + общий лимит одновременно обрабатываемых апдейтов"""
+
+    def __init__(self, concurrency: int = 64, per_chat: int = 1):
+        self.per_chat = per_chat
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self.concurrency = concurrency
+        self._slots: Dict[Hashable, _ChatSlot] = {}
+        self.in_flight = 0
+        self.max_depth = 0
+        self.processed = 0
+
+    def configure(self, concurrency: int, per_chat: int):
+        """Изменить лимиты (до начала обработки апдейтов)"""
+        self.concurrency = concurrency
+        self.per_chat = per_chat
+        self._semaphore = asyncio.Semaphore(concurrency)
+
+    async def run(self, key: Optional[Hashable], call: Callable[[], Awaitable[Any]]) -> Any:
+        slot = None
+        if key is not None:
+            slot = self._slots.get(key)
+            if slot is None:
+                slot = self._slots[key] = _ChatSlot(self.per_chat)
+            depth = len(slot.waiters) + 1
+            if depth > self.max_depth:
+                self.max_depth = depth
+            await slot.acquire()
+
+        try:
+            async with self._semaphore:
+                self.in_flight += 1
+                try:
+                    return await call()
+                finally:
+                    self.in_flight -= 1
+                    self.processed += 1
+        finally:
+            if slot is not None:
+                slot.release()
+                if slot.idle and self._slots.get(key) is slot:
+                    del self._slots[key]
+
+    # ===== МЕТРИКИ =====
+
+    def stats(self) -> dict:
+        depths = [len(slot.waiters) for slot in self._slots.values()]
+        return {
+            'chats': len(self._slots),
+            'queued': sum(depths),
+            'deepest': max(depths, default=0),
+            'max_depth': self.max_depth,
+            'in_flight': self.in_flight,
+            'concurrency': self.concurrency,
+            'per_chat': self.per_chat,
+            'processed': self.processed,
+        }
+
+    def render_prometheus(self) -> str:
+        stats = self.stats()
+        lines = []
+        for name, key, help_text, kind in (
+            ('sportbot_updates_in_flight', 'in_flight', 'Апдейтов в обработке', 'gauge'),
+            ('sportbot_updates_queued', 'queued', 'Апдейтов ждут своей очереди в чате', 'gauge'),
+            ('sportbot_updates_active_chats', 'chats', 'Чатов с апдейтами в работе', 'gauge'),
+            ('sportbot_updates_queue_depth_max', 'max_depth', 'Максимальная глубина очереди чата', 'gauge'),
+            ('sportbot_updates_processed_total', 'processed', 'Обработано апдейтов', 'counter'),
+        ):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            lines.append(f"{name} {stats[key]}")
+        return '\n'.join(lines) + '\n'
+
+
+class ChatOrderingMiddleware(BaseMiddleware):
+    """Outer middleware апдейта: обработка через UpdateScheduler"""
+
+    def __init__(self, scheduler: UpdateScheduler):
+        self.scheduler = scheduler
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any],
+    ) -> Any:
+        async def call():
+            state = data.get('state')
+            if state is not None:
+                data['raw_state'] = await state.get_state()
+            return await handler(event, data)
+
+        return await self.scheduler.run(update_chat_key(event), call)
+
+
+# Глобальный экземпляр (лимиты - config.UPDATE_CONCURRENCY / UPDATE_PER_CHAT)
+update_scheduler = UpdateScheduler()
+
+
+def setup_update_scheduler(dp, config=None) -> UpdateScheduler:
+    """Подключить планировщик внешним update-middleware (до профилирования и пользователя)"""
+    if config is not None:
+        update_scheduler.configure(
+            getattr(config, 'UPDATE_CONCURRENCY', update_scheduler.concurrency),
+            getattr(config, 'UPDATE_PER_CHAT', update_scheduler.per_chat),
+        )
+    dp.update.outer_middleware(ChatOrderingMiddleware(update_scheduler))
+    return update_scheduler
+
+
+__all__ = [
+    'UpdateScheduler', 'ChatOrderingMiddleware', 'update_scheduler',
+    'setup_update_scheduler', 'update_chat_key',
+]
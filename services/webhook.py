@@ -0,0 +1,141 @@
+# ===== WEBHOOK РЕЖИМ =====
+# aiohttp сервер принимает апдейты от Telegram, проверяет секретный токен
+# и сразу отвечает 200; обработка идет в фоне параллельно. Общий лимит и
+# порядок внутри чата обеспечивает UpdateScheduler (services/update_scheduler.py).
+# Несколько экземпляров бота можно поставить за балансировщик: состояние
+# FSM в общем хранилище (FSM_STORAGE=postgres), /health для проверок.
+
+import asyncio
+import hmac
+import logging
+from typing import Any, Optional
+
+from aiohttp import web
+from aiogram import Bot, Dispatcher
+from aiogram.types import Update
+
+logger = logging.getLogger(__name__)
+
+SECRET_HEADER = 'X-Telegram-Bot-Api-Secret-Token'
+
+
+class UpdateFeeder:
+    """Фоновая обработка принятых апдейтов (порядок и лимиты - UpdateScheduler)"""
+
+    def __init__(self, dp: Dispatcher, bot: Bot, **kwargs: Any):
+        self.dp = dp
+        self.bot = bot
+        self.kwargs = kwargs
+        self._tasks: set = set()
+        self.pending = 0
+        self.processed = 0
+        self.failed = 0
+
+    def submit(self, update: Update):
+        self.pending += 1
+        task = asyncio.create_task(self._process(update))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _process(self, update: Update):
+        try:
+            await self.dp.feed_update(self.bot, update, **self.kwargs)
+            self.processed += 1
+        except Exception as e:
+            self.failed += 1
+            logger.exception(f"❌ Ошибка обработки апдейта {update.update_id}: {e}")
+        finally:
+            self.pending -= 1
+
+    async def drain(self, timeout: float = 30.0):
+        """Дождаться обработки принятых апдейтов (при остановке)"""
+        if not self._tasks:
+            return
+        done, pending = await asyncio.wait(set(self._tasks), timeout=timeout)
+        if pending:
+            logger.warning(f"⚠️ Не обработано при остановке: {len(pending)} задач")
+            for task in pending:
+                task.cancel()
+
+
+class WebhookServer:
+    """aiohttp приложение: POST вебхука и GET /health"""
+
+    def __init__(self, dp: Dispatcher, bot: Bot, processor: UpdateFeeder,
+                 path: str = '/webhook', secret: str = ''):
+        self.dp = dp
+        self.bot = bot
+        self.processor = processor
+        self.path = path
+        self.secret = secret
+        self._runner: Optional[web.AppRunner] = None
+
+    async def _handle_update(self, request: web.Request) -> web.Response:
+        if self.secret:
+            token = request.headers.get(SECRET_HEADER, '')
+            if not hmac.compare_digest(token, self.secret):
+                return web.Response(status=401)
+
+        try:
+            update = Update.model_validate(await request.json(), context={'bot': self.bot})
+        except Exception as e:
+            logger.warning(f"⚠️ Некорректный апдейт: {e}")
+            return web.Response(status=400)
+
+        self.processor.submit(update)
+        return web.Response()
+
+    async def _handle_health(self, request: web.Request) -> web.Response:
+        return web.json_response({
+            'status': 'ok',
+            'pending': self.processor.pending,
+            'processed': self.processor.processed,
+            'failed': self.processor.failed,
+        })
+
+    async def start(self, host: str, port: int):
+        app = web.Application()
+        app.router.add_post(self.path, self._handle_update)
+        app.router.add_get('/health', self._handle_health)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, host, port).start()
+        logger.info(f"🌐 Webhook сервер: {host}:{port}{self.path}")
+
+    async def stop(self):
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+
+async def run_webhook(dp: Dispatcher, bot: Bot, config):
+    """Запуск в режиме webhook (вместо start_polling); работает до отмены"""
+    if not config.WEBHOOK_SECRET:
+        # Без секрета любой, кто достучится до порта, сможет слать поддельные апдейты
+        raise RuntimeError("WEBHOOK_URL задан без WEBHOOK_SECRET - webhook не запущен")
+
+    path = config.WEBHOOK_PATH
+    workflow_data = {'dispatcher': dp, 'bots': [bot], 'bot': bot, **dp.workflow_data}
+    processor = UpdateFeeder(dp, bot)
+    server = WebhookServer(dp, bot, processor, path, config.WEBHOOK_SECRET)
+
+    await dp.emit_startup(**workflow_data)
+    await server.start(config.WEBHOOK_HOST, config.WEBHOOK_PORT)
+    try:
+        await bot.set_webhook(
+            url=config.WEBHOOK_URL.rstrip('/') + path,
+            secret_token=config.WEBHOOK_SECRET,
+            allowed_updates=dp.resolve_used_update_types(),
+            max_connections=min(config.UPDATE_CONCURRENCY, 100),
+        )
+        logger.info(f"🔗 Webhook установлен: {config.WEBHOOK_URL.rstrip('/')}{path}")
+
+        await asyncio.Event().wait()
+    finally:
+        # Вебхук не удаляем: его продолжают обслуживать другие экземпляры
+        await server.stop()
+        await processor.drain()
+        await dp.emit_shutdown(**workflow_data)
+
+
+__all__ = ['UpdateFeeder', 'WebhookServer', 'run_webhook']
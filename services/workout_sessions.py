@@ -0,0 +1,481 @@
+# ===== ВЫПОЛНЕНИЕ ТРЕНИРОВОК (ЖИВЫЕ СЕССИИ) =====
+# Сессия в процессе живет в памяти: текущее упражнение, номер подхода, RPE.
+# В БД одна вставка workout_sessions на старт, выполненные подходы копятся в
+# буфере и пишутся в exercise_sessions пачкой (одним INSERT ... unnest) раз в
+# flush_interval, при заполнении буфера и при закрытии сессии. При закрытии
+# считаются total_duration_minutes и average_rpe.
+#
+# Сессии брошенные дольше idle_timeout закрываются как 'cancelled', при
+# остановке бота незавершенные сохраняются со статусом 'paused' и при
+# следующем старте восстанавливаются в память вместе с выполненными подходами
+# (если с последней активности прошло меньше idle_timeout).
+# Как и FSM write-behind: апдейты одного пользователя должны попадать на один
+# экземпляр бота.
+
+import asyncio
+import logging
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from decimal import Decimal
+from typing import Dict, List, Optional, Tuple
+
+import asyncpg
+
+from database.workout_cache import workout_cache
+
+logger = logging.getLogger(__name__)
+
+# Строка exercise_sessions в порядке колонок INSERT
+SetRow = Tuple[int, int, int, Optional[int], Optional[Decimal], Optional[Decimal], Optional[int], datetime]
+
+# Ошибки, при которых строку бессмысленно повторять
+_REJECTED_ROW_ERRORS = (asyncpg.IntegrityConstraintViolationError, asyncpg.DataError)
+
+
+@dataclass
+class SessionExercise:
+    workout_exercise_id: int
+    name: str
+    phase: str
+    sets: int
+    reps_min: Optional[int]
+    reps_max: Optional[int]
+    one_rm_percent: Optional[Decimal]
+    rest_seconds: Optional[int]
+    done_sets: int = 0
+
+    @property
+    def reps_text(self) -> str:
+        if self.reps_min == self.reps_max or not self.reps_max:
+            return f"{self.reps_min or '—'}"
+        return f"{self.reps_min}-{self.reps_max}"
+
+    @property
+    def finished(self) -> bool:
+        return self.done_sets >= self.sets
+
+
+@dataclass
+class LiveSession:
+    id: int
+    user_id: int
+    workout_id: int
+    workout_name: str
+    exercises: List[SessionExercise]
+    started_at: float = field(default_factory=time.monotonic)
+    touched: float = field(default_factory=time.monotonic)
+    last_set_at: Optional[float] = None
+    index: int = 0
+    awaiting_rpe: bool = False
+    paused: bool = False
+    sets_logged: int = 0
+    rpe_sum: float = 0.0
+    rpe_count: int = 0
+
+    @property
+    def current(self) -> Optional[SessionExercise]:
+        return self.exercises[self.index] if self.exercises else None
+
+    @property
+    def completed(self) -> bool:
+        return all(ex.finished for ex in self.exercises)
+
+    @property
+    def total_sets(self) -> int:
+        return sum(ex.sets for ex in self.exercises)
+
+    @property
+    def duration_minutes(self) -> int:
+        return max(1, round((time.monotonic() - self.started_at) / 60))
+
+    @property
+    def average_rpe(self) -> Optional[Decimal]:
+        if not self.rpe_count:
+            return None
+        return Decimal(str(round(self.rpe_sum / self.rpe_count, 1)))
+
+    def move(self, step: int) -> bool:
+        """Перейти к соседнему упражнению; False - дальше некуда"""
+        index = self.index + step
+        if not 0 <= index < len(self.exercises):
+            return False
+        self.index = index
+        self.awaiting_rpe = False
+        self.paused = False
+        return True
+
+
+class WorkoutSessionEngine:
+    """Живые сессии тренировок с пакетной записью подходов"""
+
+    def __init__(self, pool: asyncpg.Pool, flush_interval: float = 2.0,
+                 batch_size: int = 200, idle_timeout: float = 4 * 3600):
+        self.pool = pool
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self.idle_timeout = idle_timeout
+        self._sessions: Dict[int, LiveSession] = {}
+        self._buffer: List[SetRow] = []
+        self._flusher: Optional[asyncio.Task] = None
+        self.sets_written = 0
+        self.sets_dropped = 0
+        self.flushes = 0
+
+    # ===== ЗАПУСК / ОСТАНОВКА =====
+
+    async def start(self):
+        try:
+            resumed = await self._resume_paused()
+            if resumed:
+                logger.info(f"🏃 Восстановлено сессий тренировок: {resumed}")
+        except Exception as e:
+            logger.error(f"❌ Ошибка восстановления сессий тренировок: {e}")
+        self._flusher = asyncio.create_task(self._flush_loop(), name="workout-sessions-flush")
+
+    async def stop(self):
+        """Сбросить подходы, незавершенные сессии сохранить как 'paused'"""
+        if self._flusher is not None:
+            self._flusher.cancel()
+            await asyncio.gather(self._flusher, return_exceptions=True)
+            self._flusher = None
+
+        # Из памяти убираем только после успешной записи: при ошибке сессии
+        # остаются в движке и stop() можно вызвать повторно
+        sessions = list(self._sessions.values())
+        await self._close(sessions, 'paused')
+        for session in sessions:
+            self._forget(session)
+        await self.flush()
+
+    # ===== СЕССИИ =====
+
+    async def _resume_paused(self) -> int:
+        """Вернуть в память сессии, сохраненные как 'paused' при остановке
+
+        UPDATE ... WHERE status = 'paused' забирает каждую сессию ровно одному
+        экземпляру бота.
+        """
+        async with self.pool.acquire() as conn:
+            async with conn.transaction():
+                rows = await conn.fetch("""
+                    WITH activity AS (
+                        SELECT ws.id, GREATEST(ws.started_at, MAX(es.completed_at)) AS last_activity
+                        FROM workout_sessions ws
+                        LEFT JOIN exercise_sessions es ON es.workout_session_id = ws.id
+                        WHERE ws.status = 'paused'
+                        GROUP BY ws.id
+                    )
+                    UPDATE workout_sessions ws
+                    SET status = 'in_progress'
+                    FROM activity a
+                    WHERE ws.id = a.id AND ws.status = 'paused'
+                      AND a.last_activity > CURRENT_TIMESTAMP - make_interval(secs => $1)
+                    RETURNING ws.id, ws.user_id, ws.workout_id, ws.started_at, a.last_activity
+                """, float(self.idle_timeout))
+                if not rows:
+                    return 0
+                sets = await conn.fetch("""
+                    SELECT workout_session_id, workout_exercise_id, COUNT(*) AS done_sets,
+                           SUM(rpe) AS rpe_sum, COUNT(rpe) AS rpe_count
+                    FROM exercise_sessions
+                    WHERE workout_session_id = ANY($1::int[])
+                    GROUP BY workout_session_id, workout_exercise_id
+                """, [row['id'] for row in rows])
+
+        done: Dict[int, Dict[int, asyncpg.Record]] = {}
+        for row in sets:
+            done.setdefault(row['workout_session_id'], {})[row['workout_exercise_id']] = row
+
+        now = datetime.now(timezone.utc)
+        clock = time.monotonic()
+        stale: List[LiveSession] = []
+        resumed = 0
+        # Последняя по активности сессия пользователя побеждает
+        for row in sorted(rows, key=lambda r: r['last_activity']):
+            snapshot = await workout_cache.get(row['workout_id'])
+            session = LiveSession(
+                row['id'], row['user_id'], row['workout_id'],
+                snapshot.workout['name'] if snapshot else '',
+                self._session_exercises(snapshot.exercises) if snapshot else [],
+                started_at=clock - (now - row['started_at']).total_seconds(),
+                touched=clock - (now - row['last_activity']).total_seconds(),
+            )
+            if not session.exercises:
+                stale.append(session)  # тренировку удалили
+                continue
+
+            logged = done.get(session.id, {})
+            for exercise in session.exercises:
+                counts = logged.get(exercise.workout_exercise_id)
+                if counts is None:
+                    continue
+                exercise.done_sets = counts['done_sets']
+                session.sets_logged += counts['done_sets']
+                session.rpe_sum += float(counts['rpe_sum'] or 0)
+                session.rpe_count += counts['rpe_count']
+            if session.sets_logged:
+                session.last_set_at = session.touched
+            session.index = next(
+                (i for i, exercise in enumerate(session.exercises) if not exercise.finished),
+                len(session.exercises) - 1
+            )
+
+            previous = self._sessions.get(session.user_id)
+            if previous is not None:
+                stale.append(previous)
+            else:
+                resumed += 1
+            self._sessions[session.user_id] = session
+
+        if stale:
+            await self._close(stale, 'cancelled')
+        return resumed
+
+    def get(self, user_id: int) -> Optional[LiveSession]:
+        session = self._sessions.get(user_id)
+        if session is not None:
+            session.touched = time.monotonic()
+        return session
+
+    def has(self, user_id: int) -> bool:
+        """Есть ли живая сессия (без отметки активности)"""
+        return user_id in self._sessions
+
+    async def begin(self, user_id: int, workout_id: int) -> Optional[LiveSession]:
+        """Начать тренировку (предыдущая незавершенная закрывается)
+
+        None - тренировка не найдена; сессия без упражнений в БД не создается.
+        """
+        previous = self._sessions.get(user_id)
+        if previous is not None:
+            # Убираем из памяти только после успешной записи: при ошибке
+            # незавершенная сессия остается и ее можно закрыть повторно
+            await self._close([previous], 'cancelled')
+            self._forget(previous)
+
+        snapshot = await workout_cache.get(workout_id)
+        if snapshot is None:
+            return None
+        workout, rows = snapshot.workout, snapshot.exercises
+        if not rows:
+            # Выполнять нечего - сессию не создаем
+            return LiveSession(0, user_id, workout_id, workout['name'], [])
+
+        async with self.pool.acquire() as conn:
+            session_id = await conn.fetchval(
+                "INSERT INTO workout_sessions (user_id, workout_id) VALUES ($1, $2) RETURNING id",
+                user_id, workout_id
+            )
+
+        session = LiveSession(session_id, user_id, workout_id, workout['name'],
+                              self._session_exercises(rows))
+        self._sessions[user_id] = session
+        logger.info(f"🏃 Сессия {session_id}: пользователь {user_id}, тренировка {workout_id}")
+        return session
+
+    async def log_set(self, session: LiveSession, rpe: Optional[float] = None,
+                      reps: Optional[int] = None, weight: Optional[float] = None) -> SessionExercise:
+        """Записать подход текущего упражнения (в буфер) и перейти дальше"""
+        exercise = session.current
+        now = time.monotonic()
+        rest = round(now - session.last_set_at) if session.last_set_at is not None else None
+
+        exercise.done_sets += 1
+        session.sets_logged += 1
+        session.last_set_at = now
+        session.touched = now
+        session.awaiting_rpe = False
+        if rpe is not None:
+            session.rpe_sum += rpe
+            session.rpe_count += 1
+
+        self._buffer.append((
+            session.id,
+            exercise.workout_exercise_id,
+            exercise.done_sets,
+            reps if reps is not None else (exercise.reps_max or exercise.reps_min),
+            Decimal(str(weight)) if weight is not None else None,
+            Decimal(str(rpe)) if rpe is not None else None,
+            rest,
+            datetime.now(timezone.utc),
+        ))
+
+        if exercise.finished:
+            session.move(1)
+
+        if len(self._buffer) >= self.batch_size:
+            await self.flush()
+        return exercise
+
+    async def finish(self, user_id: int, status: str = 'completed') -> Optional[LiveSession]:
+        """Закрыть сессию ('completed' / 'cancelled'): подходы + итоги одной транзакцией"""
+        session = self._sessions.get(user_id)
+        if session is None:
+            return None
+        await self._close([session], status)
+        self._forget(session)
+        return session
+
+    @staticmethod
+    def _session_exercises(rows) -> List[SessionExercise]:
+        return [
+            SessionExercise(
+                workout_exercise_id=row['id'],
+                name=row['exercise_name'],
+                phase=row['phase'],
+                sets=row['sets'] or 1,
+                reps_min=row['reps_min'],
+                reps_max=row['reps_max'],
+                one_rm_percent=row['one_rm_percent'],
+                rest_seconds=row['rest_seconds'],
+            )
+            for row in rows
+        ]
+
+    def _forget(self, session: LiveSession):
+        if self._sessions.get(session.user_id) is session:
+            del self._sessions[session.user_id]
+
+    # ===== ЗАПИСЬ =====
+
+    async def _write_sets(self, conn, batch: List[SetRow]):
+        columns = list(zip(*batch))
+        await conn.execute("""
+            INSERT INTO exercise_sessions (
+                workout_session_id, workout_exercise_id, set_number, reps_completed,
+                weight_used, rpe, rest_seconds, completed_at
+            )
+            SELECT * FROM unnest(
+                $1::int[], $2::int[], $3::int[], $4::int[],
+                $5::numeric[], $6::numeric[], $7::int[], $8::timestamptz[]
+            )
+        """, *columns)
+        self.sets_written += len(batch)
+        self.flushes += 1
+
+    async def _write_sets_checked(self, conn, batch: List[SetRow]):
+        """Записать пачку; строки, которые БД не примет никогда, отбросить
+
+        Пачка пишется в точке сохранения. При нарушении ограничений (сессию
+        или упражнение тренировки удалили) или неверных данных строки пишутся
+        по одной, а отвергнутые логируются и отбрасываются - иначе одна
+        плохая строка блокировала бы буфер навсегда. Прочие ошибки (сеть,
+        пул) пробрасываются, и вызывающий возвращает пачку в буфер.
+        """
+        try:
+            async with conn.transaction():
+                await self._write_sets(conn, batch)
+            return
+        except _REJECTED_ROW_ERRORS as e:
+            logger.warning(f"⚠️ Пачка подходов отвергнута ({len(batch)}), пишем по одному: {e}")
+
+        for row in batch:
+            try:
+                async with conn.transaction():
+                    await self._write_sets(conn, [row])
+            except _REJECTED_ROW_ERRORS as e:
+                self.sets_dropped += 1
+                logger.error(f"❌ Подход отброшен {row}: {e}")
+
+    def _take(self, sessions: List[LiveSession]) -> List[SetRow]:
+        """Забрать из буфера подходы указанных сессий (остальные остаются)"""
+        ids = {session.id for session in sessions}
+        taken = [row for row in self._buffer if row[0] in ids]
+        if taken:
+            self._buffer = [row for row in self._buffer if row[0] not in ids]
+        return taken
+
+    async def flush(self):
+        """Записать накопленные подходы одной пачкой"""
+        if not self._buffer:
+            return
+        batch, self._buffer = self._buffer, []
+        try:
+            async with self.pool.acquire() as conn:
+                await self._write_sets_checked(conn, batch)
+        except Exception as e:
+            logger.error(f"❌ Ошибка записи подходов ({len(batch)}): {e}")
+            self._buffer = batch + self._buffer
+
+    async def _close(self, sessions: List[LiveSession], status: str):
+        """Итоги сессий и их накопленные подходы - одной транзакцией
+
+        Подходы других сессий остаются в буфере до обычного flush: их
+        ошибки не мешают закрыть эти сессии.
+        """
+        if not sessions:
+            return
+        batch = self._take(sessions)
+        try:
+            async with self.pool.acquire() as conn:
+                async with conn.transaction():
+                    if batch:
+                        await self._write_sets_checked(conn, batch)
+                    await conn.executemany("""
+                        UPDATE workout_sessions
+                        SET status = $2,
+                            completed_at = CASE WHEN $2 = 'paused' THEN NULL ELSE CURRENT_TIMESTAMP END,
+                            total_duration_minutes = $3,
+                            average_rpe = $4
+                        WHERE id = $1
+                    """, [(s.id, status, s.duration_minutes, s.average_rpe) for s in sessions])
+        except Exception as e:
+            logger.error(f"❌ Ошибка закрытия сессий тренировок: {e}")
+            self._buffer = batch + self._buffer
+            raise
+
+    # ===== ФОН =====
+
+    async def _expire_idle(self):
+        cutoff = time.monotonic() - self.idle_timeout
+        idle = [s for s in self._sessions.values() if s.touched < cutoff]
+        if not idle:
+            return
+        try:
+            await self._close(idle, 'cancelled')
+        except Exception:
+            return  # уже залогировано; сессии и подходы остались до следующего раза
+        for session in idle:
+            self._forget(session)
+        logger.info(f"🧹 Закрыто брошенных сессий тренировок: {len(idle)}")
+
+    async def _flush_loop(self):
+        try:
+            while True:
+                await asyncio.sleep(self.flush_interval)
+                await self.flush()
+                await self._expire_idle()
+        except asyncio.CancelledError:
+            pass
+
+    def stats(self) -> dict:
+        return {
+            'active_sessions': len(self._sessions),
+            'buffered_sets': len(self._buffer),
+            'sets_written': self.sets_written,
+            'sets_dropped': self.sets_dropped,
+            'flushes': self.flushes,
+        }
+
+
+# Глобальный движок сессий
+session_engine: Optional[WorkoutSessionEngine] = None
+
+
+async def init_session_engine(pool: asyncpg.Pool, **kwargs) -> WorkoutSessionEngine:
+    """Создать и запустить движок сессий тренировок"""
+    global session_engine
+    session_engine = WorkoutSessionEngine(pool, **kwargs)
+    await session_engine.start()
+    return session_engine
+
+
+def get_session_engine() -> Optional[WorkoutSessionEngine]:
+    return session_engine
+
+
+__all__ = [
+    'WorkoutSessionEngine', 'LiveSession', 'SessionExercise',
+    'init_session_engine', 'get_session_engine',
+]
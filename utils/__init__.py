@@ -2,6 +2,7 @@
 
 from .validators import *
 from .formatters import *
+from .rendering import *
 
 __all__ = [
     # Validators
@@ -12,5 +13,12 @@ __all__ = [
     # Formatters
     'format_workout_summary',
     'format_exercise_info',
-    'format_1rm_results'
+    'format_1rm_results',
+
+    # Rendering
+    'Template',
+    'Raw',
+    'static',
+    'escape_md',
+    'escape_html',
 ]
\ No newline at end of file
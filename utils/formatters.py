@@ -1,5 +1,21 @@
 # ===== ОБНОВЛЕННЫЕ ФОРМАТТЕРЫ С ПОДДЕРЖКОЙ УНИВЕРСАЛЬНЫХ ТЕСТОВ =====
 
+from .rendering import Raw, Template, join, static
+
+BLOCK_NAMES = {
+    'warmup': '🔥 Разминка',
+    'nervous_prep': '⚡ Подготовка НС',
+    'main': '💪 Основная часть',
+    'cooldown': '🧘 Заминка'
+}
+
+TEST_TYPE_EMOJI = {
+    'strength': '🏋️',
+    'endurance': '⏱️',
+    'speed': '🏃',
+    'quantity': '🔢'
+}
+
 def format_workout_summary(workout_data):
     """Форматирование краткой информации о тренировке"""
     name = workout_data.get('name', 'Тренировка')
@@ -87,14 +103,7 @@ def format_exercise_config(exercise_data):
 
 def format_workout_block_info(block_key, block_data):
     """Форматирование информации о блоке тренировки"""
-    block_names = {
-        'warmup': '🔥 Разминка',
-        'nervous_prep': '⚡ Подготовка НС',
-        'main': '💪 Основная часть',
-        'cooldown': '🧘 Заминка'
-    }
-    
-    name = block_names.get(block_key, 'Блок')
+    name = BLOCK_NAMES.get(block_key, 'Блок')
     exercises = block_data.get('exercises', [])
     description = block_data.get('description', '')
     
@@ -108,38 +117,39 @@ def format_workout_block_info(block_key, block_data):
     
     return text
 
+_EXERCISE_LIST_HEADER = Template("**📋 Упражнения: {count}**\n")
+_NO_EXERCISES = static("📋 **Упражнений пока нет**")
+
 def format_exercise_list(exercises):
     """Форматирование списка упражнений"""
     if not exercises:
-        return "📋 **Упражнений пока нет**"
-    
-    text = f"**📋 Упражнения: {len(exercises)}**\n"
+        return _NO_EXERCISES
     
+    parts = [_EXERCISE_LIST_HEADER.render(count=len(exercises))]
     for i, ex in enumerate(exercises, 1):
-        text += f"{i}. {format_exercise_config(ex)}\n"
+        parts.append(f"{i}. {format_exercise_config(ex)}\n")
     
-    return text
+    return join(parts)
+
+_BLOCK_SUMMARY_LINE = Template("**{name}:** {count} упр.\n")
+_BLOCK_SUMMARY_DESCRIPTION = Template("   _{description}_\n")
+_NO_BLOCKS = static("⭕ **Блоки не выбраны**")
 
 def format_block_summary(selected_blocks):
     """Форматирование краткой информации о блоках"""
     if not selected_blocks:
-        return "⭕ **Блоки не выбраны**"
-    
-    block_names = {
-        'warmup': '🔥 Разминка',
-        'nervous_prep': '⚡ Подготовка НС',
-        'main': '💪 Основная часть',
-        'cooldown': '🧘 Заминка'
-    }
+        return _NO_BLOCKS
     
-    text = ""
+    parts = []
     for phase, block_data in selected_blocks.items():
         if block_data['exercises']:
-            text += f"**{block_names[phase]}:** {len(block_data['exercises'])} упр.\n"
+            parts.append(_BLOCK_SUMMARY_LINE.render(
+                name=BLOCK_NAMES[phase], count=len(block_data['exercises'])
+            ))
             if block_data.get('description'):
-                text += f"   _{block_data['description']}_\n"
+                parts.append(_BLOCK_SUMMARY_DESCRIPTION.render(description=block_data['description']))
     
-    return text
+    return join(parts)
 
 # ===== НОВЫЕ ФОРМАТТЕРЫ ДЛЯ УНИВЕРСАЛЬНЫХ ТЕСТОВ =====
 
@@ -214,33 +224,44 @@ def format_test_results(exercise_name: str, test_type: str, result_value: float,
     
     return text
 
+_TEST_HISTORY_EMPTY = static(
+    "📊 **У вас пока нет результатов тестов**\n\nПройдите первый тест для отслеживания прогресса!"
+)
+_TEST_HISTORY_HEADER = static("📊 **История ваших тестов:**\n\n")
+_TEST_HISTORY_ITEM = Template(
+    "{emoji} **{name}**\n"
+    "📈 Результат: **{value} {unit}**\n"
+    "{details}"
+    "📅 {date}\n\n"
+)
+_TEST_HISTORY_DETAILS = Template("📝 Тест: {weight}кг × {reps} раз\n")
+
 def format_test_history(tests: list) -> str:
     """Форматирование истории тестов пользователя"""
     if not tests:
-        return "📊 **У вас пока нет результатов тестов**\n\nПройдите первый тест для отслеживания прогресса!"
+        return _TEST_HISTORY_EMPTY
     
-    text = f"📊 **История ваших тестов:**\n\n"
+    parts = [_TEST_HISTORY_HEADER]
     
     for test in tests:
-        emoji = {
-            'strength': '🏋️',
-            'endurance': '⏱️',
-            'speed': '🏃', 
-            'quantity': '🔢'
-        }.get(test.get('test_type'), '📊')
-        
         date = test.get('tested_at', '').strftime('%d.%m.%Y') if test.get('tested_at') else 'Неизвестно'
         
-        text += f"{emoji} **{test.get('exercise_name', 'Упражнение')}**\n"
-        text += f"📈 Результат: **{test.get('result_value', 0)} {format_measurement_unit(test.get('result_unit', ''))}**\n"
-        
         # Дополнительные данные
         if test.get('test_type') == 'strength' and test.get('test_weight'):
-            text += f"📝 Тест: {test.get('test_weight')}кг × {test.get('test_reps')} раз\n"
+            details = _TEST_HISTORY_DETAILS.render(weight=test.get('test_weight'), reps=test.get('test_reps'))
+        else:
+            details = Raw('')
         
-        text += f"📅 {date}\n\n"
-    
-    return text
+        parts.append(_TEST_HISTORY_ITEM.render(
+            emoji=TEST_TYPE_EMOJI.get(test.get('test_type'), '📊'),
+            name=test.get('exercise_name', 'Упражнение'),
+            value=test.get('result_value', 0),
+            unit=format_measurement_unit(test.get('result_unit', '')),
+            details=details,
+            date=date,
+        ))
+    
+    return join(parts)
 
 def format_measurement_unit(unit: str) -> str:
     """Форматирование единиц измерения для отображения"""
@@ -315,27 +336,28 @@ def format_test_recommendation(test_result: dict, target_percent: int) -> str:
     
     return f"📊 **Цель:** {target_value:.1f} {display_unit} ({target_percent}% от рекорда)"
 
+_SEARCH_RESULTS_HEADER = Template("🔍 **Найдено: {count} упражнений**\n\n")
+_SEARCH_RESULT_ITEM = Template(
+    "{emoji} **{name}**\n"
+    "📂 {category} • {muscle_group}\n"
+    "📝 {description}\n\n"
+)
+
 def format_exercise_search_results(exercises, search_term):
     """Форматирование результатов поиска упражнений"""
     if not exercises:
         return f"❌ Упражнения по запросу '{search_term}' не найдены\n\nПопробуйте другие ключевые слова."
     
-    text = f"🔍 **Найдено: {len(exercises)} упражнений**\n\n"
+    parts = [_SEARCH_RESULTS_HEADER.render(count=len(exercises))]
     for ex in exercises:
         # Добавляем эмодзи в зависимости от типа теста
-        test_emoji = {
-            'strength': '🏋️',
-            'endurance': '⏱️',
-            'speed': '🏃',
-            'quantity': '🔢',
-            'none': '💪'
-        }.get(ex.get('test_type'), '💪')
-        
-        text += f"{test_emoji} **{ex['name']}**\n"
-        text += f"📂 {ex['category']} • {ex['muscle_group']}\n"
-        text += f"📝 {ex['description'][:100]}{'...' if len(ex['description']) > 100 else ''}\n\n"
+        parts.append(_SEARCH_RESULT_ITEM.render(
+            ex,
+            emoji=TEST_TYPE_EMOJI.get(ex.get('test_type'), '💪'),
+            description=f"{ex['description'][:100]}{'...' if len(ex['description']) > 100 else ''}",
+        ))
     
-    return text
+    return join(parts)
 
 def format_time_duration(seconds):
     """Форматирование времени в читаемый вид"""
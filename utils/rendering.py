@@ -0,0 +1,137 @@
+# ===== ШАБЛОНЫ СООБЩЕНИЙ =====
+# Шаблон разбирается один раз при импорте: статические куски интернируются,
+# подстановки экранируются под parse_mode и собираются одним ''.join вместо
+# цепочки text += (квадратичной на длинных списках упражнений/игроков).
+#
+#     EXERCISE_LINE = Template("• **{name}**\n  📊 {sets} подх. × {reps} повт.\n")
+#     text = EXERCISE_LINE.render_many(exercises)
+#
+# Готовая разметка (результат другого шаблона, static(...)) оборачивается в
+# Raw и повторно не экранируется.
+#
+# Внутри сущности legacy Markdown (_курсив_, *жирный*, `код`) экранирование
+# обратной косой не работает: подстановка внутри сущности экранируется
+# закрытием и повторным открытием ("_snake_\__case_"), остальные символы
+# разметки там и так буквальные.
+
+import html
+import sys
+from string import Formatter
+from typing import Any, Callable, Dict, Iterable, List, Mapping, Optional, Tuple, Union
+
+MARKDOWN = 'markdown'
+HTML = 'html'
+
+# Символы разметки parse_mode="Markdown" (legacy)
+_MD_TABLE = str.maketrans({ch: '\\' + ch for ch in '_*`['})
+
+
+class Raw(str):
+    """Готовая разметка - подставляется без экранирования"""
+
+    __slots__ = ()
+
+
+def escape_md(value: Any) -> str:
+    """Экранирование для parse_mode="Markdown\" (вне сущностей)"""
+    return str(value).translate(_MD_TABLE)
+
+
+def _md_entity_escaper(marker: str) -> Callable[[Any], str]:
+    """Экранирование внутри сущности marker: закрыть, \\marker, открыть снова"""
+    replacement = f"{marker}\\{marker}{marker}"
+    return lambda value: str(value).replace(marker, replacement)
+
+
+def _md_entity_at_end(text: str, entity: Optional[str]) -> Optional[str]:
+    """Какая сущность открыта после литерала text (с учетом открытой до него)"""
+    escaped = False
+    for ch in text:
+        if escaped:
+            escaped = False
+        elif entity is None and ch == '\\':
+            escaped = True
+        elif entity is None and ch in '_*`':
+            entity = ch
+        elif ch == entity:
+            entity = None
+    return entity
+
+
+def escape_html(value: Any) -> str:
+    """Экранирование для parse_mode="HTML\""""
+    return html.escape(str(value), quote=False)
+
+
+_ESCAPERS: Dict[Optional[str], Callable[[Any], str]] = {
+    MARKDOWN: escape_md,
+    HTML: escape_html,
+    None: str,
+}
+
+
+def static(text: str) -> Raw:
+    """Неизменяемый фрагмент (справка, заголовок) - один объект на процесс"""
+    return Raw(sys.intern(text))
+
+
+class Template:
+    """Предкомпилированный шаблон в синтаксисе str.format: {name} и {name:spec}"""
+
+    __slots__ = ('source', 'mode', '_parts', '_escape')
+
+    def __init__(self, source: str, mode: Optional[str] = MARKDOWN):
+        self.source = source
+        self.mode = mode
+        self._escape = _ESCAPERS[mode]
+        self._parts: List[Union[str, Tuple[str, str, Callable[[Any], str]]]] = []
+
+        entity = None
+        for literal, field, spec, conversion in Formatter().parse(source):
+            if literal:
+                self._parts.append(sys.intern(literal))
+                if mode == MARKDOWN:
+                    entity = _md_entity_at_end(literal, entity)
+            if field is None:
+                continue
+            if not field.isidentifier() or conversion:
+                raise ValueError(f"Шаблон поддерживает только {{name}} и {{name:spec}}: {field!r}")
+            escape = _md_entity_escaper(entity) if entity else self._escape
+            self._parts.append((field, spec or '', escape))
+
+    def render(self, values: Optional[Mapping[str, Any]] = None, **kwargs: Any) -> Raw:
+        """Подставить значения (mapping, asyncpg Record и/или kwargs)"""
+        if kwargs:
+            values = {**values, **kwargs} if values is not None else kwargs
+        out = []
+        for part in self._parts:
+            if part.__class__ is str:
+                out.append(part)
+                continue
+            name, spec, escape = part
+            value = values[name]
+            if isinstance(value, Raw):
+                out.append(value)
+            elif spec:
+                out.append(escape(format(value, spec)))
+            else:
+                out.append(escape(value))
+        return Raw(''.join(out))
+
+    def render_many(self, rows: Iterable[Mapping[str, Any]], sep: str = '') -> Raw:
+        """Шаблон для каждой строки (упражнения, игроки) одним join"""
+        return Raw(sep.join([self.render(row) for row in rows]))
+
+    def __repr__(self) -> str:
+        return f"Template({self.source!r})"
+
+
+def join(parts: Iterable[str], sep: str = '') -> Raw:
+    """Склеить уже отрендеренные куски"""
+    return Raw(sep.join(parts))
+
+
+__all__ = [
+    'Template', 'Raw', 'static', 'join',
+    'escape_md', 'escape_html', 'MARKDOWN', 'HTML',
+]
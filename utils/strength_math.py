@@ -0,0 +1,209 @@
+# ===== РАСЧЕТЫ СИЛОВЫХ ПОКАЗАТЕЛЕЙ (1ПМ, RPE, ПРОЦЕНТОВКИ) =====
+# Одна точка для всех формул 1ПМ. Пакетные функции (*_batch) при наличии
+# numpy считают весь массив одним векторным вызовом, без numpy - обычным
+# циклом; скалярные (для обработчиков) - обертки над ними, путь расчета один.
+
+import math
+from typing import Dict, Iterable, List, Sequence, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # numpy опционален (ставится вместе с pandas)
+    np = None
+
+# ===== ФОРМУЛЫ 1ПМ =====
+# Каждая формула: (вес, повторения) -> 1ПМ. Пишем через math/np-совместимые
+# операции, чтобы одна и та же функция работала и со скалярами, и с массивами.
+
+def _exp(x):
+    return np.exp(x) if np is not None and isinstance(x, np.ndarray) else math.exp(x)
+
+
+FORMULAS = {
+    'brzycki': lambda w, r: w / (1.0278 - 0.0278 * r),
+    'epley': lambda w, r: w * (1 + r / 30.0),
+    # O'Conner; в боте исторически называется "альтернативной"
+    'alternative': lambda w, r: w * (1 + 0.025 * r),
+    'lander': lambda w, r: (100 * w) / (101.3 - 2.67123 * r),
+    'lombardi': lambda w, r: w * r ** 0.10,
+    'mayhew': lambda w, r: (100 * w) / (52.2 + 41.9 * _exp(-0.055 * r)),
+    'wathan': lambda w, r: (100 * w) / (48.8 + 53.8 * _exp(-0.075 * r)),
+}
+
+FORMULA_NAMES = {
+    'brzycki': 'Бжицкого',
+    'epley': 'Эпли',
+    'alternative': 'Альтернативная',
+    'lander': 'Лэндера',
+    'lombardi': 'Ломбарди',
+    'mayhew': 'Мэйхью',
+    'wathan': 'Ватана',
+}
+
+# Набор для "среднего 1ПМ", который бот показывает и сохраняет
+DEFAULT_FORMULAS = ('brzycki', 'epley', 'alternative')
+
+MAX_REPS = 30
+
+
+def calculate_1rm_batch(weights: Iterable[float], reps: Iterable[int],
+                        formulas: Sequence[str] = DEFAULT_FORMULAS) -> Dict[str, Sequence[float]]:
+    """Пакетный расчет 1ПМ для пар вес x повторения
+
+    Возвращает {формула: значения, 'average': значения} - numpy массивы,
+    если numpy установлен, иначе списки. Значения не округляются;
+    при 1 повторении 1ПМ равен весу.
+    """
+    if np is None:
+        results = {name: [] for name in formulas}
+        results['average'] = []
+        for w, r in zip(weights, reps):
+            w, r = float(w), int(r)
+            single = [w if r == 1 else FORMULAS[name](w, r) for name in formulas]
+            for name, value in zip(formulas, single):
+                results[name].append(value)
+            results['average'].append(sum(single) / len(single))
+        return results
+
+    w = np.asarray(weights, dtype=np.float64)
+    r = np.asarray(reps, dtype=np.float64)
+    single = r == 1
+
+    results = {name: np.where(single, w, FORMULAS[name](w, r)) for name in formulas}
+    results['average'] = np.mean([results[name] for name in formulas], axis=0)
+    return results
+
+
+def calculate_1rm(weight, reps, formulas: Sequence[str] = DEFAULT_FORMULAS) -> Dict[str, float]:
+    """Расчет 1ПМ по формулам + среднее (округление до 0.1 кг)"""
+    batch = calculate_1rm_batch([weight], [reps], formulas)
+    return {name: round(float(values[0]), 1) for name, values in batch.items()}
+
+
+# ===== RPE =====
+# Таблица RTS (Tuchscherer): %1ПМ при RPE 10 для 1..12 повторений.
+# RPE ниже 10 = повторения в запасе: эффективные повторения = reps + (10 - RPE).
+
+_RPE10_PERCENT = (100.0, 95.5, 92.2, 89.2, 86.3, 83.7, 81.1, 78.6, 76.2, 73.9, 70.7, 68.0)
+
+
+def _effective_reps_percent(effective_reps: float) -> float:
+    """%1ПМ для эффективных повторений (с интерполяцией по половинкам RPE)"""
+    if effective_reps <= 1:
+        return 100.0
+    if effective_reps > len(_RPE10_PERCENT):
+        # За пределами таблицы - обратная формула Эпли
+        return 100.0 / (1 + effective_reps / 30.0)
+    low = int(effective_reps)
+    frac = effective_reps - low
+    percent = _RPE10_PERCENT[low - 1]
+    if frac:
+        percent += (_RPE10_PERCENT[low] - percent) * frac
+    return percent
+
+
+# Предрасчет: эффективные повторения с шагом 0.5 -> %1ПМ
+RPE_PERCENT_TABLE: Dict[float, float] = {
+    steps / 2: round(_effective_reps_percent(steps / 2), 1)
+    for steps in range(2, 2 * MAX_REPS + 1)
+}
+
+
+# Та же таблица массивом: индекс = (эффективные повторения - 1) * 2
+_RPE_PERCENTS = tuple(RPE_PERCENT_TABLE[key] for key in sorted(RPE_PERCENT_TABLE))
+
+
+def _rpe_effective(reps: float, rpe: float) -> float:
+    rpe = min(10.0, max(6.0, round(float(rpe) * 2) / 2))
+    return min(float(MAX_REPS), max(1.0, int(reps) + (10.0 - rpe)))
+
+
+def rpe_percent(reps: int, rpe: float) -> float:
+    """%1ПМ для подхода reps повторений с заданным RPE (6-10)"""
+    return RPE_PERCENT_TABLE[_rpe_effective(reps, rpe)]
+
+
+def rpe_percent_batch(reps, rpes):
+    """%1ПМ для массивов повторений и RPE (та же таблица, что у rpe_percent)"""
+    if np is None:
+        return [rpe_percent(r, rpe) for r, rpe in zip(reps, rpes)]
+    rpe = np.clip(np.round(np.asarray(rpes, dtype=np.float64) * 2) / 2, 6.0, 10.0)
+    reps_whole = np.trunc(np.asarray(reps, dtype=np.float64))
+    effective = np.clip(reps_whole + (10.0 - rpe), 1.0, float(MAX_REPS))
+    return np.asarray(_RPE_PERCENTS)[((effective - 1.0) * 2).astype(np.intp)]
+
+
+def estimate_1rm_rpe_batch(weights, reps, rpes):
+    """Пакетная оценка 1ПМ по весу, повторениям и RPE (без округления)"""
+    percents = rpe_percent_batch(reps, rpes)
+    if np is None:
+        return [float(w) * 100.0 / p for w, p in zip(weights, percents)]
+    return np.asarray(weights, dtype=np.float64) * 100.0 / percents
+
+
+def estimate_1rm_rpe(weight, reps, rpe) -> float:
+    """Оценка 1ПМ по весу, повторениям и RPE"""
+    return round(float(estimate_1rm_rpe_batch([weight], [reps], [rpe])[0]), 1)
+
+
+# ===== ПРОЦЕНТОВКИ =====
+
+# Стандартные зоны нагрузки: (% от 1ПМ, назначение)
+TRAINING_ZONES: Tuple[Tuple[int, str], ...] = (
+    (50, 'разминка'),
+    (70, 'выносливость'),
+    (85, 'сила'),
+    (95, 'максимальная сила'),
+)
+
+# Предрасчет: повторения -> % от 1ПМ (обратная формула Бжицкого)
+REPS_PERCENT_TABLE: Dict[int, float] = {
+    reps: round(100.0 * (1.0278 - 0.0278 * reps), 1) for reps in range(1, MAX_REPS + 1)
+}
+
+
+def round_to_plates(weight: float, step: float = 2.5) -> float:
+    """Округлить вес до шага блинов"""
+    return round(round(weight / step) * step, 2)
+
+
+def percent_load(one_rm: float, percent: float, step: float = 0) -> float:
+    """Вес для заданного % от 1ПМ (step > 0 - округлить до блинов)"""
+    load = float(one_rm) * percent / 100.0
+    return round_to_plates(load, step) if step else round(load, 1)
+
+
+def percentage_table(one_rm: float, percents: Iterable[int] = range(50, 105, 5),
+                     step: float = 2.5) -> List[Tuple[int, float]]:
+    """Таблица процентовок [(процент, вес), ...]"""
+    return [(percent, percent_load(one_rm, percent, step)) for percent in percents]
+
+
+def load_for_reps(one_rm: float, reps: int, step: float = 2.5) -> float:
+    """Рабочий вес на reps повторений до отказа"""
+    reps = min(max(int(reps), 1), MAX_REPS)
+    return percent_load(one_rm, REPS_PERCENT_TABLE[reps], step)
+
+
+def training_loads_batch(one_rms, percents, step: float = 2.5):
+    """Рабочие веса: матрица len(one_rms) x len(percents)
+
+    Один вызов на всю команду: строки - игроки (их 1ПМ),
+    столбцы - проценты из плана тренировки.
+    """
+    if np is None:
+        return [[percent_load(orm, p, step) for p in percents] for orm in one_rms]
+    loads = np.outer(np.asarray(one_rms, dtype=np.float64), np.asarray(percents, dtype=np.float64)) / 100.0
+    if step:
+        loads = np.round(loads / step) * step
+    return loads
+
+
+__all__ = [
+    'FORMULAS', 'FORMULA_NAMES', 'DEFAULT_FORMULAS', 'MAX_REPS',
+    'calculate_1rm', 'calculate_1rm_batch',
+    'RPE_PERCENT_TABLE', 'rpe_percent', 'rpe_percent_batch',
+    'estimate_1rm_rpe', 'estimate_1rm_rpe_batch',
+    'TRAINING_ZONES', 'REPS_PERCENT_TABLE', 'round_to_plates', 'percent_load',
+    'percentage_table', 'load_for_reps', 'training_loads_batch',
+]